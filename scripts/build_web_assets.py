@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+This script compresses the static web assets served by the HTTP server scripts. Simply execute
+this script from the root of the project directory.
+
+   $ python3 scripts/build_web_assets.py
+
+Every file under `software/contrib/www` gets a gzipped copy alongside it, e.g. `index.html.gz`
+next to `index.html`. `HttpServer.send_file` sends the `.gz` copy to browsers that accept gzip,
+so both should be copied to `/lib/contrib/www` on the pico. A copy is only written if it's smaller
+than the original.
+
+Compressed copies are rebuilt when the original is newer. Use `--force` to rebuild all of them.
+
+The UF2 firmware only includes Python modules, so the build freezes the assets into modules
+instead with `--freeze`:
+
+   $ python3 scripts/build_web_assets.py --freeze path/to/modules/contrib
+
+Each directory under `software/contrib/www`, e.g. `http_control`, becomes a module called
+`www_http_control.py` in the given directory. Its `FILES` dict maps each file's name to a tuple of
+its ETag, its contents and its gzipped contents (or None), ready for `HttpServer.send_bytes`.
+Frozen bytes constants stay in flash, so serving them doesn't use RAM.
+"""
+import argparse
+import gzip
+import os
+import zlib
+
+WWW_DIR = os.path.join("software", "contrib", "www")
+
+# files that are already compressed gain nothing from gzip
+SKIP_EXTENSIONS = (".gz", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".woff", ".woff2")
+
+
+def compress(path, force=False):
+    """Write a gzipped copy of a file
+
+    :param path:  The file to compress
+    :param force:  If True the copy is written even if it's newer than the file
+
+    :return: A tuple of the file's size and the compressed size, or None if the file was skipped
+    """
+    gz_path = f"{path}.gz"
+    if (
+        not force
+        and os.path.exists(gz_path)
+        and os.path.getmtime(gz_path) >= os.path.getmtime(path)
+    ):
+        return None
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # mtime=0 keeps the output identical between builds
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) >= len(data):
+        if os.path.exists(gz_path):
+            os.remove(gz_path)
+        return (len(data), len(data))
+
+    with open(gz_path, "wb") as f:
+        f.write(compressed)
+    return (len(data), len(compressed))
+
+
+def build(root=WWW_DIR, force=False):
+    """Compress every asset under a directory
+
+    :param root:  The directory to search
+    :param force:  If True every copy is rebuilt
+
+    :return: A list of (path, original size, compressed size) tuples for the files compressed
+    """
+    results = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(SKIP_EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, name)
+            sizes = compress(path, force)
+            if sizes is not None:
+                results.append((path, sizes[0], sizes[1]))
+    return results
+
+
+def freeze(root=WWW_DIR, out_dir="."):
+    """Write a module holding the assets of each directory under root
+
+    Files in subdirectories are named by their path relative to the asset directory, e.g.
+    `css/style.css`. Compressed copies on disk are ignored; the module holds its own.
+
+    :param root:  The directory to search
+    :param out_dir:  The directory to write the modules to
+
+    :return: A list of (module path, number of files) tuples
+    """
+    results = []
+    for name in sorted(os.listdir(root)):
+        asset_dir = os.path.join(root, name)
+        if not os.path.isdir(asset_dir):
+            continue
+
+        lines = [
+            f"# Generated by scripts/build_web_assets.py from {asset_dir}; do not edit",
+            "# Each file maps to a tuple of its ETag, its contents and its gzipped contents or None",
+            "FILES = {",
+        ]
+        count = 0
+        for dirpath, dirnames, filenames in os.walk(asset_dir):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(".gz"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                with open(path, "rb") as f:
+                    data = f.read()
+                compressed = None
+                if not filename.lower().endswith(SKIP_EXTENSIONS):
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                    if len(compressed) >= len(data):
+                        compressed = None
+                key = os.path.relpath(path, asset_dir).replace(os.sep, "/")
+                etag = f'"{zlib.crc32(data):08x}"'
+                lines.append(f"    {key!r}: ({etag!r}, {data!r}, {compressed!r}),")
+                count += 1
+        lines.append("}")
+
+        module = os.path.join(out_dir, f"www_{name}.py")
+        with open(module, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        results.append((module, count))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gzip the static web assets")
+    parser.add_argument("--force", action="store_true", help="rebuild every compressed copy")
+    parser.add_argument(
+        "--freeze",
+        metavar="DIR",
+        help="write the assets into Python modules in DIR instead, for freezing into the firmware",
+    )
+    parser.add_argument("root", nargs="?", default=WWW_DIR, help=f"default: {WWW_DIR}")
+    args = parser.parse_args()
+
+    if args.freeze:
+        for module, count in freeze(args.root, args.freeze):
+            print(f"{module}: {count} files")
+    else:
+        for path, size, compressed in build(args.root, args.force):
+            print(f"{path}: {size} -> {compressed} bytes")
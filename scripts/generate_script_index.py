@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+This script generates the prebuilt menu index from the scripts listed in contrib/menu.py. Simply
+execute this script from the root of the project directory.
+
+   $ python3 scripts/generate_script_index.py
+
+The index is written to `software/contrib/menu_index.txt`, and should be copied to `/lib/contrib`
+on the pico alongside the contrib scripts. When the index is present the bootloader lists the
+scripts from it instead of importing contrib/menu.py.
+
+The index is only used when the scripts are copied to the pico's filesystem (e.g. with rshell or
+Thonny). The UF2 firmware freezes contrib/menu.py, whose bytecode runs from flash without being
+compiled at boot, so the index isn't included in it.
+"""
+import io
+import os
+import sys
+import importlib
+
+INDEX_FILE = os.path.join("software", "contrib", "menu_index.txt")
+
+
+def mock_time_functions():
+    # a file in the mock package doesn't work for the `time` package, so we will have to monkey
+    # patch the missing functions to make the imports in contrib/menu.py succeed
+
+    import time
+
+    def noop(*args):
+        pass
+
+    time.sleep_ms = noop
+    time.ticks_ms = noop
+    time.ticks_add = noop
+    time.ticks_diff = noop
+
+
+def build_index():
+    """Generate the contents of the index file from contrib/menu.py
+
+    :return: The index as a string
+    """
+    menu = importlib.import_module("contrib.menu")
+    script_index = importlib.import_module("script_index")
+
+    scripts = dict(menu.EUROPI_SCRIPTS)
+    scripts.update(menu.WIFI_SCRIPTS)
+    flags = {name: [script_index.FLAG_WIFI] for name in menu.WIFI_SCRIPTS.keys()}
+
+    out = io.StringIO()
+    script_index.write_script_index(out, dict(sorted(scripts.items())), flags)
+    return out.getvalue()
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath("software/firmware"))
+    sys.path.insert(0, os.path.abspath("software"))
+    sys.path.insert(0, os.path.abspath("software/tests/mocks"))
+
+    mock_time_functions()
+
+    index = build_index()
+    with open(INDEX_FILE, "w") as file:
+        file.write(index)
+
+    print(f"Wrote {len(index.splitlines())} scripts to {INDEX_FILE}")
@@ -8,4 +8,9 @@ dir "%filepathcontrib%"
 cd/
 rshell cp %filepathrshell% /pyboard/lib/contrib
 
+set "filepathindex=%deployfilepath%..\..\software\contrib\menu_index.txt"
+set "filepathindexrshell=%filepathindex:\=/%"
+set "filepathindexrshell=%filepathindexrshell:C:/=/%"
+rshell cp %filepathindexrshell% /pyboard/lib/contrib
+
 cd %~dp0
\ No newline at end of file
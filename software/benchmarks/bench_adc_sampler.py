@@ -0,0 +1,63 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the per-call latency of reading the analogue inputs directly vs. via the AdcSampler
+
+Usage::
+
+    python3 benchmarks/bench_adc_sampler.py
+"""
+
+import bench_utils
+from bench_utils import measure, report
+
+from europi_hardware import ain, k1
+from experimental.adc_sampler import AdcSampler, SampledAnalogueInput, SampledKnob
+
+
+def main():
+    sampler = AdcSampler()
+    s_ain = SampledAnalogueInput(ain, sampler)
+    s_k1 = SampledKnob(k1, sampler)
+
+    # fill the buffers; on the module the timer does this in the background
+    for _ in range(sampler.buffer_size * 2):
+        sampler.tick()
+
+    report(
+        "AnalogueInput.read_voltage()",
+        [
+            ("ain (32 samples)", measure(ain.read_voltage)),
+            ("ain (1 sample)", measure(lambda: ain.read_voltage(1))),
+            ("SampledAnalogueInput", measure(s_ain.read_voltage)),
+        ],
+    )
+    report(
+        "Knob.percent()",
+        [
+            ("k1 (32 samples)", measure(k1.percent)),
+            ("k1 (1 sample)", measure(lambda: k1.percent(1))),
+            ("SampledKnob", measure(s_k1.percent)),
+        ],
+    )
+    report(
+        "AdcSampler.tick() (timer callback cost)",
+        [
+            ("tick", measure(sampler.tick)),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the cost of one Game of Life generation on the 128x32 field using the original
+per-cell summed-area-table implementation and the bit-parallel ``LifeField`` engine
+
+Usage::
+
+    python3 benchmarks/bench_conway.py
+"""
+
+import random
+
+import bench_utils
+from bench_utils import measure, report
+
+from contrib.conway import LifeField, bitwise_entropy, count_entropy
+from europi import OLED_HEIGHT, OLED_WIDTH
+from experimental.bitarray import get_bit, set_bit
+
+NUM_PIXELS = OLED_WIDTH * OLED_HEIGHT
+
+
+class SummedAreaLife:
+    """The original implementation of Conway.tick()"""
+
+    def __init__(self, field):
+        self.field = bytearray(field)
+        self.next_field = bytearray(len(field))
+        self.field_sum = [[0] * OLED_WIDTH for _ in range(OLED_HEIGHT)]
+
+    def update_field_sums(self):
+        for i in range(OLED_HEIGHT):
+            for j in range(OLED_WIDTH):
+                a = 0 if i == 0 or j == 0 else self.field_sum[i - 1][j - 1]
+                b = 0 if i == 0 else self.field_sum[i - 1][j]
+                c = 0 if j == 0 else self.field_sum[i][j - 1]
+                self.field_sum[i][j] = get_bit(self.field, i * OLED_WIDTH + j) + b + c - a
+
+    def sum_cells(self, start_row, start_col, end_row, end_col):
+        a = 0 if start_row == 0 or start_col == 0 else self.field_sum[start_row - 1][start_col - 1]
+        c = 0 if start_row == 0 else self.field_sum[start_row - 1][end_col]
+        g = 0 if start_col == 0 else self.field_sum[end_row][start_col - 1]
+        return self.field_sum[end_row][end_col] - c - g + a
+
+    def step(self):
+        born = 0
+        died = 0
+        self.update_field_sums()
+        for i in range(OLED_HEIGHT):
+            top = max(0, i - 1)
+            bottom = min(OLED_HEIGHT - 1, i + 1)
+            for j in range(OLED_WIDTH):
+                left = max(0, j - 1)
+                right = min(OLED_WIDTH - 1, j + 1)
+                bit_index = i * OLED_WIDTH + j
+                cell_present = get_bit(self.field, bit_index)
+                num_neighbours = self.sum_cells(top, left, bottom, right)
+                if cell_present:
+                    num_neighbours = max(0, num_neighbours - 1)
+                    if num_neighbours == 2 or num_neighbours == 3:
+                        set_bit(self.next_field, bit_index, True)
+                    else:
+                        set_bit(self.next_field, bit_index, False)
+                        died += 1
+                elif num_neighbours == 3:
+                    set_bit(self.next_field, bit_index, True)
+                    born += 1
+                else:
+                    set_bit(self.next_field, bit_index, False)
+        (self.field, self.next_field) = (self.next_field, self.field)
+        return (born, died)
+
+
+class BitParallelLife:
+    """Conway.tick() using LifeField, including copying the result into the frame buffer"""
+
+    def __init__(self, field):
+        self.life = LifeField(OLED_WIDTH, OLED_HEIGHT)
+        self.life.load(field)
+        self.next_field = bytearray(len(field))
+
+    def step(self):
+        result = self.life.step()
+        self.life.store(self.next_field)
+        return result
+
+
+def make_field():
+    rng = random.Random(42)
+    field = bytearray(NUM_PIXELS // 8)
+    for i in range(NUM_PIXELS):
+        if rng.random() < 0.35:
+            set_bit(field, i, True)
+    return field
+
+
+def main():
+    field = make_field()
+    sat = SummedAreaLife(field)
+    bit = BitParallelLife(field)
+    results = [
+        ("summed-area table", measure(sat.step, 50)),
+        ("bit-parallel rows", measure(bit.step, 50)),
+    ]
+    report(f"One {OLED_WIDTH}x{OLED_HEIGHT} generation", results)
+    for label, us in results:
+        print(f"{label: <40} {1_000_000 / us: >10.1f} generations/s")
+    print()
+
+    report(
+        "Entropy of the field",
+        [
+            ("bitwise_entropy", measure(lambda: bitwise_entropy(field), 1000)),
+            ("count_entropy", measure(lambda: count_entropy(1434, NUM_PIXELS), 1000)),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare rendering a screen of freesans14 text with and without the glyph cache
+
+Usage::
+
+    python3 benchmarks/bench_custom_font.py
+"""
+
+import bench_utils
+from bench_utils import measure, report
+
+import framebuf
+
+from experimental.custom_font import CustomFontWriter, oled
+from experimental.fonts import freesans14
+
+LINES = ["The quick brown", "fox jumps over"]
+
+
+def uncached_print(writer, string, x, y, c=1):
+    """The original CustomFontWriter.print, which builds a new FrameBuffer for every character"""
+    for char in string:
+        glyph, char_height, char_width = writer.font.get_ch(char)
+        buf = bytearray(glyph)
+        if c != 1:
+            for i, v in enumerate(buf):
+                buf[i] = 0xFF & ~v
+        fbc = framebuf.FrameBuffer(buf, char_width, char_height, writer.map)
+        writer.device.blit(fbc, x, y)
+        x += char_width
+
+
+def main():
+    writer = CustomFontWriter(oled, freesans14)
+
+    def render(print_func, c):
+        for i, line in enumerate(LINES):
+            print_func(line, 0, i * freesans14.height(), c)
+
+    report(
+        "Full screen of freesans14 text",
+        [
+            ("uncached", measure(lambda: render(lambda *a: uncached_print(writer, *a), 1), 2000)),
+            ("cached", measure(lambda: render(writer.print, 1), 2000)),
+        ],
+    )
+    report(
+        "Full screen of inverted freesans14 text",
+        [
+            ("uncached", measure(lambda: render(lambda *a: uncached_print(writer, *a), 0), 2000)),
+            ("cached", measure(lambda: render(writer.print, 0), 2000)),
+        ],
+    )
+    report(
+        "string_len()",
+        [
+            ("uncached", measure(lambda: sum(freesans14.get_ch(c)[2] for c in LINES[0]))),
+            ("cached", measure(lambda: writer.string_len(LINES[0]))),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
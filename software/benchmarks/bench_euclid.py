@@ -0,0 +1,101 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the cost of generating Euclidean patterns with the original recursive builder, the
+iterative builder and the pattern cache, and of testing a step in each pattern format
+
+Usage::
+
+    python3 benchmarks/bench_euclid.py
+"""
+
+import bench_utils
+from bench_utils import measure, report
+
+from experimental import euclid
+from experimental.euclid import (
+    generate_euclidean_bits,
+    generate_euclidean_int,
+    generate_euclidean_pattern,
+)
+
+
+def recursive_pattern(steps, pulses, rot=0):
+    """The original recursive implementation"""
+    pattern = []
+    counts = []
+    remainders = []
+    divisor = steps - pulses
+    remainders.append(pulses)
+    level = 0
+    while True:
+        counts.append(divisor // remainders[level])
+        remainders.append(divisor % remainders[level])
+        divisor = remainders[level]
+        level = level + 1
+        if remainders[level] <= 1:
+            break
+    counts.append(divisor)
+
+    def build(level):
+        if level == -1:
+            pattern.append(0)
+        elif level == -2:
+            pattern.append(1)
+        else:
+            for i in range(0, counts[level]):
+                build(level - 1)
+            if remainders[level] != 0:
+                build(level - 2)
+
+    build(level)
+    i = pattern.index(1)
+    pattern = pattern[i:] + pattern[0:i]
+    for i in range(rot):
+        x = pattern.pop(-1)
+        pattern.insert(0, x)
+    return pattern
+
+
+def uncached_pattern(steps, pulses, rot=0):
+    euclid._pattern_cache.clear()
+    return generate_euclidean_pattern(steps, pulses, rot)
+
+
+def main():
+    for steps, pulses, rot in [(16, 5, 3), (64, 23, 10)]:
+        report(
+            f"Generating E({pulses}, {steps}) rotated by {rot}",
+            [
+                ("recursive", measure(lambda: recursive_pattern(steps, pulses, rot), 2000)),
+                ("iterative", measure(lambda: uncached_pattern(steps, pulses, rot), 2000)),
+                ("cached", measure(lambda: generate_euclidean_pattern(steps, pulses, rot), 2000)),
+            ],
+        )
+
+    pattern = generate_euclidean_pattern(32, 13)
+    packed = generate_euclidean_int(32, 13)
+    bits = generate_euclidean_bits(32, 13)
+    report(
+        "Testing step 19 of E(13, 32)",
+        [
+            ("list", measure(lambda: pattern[19] == 1)),
+            ("int", measure(lambda: (packed >> 19) & 1)),
+            ("bits", measure(lambda: bits[19 >> 3] & (0x80 >> (19 & 7)))),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
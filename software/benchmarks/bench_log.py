@@ -0,0 +1,89 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the throughput of ``europi_log`` when every message opens, appends to and closes the
+log file (the original implementation) with the buffered logger, and with messages that are
+filtered out by the log level
+
+Console output is disabled for all cases so that only the cost of writing the file is measured.
+
+Usage::
+
+    python3 benchmarks/bench_log.py
+"""
+
+import os
+import tempfile
+
+import bench_utils
+from bench_utils import measure, report
+
+import europi_log
+from europi_log import LOG_DEBUG, LOG_INFO, configure_log, flush_log, log_debug
+
+ITERATIONS = 5000
+
+
+def unbuffered_log_debug(message, tag=None):
+    """The original log_debug/write_log_entry"""
+    if tag:
+        log_entry = f"[DBUG] [{tag}] {message}"
+    else:
+        log_entry = f"[DBUG] {message}"
+    try:
+        with open(europi_log.LOG_FILE, "a") as log_out:
+            log_out.write(f"{log_entry}\n")
+    except Exception:
+        pass
+
+
+class Counter:
+    def __init__(self):
+        self.n = 0
+
+    def message(self):
+        self.n += 1
+        return f"step {self.n} value {self.n * 3}"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        europi_log.LOG_FILE = os.path.join(tmp, "europi_log.txt")
+        europi_log.OLD_LOG_FILE = os.path.join(tmp, "europi_log.1.txt")
+        configure_log(level=LOG_DEBUG, console=False, max_size=1 << 30)
+        counter = Counter()
+
+        unbuffered = measure(lambda: unbuffered_log_debug(counter.message(), "bench"), ITERATIONS)
+        europi_log.init_log()
+
+        buffered = measure(lambda: log_debug(counter.message(), "bench"), ITERATIONS)
+        flush_log()
+        europi_log.init_log()
+
+        configure_log(level=LOG_INFO)
+        filtered = measure(lambda: log_debug(counter.message(), "bench"), ITERATIONS)
+
+    results = [
+        ("open/append/close per message", unbuffered),
+        ("buffered, batched flushes", buffered),
+        ("filtered out by level", filtered),
+    ]
+    report(f"Logging {ITERATIONS} debug messages", results)
+    for label, us in results:
+        print(f"{label: <40} {1_000_000 / us: >10.0f} messages/s")
+    print()
+
+
+if __name__ == "__main__":
+    main()
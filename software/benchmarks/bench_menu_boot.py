@@ -0,0 +1,102 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare building the bootloader menu's script list from contrib/menu.py vs. the prebuilt index
+
+This can be run on the host::
+
+    python3 benchmarks/bench_menu_boot.py
+
+or copied to the Pico and run from the REPL, in which case memory use is reported with the
+bootloader's ``PrintMemoryUse`` helper (i.e. ``gc.mem_free()``). Because modules are only
+imported once, run it twice on the Pico: once as-is, and once with ``USE_INDEX = False``.
+"""
+
+import gc
+import sys
+
+USE_INDEX = True
+
+if sys.implementation.name == "micropython":
+    import utime
+
+    import bootloader
+    from bootloader import PrintMemoryUse
+
+    bootloader.DEBUG = True
+
+    def load_scripts():
+        if USE_INDEX:
+            from script_index import load_menu_index
+
+            return load_menu_index()
+        else:
+            from contrib.menu import EUROPI_SCRIPTS
+
+            return EUROPI_SCRIPTS
+
+    def main():
+        start = utime.ticks_us()
+        with PrintMemoryUse("index" if USE_INDEX else "contrib.menu"):
+            scripts = load_scripts()
+            names = sorted(scripts.keys())
+        print(f"{len(names)} scripts in {utime.ticks_diff(utime.ticks_us(), start) / 1000:.1f}ms")
+
+else:
+    import bench_utils
+
+    import subprocess
+    import time
+    import tracemalloc
+
+    INDEX_FILE = str(bench_utils.SOFTWARE_DIR / "contrib" / "menu_index.txt")
+
+    # Each measurement runs in a fresh interpreter so nothing is already imported
+    CODE = """
+import sys, time, tracemalloc
+sys.path += {paths!r}
+import utime
+sys.modules["time"] = utime
+import europi, bootloader
+tracemalloc.start()
+start = time.perf_counter()
+{load}
+names = sorted(scripts.keys())
+elapsed = time.perf_counter() - start
+print(len(names), elapsed * 1000, tracemalloc.get_traced_memory()[0] / 1024)
+"""
+
+    LOADERS = {
+        "contrib.menu": "from contrib.menu import EUROPI_SCRIPTS as scripts",
+        "menu_index.txt": f"from script_index import ScriptIndex; scripts = ScriptIndex({INDEX_FILE!r})",
+    }
+
+    def main():
+        paths = [p for p in sys.path if p.startswith(str(bench_utils.SOFTWARE_DIR))]
+        print("Building the menu's script list")
+        print("-------------------------------")
+        for label, load in LOADERS.items():
+            output = subprocess.run(
+                [sys.executable, "-c", CODE.format(paths=paths, load=load)],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.splitlines()[-1]
+            n, ms, kb = output.split()
+            print(f"{label: <20} {int(n): >3} scripts  {float(ms): >7.2f}ms  {float(kb): >7.2f}k")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the throughput of the original list-based OSC codec with the ``struct``/``memoryview``
+codec, sending packets to ourselves over a local UDP socket
+
+Each packet is encoded, sent, received and decoded. The last case sets all six CVs with one
+bundle instead of six separate messages.
+
+CPython allocates short-lived objects very cheaply, so the host timings understate the
+difference on MicroPython, where every temporary list and string eventually costs a garbage
+collection. The peak memory used while encoding and decoding one packet is reported too.
+
+Usage::
+
+    python3 benchmarks/bench_osc.py
+"""
+
+import socket
+import struct
+import tracemalloc
+
+import bench_utils
+from bench_utils import report
+
+import time
+
+from experimental.osc import OpenSoundPacket, OpenSoundWriter, for_each_message
+
+BATCH = 32
+BATCHES = 200
+CV_VALUES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+ADDRESSES = [f"/europi/cv{i + 1}" for i in range(6)]
+
+
+def legacy_encode(address, *args):
+    """The original OpenSoundServer.send_data, without the socket"""
+
+    def pad_length(arr):
+        for i in range((4 - (len(arr) % 4)) % 4):
+            arr.append(0)
+
+    data = []
+    for ch in address:
+        data.append(ord(ch))
+    data.append(0)
+    pad_length(data)
+    data.append(ord(","))
+    for arg in args:
+        if type(arg) is int:
+            data.append(ord("i"))
+        elif type(arg) is float:
+            data.append(ord("f"))
+        elif type(arg) is str:
+            data.append(ord("s"))
+    data.append(0)
+    pad_length(data)
+    for arg in args:
+        if type(arg) is int:
+            data.append((arg >> 24) & 0xFF)
+            data.append((arg >> 16) & 0xFF)
+            data.append((arg >> 8) & 0xFF)
+            data.append(arg & 0xFF)
+        elif type(arg) is float:
+            for b in struct.pack(">f", arg):
+                data.append(b)
+        elif type(arg) is str:
+            for ch in arg:
+                data.append(ord(ch))
+            data.append(0)
+            pad_length(data)
+    return bytearray(data)
+
+
+def legacy_decode(data):
+    """The original OpenSoundPacket.__init__, for the types used here"""
+    address_end = data.index(b"\0", 1)
+    address = data[0:address_end].decode("utf-8")
+    values = []
+    type_start = data.index(b",", address_end)
+    data_start = data.index(b"\0", type_start)
+    d = data_start + (4 - (data_start % 4)) % 4
+    i = type_start + 1
+    while data[i] != 0x00:
+        t = chr(data[i])
+        if t == "i":
+            values.append((data[d] << 24) | (data[d + 1] << 16) | (data[d + 2] << 8) | data[d + 1])
+            d += 4
+        elif t == "f":
+            values.append(struct.unpack(">f", data[d : d + 4])[0])
+            d += 4
+        elif t == "s":
+            s = ""
+            string_end = data.index(b"\0", d)
+            for c in range(d, string_end):
+                s += chr(data[c])
+            values.append(s)
+            d = string_end + (4 - (string_end % 4)) % 4
+        i += 1
+    return (address, values)
+
+
+class Loopback:
+    """A UDP socket that sends packets to itself"""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.addr = self.sock.getsockname()
+
+    def send(self, data):
+        self.sock.sendto(data, self.addr)
+
+    def recv(self):
+        return self.sock.recvfrom(2048)[0]
+
+
+def run(send_batch, receive_batch, repeat=5):
+    """
+    Send & receive BATCHES batches of BATCH packets
+
+    The socket makes the timings noisy, so the fastest of several runs is used.
+
+    :return: The mean time per packet in microseconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(BATCHES):
+            send_batch()
+            receive_batch()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1_000_000 / (BATCHES * BATCH)
+
+
+def peak_allocation(func):
+    """
+    Measure the most memory temporarily allocated by a call
+
+    :return: The peak allocation in bytes, above what was allocated before the call
+    """
+    func()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - before
+
+
+def main():
+    loopback = Loopback()
+    received = []
+
+    def legacy_send():
+        for i in range(BATCH):
+            loopback.send(legacy_encode("/europi/cv1", CV_VALUES[i % 6], i, "gate"))
+
+    def legacy_receive():
+        for _ in range(BATCH):
+            received.append(legacy_decode(loopback.recv()))
+
+    writer = OpenSoundWriter()
+    packet = OpenSoundPacket()
+
+    def on_message(p):
+        received.append(p.values[0])
+
+    def send():
+        for i in range(BATCH):
+            writer.reset()
+            writer.add_message("/europi/cv1", CV_VALUES[i % 6], i, "gate")
+            loopback.send(writer.getvalue())
+
+    def receive():
+        for _ in range(BATCH):
+            for_each_message(loopback.recv(), packet, on_message)
+
+    def legacy_send_six():
+        for _ in range(BATCH):
+            for i in range(6):
+                loopback.send(legacy_encode(ADDRESSES[i], CV_VALUES[i]))
+
+    def legacy_receive_six():
+        for _ in range(BATCH * 6):
+            received.append(legacy_decode(loopback.recv()))
+
+    def send_bundle():
+        for _ in range(BATCH):
+            writer.reset()
+            writer.begin_bundle()
+            for i in range(6):
+                writer.add_message(ADDRESSES[i], CV_VALUES[i])
+            writer.end_bundle()
+            loopback.send(writer.getvalue())
+
+    results = [
+        ("original codec", run(legacy_send, legacy_receive)),
+        ("struct/memoryview codec", run(send, receive)),
+    ]
+    report("One message per packet: encode, send, receive, decode", results)
+    for label, us in results:
+        print(f"{label: <40} {1_000_000 / us: >10.0f} packets/s")
+    print()
+
+    data = bytes(legacy_encode("/europi/cv1", 0.5, 3))
+
+    def codec():
+        writer.reset()
+        writer.add_message("/europi/cv1", 0.5, 3)
+        packet.decode(data)
+
+    print("Peak memory allocated to encode & decode one (float, int) packet")
+    print("----------------------------------------------------------------")
+    legacy = peak_allocation(lambda: legacy_decode(legacy_encode("/europi/cv1", 0.5, 3)))
+    print(f"{'original codec': <40} {legacy: >10} bytes")
+    print(f"{'struct/memoryview codec': <40} {peak_allocation(codec): >10} bytes")
+    print()
+
+    results = [
+        ("original codec, 6 messages", run(legacy_send_six, legacy_receive_six)),
+        ("struct/memoryview codec, 1 bundle", run(send_bundle, receive)),
+    ]
+    report("Setting all 6 CVs", results)
+    for label, us in results:
+        print(f"{label: <40} {1_000_000 / us: >10.0f} updates/s")
+    print()
+
+
+if __name__ == "__main__":
+    main()
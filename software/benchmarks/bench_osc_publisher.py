@@ -0,0 +1,196 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the traffic and CPU time of publishing osc_control's inputs & outputs at 20Hz
+
+- one ``send_data()`` call per value per tick, as osc_control's status timer used to
+- an ``OpenSoundPublisher`` sending only the values that changed, in one bundle per tick
+
+Sixty seconds of a typical patch are simulated: the knobs sit still apart from a little ADC
+noise except for a few seconds when one is turned, ``ain`` follows a slow LFO, the buttons are
+pressed now & then, ``din`` is a 2Hz gate and the CVs step through a sequence. The datagrams go
+to a local UDP listener. The CPU share is the time spent publishing as a percentage of the
+simulated time; the Pico is much slower than a PC, so compare the rows rather than reading it as
+the Pico's load.
+
+Usage::
+
+    python3 benchmarks/bench_osc_publisher.py
+"""
+
+import math
+import random
+import socket
+import time
+
+import bench_utils
+
+from experimental.osc import OpenSoundPublisher, OpenSoundServer
+
+RATE = 20
+SECONDS = 60
+THRESHOLD = 0.005
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0
+
+    def ticks_ms(self):
+        return self.now
+
+    def ticks_add(self, a, b):
+        return a + b
+
+    def ticks_diff(self, a, b):
+        return a - b
+
+
+class Patch:
+    """The simulated state of the module's inputs & outputs at the current time"""
+
+    def __init__(self):
+        self.random = random.Random(1)
+        self.t = 0.0
+
+    def noise(self):
+        return self.random.uniform(-0.002, 0.002)
+
+    def k1(self):
+        # turned from 0.2 to 0.8 between 10s & 13s
+        position = 0.2 + 0.6 * min(max((self.t - 10) / 3, 0), 1)
+        return position + self.noise()
+
+    def k2(self):
+        return 0.5 + self.noise()
+
+    def ain(self):
+        return 0.5 + 0.5 * math.sin(2 * math.pi * 0.1 * self.t)
+
+    def b1(self):
+        return self.t % 15 < 0.3
+
+    def b2(self):
+        return self.t % 23 < 0.3
+
+    def din(self):
+        return self.t % 0.5 < 0.25
+
+    def cv(self, i):
+        step = int(self.t * 2) + i
+        return (step * 7 % 11) / 10
+
+
+def addresses_and_readers(patch):
+    sources = [
+        ("/europi/k1", patch.k1),
+        ("/europi/k2", patch.k2),
+        ("/europi/ain", patch.ain),
+        ("/europi/b1", patch.b1),
+        ("/europi/b2", patch.b2),
+        ("/europi/din", patch.din),
+    ]
+    for i in range(6):
+        sources.append((f"/europi/cv{i + 1}", lambda i=i: patch.cv(i)))
+    return sources
+
+
+def simulate(listener, setup):
+    """
+    Run the main loop for SECONDS of simulated time, 1ms per iteration
+
+    :return: A tuple of the datagrams & bytes received, and the seconds spent publishing
+    """
+    server = OpenSoundServer(
+        recv_port=0, send_port=listener.getsockname()[1], send_addr="127.0.0.1"
+    )
+    clock = SimulatedClock()
+    patch = Patch()
+    poll = setup(server, clock, addresses_and_readers(patch))
+
+    datagrams = 0
+    received = 0
+    busy = 0.0
+    for ms in range(SECONDS * 1000):
+        clock.now = ms
+        patch.t = ms / 1000
+        start = time.perf_counter()
+        poll()
+        busy += time.perf_counter() - start
+
+        try:
+            while True:
+                received += len(listener.recv(2048))
+                datagrams += 1
+        except BlockingIOError:
+            pass
+
+    server.close()
+    return (datagrams, received, busy)
+
+
+def per_value(server, clock, sources):
+    period = 1000 // RATE
+    next_tick = [0]
+
+    def poll():
+        # stands in for the Timer, which fired every period regardless of the main loop
+        if clock.ticks_diff(clock.now, next_tick[0]) < 0:
+            return
+        next_tick[0] += period
+        for address, read in sources:
+            server.send_data(address, read())
+
+    return poll
+
+
+def publisher(server, clock, sources):
+    publisher = OpenSoundPublisher(server, rate=RATE, threshold=THRESHOLD, clock=clock)
+    for address, read in sources:
+        publisher.add(address, read)
+    return publisher.poll
+
+
+def main():
+    listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    listener.setblocking(False)
+
+    results = []
+    for label, setup in [
+        ("send_data() per value", per_value),
+        ("OpenSoundPublisher, changes only", publisher),
+    ]:
+        best = None
+        for _ in range(3):
+            result = simulate(listener, setup)
+            if best is None or result[2] < best[2]:
+                best = result
+        results.append((label, best))
+
+    title = f"Publishing 12 values at {RATE}Hz for {SECONDS}s of a simulated patch"
+    print(title)
+    print("-" * len(title))
+    print(f"{'': <36} {'datagrams/s': >12} {'bytes/s': >9} {'CPU share': >10}")
+    for label, (datagrams, received, busy) in results:
+        print(
+            f"{label: <36} {datagrams / SECONDS: >12.1f} {received / SECONDS: >9.0f}"
+            f" {busy / SECONDS * 100: >9.3f}%"
+        )
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the cost of setting an output with float volts, integer millivolts and a duty table
+
+Usage::
+
+    python3 benchmarks/bench_output.py
+"""
+
+import bench_utils
+from bench_utils import measure, report
+
+from europi_hardware import cv1, cvs, cv_bank
+
+
+def main():
+    cv1.build_duty_table(100)
+
+    report(
+        "Output.voltage()",
+        [
+            ("voltage(3.21)", measure(lambda: cv1.voltage(3.21))),
+            ("voltage_mv(3210)", measure(lambda: cv1.voltage_mv(3210))),
+            ("voltage_step(321)", measure(lambda: cv1.voltage_step(321))),
+            ("set_duty_raw(20000)", measure(lambda: cv1.set_duty_raw(20000))),
+        ],
+    )
+
+    voltages = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    duties = [cv.duty_for_voltage(v) for cv, v in zip(cvs, voltages)]
+
+    def individual():
+        for i in range(len(cvs)):
+            cvs[i].voltage(voltages[i])
+
+    report(
+        "Setting all 6 outputs",
+        [
+            ("cv.voltage() x6", measure(individual)),
+            ("cv_bank.set_voltages()", measure(lambda: cv_bank.set_voltages(voltages))),
+            # the time between the first and last output changing
+            ("cv_bank.set_duties() (commit only)", measure(lambda: cv_bank.set_duties(duties))),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
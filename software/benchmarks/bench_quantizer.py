@@ -0,0 +1,101 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the table-based Quantizer against the previous per-call scan over all 12 semitones, and
+the binary-search TuningQuantizer with different numbers of notes per octave
+
+Usage::
+
+    python3 benchmarks/bench_quantizer.py
+"""
+
+import bench_utils
+from bench_utils import measure, report
+
+from array import array
+
+from europi import MAX_OUTPUT_VOLTAGE
+from experimental.quantizer import CommonScales, TuningQuantizer, VOLTS_PER_SEMITONE
+
+
+def scan_quantize(notes, analog_in, root=0):
+    """The previous implementation of Quantizer.quantize"""
+    analog_in = analog_in - VOLTS_PER_SEMITONE * root
+    nearest_chromatic_volt = round(analog_in / VOLTS_PER_SEMITONE) * VOLTS_PER_SEMITONE
+    base_volts = int(nearest_chromatic_volt)
+    nearest_semitone = (nearest_chromatic_volt - base_volts) / VOLTS_PER_SEMITONE
+
+    nearest_on_scale = 0
+    best_delta = 255
+    for note in range(len(notes)):
+        if notes[note]:
+            delta = abs(nearest_semitone - note)
+            if delta < best_delta:
+                nearest_on_scale = note
+                best_delta = delta
+
+    volts = base_volts + nearest_on_scale * VOLTS_PER_SEMITONE + root * VOLTS_PER_SEMITONE
+    highest_volts = volts
+    highest_note = nearest_on_scale
+    while volts > MAX_OUTPUT_VOLTAGE:
+        highest_volts -= VOLTS_PER_SEMITONE
+        highest_note = (highest_note - 1) % len(notes)
+        if notes[highest_note]:
+            volts = highest_volts
+            nearest_on_scale = highest_note
+    return (volts, nearest_on_scale)
+
+
+def main():
+    scale = CommonScales.Major135
+    notes = scale.notes
+
+    report(
+        "Quantizing one voltage",
+        [
+            ("scan", measure(lambda: scan_quantize(notes, 3.21, 5))),
+            ("quantize()", measure(lambda: scale.quantize(3.21, 5))),
+        ],
+    )
+
+    voltages = [0.1, 1.3, 2.7, 4.05, 6.66, 9.9]
+    out = array("f", [0.0] * len(voltages))
+
+    def scan_all():
+        for i in range(len(voltages)):
+            out[i] = scan_quantize(notes, voltages[i], 5)[0]
+
+    def quantize_all():
+        for i in range(len(voltages)):
+            out[i] = scale.quantize(voltages[i], 5)[0]
+
+    report(
+        "Quantizing 6 voltages",
+        [
+            ("scan x6", measure(scan_all)),
+            ("quantize() x6", measure(quantize_all)),
+            ("quantize_many()", measure(lambda: scale.quantize_many(voltages, 5, out))),
+        ],
+    )
+
+    tunings = [(n, TuningQuantizer.equal_temperament(n)) for n in (12, 31, 72)]
+    report(
+        "TuningQuantizer.quantize()",
+        [("Quantizer (12-TET)", measure(lambda: CommonScales.Chromatic.quantize(3.21, 5)))]
+        + [(f"{n}-TET", measure(lambda t=t: t.quantize(3.21, 5))) for (n, t) in tunings],
+    )
+
+
+if __name__ == "__main__":
+    main()
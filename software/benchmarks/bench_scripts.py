@@ -0,0 +1,407 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Run whole scripts headless against the instrumented mocks in ``sim_hardware`` and measure the
+cost of each iteration of their main loops
+
+For every script this reports the host wall-time per loop iteration and the number of ADC reads,
+PWM writes, I2C bytes and framebuffer operations per iteration. The hardware counts are
+deterministic, so any change in them is a real change in what the script does; the wall-times
+are only comparable between runs on the same machine.
+
+Each script runs in its own process, from a temporary directory so saved state files don't
+leak between runs or into the source tree, and is run ``--repeat`` times keeping the fastest
+result. Between loop iterations the simulated clock moves
+forward by ``--tick-ms``, firing any ``machine.Timer`` callbacks and ``din`` clock pulses that
+fall due.
+
+Usage::
+
+    # run every script & compare against the saved baseline
+    python3 benchmarks/bench_scripts.py
+
+    # run only some scripts
+    python3 benchmarks/bench_scripts.py conway pams
+
+    # save the results as the new baseline
+    python3 benchmarks/bench_scripts.py --save
+
+    # run with the firmware's profiler enabled to see where the time goes, and how much
+    # overhead profiling adds
+    python3 benchmarks/bench_scripts.py --profile
+
+The exit status is 1 if any script is slower than the baseline by more than ``--tolerance`` or
+performs more hardware operations per iteration than it used to. Times are compared relative to
+a fixed calibration workload run in the same process, which evens out differences in the speed
+of the machine between runs.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import bench_utils
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts_baseline.json")
+
+# Prefix for the line a child process prints its results on
+RESULT_PREFIX = "RESULT "
+
+# Counters may grow by this fraction before being reported as a regression
+COUNTER_TOLERANCE = 0.01
+
+COUNTER_FIELDS = ["adc_reads", "pwm_writes", "i2c_bytes", "fb_ops"]
+
+
+class Scenario:
+    """How to run one script
+
+    :param script:  The fully-qualified name of the ``EuroPiScript`` class
+    :param marker:  A (module, attribute path) pair naming a function the script's main loop
+        calls exactly once per iteration. The harness wraps it to count iterations
+    :param setup:  An optional function called with the script instance before ``main()``
+    """
+
+    def __init__(self, script, marker, setup=None):
+        self.script = script
+        self.marker = marker
+        self.setup = setup
+
+
+def start_pams_clock(script):
+    script.clock.start()
+
+
+SCENARIOS = {
+    "conway": Scenario("contrib.conway.Conway", ("europi", "oled.show")),
+    "euclid": Scenario("contrib.euclid.EuclideanRhythms", ("time", "ticks_ms")),
+    "pams": Scenario(
+        "contrib.pams.PamsWorkout2", ("contrib.pams", "ssoled.show"), setup=start_pams_clock
+    ),
+    "quantizer": Scenario("contrib.quantizer.QuantizerScript", ("europi", "oled.show")),
+    "turing_machine": Scenario(
+        "contrib.turing_machine.EuroPiTuringMachine", ("europi", "oled.show")
+    ),
+}
+
+
+class StopBenchmark(BaseException):
+    """Raised from the loop marker to stop the script once enough iterations have run
+
+    This is a ``BaseException`` so the scripts' own ``except Exception`` blocks don't catch it.
+    """
+
+
+class LoopCounter:
+    """Wraps a script's loop marker to time each iteration and stop the script when done
+
+    :param clock:  The ``SimClock``
+    :param counters:  The hardware ``Counters``
+    :param iterations:  The number of iterations to measure
+    :param warmup:  The number of iterations to run before measuring
+    :param tick_ms:  How far the simulated clock advances on each iteration
+    """
+
+    def __init__(self, clock, counters, iterations, warmup, tick_ms):
+        self.clock = clock
+        self.counters = counters
+        self.iterations = iterations
+        self.warmup = warmup
+        self.tick_us = int(tick_ms * 1000)
+
+        self.count = 0
+        self.last = 0
+        self.times_us = []
+        self.totals = None
+
+    def wrap(self, func):
+        def wrapper(*args, **kwargs):
+            # ignore calls made by timer & input callbacks; they aren't part of the main loop
+            if not self.clock.in_irq:
+                self.boundary()
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    def boundary(self):
+        now = time.perf_counter()
+        self.count += 1
+        if self.count == self.warmup + 1:
+            self.counters.reset()
+        elif self.count > self.warmup + 1:
+            self.times_us.append((now - self.last) * 1_000_000)
+            if len(self.times_us) == self.iterations:
+                self.totals = self.counters.snapshot()
+                raise StopBenchmark()
+        self.last = now
+        self.clock.advance(self.tick_us)
+
+
+def calibrate(repeats=50):
+    """Time a fixed pure-Python workload
+
+    Timings from a shared or throttled machine vary a lot between processes. Scaling each
+    script's time by how long this workload took in the same process makes runs comparable.
+
+    :return: The median time of the workload, in microseconds
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        total = 0
+        for i in range(1000):
+            total += (i * 7) & 0xFF
+        times.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(times)
+
+
+def relative_time(result):
+    """Get a script's time per iteration relative to the calibration workload"""
+    return result["us_per_tick"] / result["calibration_us"]
+
+
+def resolve(module_name, path):
+    """Find the object that owns the final attribute in a dotted path"""
+    obj = importlib.import_module(module_name)
+    names = path.split(".")
+    for name in names[:-1]:
+        obj = getattr(obj, name)
+    return obj, names[-1]
+
+
+def run_scenario(name, iterations, warmup, tick_ms, bpm, profile=False):
+    """Run a single script in this process
+
+    This patches the hardware mocks and imports the script, so it should only be called once
+    per process.
+
+    :param profile:  If True, enable the firmware's profiler and include its report
+
+    :return: A dict of the results
+    """
+    import sim_hardware
+
+    clock = sim_hardware.install(bpm)
+    oled = sim_hardware.use_display()
+    random.seed(0)
+
+    if profile:
+        import europi_profiler
+        from europi_profiler import profiler
+
+        # time the sections with the host's clock; the simulated one only moves between iterations
+        europi_profiler.ticks_us = lambda: time.perf_counter_ns() // 1000
+        europi_profiler.ticks_diff = lambda end, start: end - start
+        profiler.enable()
+        profiler.instrument_display(oled)
+
+    # some scripts try "from firmware import europi" first to support running tests from the
+    # repository root; make sure they use the same europi module as everything else
+    sys.modules["firmware"] = None
+
+    scenario = SCENARIOS[name]
+    (module_name, class_name) = scenario.script.rsplit(".", 1)
+    script = getattr(importlib.import_module(module_name), class_name)()
+    if scenario.setup is not None:
+        scenario.setup(script)
+
+    loop = LoopCounter(clock, sim_hardware.counters, iterations, warmup, tick_ms)
+    (owner, attr) = resolve(*scenario.marker)
+    setattr(owner, attr, loop.wrap(getattr(owner, attr)))
+
+    calibration_us = calibrate()
+    try:
+        script.main()
+    except StopBenchmark:
+        pass
+    calibration_us = min(calibration_us, calibrate())
+
+    if loop.totals is None:
+        raise RuntimeError(f"{name} stopped after {loop.count} of {warmup + iterations} iterations")
+
+    times = loop.times_us
+    result = {
+        "us_per_tick": round(statistics.median(times), 2),
+        "mean_us": round(statistics.mean(times), 2),
+        "max_us": round(max(times), 2),
+        "calibration_us": round(calibration_us, 2),
+    }
+    for field in COUNTER_FIELDS:
+        result[field] = round(loop.totals[field] / iterations, 2)
+    if profile:
+        result["profile"] = profiler.report()
+    return result
+
+
+def run_child(name, args):
+    """Run a script in a new process and return its results"""
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--child",
+        name,
+        "--iterations",
+        str(args.iterations),
+        "--warmup",
+        str(args.warmup),
+        "--tick-ms",
+        str(args.tick_ms),
+        "--bpm",
+        str(args.bpm),
+    ]
+    if args.profile:
+        command.append("--profile")
+    with tempfile.TemporaryDirectory() as work_dir:
+        proc = subprocess.run(command, cwd=work_dir, capture_output=True, text=True)
+
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX) :])
+    raise RuntimeError(f"Failed to benchmark {name}:\n{proc.stdout}\n{proc.stderr}")
+
+
+def compare(name, result, baseline, tolerance):
+    """Compare a script's results to its baseline
+
+    :return: A list of descriptions of any regressions
+    """
+    problems = []
+    if relative_time(result) > relative_time(baseline) * (1 + tolerance):
+        problems.append(
+            f"{name}: {result['us_per_tick']:.2f} us/tick, was {baseline['us_per_tick']:.2f}"
+        )
+    for field in COUNTER_FIELDS:
+        if field in baseline and result[field] > baseline[field] * (1 + COUNTER_TOLERANCE):
+            problems.append(f"{name}: {result[field]} {field}/tick, was {baseline[field]}")
+    return problems
+
+
+def print_results(results, baseline):
+    print(
+        f"{'script': <16} {'us/tick': >10} {'vs base': >8} {'max us': >10} "
+        f"{'adc': >8} {'pwm': >8} {'i2c B': >8} {'fb ops': >8}"
+    )
+    for name, result in results.items():
+        if name in baseline:
+            change = f"{relative_time(result) / relative_time(baseline[name]):.2f}x"
+        else:
+            change = "new"
+        print(
+            f"{name: <16} {result['us_per_tick']: >10.2f} {change: >8} {result['max_us']: >10.2f} "
+            f"{result['adc_reads']: >8} {result['pwm_writes']: >8} "
+            f"{result['i2c_bytes']: >8} {result['fb_ops']: >8}"
+        )
+    print()
+
+
+def load_baseline(filename):
+    try:
+        with open(filename) as f:
+            return json.load(f)["scripts"]
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("scripts", nargs="*", help=f"Scripts to run: {', '.join(SCENARIOS)}")
+    parser.add_argument("--iterations", type=int, default=500, help="Iterations to measure")
+    parser.add_argument("--warmup", type=int, default=20, help="Iterations to skip first")
+    parser.add_argument("--tick-ms", type=float, default=10, help="Simulated ms per iteration")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per script; the best is kept")
+    parser.add_argument("--bpm", type=int, default=120, help="Tempo of the clock sent to din")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="The baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Save the results as the baseline")
+    parser.add_argument(
+        "--profile", action="store_true", help="Enable the firmware profiler & show its report"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5, help="Allowed slow-down vs. the baseline"
+    )
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_scenario(
+            args.child, args.iterations, args.warmup, args.tick_ms, args.bpm, args.profile
+        )
+        print(RESULT_PREFIX + json.dumps(result))
+        return
+
+    if args.profile and args.save:
+        parser.error("Profiled runs can't be saved as the baseline")
+
+    names = args.scripts or list(SCENARIOS)
+    for name in names:
+        if name not in SCENARIOS:
+            parser.error(f"Unknown script {name}")
+
+    results = {}
+    for name in names:
+        # keep the fastest run; anything else running on the machine only ever slows us down
+        runs = [run_child(name, args) for _ in range(args.repeat)]
+        results[name] = min(runs, key=relative_time)
+    baseline = load_baseline(args.baseline)
+    print_results(results, baseline)
+
+    for name, result in results.items():
+        if "profile" in result:
+            print(f"Profile of {name} (host times, us)")
+            for line in result["profile"]:
+                print(f"  {line}")
+            print()
+
+    if args.save:
+        saved = dict(baseline)
+        saved.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "settings": {
+                        "iterations": args.iterations,
+                        "warmup": args.warmup,
+                        "repeat": args.repeat,
+                        "tick_ms": args.tick_ms,
+                        "bpm": args.bpm,
+                    },
+                    "scripts": saved,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    problems = []
+    for name, result in results.items():
+        if name in baseline:
+            problems += compare(name, result, baseline[name], args.tolerance)
+    if problems:
+        print("Regressions:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the size and latency of saving a CV recording bank as JSON vs. with the binary state log
+
+The bank is shaped like one of CVecorder's: 6 channels of 64 steps, stored as hundredths of a volt.
+
+Usage::
+
+    python3 benchmarks/bench_state_log.py
+"""
+
+import bench_utils
+from bench_utils import measure, report
+
+import os
+import tempfile
+from array import array
+
+from europi_script import EuroPiScript
+
+CHANNELS = 6
+STEPS = 64
+
+
+class BenchScript(EuroPiScript):
+    pass
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())
+    script = BenchScript()
+
+    channels = [[(i * 37 + ch * 101) % 1000 for i in range(STEPS)] for ch in range(CHANNELS)]
+    bank = {"bank": 0, "channels": channels}
+    struct_bank = {"bank": 0}
+    for ch in range(CHANNELS):
+        struct_bank[f"ch{ch}"] = array("H", channels[ch])
+
+    script.save_state_json(bank)
+    json_size = os.stat(script._state_filename)[6]
+    script.save_state_struct(struct_bank)
+    struct_size = script._state_log.size()
+    script.remove_state()
+
+    print(f"State size: JSON {json_size}B, binary {struct_size}B")
+    print()
+
+    def update_one_channel():
+        struct_bank["ch0"][0] += 1
+        script.save_state_struct({"ch0": struct_bank["ch0"]})
+
+    report(
+        "Saving state",
+        [
+            ("save_state_json(whole bank)", measure(lambda: script.save_state_json(bank), 500)),
+            (
+                "save_state_struct(whole bank)",
+                measure(lambda: script.save_state_struct(struct_bank), 500),
+            ),
+            ("save_state_struct(one channel)", measure(update_one_channel, 500)),
+        ],
+    )
+    report(
+        "Loading state",
+        [
+            ("load_state_json()", measure(script.load_state_json, 500)),
+            ("load_state_struct()", measure(script.load_state_struct, 500)),
+        ],
+    )
+    script.remove_state()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the memory used and bytes sent to serve http_control's page
+
+- ``send_html`` with the page held in a string, as http_control used to
+- ``send_file``, streaming the page from flash
+- ``send_file`` with the gzipped copy made by ``scripts/build_web_assets.py``
+- a repeat visit, where the browser already has the page and sends its ETag
+
+The heap figures are the most memory allocated while the server handles one page load, on top
+of what was allocated before it; the string version also keeps the page in RAM for as long as
+the script runs. CPython's objects are larger than MicroPython's, so compare the rows rather
+than reading the numbers as Pico RAM.
+
+CPython's files normally have their own read buffer, which MicroPython's don't, so files are
+opened unbuffered here to match the Pico.
+
+Usage::
+
+    python3 benchmarks/bench_static.py
+"""
+
+import gzip
+import os
+import socket
+import sys
+import tempfile
+import tracemalloc
+
+import bench_utils
+from bench_utils import SOFTWARE_DIR
+
+import experimental.http_server
+from experimental.http_server import HttpServer
+
+PAGE = SOFTWARE_DIR / "contrib" / "www" / "http_control" / "index.html"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def page_load(server, handler, headers=""):
+    """
+    Request the page and measure the server's memory use while it answers
+
+    :return: A tuple of the peak heap allocated by the server and the bytes received
+    """
+    server.get_callback = handler
+    client = socket.create_connection(("127.0.0.1", server.port))
+    client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    client.settimeout(0.01)
+    server.check_requests()
+
+    client.sendall(f"GET / HTTP/1.1\r\nHost: europi\r\n{headers}\r\n".encode())
+    received = 0
+    peak = 0
+    for _ in range(100):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        server.check_requests()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+        try:
+            while True:
+                data = client.recv(65536)
+                if not data:
+                    break
+                received += len(data)
+        except socket.timeout:
+            pass
+    client.close()
+    return (peak, received)
+
+
+def main():
+    experimental.http_server.open = lambda filename, mode="r": open(filename, mode, buffering=0)
+
+    with tempfile.TemporaryDirectory() as www:
+        page = PAGE.read_bytes()
+        filename = os.path.join(www, "index.html")
+        with open(filename, "wb") as f:
+            f.write(page)
+        with open(f"{filename}.gz", "wb") as f:
+            f.write(gzip.compress(page, compresslevel=9, mtime=0))
+
+        server = HttpServer(free_port())
+        html_document = page.decode()
+
+        def send_string(connection=None, request=None):
+            server.send_html(connection, html_document)
+
+        def send_file(connection=None, request=None):
+            server.send_file(connection, request, filename)
+
+        st = os.stat(f"{filename}.gz")
+        etag = f'"{st.st_size:x}-{int(st.st_mtime):x}"'
+
+        results = [
+            (
+                "send_html, page in a string",
+                page_load(server, send_string),
+                sys.getsizeof(html_document),
+            ),
+            ("send_file", page_load(server, send_file), 0),
+            ("send_file, gzipped", page_load(server, send_file, "Accept-Encoding: gzip\r\n"), 0),
+            (
+                "repeat visit (304 Not Modified)",
+                page_load(
+                    server,
+                    send_file,
+                    f"Accept-Encoding: gzip\r\nIf-None-Match: {etag}\r\n",
+                ),
+                0,
+            ),
+        ]
+        server.close()
+
+    title = f"Serving http_control's {len(page)} byte page"
+    print(title)
+    print("-" * len(title))
+    print(f"{'': <36} {'resident': >10} {'peak heap': >10} {'bytes sent': >11}")
+    for label, (peak, received), resident in results:
+        print(f"{label: <36} {resident: >10} {peak: >10} {received: >11}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Shared helpers for the host-side benchmarks
+
+Importing this module sets up ``sys.path`` the same way ``tests/conftest.py`` does, so the
+firmware, contrib scripts and hardware mocks can all be imported with plain CPython.
+
+The absolute numbers measured on a PC are not representative of the Pico, but the ratio
+between two implementations usually is.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+SOFTWARE_DIR = Path(__file__).parent.parent
+
+sys.path.append(str(SOFTWARE_DIR / "firmware"))
+sys.path.append(str(SOFTWARE_DIR))  # contrib
+sys.path.append(str(SOFTWARE_DIR / "tests" / "mocks"))
+
+
+def measure(func, iterations=10000):
+    """
+    Call a function repeatedly and return the mean time per call
+
+    :param func:  A callable that takes no arguments
+    :param iterations:  The number of times to call it
+
+    :return: The mean time per call, in microseconds
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    end = time.perf_counter()
+    return (end - start) * 1_000_000 / iterations
+
+
+def report(title, results):
+    """
+    Print a table of benchmark results
+
+    :param title:  The title of the benchmark
+    :param results:  A list of (label, microseconds per call) tuples. The first entry is used
+        as the baseline the others are compared against
+    """
+    print(title)
+    print("-" * len(title))
+    baseline = results[0][1]
+    for label, us in results:
+        print(f"{label: <40} {us: >10.3f} us/call  {baseline / us: >6.2f}x")
+    print()
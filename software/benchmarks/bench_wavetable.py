@@ -0,0 +1,92 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the per-update cost of six wavetable LFOs against the float/trig math used by
+Harmonic LFOs' ``calculate_voltage`` and PAMS' ``sine_wave``
+
+Usage::
+
+    python3 benchmarks/bench_wavetable.py
+
+Note that on the host ``sin``/``cos`` run as native code and floats are cheap, which flatters the
+trig versions. On the Pico every intermediate float is a heap allocation, while the wavetable path
+only uses small integers, so run this on the module to compare real-world costs.
+"""
+
+import bench_utils
+from bench_utils import measure, report
+
+from math import cos, pi, radians, sin
+
+from experimental.wavetable import WavetableLfo, SINE
+
+MAX_VOLTAGE = 10
+DIVISIONS = [1, 3, 5, 7, 11, 13]
+
+
+class TrigLfos:
+    """The sine path of Harmonic LFOs' calculate_voltage"""
+
+    def __init__(self):
+        self.degree = 0
+
+    def update(self):
+        self.degree += 1
+        rad = radians(self.degree)
+        for multiplier in DIVISIONS:
+            (0 - (cos(rad * (1 / multiplier))) + 1) * (MAX_VOLTAGE / 2)
+
+
+class PamsSines:
+    """PAMS' sine_wave, one call per channel per tick"""
+
+    def __init__(self):
+        self.tick = 0
+
+    def update(self):
+        self.tick += 1
+        for n_ticks in DIVISIONS:
+            n_ticks *= 96
+            tick = self.tick % n_ticks
+            theta = (tick + 0 / 100.0 * n_ticks) / n_ticks * 2 * pi
+            ((sin(theta) + 1) / 2) * MAX_VOLTAGE
+
+
+def main():
+    trig = TrigLfos()
+    pams = PamsSines()
+    lfos = [WavetableLfo(SINE, rate=360, frequency=1 / d) for d in DIVISIONS]
+    raw_lfos = [WavetableLfo(SINE, rate=360, frequency=1 / d, interpolate=False) for d in DIVISIONS]
+
+    def wavetable():
+        for lfo in lfos:
+            lfo.tick_mv(MAX_VOLTAGE * 1000)
+
+    def wavetable_raw():
+        for lfo in raw_lfos:
+            lfo.tick_mv(MAX_VOLTAGE * 1000)
+
+    report(
+        "Updating 6 sine LFOs",
+        [
+            ("Harmonic LFOs calculate_voltage", measure(trig.update)),
+            ("PAMS sine_wave", measure(pams.update)),
+            ("WavetableLfo (interpolated)", measure(wavetable)),
+            ("WavetableLfo (no interpolation)", measure(wavetable_raw)),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the round-trip latency of the ways a browser can set a CV over HTTP
+
+- a new TCP connection per JSON POST, as http_control used to make
+- JSON POSTs over one keep-alive connection
+- 4-byte binary WebSocket messages, each answered with an 8-byte telemetry frame
+
+The server runs in a background thread, calling ``check_requests()`` in a loop the way a script's
+main loop would. The bytes exchanged per update are reported too; on the Pico's wifi these matter
+more than they do over loopback.
+
+Usage::
+
+    python3 benchmarks/bench_websocket.py
+"""
+
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+import bench_utils
+from bench_utils import report
+
+from experimental.http_server import HttpServer, WebSocketOpcode
+
+UPDATES = 500
+BODY = json.dumps({f"cv{i + 1}": 1.234 for i in range(6)}).encode()
+STATUS = {"inputs": {"ain": 1.234, "din": 0, "k1": 0.5, "k2": 0.5, "b1": 0, "b2": 0}}
+STATUS["outputs"] = {f"cv{i + 1}": 1.234 for i in range(6)}
+TELEMETRY = struct.pack(">BHHHB", 0x81, 1234, 5000, 5000, 0)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server():
+    server = HttpServer(free_port(), max_clients=8)
+
+    @server.post_handler
+    def handle_post(connection=None, request=None):
+        request.json()
+        server.send_json(connection, STATUS)
+
+    @server.websocket("/ws")
+    def handle_message(connection=None, data=None):
+        connection.send(TELEMETRY)
+
+    running = [True]
+
+    def loop():
+        while running[0]:
+            server.check_requests()
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+
+    def stop():
+        running[0] = False
+        thread.join()
+        server.close()
+
+    return (server, stop)
+
+
+def read_response(sock, buffer=b""):
+    """Read one HTTP response with a Content-Length, returning it and any data after it"""
+    while b"\r\n\r\n" not in buffer:
+        buffer += sock.recv(4096)
+    (head, rest) = buffer.split(b"\r\n\r\n", 1)
+    length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+    while len(rest) < length:
+        rest += sock.recv(4096)
+    return (head + b"\r\n\r\n" + rest[0:length], rest[length:])
+
+
+def post_request(port):
+    return (
+        f"POST / HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: text/json\r\n"
+        f"Content-Length: {len(BODY)}\r\n\r\n"
+    ).encode() + BODY
+
+
+def new_connection_per_post(port):
+    request = post_request(port)
+    sizes = []
+
+    def update():
+        with socket.create_connection(("127.0.0.1", port)) as sock:
+            sock.sendall(request)
+            (response, _) = read_response(sock)
+            sizes.append(len(response))
+
+    return (update, lambda: None, len(request), sizes)
+
+
+def keep_alive_post(port):
+    request = post_request(port)
+    sock = socket.create_connection(("127.0.0.1", port))
+    sizes = []
+
+    def update():
+        sock.sendall(request)
+        (response, _) = read_response(sock)
+        sizes.append(len(response))
+
+    return (update, sock.close, len(request), sizes)
+
+
+def websocket(port):
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(
+        b"GET /ws HTTP/1.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+        b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n"
+    )
+    buffer = b""
+    while b"\r\n\r\n" not in buffer:
+        buffer += sock.recv(4096)
+
+    # set CV1 to 1.234V: type, mask, millivolts; masked as a browser would
+    payload = struct.pack(">BBH", 0x01, 0x01, 1234)
+    mask = os.urandom(4)
+    frame = bytes((0x80 | WebSocketOpcode.BINARY, 0x80 | len(payload))) + mask
+    frame += bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    sizes = []
+
+    def update():
+        sock.sendall(frame)
+        response = sock.recv(64)
+        while len(response) < 2 + len(TELEMETRY):
+            response += sock.recv(64)
+        sizes.append(len(response))
+
+    return (update, sock.close, len(frame), sizes)
+
+
+def main():
+    (server, stop) = start_server()
+    port = server.port
+
+    results = []
+    sizes = []
+    latencies = {}
+    for label, setup in [
+        ("new connection per JSON POST", new_connection_per_post),
+        ("JSON POST, keep-alive", keep_alive_post),
+        ("binary WebSocket message", websocket),
+    ]:
+        (update, close, sent, received) = setup(port)
+        for _ in range(20):
+            update()
+
+        times = []
+        for _ in range(UPDATES):
+            start = time.perf_counter()
+            update()
+            times.append((time.perf_counter() - start) * 1_000_000)
+        close()
+
+        times.sort()
+        results.append((label, sum(times) / len(times)))
+        latencies[label] = (times[len(times) // 2], times[len(times) * 99 // 100])
+        sizes.append((label, sent, received[-1]))
+
+    stop()
+
+    report(f"Round trip per CV update, mean of {UPDATES}", results)
+    print(f"{'': <40} {'median': >10} {'p99': >10}")
+    for label, (median, p99) in latencies.items():
+        print(f"{label: <40} {median: >7.0f} us {p99: >7.0f} us")
+    print()
+
+    print("Bytes exchanged per update (excluding TCP/IP headers)")
+    print("-----------------------------------------------------")
+    for label, sent, received in sizes:
+        print(f"{label: <40} {sent: >5} sent {received: >5} received")
+    print()
+
+
+if __name__ == "__main__":
+    main()
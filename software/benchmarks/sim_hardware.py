@@ -0,0 +1,327 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Instrumented hardware mocks and a simulated clock for running scripts headless on a PC
+
+``install()`` patches the mocks in ``tests/mocks`` so that:
+
+- ADC reads, PWM duty-cycle writes, bytes written to the I2C bus and framebuffer drawing calls
+  are counted in ``counters``
+- ``utime``/``time`` report a simulated clock instead of always returning zero, and sleeping
+  advances that clock instead of blocking
+- ``machine.Timer`` callbacks fire when the simulated clock passes their period
+- ``din`` receives a square-wave clock at a fixed BPM from the simulated clock
+
+It must be called before ``europi`` is imported, since ``europi`` and the scripts bind some of
+these functions at import time. Nothing here depends on the real passage of time, so two runs
+of the same script drive it through exactly the same sequence of events.
+"""
+
+import time
+
+import bench_utils
+
+import framebuf
+import machine
+import ssd1306
+import utime
+
+# MicroPython's tick counters wrap around at 2^30
+TICKS_PERIOD = 1 << 30
+TICKS_MASK = TICKS_PERIOD - 1
+TICKS_HALF = TICKS_PERIOD >> 1
+
+# The value returned by every ADC read; mid-scale, so knobs read as half-way
+DEFAULT_ADC_VALUE = 32768
+
+# Drawing methods whose calls are counted as framebuffer operations
+FRAMEBUFFER_OPS = [
+    "fill",
+    "pixel",
+    "hline",
+    "vline",
+    "line",
+    "rect",
+    "fill_rect",
+    "ellipse",
+    "poly",
+    "text",
+    "blit",
+    "scroll",
+]
+
+
+class Counters:
+    """Counts of the hardware operations performed by a script"""
+
+    FIELDS = ["adc_reads", "pwm_writes", "i2c_bytes", "fb_ops"]
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.adc_reads = 0
+        self.pwm_writes = 0
+        self.i2c_bytes = 0
+        self.fb_ops = 0
+
+    def snapshot(self):
+        """Get the current counts as a dict"""
+        return {field: getattr(self, field) for field in Counters.FIELDS}
+
+
+class SimTimer:
+    """The state of one running ``machine.Timer``"""
+
+    def __init__(self, timer, period_us, periodic, callback, due_us):
+        self.timer = timer
+        self.period_us = period_us
+        self.periodic = periodic
+        self.callback = callback
+        self.due_us = due_us
+
+
+class SimClock:
+    """A simulated microsecond clock that drives timers and the digital input
+
+    :param bpm:  The tempo of the clock sent to ``din``, in quarter notes per minute. Use 0 to
+        leave ``din`` idle
+    :param gate_ms:  How long each ``din`` pulse stays high
+    """
+
+    def __init__(self, bpm=120, gate_ms=10):
+        self.now_us = 0
+        self.timers = {}
+        self.din = None
+        self.din_period_us = int(60_000_000 / bpm) if bpm > 0 else 0
+        self.din_gate_us = gate_ms * 1000
+        self.din_next_us = 0
+        self.din_high = False
+
+        # True while a timer or input callback is running
+        self.in_irq = False
+
+    def ticks_ms(self):
+        return (self.now_us // 1000) & TICKS_MASK
+
+    def ticks_us(self):
+        return self.now_us & TICKS_MASK
+
+    @staticmethod
+    def ticks_add(ticks, delta):
+        return (ticks + delta) & TICKS_MASK
+
+    @staticmethod
+    def ticks_diff(end, start):
+        return ((end - start + TICKS_HALF) & TICKS_MASK) - TICKS_HALF
+
+    def sleep(self, seconds):
+        self.advance(int(seconds * 1_000_000))
+
+    def sleep_ms(self, ms):
+        self.advance(int(ms * 1000))
+
+    def sleep_us(self, us):
+        self.advance(int(us))
+
+    def _next_event(self):
+        """Get the time of the next timer or input edge, or None if nothing is scheduled"""
+        due = None
+        for sim_timer in self.timers.values():
+            if due is None or sim_timer.due_us < due:
+                due = sim_timer.due_us
+        if self.din is not None and self.din_period_us > 0:
+            if due is None or self.din_next_us < due:
+                due = self.din_next_us
+        return due
+
+    def advance(self, us):
+        """Move the clock forward, firing any timers and input edges that fall due
+
+        Events are handled in time order, with the clock set to the time of each event while its
+        callback runs, as if it were an interrupt.
+
+        :param us:  How many microseconds to advance by
+        """
+        end = self.now_us + us
+        if self.in_irq:
+            # e.g. a timer callback that sleeps; just let time pass
+            self.now_us = end
+            return
+
+        while True:
+            due = self._next_event()
+            if due is None or due > end:
+                break
+            self.now_us = max(self.now_us, due)
+            self.in_irq = True
+            try:
+                self._fire(due)
+            finally:
+                self.in_irq = False
+        self.now_us = end
+
+    def _fire(self, due):
+        if self.din is not None and self.din_period_us > 0 and self.din_next_us == due:
+            self.din_high = not self.din_high
+            if self.din_high:
+                self.din_next_us += self.din_gate_us
+            else:
+                self.din_next_us += self.din_period_us - self.din_gate_us
+            # the input is inverted in hardware; a low pin is a high signal
+            self.din.pin._sim_value = 0 if self.din_high else 1
+            irq = getattr(self.din.pin, "_sim_irq", None)
+            if irq is not None:
+                irq(self.din.pin)
+            return
+
+        for key, sim_timer in list(self.timers.items()):
+            if sim_timer.due_us == due:
+                if sim_timer.periodic:
+                    sim_timer.due_us += sim_timer.period_us
+                else:
+                    del self.timers[key]
+                sim_timer.callback(sim_timer.timer)
+                return
+
+    def start_timer(self, timer, freq, period, periodic, callback):
+        if callback is None:
+            return
+        if freq > 0:
+            period_us = int(1_000_000 / freq)
+        else:
+            period_us = int(period * 1000)
+        period_us = max(period_us, 1)
+        self.timers[id(timer)] = SimTimer(
+            timer, period_us, periodic, callback, self.now_us + period_us
+        )
+
+    def stop_timer(self, timer):
+        self.timers.pop(id(timer), None)
+
+
+counters = Counters()
+clock = None
+
+
+def install(bpm=120, gate_ms=10):
+    """Patch the hardware mocks to use a new simulated clock and count hardware operations
+
+    :param bpm:  The tempo of the clock sent to ``din``
+    :param gate_ms:  The length of each ``din`` pulse
+    :return: The ``SimClock``
+    """
+    global clock
+    clock = SimClock(bpm, gate_ms)
+
+    # the host's time module has no ticks_* functions; give it the same API as MicroPython's
+    for module in (utime, time):
+        module.ticks_ms = clock.ticks_ms
+        module.ticks_us = clock.ticks_us
+        module.ticks_add = clock.ticks_add
+        module.ticks_diff = clock.ticks_diff
+        module.sleep = clock.sleep
+        module.sleep_ms = clock.sleep_ms
+        module.sleep_us = clock.sleep_us
+
+    def read_u16(adc, *args):
+        counters.adc_reads += 1
+        return DEFAULT_ADC_VALUE
+
+    def duty_u16(pwm, duty=None):
+        counters.pwm_writes += 1
+
+    def writeto(i2c, addr, buf, stop=True):
+        counters.i2c_bytes += len(buf)
+        return 1
+
+    def writevto(i2c, addr, vector, stop=True):
+        for buf in vector:
+            counters.i2c_bytes += len(buf)
+        return 1
+
+    def pin_value(pin, *args):
+        if args:
+            pin._sim_value = args[0]
+            return None
+        # inputs idle high (i.e. no signal, buttons released)
+        return getattr(pin, "_sim_value", 1)
+
+    def pin_irq(pin, handler=None, trigger=None):
+        pin._sim_irq = handler
+
+    def timer_init(timer, *, mode=1, freq=-1, period=-1, callback=None):
+        clock.stop_timer(timer)
+        clock.start_timer(timer, freq, period, mode == machine.Timer.PERIODIC, callback)
+
+    def timer_new(timer, *, mode=1, freq=-1, period=-1, callback=None):
+        timer_init(timer, mode=mode, freq=freq, period=period, callback=callback)
+
+    machine.ADC.read_u16 = read_u16
+    machine.PWM.duty_u16 = duty_u16
+    machine.I2C.writeto = writeto
+    machine.I2C.writevto = writevto
+    machine.Pin.value = pin_value
+    machine.Pin.irq = pin_irq
+    machine.Timer.__init__ = timer_new
+    machine.Timer.init = timer_init
+    machine.Timer.deinit = lambda timer: clock.stop_timer(timer)
+
+    for name in FRAMEBUFFER_OPS:
+        for cls in (ssd1306.SSD1306_I2C, framebuf.FrameBuffer):
+            _count_calls(cls, name)
+
+    return clock
+
+
+def _count_calls(cls, name):
+    """Wrap a method so that each call is counted as a framebuffer operation"""
+    method = getattr(cls, name, None)
+    if method is None:
+        return
+
+    def wrapper(*args, **kwargs):
+        counters.fb_ops += 1
+        return method(*args, **kwargs)
+
+    setattr(cls, name, wrapper)
+
+
+def use_display():
+    """Replace ``europi.oled`` with a real ``Display`` writing to the instrumented I2C bus
+
+    Without this ``europi`` falls back to a ``DummyDisplay`` on the host, which never touches
+    the bus. This must be called after importing ``europi`` but before importing any module
+    that does ``from europi import oled``. ``din`` is connected to the simulated clock at the
+    same time.
+
+    :return: The new ``Display``
+    """
+    import europi
+    from europi_display import Display
+
+    config = europi.europi_config
+    europi.oled = Display(
+        width=config.DISPLAY_WIDTH,
+        height=config.DISPLAY_HEIGHT,
+        sda=config.DISPLAY_SDA,
+        scl=config.DISPLAY_SCL,
+        channel=config.DISPLAY_CHANNEL,
+        freq=config.DISPLAY_FREQUENCY,
+        contrast=config.DISPLAY_CONTRAST,
+        rotate=config.ROTATE_DISPLAY,
+    )
+    clock.din = europi.din
+    counters.reset()
+    return europi.oled
@@ -637,6 +637,10 @@ class BouncingPixels(EuroPiScript):
                 self.balls[i].draw()
         oled.show()
 
+    def teardown(self):
+        """Stop the simulation thread on the second core."""
+        self.is_running = False
+
     def main(self):
         """Start the application."""
         # Per chrisib's recommendation after some display-related errors,
@@ -229,11 +229,8 @@ class ClockModifier(EuroPiScript):
             self.state_dirty = True
             self.ui_dirty = True
 
-        @din.handler
-        def on_din():
-            """Record the start time of our rising edge
-            """
-            self.last_clock_at = time.ticks_us()
+        # the IRQ only timestamps din's edges; the main loop reads the latest rising edge
+        self.din_edges = din.capture()
 
         def on_ain():
             """Reset all channels when AIN goes high
@@ -280,6 +277,11 @@ class ClockModifier(EuroPiScript):
             # update AIN so its rising edge callback can fire
             self.d_ain.update()
 
+            # Record the start time of our latest rising edge on DIN
+            self.din_edges.drain()
+            if self.din_edges.rising_count:
+                self.last_clock_at = self.din_edges.last_rising_us
+
             # Save the clock modifiers for channels 2, 3, 5, 6 if they've been edited
             if self.state_dirty:
                 self.state_dirty = False
@@ -45,6 +45,10 @@ def stdev(l):
     return ( sum([((x - mean) ** 2) for x in l]) / len(l) )**0.5
 
 
+# How many bits are set in each possible byte
+POPCOUNT = bytes([bin(i).count("1") for i in range(256)])
+
+
 def bitwise_entropy(arr):
     """Calculate the entropy of the bit string in a bytearray
 
@@ -55,12 +59,20 @@ def bitwise_entropy(arr):
     # Count how many bits are 1 in the whole bytearray
     count1s = 0
     for b in arr:
-        for i in range(8):
-            if b & (1 << i):
-                count1s += 1
+        count1s += POPCOUNT[b]
+
+    return count_entropy(count1s, len(arr) << 3)
+
+
+def count_entropy(count1s, num_bits):
+    """Calculate the entropy of a bit string, given how many of its bits are 1
+
+    @param count1s   The number of bits that are 1
+    @param num_bits  The total number of bits in the string
 
+    @return the Shannon Entropy of the string, assuming a 50/50 chance of any bit being 1 or 0
+    """
     # Make sure we don't have all-1 or all-0 in the array; handle those cases
-    num_bits = len(arr) << 3
     if count1s == 0:
         return 0.0
     elif count1s == num_bits:
@@ -76,6 +88,164 @@ def bitwise_entropy(arr):
         return -sum([ p * math.log(p) for p in p_x]) / LOG2
 
 
+class LifeField:
+    """A bit-parallel Game of Life engine
+
+    Each row of the field is stored as a single integer, with the leftmost cell in the most
+    significant bit; this is the same layout as a MONO_HLSB FrameBuffer, so rows can be loaded
+    from & stored to the OLED buffer directly.
+
+    Instead of counting the neighbours of every cell one at a time, the neighbour counts for a
+    whole row are calculated at once as 3 bit-planes using full-adder logic on shifted copies of
+    the rows above, below and the row itself. A generation is then a few dozen integer operations
+    per row instead of several function calls per cell.
+
+    Cells beyond the edges of the field are always dead; the field does not wrap around.
+
+    @param width   The width of the field. Must be a multiple of 8 and less than 256
+    @param height  The height of the field
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.row_bytes = width // 8
+        self.mask = (1 << width) - 1
+
+        self.rows = [0] * height
+        self.next_rows = [0] * height
+
+        # the sums of each 3-cell horizontal neighbourhood, as 2 bit-planes
+        # pre-allocated so we don't need to re-create the lists on every tick
+        self.sum_lo = [0] * height
+        self.sum_hi = [0] * height
+
+        # masks for counting bits in parallel; see popcount
+        self.m1 = int.from_bytes(b"\x55" * self.row_bytes, "big")
+        self.m2 = int.from_bytes(b"\x33" * self.row_bytes, "big")
+        self.m4 = int.from_bytes(b"\x0f" * self.row_bytes, "big")
+        self.h01 = int.from_bytes(b"\x01" * self.row_bytes, "big")
+        self.count_shift = 8 * (self.row_bytes - 1)
+
+    def load(self, field):
+        """Read the cells from a MONO_HLSB bytearray
+
+        @param field  The bytearray to read from
+        """
+        n = self.row_bytes
+        for r in range(self.height):
+            self.rows[r] = int.from_bytes(field[r * n:(r + 1) * n], "big")
+
+    def store(self, field):
+        """Write the cells into a MONO_HLSB bytearray
+
+        @param field  The bytearray to write to
+        """
+        n = self.row_bytes
+        for r in range(self.height):
+            field[r * n:(r + 1) * n] = self.rows[r].to_bytes(n, "big")
+
+    def popcount(self, row):
+        """Count the number of live cells in a row
+
+        The bits are summed in pairs, then nibbles, then bytes in parallel, and the multiplication
+        adds all of the bytes' counts together into the most significant byte.
+
+        @param row  The row to count, as an integer
+
+        @return The number of bits that are set in @row
+        """
+        row = row - ((row >> 1) & self.m1)
+        row = (row & self.m2) + ((row >> 2) & self.m2)
+        row = (row + (row >> 4)) & self.m4
+        return ((row * self.h01) >> self.count_shift) & 0xff
+
+    def population(self):
+        """Count the number of live cells in the whole field
+        """
+        total = 0
+        for row in self.rows:
+            if row:
+                total += self.popcount(row)
+        return total
+
+    def step(self):
+        """Advance the field by one generation
+
+        @return A tuple of the number of cells that were born and the number of cells that died
+        """
+        rows = self.rows
+        next_rows = self.next_rows
+        sum_lo = self.sum_lo
+        sum_hi = self.sum_hi
+        mask = self.mask
+        last = self.height - 1
+
+        # add each cell to its left & right neighbours, giving a 2-bit sum of 0-3 for every column
+        for r in range(self.height):
+            c = rows[r]
+            left = (c << 1) & mask
+            right = c >> 1
+            sum_lo[r] = left ^ c ^ right
+            sum_hi[r] = (left & c) | (left & right) | (c & right)
+
+        num_born = 0
+        num_died = 0
+        for r in range(self.height):
+            if r > 0:
+                a0 = sum_lo[r - 1]
+                a1 = sum_hi[r - 1]
+            else:
+                a0 = 0
+                a1 = 0
+            if r < last:
+                b0 = sum_lo[r + 1]
+                b1 = sum_hi[r + 1]
+            else:
+                b0 = 0
+                b1 = 0
+
+            c = rows[r]
+            left = (c << 1) & mask
+            right = c >> 1
+
+            # above + below: 3-bit sum of 0-6
+            s0 = a0 ^ b0
+            carry = a0 & b0
+            x = a1 ^ b1
+            s1 = x ^ carry
+            s2 = (a1 & b1) | (carry & x)
+
+            # + left & right on this row: 0-8 neighbours. n0-n2 are the low 3 bits of the count;
+            # a count of 8 wraps to 0, which is just as dead
+            m0 = left ^ right
+            m1 = left & right
+            n0 = s0 ^ m0
+            carry = s0 & m0
+            x = s1 ^ m1
+            n1 = x ^ carry
+            n2 = s2 ^ ((s1 & m1) | (carry & x))
+
+            # alive next generation if there are 3 neighbours, or 2 neighbours and the cell is
+            # already alive
+            nxt = n1 & (n0 | c) & (n2 ^ mask)
+            next_rows[r] = nxt
+
+            changed = nxt ^ c
+            if changed:
+                born = changed & nxt
+                if born:
+                    num_born += self.popcount(born)
+                died = changed & c
+                if died:
+                    num_died += self.popcount(died)
+
+        # swap the row lists so we don't need to copy between them
+        self.rows = next_rows
+        self.next_rows = rows
+
+        return (num_born, num_died)
+
+
 class Conway(EuroPiScript):
     def __init__(self):
         # For ease of blitting, store the field as a bit array
@@ -88,13 +258,8 @@ class Conway(EuroPiScript):
         self.frame = FrameBuffer(self.field, OLED_WIDTH, OLED_HEIGHT, MONO_HLSB)
         self.next_frame = FrameBuffer(self.next_field, OLED_WIDTH, OLED_HEIGHT, MONO_HLSB)
 
-        # summed area table
-        # used to quickly count the neighbours within a region
-        self.field_sum = []
-        for _ in range(OLED_HEIGHT):
-            self.field_sum.append([])
-            for _ in range(OLED_WIDTH):
-                self.field_sum[-1].append(0)
+        # the bit-parallel engine that calculates each generation
+        self.life = LifeField(OLED_WIDTH, OLED_HEIGHT)
 
         # how many cells were born this tick?
         self.num_born = 0
@@ -109,10 +274,6 @@ class Conway(EuroPiScript):
         # Set to True if we want to clear the field & respawn
         self.reset_requested = False
 
-        # statically allocated array of the indices of the cells around the one we're considering
-        # this is just an optimization to avoid re-allocating this array
-        self.neighbourhood = [0, 0, 0, 0, 0, 0, 0, 0]
-
         # keep the last few changes in population in a list to check if it's oscillating predictably
         self.population_deltas = []
         self.MAX_DELTAS = 12
@@ -177,58 +338,14 @@ class Conway(EuroPiScript):
                 set_bit(self.next_field, i, False)
                 self.num_alive -= 1
 
+        # count the population from scratch; cells that were already alive & stayed alive aren't
+        # counted above
+        self.life.load(self.field)
+        self.num_alive = self.life.population()
+
         # Assume the whole field has changed
         self.num_changes = NUM_PIXELS
 
-    def update_field_sums(self):
-        """Recalculate the summed area table
-        """
-        for i in range(OLED_HEIGHT):
-            for j in range(OLED_WIDTH):
-                if i == 0 or j == 0:
-                    a = 0
-                else:
-                    a = self.field_sum[i-1][j-1]
-
-                if i == 0:
-                    b = 0
-                else:
-                    b = self.field_sum[i-1][j]
-
-                if j == 0:
-                    c = 0
-                else:
-                    c = self.field_sum[i][j-1]
-
-                self.field_sum[i][j] = get_bit(self.field, i * OLED_WIDTH + j) + b + c - a
-
-    def sum_cells(self, start_row, start_col, end_row, end_col):
-        """Get the sum of all cells in a given sub-matrix
-        A B C
-        D E F
-        G H I
-        If we're getting the sum of [[E F] [H I]] we return
-        I - C - G + A
-        """
-        if start_row == 0 or start_col == 0:
-            a = 0
-        else:
-            a = self.field_sum[start_row - 1][start_col - 1]
-
-        if start_row == 0:
-            c = 0
-        else:
-            c = self.field_sum[start_row - 1][end_col]
-
-        if start_col == 0:
-            g = 0
-        else:
-            g = self.field_sum[end_row][start_col - 1]
-
-        i = self.field_sum[end_row][end_col]
-
-        return i - c - g + a
-
     def draw(self):
         """Show the current playing field on the OLED
         """
@@ -238,8 +355,7 @@ class Conway(EuroPiScript):
     def tick(self):
         """Calculate the state of the next generation
 
-        This checks the regions around every changed space in the previous generation, updating the
-        total population and counting how many births & deaths this generation had.
+        This updates the total population and counts how many births & deaths this generation had.
 
         If a reset was requested, the field is cleared & randomly reset _before_ calculating the new generation
         """
@@ -251,42 +367,12 @@ class Conway(EuroPiScript):
             self.reset_requested = False
             self.reset()
 
-        # iterate through every cell, calculating generational changes
-        self.update_field_sums()
-        for i in range(OLED_HEIGHT):
-            top = max(0, i-1)
-            bottom = min(OLED_HEIGHT-1, i+1)
-
-            for j in range(OLED_WIDTH):
-                left = max(0, j-1)
-                right = min(OLED_WIDTH-1, j+1)
-
-                bit_index = i * OLED_WIDTH + j
-
-                cell_present = get_bit(self.field, bit_index)
-
-                num_neighbours = self.sum_cells(top, left, bottom, right)
-                if cell_present:
-                    num_neighbours = max(0, num_neighbours-1)
-
-                if cell_present:
-                    if num_neighbours == 2 or num_neighbours == 3:  # happy cell, stays alive
-                        set_bit(self.next_field, bit_index, True)
-                    else:                                           # sad cell, dies
-                        set_bit(self.next_field, bit_index, False)
-                        self.num_died += 1
-                        self.num_alive -= 1
-
-                        self.num_changes += 1
-                else:
-                    if num_neighbours == 3:                         # baby cell is born!
-                        set_bit(self.next_field, bit_index, True)
-                        self.num_alive += 1
-                        self.num_born += 1
+        # calculate the whole generation row-by-row & copy the result into the next frame
+        (self.num_born, self.num_died) = self.life.step()
+        self.life.store(self.next_field)
 
-                        self.num_changes += 1
-                    else:                                           # empty space remains empty
-                        set_bit(self.next_field, bit_index, False)
+        self.num_alive += self.num_born - self.num_died
+        self.num_changes = self.num_born + self.num_died
 
         # swap field & next_field so we don't need to copy between arrays
         tmp = self.next_field
@@ -356,7 +442,7 @@ class Conway(EuroPiScript):
                 self.population_deltas.pop(0)
             in_stasis = self.check_for_stasis()
 
-            cv1.voltage(MAX_OUTPUT_VOLTAGE * bitwise_entropy(self.field))
+            cv1.voltage(MAX_OUTPUT_VOLTAGE * count_entropy(self.num_alive, NUM_PIXELS))
             if self.num_born > self.num_died:
                 cv5.on()
             else:
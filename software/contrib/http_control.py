@@ -15,133 +15,56 @@
 Serves a simple HTTP page to control the levels of the six CV outputs from a browser
 
 Requires a Pico W or Pico 2 W with a valid wifi setup to work
+
+The page opens a WebSocket to ``/ws``, over which both sides exchange small binary messages. All
+numbers are big-endian:
+
+- ``0x01 mask cv...``: set the CVs whose bits are set in ``mask`` (bit 0 is CV1); each is a u16
+  in millivolts, in order
+- ``0x02 rate``: stream telemetry ``rate`` times per second (u8; 0 stops it)
+- ``0x81 ain k1 k2 flags``: telemetry sent to the browser; ``ain`` is a u16 in millivolts,
+  ``k1`` and ``k2`` are u16 in hundredths of a percent, and bits 0-2 of the u8 ``flags`` are
+  ``din``, ``b1`` and ``b2``
+
+Browsers without WebSockets fall back to POSTing the CVs as JSON.
+
+The page itself is served from ``www/http_control/index.html`` next to this script, or from the
+gzipped copy made by ``scripts/build_web_assets.py`` if there is one. The UF2 firmware has no
+``www`` directory, so there the page is served from the ``www_http_control`` module frozen into
+it instead.
 """
 
 from europi import *
 from europi_script import EuroPiScript
 
 from experimental.http_server import *
-import json
-
-
-HTML_DOCUMENT = """<!DOCTYPE html>
-<html lang="en">
-    <head>
-        <style>
-            body {
-                font-family: Montserrat;
-                text-align: center;
-            }
-            h1 {
-                font-weight: normal;
-                font-size: 2.5rem;
-                letter-spacing: 1.75rem;
-                padding-left: 1.75rem;
-                text-align: center;
-            }
-            h2 {
-                font-weight:  bold;
-                font-size: 3.0rem;
-            }
-            td {
-                font-weight: lighter;
-                font-size: 2.0rem;
-            }
-            .content-wrapper {
-                margin: 0;
-                position: absolute;
-                top: 50%;
-                align-content: center;
-                width: 100%;
-                -ms-transform: translateY(-50%);
-                transform: translateY(-50%);
-            }
-            table {
-                margin: auto;
-            }
-        </style>
-        <title>
-            EuroPi Web Control
-        </title>
-        <script>
-            function on_change() {
-                cvs = {
-                    "cv1": parseFloat(document.getElementById("cv1").value),
-                    "cv2": parseFloat(document.getElementById("cv2").value),
-                    "cv3": parseFloat(document.getElementById("cv3").value),
-                    "cv4": parseFloat(document.getElementById("cv4").value),
-                    "cv5": parseFloat(document.getElementById("cv5").value),
-                    "cv6": parseFloat(document.getElementById("cv6").value)
-                }
-                console.debug(cvs)
-
-                var xhr = new XMLHttpRequest();
-                var url = document.URL;
-                xhr.open("POST", url, true);
-                xhr.setRequestHeader("Content-Type", "text/json");
-                xhr.onreadystatechange = function () {
-                    if (xhr.readyState === 4 && xhr.status === 200) {
-                        var json = JSON.parse(xhr.responseText);
-                        console.log(json);
-                    }
-                };
-                var data = JSON.stringify(cvs);
-                xhr.send(data);
-            }
-        </script>
-    </head>
-    <body>
-        <h1>EuroPi Web Control</h1>
-        <div class="content-wrapper">
-            <table>
-                <tr>
-                    <td>
-                        CV1
-                    </td>
-                    <td>
-                        CV2
-                    </td>
-                    <td>
-                        CV3
-                    </td>
-                </tr>
-                <tr>
-                    <td>
-                        <input type="range" min="0" max="10" step="0.001" value="0" id="cv1" oninput="on_change()">
-                    </td>
-                    <td>
-                        <input type="range" min="0" max="10" step="0.001" value="0" id="cv2" oninput="on_change()">
-                    </td>
-                    <td>
-                        <input type="range" min="0" max="10" step="0.001" value="0" id="cv3" oninput="on_change()">
-                    </td>
-                </tr>
-                <tr>
-                    <td>
-                        CV4
-                    </td>
-                    <td>
-                        CV5
-                    </td>
-                    <td>
-                        CV6
-                    </td>
-                </tr>
-                <tr>
-                    <td>
-                        <input type="range" min="0" max="10" step="0.001" value="0" id="cv4" oninput="on_change()">
-                    </td>
-                    <td>
-                        <input type="range" min="0" max="10" step="0.001" value="0" id="cv5" oninput="on_change()">
-                    </td>
-                    <td>
-                        <input type="range" min="0" max="10" step="0.001" value="0" id="cv6" oninput="on_change()">
-                    </td>
-                </tr>
-            </table>
-        </div>
-    </body>
-</html>"""
+
+import configuration
+import struct
+import time
+
+## Client -> EuroPi: set some of the CVs
+MSG_SET_CVS = 0x01
+
+## Client -> EuroPi: set the telemetry rate
+MSG_SET_RATE = 0x02
+
+## EuroPi -> client: the current inputs
+MSG_TELEMETRY = 0x81
+
+
+## The directory holding the web page; run scripts/build_web_assets.py to compress it
+try:
+    WWW_DIR = __file__.rsplit("/", 1)[0] + "/www/http_control"
+except NameError:
+    # frozen modules may not have a __file__
+    WWW_DIR = "/lib/contrib/www/http_control"
+
+## The web page frozen into the UF2 firmware, used if it isn't in WWW_DIR
+try:
+    from contrib.www_http_control import FILES as FROZEN_FILES
+except ImportError:
+    FROZEN_FILES = {}
 
 
 class HttpControl(EuroPiScript):
@@ -151,12 +74,28 @@ class HttpControl(EuroPiScript):
 
         self.server = HttpServer(80)
 
+        self.telemetry = bytearray(8)
+        self.telemetry_period_ms = 0
+        self.next_telemetry_at = time.ticks_ms()
+        self.set_telemetry_rate(self.config.TELEMETRY_RATE)
+
+        @self.server.websocket("/ws")
+        def handle_message(connection=None, data=None):
+            if type(data) is str or len(data) < 2:
+                return
+            if data[0] == MSG_SET_CVS:
+                self.set_cvs(data)
+            elif data[0] == MSG_SET_RATE:
+                self.set_telemetry_rate(data[1])
+
         @self.server.get_handler
         def handle_get(connection=None, request=None):
-            self.server.send_html(
-                connection,
-                HTML_DOCUMENT,
-            )
+            filename = f"{WWW_DIR}/index.html"
+            if file_info(filename) is None and "index.html" in FROZEN_FILES:
+                (etag, data, gzipped) = FROZEN_FILES["index.html"]
+                self.server.send_bytes(connection, request, data, etag, gzipped=gzipped)
+            else:
+                self.server.send_file(connection, request, filename)
 
         @self.server.post_handler
         def handle_post(connection=None, request=None):
@@ -182,8 +121,7 @@ class HttpControl(EuroPiScript):
             We only care about the actual JSON body
             """
             try:
-                (_, body) = request.split("\r\n\r\n")
-                jdata = json.loads(body)
+                jdata = request.json()
 
                 for i in range(NUM_CVS):
                     cvs[i].voltage(jdata.get(f"cv{i+1}", 0.0))
@@ -211,13 +149,76 @@ class HttpControl(EuroPiScript):
                     headers=None,
                 )
             except ValueError as err:
-                log_warn(f"{body} is not valid json")
+                log_warning(f"{request.body} is not valid json", "http_control")
                 self.server.send_error_page(
                     err,
                     connection,
                     status=HttpStatus.BAD_REQUEST,
                 )
 
+    @classmethod
+    def config_points(cls):
+        return [
+            # how many times per second the inputs are sent to the browser
+            configuration.integer("TELEMETRY_RATE", default=20, minimum=0, maximum=100),
+        ]
+
+    def set_cvs(self, data):
+        """
+        Set the CVs from a MSG_SET_CVS message
+
+        @param data  The message: the message type, a bitmask of the CVs to set, then a big-endian
+                     u16 voltage in millivolts for each CV in the mask
+        """
+        mask = data[1]
+        offset = 2
+        for i in range(NUM_CVS):
+            if mask & (1 << i):
+                if offset + 2 > len(data):
+                    return
+                cvs[i].voltage(((data[offset] << 8) | data[offset + 1]) / 1000)
+                offset += 2
+
+    def set_telemetry_rate(self, rate):
+        """
+        Change how often the inputs are streamed to the browser
+
+        @param rate  The number of updates per second, or 0 to stop them
+        """
+        if rate > 0:
+            self.telemetry_period_ms = 1000 // rate
+        else:
+            self.telemetry_period_ms = 0
+
+    def send_telemetry(self):
+        """Send the current inputs to every open WebSocket, if it's time to"""
+        if self.telemetry_period_ms == 0 or len(self.server.websockets) == 0:
+            return
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self.next_telemetry_at) < 0:
+            return
+
+        self.next_telemetry_at = time.ticks_add(self.next_telemetry_at, self.telemetry_period_ms)
+        if time.ticks_diff(now, self.next_telemetry_at) >= 0:
+            # we've fallen behind; skip the missed updates rather than sending a burst
+            self.next_telemetry_at = time.ticks_add(now, self.telemetry_period_ms)
+
+        struct.pack_into(
+            ">BHHHB",
+            self.telemetry,
+            0,
+            MSG_TELEMETRY,
+            int(ain.read_voltage() * 1000),
+            int(k1.percent() * 10000),
+            int(k2.percent() * 10000),
+            din.value() | (b1.value() << 1) | (b2.value() << 2),
+        )
+        self.server.broadcast(self.telemetry)
+
+    def teardown(self):
+        # free port 80 & the clients' sockets for the next script
+        self.server.close()
+
     def main(self):
         if wifi_connection is None:
             raise WifiError("No wifi connection")
@@ -233,6 +234,7 @@ Connected""")
 
         while True:
             self.server.check_requests()
+            self.send_telemetry()
 
 
 if __name__ == "__main__":
@@ -347,6 +347,10 @@ class Lutra(EuroPiScript):
             if self.config_dirty:
                 self.save()
 
+    def teardown(self):
+        # stop the GUI thread on the second core
+        self.is_running = False
+
     def main(self):
         self.is_running = True
         try:
@@ -29,6 +29,9 @@ import europi_config
 #  The OLED can display up to 16 characters horizontally, so make sure the names fit
 #  that width requirement
 #
+#  After changing this list, regenerate the prebuilt menu index with
+#  scripts/generate_script_index.py
+#
 # fmt: off
 EUROPI_SCRIPTS = OrderedDict([
 #   ["0123456789abcdef",  "contrib.spam.Eggs"],
@@ -53,7 +56,6 @@ EUROPI_SCRIPTS = OrderedDict([
     ["Gate Phaser",       "contrib.gate_phaser.GatePhaser"],
     ["Hamlet",            "contrib.hamlet.Hamlet"],
     ["HarmonicLFOs",      "contrib.harmonic_lfos.HarmonicLFOs"],
-    ["HTTP Interface",    "contrib.http_control.HttpControl"],
     ["Itty Bitty",        "contrib.itty_bitty.IttyBitty"],
     ["Kompari",           "contrib.kompari.Kompari"],
     ["Logic",             "contrib.logic.Logic"],
@@ -62,7 +64,6 @@ EUROPI_SCRIPTS = OrderedDict([
     ["Morse",             "contrib.morse.Morse"],
     ["NoddyHolder",       "contrib.noddy_holder.NoddyHolder"],
     ["Ocean Surge",       "contrib.ocean_surge.OceanSurge"],
-    ["OSC Interface",     "contrib.osc_control.OscControl"],
     ["Pam's Workout",     "contrib.pams.PamsWorkout2"],
     ["Particle Phys.",    "contrib.particle_physics.ParticlePhysics"],
     ["Pet Rock",          "contrib.pet_rock.PetRock"],
@@ -99,18 +100,20 @@ EUROPI_SCRIPTS = OrderedDict([
     ["_Diagnostic",       "tools.diagnostic.Diagnostic"],
     ["_Exp Cfg Editor",   "tools.experimental_conf_edit.ExperimentalConfigurationEditor"],
 ])
+
+## Scripts that require wifi
+#
+#  These are only added to the menu if the Pico model in use has a wifi module
+WIFI_SCRIPTS = OrderedDict([
+    ["HTTP Interface",    "contrib.http_control.HttpControl"],
+    ["OSC Interface",     "contrib.osc_control.OscControl"],
+])
 # fmt: on
 
 
-# Remove scripts that require wifi if the Pico model in use doesn't
-# have a wifi module included
 cfg = europi_config.load_europi_config()
-if (
-    cfg.PICO_MODEL != europi_config.MODEL_PICO_W
-    and cfg.PICO_MODEL != europi_config.MODEL_PICO_2W
-):
-    EUROPI_SCRIPTS.pop("HTTP Interface")
-    EUROPI_SCRIPTS.pop("OSC Interface")
+if cfg.PICO_MODEL == europi_config.MODEL_PICO_W or cfg.PICO_MODEL == europi_config.MODEL_PICO_2W:
+    EUROPI_SCRIPTS.update(WIFI_SCRIPTS)
 
 
 if __name__ == "__main__":
@@ -308,6 +308,10 @@ class OceanSurge(EuroPiScript):
             if self.settings_dirty:
                 self.save()
 
+    def teardown(self):
+        # stop the GUI thread on the second core
+        self.is_running = False
+
     def main(self):
         self.is_running = True
         try:
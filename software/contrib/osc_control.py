@@ -20,6 +20,10 @@ The following addresses & types are used:
 - /europi/cv{1-6} int: set gate on/off (treated as boolean)
 - /europi/cvs : as above, but allows all outputs to be set at once
 
+Messages may also be sent in OSC bundles, and addresses may use OSC patterns (e.g. /europi/cv[1-3])
+
+The inputs and the levels of the outputs are published as they change; see osc_control.md
+
 The application settings can be used to change the root namespace
 """
 
@@ -27,7 +31,6 @@ from europi import *
 from europi_script import EuroPiScript
 
 import configuration
-from machine import Timer
 
 from experimental.osc import *
 import experimental.wifi
@@ -44,25 +47,47 @@ class OscControl(EuroPiScript):
             send_addr=self.config.SEND_ADDR,
         )
 
+        # publish the inputs & outputs whenever they change
+        self.publisher = OpenSoundPublisher(
+            self.server,
+            rate=self.config.PUBLISH_RATE,
+            threshold=self.config.PUBLISH_THRESHOLD,
+            refresh_ms=self.config.REFRESH_INTERVAL,
+        )
+        self.publisher.add(self.k1_topic, k1.percent)
+        self.publisher.add(self.k2_topic, k2.percent)
+        self.publisher.add(self.ain_topic, ain.percent)
+        self.publisher.add(self.b1_topic, lambda: b1.value() != 0)
+        self.publisher.add(self.b2_topic, lambda: b2.value() != 0)
+        self.publisher.add(self.din_topic, lambda: din.value() != 0)
+
         self.ui_dirty = False
 
-        @self.server.data_handler
-        def on_data_recv(connection=None, data=None):
-            if data.address == self.cv1_topic:
-                self.set_cv(cv1, data)
-            elif data.address == self.cv2_topic:
-                self.set_cv(cv2, data)
-            elif data.address == self.cv3_topic:
-                self.set_cv(cv3, data)
-            elif data.address == self.cv4_topic:
-                self.set_cv(cv4, data)
-            elif data.address == self.cv5_topic:
-                self.set_cv(cv5, data)
-            elif data.address == self.cv6_topic:
-                self.set_cv(cv6, data)
-            elif data.address == self.cvs_topic:
-                # set all CVs at once
-                self.set_cvs(data)
+        # dispatch incoming messages by address; each CV's handler is bound to its output
+        self.router = OpenSoundRouter()
+        topics = [
+            self.cv1_topic,
+            self.cv2_topic,
+            self.cv3_topic,
+            self.cv4_topic,
+            self.cv5_topic,
+            self.cv6_topic,
+        ]
+        for i in range(len(cvs)):
+            self.router.add(
+                topics[i],
+                lambda connection=None, data=None, cv_out=cvs[i]: self.set_cv(cv_out, data),
+            )
+        # set all CVs at once
+        self.router.add(self.cvs_topic, lambda connection=None, data=None: self.set_cvs(data))
+        self.server.data_handler(self.router.dispatch)
+
+        # the outputs are sent back on their own topics, as 0-1 levels like the ones they accept
+        for i in range(len(cvs)):
+            self.publisher.add(
+                topics[i],
+                lambda cv_out=cvs[i]: cv_out.voltage() / europi_config.MAX_OUTPUT_VOLTAGE,
+            )
 
     def sanitize_osc_config(self):
         self.namespace = self.config.NAMESPACE
@@ -101,7 +126,7 @@ class OscControl(EuroPiScript):
         @param cv_out  CV1-6
         @param data  The OpenSoundPacket we're processing
         """
-        if type(data.values[0]) is int:
+        if type(data.values[0]) is int or type(data.values[0]) is bool:
             if data.values[0] == 0:
                 cv_out.off()
             else:
@@ -121,7 +146,7 @@ class OscControl(EuroPiScript):
             t = type(data.values[i])
             cv = cvs[i]
 
-            if t is int:
+            if t is int or t is bool:
                 if v == 0:
                     cv.off()
                 else:
@@ -153,34 +178,12 @@ class OscControl(EuroPiScript):
             configuration.integer("RECV_PORT", default=9000, minimum=0, maximum=65535),
             configuration.integer("SEND_PORT", default=9001, minimum=0, maximum=65535),
             configuration.string("SEND_ADDR", default="192.168.4.100"),
-        ]
 
-    def on_status_tick(self, timer):
-        # send the states of all of our inputs
-        self.server.send_data(
-            self.k1_topic,
-            k1.percent(),
-        )
-        self.server.send_data(
-            self.k2_topic,
-            k2.percent(),
-        )
-        self.server.send_data(
-            self.ain_topic,
-            ain.percent(),
-        )
-        self.server.send_data(
-            self.b1_topic,
-            b1.value() != 0,
-        )
-        self.server.send_data(
-            self.b2_topic,
-            b2.value() != 0,
-        )
-        self.server.send_data(
-            self.din_topic,
-            din.value() != 0,
-        )
+            # Publishing settings
+            configuration.integer("PUBLISH_RATE", default=20, minimum=1, maximum=100),
+            configuration.floatingPoint("PUBLISH_THRESHOLD", default=0.005, minimum=0.0, maximum=1.0),
+            configuration.integer("REFRESH_INTERVAL", default=1000, minimum=0, maximum=60000),
+        ]
 
     def draw(self):
         oled.fill(0)
@@ -194,6 +197,10 @@ class OscControl(EuroPiScript):
         oled.show()
         self.ui_dirty = False
 
+    def teardown(self):
+        # free the OSC ports for the next script
+        self.server.close()
+
     def main(self):
         if wifi_connection is None:
             raise experimental.wifi.WifiError("No wifi connection")
@@ -201,12 +208,9 @@ class OscControl(EuroPiScript):
         oled.centre_text(f"""{wifi_connection.ip_addr}
 waiting...""")
 
-        # start a timer to send our input state at 10Hz
-        timer = Timer()
-        timer.init(freq=20, mode=Timer.PERIODIC, callback=self.on_status_tick)
-
         while True:
             self.server.receive_data()
+            self.publisher.poll()
             if self.ui_dirty:
                 self.draw()
 
@@ -1536,6 +1536,9 @@ class PamsWorkout2(EuroPiScript):
     def bank_filename(self, bank):
         return f'saved_state_{self.__class__.__qualname__}_{bank.lower().replace(" ", "_")}.json'
 
+    def teardown(self):
+        self.clock.stop()
+
     def main(self):
         prev_k1 = CV_INS["KNOB"].percent()
         prev_k2 = k2_bank.current.percent()
@@ -19,7 +19,9 @@ import time
 
 from collections import OrderedDict
 from europi import oled, OLED_HEIGHT, OLED_WIDTH, CHAR_HEIGHT, CHAR_WIDTH, reset_state
+from europi_hardware import set_main_loop_hook
 from europi_log import *
+from europi_profiler import profiler, PROFILE_FILE
 from europi_script import EuroPiScript
 from ui import Menu
 
@@ -27,6 +29,18 @@ SCRIPT_DIR = "/lib/contrib/"
 REG_FILE_CODE = 0x8000
 DEBUG = False
 
+# How long a script has to unwind after the user asks to exit to the menu before we give up and
+# hard-reset the module instead
+EXIT_TIMEOUT_MS = 1000
+
+
+class ScriptExit(BaseException):
+    """Raised inside a running script to unwind it when the user exits to the menu
+
+    This derives from ``BaseException`` so that scripts' own ``except Exception`` blocks don't
+    swallow it.
+    """
+
 
 class PrintMemoryUse:
     def __init__(self, label=""):
@@ -63,6 +77,12 @@ class BootloaderMenu(EuroPiScript):
     In a program that was launched from the menu:
 
     * Hold both buttons for at least 0.5s and release to return to the menu.
+
+    By default switching between the menu and a script is done in-place (see ``WARM_SCRIPT_SWITCH`` in
+    ``europi_config``): the running script is torn down with its ``teardown()`` method and ``reset_state()``, its
+    module is unloaded, and the next script is started without rebooting. If the switch fails, e.g. the script
+    doesn't unwind within ``EXIT_TIMEOUT_MS`` or there isn't enough free memory to start the next script, the module
+    is hard-reset instead.
     """
 
     def __init__(self, scripts):
@@ -74,6 +94,17 @@ class BootloaderMenu(EuroPiScript):
         self.scripts = scripts
         self.run_request = None
 
+        self.warm_switch = europi.europi_config.WARM_SCRIPT_SWITCH
+        self.running_script = None
+        self.exit_timer = None
+
+        # set by the button IRQ; the script is unwound from the main thread by check_exit
+        self.exit_requested = False
+
+        # ticks_ms when the last script was selected from the menu, used to measure launch latency
+        self.selected_at = None
+        self.last_launch_ms = None
+
     @staticmethod
     def show_progress(percentage):
         oled.hline(0, OLED_HEIGHT - 1, int(OLED_WIDTH * percentage), 1)
@@ -117,10 +148,75 @@ class BootloaderMenu(EuroPiScript):
         self.run_request = self.scripts[selected_item]
 
     def exit_to_menu(self):
+        """Button handler for returning to the menu when both buttons are held
+
+        This runs in the buttons' IRQ, where an exception can't unwind the script, so a warm switch
+        only sets ``exit_requested``. ``check_exit`` raises ``ScriptExit`` the next time the script
+        reads a knob or ``ain`` or calls ``oled.show()``.
+        """
+        if self.exit_requested:
+            return
         self.remove_state()
         # Attempt to save the state of this script if it has been implemented.
         self.save_state()  # TODO: isn't this the wrong state?
-        machine.reset()  # why doesn't machine.soft_reset() work anymore?
+
+        if not self.warm_switch or self.running_script is None:
+            if profiler.enabled:
+                profiler.dump(PROFILE_FILE)
+            flush_log()
+            machine.reset()  # why doesn't machine.soft_reset() work anymore?
+
+        # Unwind the running script back to main(). If it doesn't get there in time (e.g. it's stuck
+        # in a blocking call, or never reads an input) fall back to a hard reset
+        self.exit_timer = machine.Timer()
+        self.exit_timer.init(
+            mode=machine.Timer.ONE_SHOT,
+            period=EXIT_TIMEOUT_MS,
+            callback=lambda t: machine.reset(),
+        )
+        self.exit_requested = True
+
+    def check_exit(self):
+        """Unwind the running script if the user has asked to exit to the menu
+
+        Installed with ``set_main_loop_hook`` while a script runs. ``exit_requested`` stays set until
+        ``run_script`` catches the exception, in case the hook is first called from one of the
+        script's own IRQ handlers. Log messages that have been buffered for too long are written out
+        here too, as a script may not log anything else for a while.
+        """
+        if self.exit_requested:
+            raise ScriptExit()
+        flush_log_if_due()
+
+    def cancel_exit_timer(self):
+        """Stop the hard-reset fallback started by ``exit_to_menu``"""
+        if self.exit_timer is not None:
+            self.exit_timer.deinit()
+            self.exit_timer = None
+
+    def teardown_script(self):
+        """Return the hardware to its initial state after a script exits & free the script's memory
+
+        This is only needed when switching scripts without resetting the module. Any buffered log messages
+        are written out, and if profiling is enabled the script's profile is saved to ``PROFILE_FILE`` first.
+        The running script, if any, is released before collecting so its memory is actually freed.
+        """
+        flush_log()
+        oled.stop_background_flush()
+        script = self.running_script
+        self.running_script = None
+        if script is not None:
+            script.teardown()
+            if profiler.enabled:
+                profiler.dump(PROFILE_FILE)
+                profiler.reset()
+            module = script.__class__.__module__
+            if module.startswith("contrib.") and module in sys.modules:
+                # unload the script so its module-level objects can be collected
+                del sys.modules[module]
+            script = None
+        reset_state()
+        gc.collect()
 
     def run_menu(self) -> type:
         """Prompt the user to select a EuroPiScript class from the menu and return it
@@ -159,55 +255,113 @@ class BootloaderMenu(EuroPiScript):
     def main(self):
         saved_state = self.load_state_json()
         script_class_name = saved_state.get("last_launched", None)
-        script_class = None
 
-        if script_class_name:
-            script_class = self.get_class_for_name(script_class_name)
+        while True:
+            script_class = None
+            if script_class_name:
+                script_class = self.get_class_for_name(script_class_name)
+
+            if not script_class:
+                script_class = self.run_menu()
+                self.selected_at = time.ticks_ms()
+                script_class_name = f"{script_class.__module__}.{script_class.__name__}"
+                self.save_state_json({"last_launched": script_class_name})
+                if not self.warm_switch:
+                    flush_log()
+                    machine.reset()
+                self.menu = None
+                self.run_request = None
+                self.teardown_script()
+
+            if not self.run_script(script_class, script_class_name):
+                return
+
+            # the user exited back to the menu
+            script_class_name = None
+
+    def run_script(self, script_class, script_class_name):
+        """Run the selected script until it exits or crashes
+
+        :param script_class:  The ``EuroPiScript`` subclass to run
+        :param script_class_name:  The fully-qualified name of ``script_class``
+        :return: True if the user exited back to the menu, False if the script returned or crashed
+        """
+        # setup the exit handlers, and execute the selection
+        self.exit_requested = False
+        europi.b1._handler_both(europi.b2, self.exit_to_menu)
+        europi.b2._handler_both(europi.b1, self.exit_to_menu)
+        set_main_loop_hook(self.check_exit)
 
-        if not script_class:
-            script_class = self.run_menu()
-            self.save_state_json(
-                {"last_launched": f"{script_class.__module__}.{script_class.__name__}"}
-            )
-            machine.reset()
-        else:
-            # setup the exit handlers, and execute the selection
-            europi.b1._handler_both(europi.b2, self.exit_to_menu)
-            europi.b2._handler_both(europi.b1, self.exit_to_menu)
+        try:
+            if (
+                europi.europi_config.MENU_AFTER_POWER_ON
+                or script_class_name == "calibrate.Calibrate"
+            ):
+                # Remove the last-launched file to force the module back to the menu after it powers-on next time
+                self.save_state_json({})
 
             try:
-                if (
-                    europi.europi_config.MENU_AFTER_POWER_ON
-                    or script_class_name == "calibrate.Calibrate"
-                ):
-                    # Remove the last-launched file to force the module back to the menu after it powers-on next time
-                    self.save_state_json({})
-
-                script_class().main()
+                self.running_script = script_class()
+            except MemoryError:
+                if self.selected_at is None:
+                    raise
+                # not enough memory left after running the menu in-place; the last-launched script
+                # is saved, so a clean boot will start it
+                log_warning(f"Out of memory launching {script_class_name}; resetting", "bootloader")
+                flush_log()
+                machine.reset()
+
+            # when launched in-place this is the menu->script latency, otherwise it's the time since boot
+            if self.selected_at is None:
+                self.last_launch_ms = time.ticks_ms()
+            else:
+                self.last_launch_ms = time.ticks_diff(time.ticks_ms(), self.selected_at)
+            if DEBUG:
+                log_info(f"Launched {script_class_name} in {self.last_launch_ms}ms", "bootloader")
+
+            self.running_script.main()
+            set_main_loop_hook(None)
+            return False
+        except ScriptExit:
+            set_main_loop_hook(None)
+            self.exit_requested = False
+            self.cancel_exit_timer()
+            try:
+                self.teardown_script()
             except Exception as err:
-                # set all outputs to zero for safety
-                europi.turn_off_all_cvs()
-
-                # in case we have the USB cable connected, print the stack trace for debugging
-                # otherwise, just halt and show the error message
-                log_error(f"Failed to run script: {err}", "bootloader")
-                sys.print_exception(err)
-
-                # show the type & first portion of the exception on the OLED
-                # we can only fit so many characters, so truncate as needed
-                MAX_CHARS = OLED_WIDTH // CHAR_WIDTH
-                self.show_error(
-                    "Crash", f"{err.__class__.__name__[0:MAX_CHARS]}\n{str(err)[0:MAX_CHARS]}", -1
-                )
-
-                # Log the crash to a file for later analysis/recovery
-                try:
-                    with open("last_crash.log", "w") as log_file:
-                        log_file.write(f"{time.ticks_ms()}: {err}\n")
-                        sys.print_exception(err, log_file)
-
-                    log_error(f"Crash! See last_crash.txt for details: {err}", "bootloader")
-                except:
-                    # If we fail to create the error log, just silently fail; we don't need
-                    # an additional exception to handle
-                    pass
+                log_error(f"Failed to tear down {script_class_name}: {err}", "bootloader")
+                machine.reset()
+            self.selected_at = None
+            return True
+        except Exception as err:
+            set_main_loop_hook(None)
+
+            # set all outputs to zero for safety
+            europi.turn_off_all_cvs()
+
+            # in case we have the USB cable connected, print the stack trace for debugging
+            # otherwise, just halt and show the error message
+            log_error(f"Failed to run script: {err}", "bootloader")
+            sys.print_exception(err)
+
+            # show the type & first portion of the exception on the OLED
+            # we can only fit so many characters, so truncate as needed
+            MAX_CHARS = OLED_WIDTH // CHAR_WIDTH
+            self.show_error(
+                "Crash", f"{err.__class__.__name__[0:MAX_CHARS]}\n{str(err)[0:MAX_CHARS]}", -1
+            )
+
+            # Log the crash to a file for later analysis/recovery
+            try:
+                with open("last_crash.log", "w") as log_file:
+                    log_file.write(f"{time.ticks_ms()}: {err}\n")
+                    sys.print_exception(err, log_file)
+                if profiler.enabled:
+                    profiler.dump(PROFILE_FILE)
+
+                log_error(f"Crash! See last_crash.txt for details: {err}", "bootloader")
+            except:
+                # If we fail to create the error log, just silently fail; we don't need
+                # an additional exception to handle
+                pass
+            return False
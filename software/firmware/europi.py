@@ -37,6 +37,7 @@ from europi_config import load_europi_config, MODEL_PICO_2W, MODEL_PICO_W
 from europi_display import Display, DummyDisplay
 from europi_hardware import *
 from europi_log import *
+from europi_profiler import profiler
 
 from experimental.experimental_config import load_experimental_config
 from experimental.wifi import WifiConnection, WifiError
@@ -138,5 +139,10 @@ Cancel: B1"""
 else:
     wifi_connection = None
 
+# Start profiling before any script registers its handlers, so they're timed too
+if europi_config.PROFILING:
+    profiler.enable()
+    profiler.instrument_display(oled)
+
 # Reset the module state upon import.
 reset_state()
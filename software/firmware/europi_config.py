@@ -236,6 +236,16 @@ class EuroPiConfig:
                 name="MENU_AFTER_POWER_ON",
                 default=False,
             ),
+            configuration.boolean(
+                name="WARM_SCRIPT_SWITCH",
+                default=True,
+            ),
+
+            # Diagnostics
+            configuration.boolean(
+                name="PROFILING",
+                default=False,
+            ),
         ]
         # fmt: on
 
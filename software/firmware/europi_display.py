@@ -15,10 +15,14 @@
 Classes and definitions for interacting with the OLED display
 """
 
+from array import array
 from machine import I2C, Pin
 import ssd1306
+import utime
 from ssd1306 import SSD1306_I2C
 
+from europi_hardware import run_main_loop_hook
+
 # Default font is 8x8 pixel monospaced font.
 CHAR_WIDTH = 8
 CHAR_HEIGHT = 8
@@ -38,8 +42,31 @@ class Display(SSD1306_I2C):
 
     More explanations and tips about the the display can be found in the oled_tips file
     `oled_tips.md <https://github.com/Allen-Synthesis/EuroPi/blob/main/software/oled_tips.md>`_
+
+    The display keeps track of which parts of the framebuffer have been drawn to since the last
+    call to ``show()``, and only sends those parts over I2C. The SSD1306 stores pixels in 8-pixel
+    tall pages, so the changed region is tracked as a range of columns within each page. If so
+    much of the screen has changed that a partial update would not save anything, the whole
+    framebuffer is sent instead.
+
+    Scripts that modify ``oled.buffer`` directly must call ``mark_dirty()`` (or
+    ``show(full_refresh=True)``) so the change is sent to the display.
+
+    The number of bytes sent over I2C by the last call to ``show()`` is available as
+    ``last_frame_bytes``, and the running total as ``total_bytes``.
+
+    Sending a frame can still take several milliseconds. ``start_background_flush()`` moves the
+    transfer onto the second core so ``show()`` returns immediately. In that mode
+    ``frames_sent``, ``frames_dropped`` and ``frame_rate`` show how well the display is keeping
+    up with the script.
     """
 
+    # Each command is sent as its own I2C write of a control byte + the command byte
+    CMD_BYTES = 2
+
+    # Setting a column & page window takes 6 commands
+    WINDOW_BYTES = 6 * CMD_BYTES
+
     def __init__(
         # fmt: off
         self,
@@ -56,6 +83,32 @@ class Display(SSD1306_I2C):
         i2c = I2C(channel, sda=Pin(sda), scl=Pin(scl), freq=freq)
         self.width = width
         self.height = height
+
+        # Per-page range of dirty columns; x0 > x1 means the page is clean
+        # These must exist before the SSD1306 constructor clears the screen
+        n_pages = height // 8
+        self._dirty_x0 = array("h", [0] * n_pages)
+        self._dirty_x1 = array("h", [width - 1] * n_pages)
+        self._all_dirty = True
+
+        # Narrow displays use the centre columns of the controller's RAM
+        self._col_offset = (128 - width) // 2 if width != 128 else 0
+
+        self.last_frame_bytes = 0
+        self.total_bytes = 0
+
+        # Background flushing state; see start_background_flush
+        self._back_buffer = None
+        self._back_windows = None
+        self._flush_pending = False
+        self._frame_deferred = False
+        self._flush_running = False
+        self._flush_thread_active = False
+        self._last_frame_ms = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.frame_rate = 0.0
+
         super().__init__(self.width, self.height, i2c)
         self.rotate(rotate)
         self.contrast(contrast)
@@ -74,6 +127,302 @@ class Display(SSD1306_I2C):
         self.write_cmd(ssd1306.SET_COM_OUT_DIR | ((rotate & 1) << 3))
         self.write_cmd(ssd1306.SET_SEG_REMAP | (rotate & 1))
 
+    def mark_dirty(self, x, y, width, height):
+        """Flag a rectangular region of the framebuffer as needing to be sent on the next ``show()``
+
+        Drawing functions call this automatically; scripts only need to call it if they modify
+        the framebuffer directly.
+
+        :param x:  The left edge of the region
+        :param y:  The top edge of the region
+        :param width:  The width of the region in pixels
+        :param height:  The height of the region in pixels
+        """
+        x0 = x if x > 0 else 0
+        x1 = x + width - 1
+        if x1 >= self.width:
+            x1 = self.width - 1
+        y0 = y if y > 0 else 0
+        y1 = y + height - 1
+        if y1 >= self.height:
+            y1 = self.height - 1
+        if x0 > x1 or y0 > y1:
+            return
+
+        dirty_x0 = self._dirty_x0
+        dirty_x1 = self._dirty_x1
+        for page in range(y0 >> 3, (y1 >> 3) + 1):
+            if dirty_x0[page] > dirty_x1[page]:
+                dirty_x0[page] = x0
+                dirty_x1[page] = x1
+            else:
+                if x0 < dirty_x0[page]:
+                    dirty_x0[page] = x0
+                if x1 > dirty_x1[page]:
+                    dirty_x1[page] = x1
+
+    def mark_all_dirty(self):
+        """Flag the whole framebuffer as needing to be sent on the next ``show()``"""
+        self._all_dirty = True
+
+    def _clear_dirty(self):
+        self._all_dirty = False
+        for page in range(len(self._dirty_x0)):
+            self._dirty_x0[page] = self.width
+            self._dirty_x1[page] = -1
+
+    def _write_window(self, x0, x1, page0, page1, data):
+        """Send a window of the framebuffer to the display
+
+        :param x0:  The first column of the window
+        :param x1:  The last column of the window
+        :param page0:  The first page of the window
+        :param page1:  The last page of the window
+        :param data:  A list of buffers to send, one per page
+        """
+        self.write_cmd(ssd1306.SET_COL_ADDR)
+        self.write_cmd(x0 + self._col_offset)
+        self.write_cmd(x1 + self._col_offset)
+        self.write_cmd(ssd1306.SET_PAGE_ADDR)
+        self.write_cmd(page0)
+        self.write_cmd(page1)
+        self.i2c.writevto(self.addr, [b"\x40"] + data)
+
+        n_bytes = Display.WINDOW_BYTES + 1
+        for d in data:
+            n_bytes += len(d)
+        return n_bytes
+
+    def _take_windows(self, full_refresh):
+        """Convert the dirty regions into a list of windows to send and mark everything clean
+
+        :param full_refresh:  If True, the whole framebuffer is sent regardless of what has changed
+        :return: A list of (x0, x1, page0, page1) windows, or None if the whole frame should be sent
+        """
+        windows = None
+        if not (full_refresh or self._all_dirty):
+            n_pages = len(self._dirty_x0)
+            dirty_x0 = self._dirty_x0
+            dirty_x1 = self._dirty_x1
+
+            # Group consecutive pages with identical column ranges into a single window
+            windows = []
+            partial_cost = 0
+            page = 0
+            while page < n_pages:
+                x0 = dirty_x0[page]
+                x1 = dirty_x1[page]
+                if x0 > x1:
+                    page += 1
+                    continue
+                end = page
+                while end + 1 < n_pages and dirty_x0[end + 1] == x0 and dirty_x1[end + 1] == x1:
+                    end += 1
+                windows.append((x0, x1, page, end))
+                partial_cost += Display.WINDOW_BYTES + 1 + (x1 - x0 + 1) * (end - page + 1)
+                page = end + 1
+
+            if partial_cost >= Display.WINDOW_BYTES + 1 + self.width * n_pages:
+                windows = None
+
+        self._clear_dirty()
+        return windows
+
+    def _transmit(self, buffer, windows):
+        """Send the given windows of a framebuffer to the display
+
+        :param buffer:  The framebuffer's bytes
+        :param windows:  The windows to send, as returned by ``_take_windows``
+        """
+        width = self.width
+        buffer = memoryview(buffer)
+        if windows is None:
+            sent = self._write_window(0, width - 1, 0, len(self._dirty_x0) - 1, [buffer])
+        else:
+            sent = 0
+            for x0, x1, page0, page1 in windows:
+                sent += self._write_window(
+                    x0,
+                    x1,
+                    page0,
+                    page1,
+                    [buffer[p * width + x0 : p * width + x1 + 1] for p in range(page0, page1 + 1)],
+                )
+        self.last_frame_bytes = sent
+        self.total_bytes += sent
+
+    def show(self, full_refresh=False):
+        """Send the changed parts of the framebuffer to the display
+
+        If background flushing has been started with ``start_background_flush()`` this copies the
+        framebuffer and returns immediately; the copy is sent to the display by the background
+        worker.
+
+        :param full_refresh:  If True, the whole framebuffer is sent regardless of what has changed
+        """
+        run_main_loop_hook()
+        if self._back_buffer is None:
+            self._transmit(self.buffer, self._take_windows(full_refresh))
+            return
+
+        if self._flush_pending:
+            # The worker is still busy with an earlier frame; it sends the latest framebuffer
+            # once it's done. The dirty regions are kept, so the next frame sent from here
+            # includes these changes too
+            self.frames_dropped += 1
+            if full_refresh:
+                self._all_dirty = True
+            self._frame_deferred = True
+            return
+
+        self._back_buffer[:] = self.buffer
+        self._back_windows = self._take_windows(full_refresh)
+        self._frame_deferred = False
+        self._flush_pending = True
+
+    def start_background_flush(self, use_thread=True):
+        """Send frames to the display in the background instead of blocking in ``show()``
+
+        After calling this, ``show()`` copies the framebuffer into a back buffer and returns
+        immediately. If a frame is still being sent when ``show()`` is called again the new frame
+        isn't copied (see ``frames_dropped``); instead the worker sends the whole framebuffer
+        as soon as it finishes, so the display always ends up showing the latest frame even if
+        the script doesn't call ``show()`` again.
+
+        The worker runs on the Pico's second core using ``_thread``, so it cannot be combined
+        with scripts that start their own second thread. If ``use_thread`` is False no thread
+        is started and the script must call ``process_background_flush()`` itself, e.g. from a
+        timer or from a quieter part of its main loop.
+
+        While background flushing is active, only the worker should use the display's I2C bus.
+        See MULTITHREADING.md for more details on using the second core.
+
+        :param use_thread:  If True, start a thread on the second core to send the frames
+        """
+        if self._back_buffer is not None:
+            return
+
+        self._back_buffer = bytearray(len(self.buffer))
+        self._back_windows = None
+        self._flush_pending = False
+        self._frame_deferred = False
+        self._flush_running = True
+
+        if use_thread:
+            import _thread
+
+            self._flush_thread_active = True
+            _thread.start_new_thread(self._flush_thread, ())
+
+    def stop_background_flush(self):
+        """Stop the background worker and return to sending frames directly from ``show()``"""
+        if self._back_buffer is None:
+            return
+
+        self._flush_running = False
+        while self._flush_thread_active:
+            utime.sleep_ms(1)
+
+        if self._flush_pending:
+            self._transmit(self._back_buffer, self._back_windows)
+            self._flush_pending = False
+        self._back_buffer = None
+        if self._frame_deferred:
+            self._frame_deferred = False
+            self._transmit(self.buffer, self._take_windows(False))
+
+    def process_background_flush(self):
+        """Send the pending frame, if there is one
+
+        :return: True if a frame was sent, otherwise False
+        """
+        if not self._flush_pending:
+            if not self._frame_deferred:
+                return False
+            # show() was called while the last frame was being sent. The dirty regions belong to
+            # the script's thread, so send the whole frame rather than touching them
+            self._frame_deferred = False
+            self._back_buffer[:] = self.buffer
+            self._back_windows = None
+
+        self._transmit(self._back_buffer, self._back_windows)
+
+        now = utime.ticks_ms()
+        if self.frames_sent > 0:
+            elapsed = utime.ticks_diff(now, self._last_frame_ms)
+            if elapsed > 0:
+                # smooth the frame rate so it's readable when displayed
+                self.frame_rate = self.frame_rate * 0.9 + (1000 / elapsed) * 0.1
+        self._last_frame_ms = now
+        self.frames_sent += 1
+
+        # release the back buffer only once we're completely finished with it
+        self._flush_pending = False
+        return True
+
+    def _flush_thread(self):
+        try:
+            while self._flush_running:
+                if not self.process_background_flush():
+                    utime.sleep_ms(1)
+        finally:
+            self._flush_thread_active = False
+
+    # Drawing functions; these flag the affected region as dirty and then draw to the framebuffer
+
+    def fill(self, c):
+        self._all_dirty = True
+        super().fill(c)
+
+    def pixel(self, x, y, *args):
+        if args:
+            self.mark_dirty(x, y, 1, 1)
+        return super().pixel(x, y, *args)
+
+    def hline(self, x, y, w, c):
+        self.mark_dirty(x, y, w, 1)
+        super().hline(x, y, w, c)
+
+    def vline(self, x, y, h, c):
+        self.mark_dirty(x, y, 1, h)
+        super().vline(x, y, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        self.mark_dirty(min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1)
+        super().line(x1, y1, x2, y2, c)
+
+    def rect(self, x, y, w, h, c, *args):
+        self.mark_dirty(x, y, w, h)
+        super().rect(x, y, w, h, c, *args)
+
+    def fill_rect(self, x, y, w, h, c):
+        self.mark_dirty(x, y, w, h)
+        super().fill_rect(x, y, w, h, c)
+
+    def ellipse(self, x, y, xr, yr, c, *args):
+        self.mark_dirty(x - xr, y - yr, 2 * xr + 1, 2 * yr + 1)
+        super().ellipse(x, y, xr, yr, c, *args)
+
+    def poly(self, x, y, coords, c, *args):
+        self._all_dirty = True
+        super().poly(x, y, coords, c, *args)
+
+    def text(self, s, x, y, *args):
+        self.mark_dirty(x, y, len(s) * CHAR_WIDTH, CHAR_HEIGHT)
+        super().text(s, x, y, *args)
+
+    def blit(self, fbuf, x, y, *args):
+        # MicroPython's FrameBuffer doesn't expose its size, so unless the source provides one
+        # assume it covers everything to the bottom-right of (x, y)
+        self.mark_dirty(
+            x, y, getattr(fbuf, "width", self.width - x), getattr(fbuf, "height", self.height - y)
+        )
+        super().blit(fbuf, x, y, *args)
+
+    def scroll(self, xstep, ystep):
+        self._all_dirty = True
+        super().scroll(xstep, ystep)
+
     def centre_text(self, text, clear_first=True, auto_show=True):
         """Display one or more lines of text centred both horizontally and vertically.
 
@@ -110,16 +459,36 @@ class DummyDisplay:
     def __init__(self, width, height):
         self.width = width
         self.height = height
+        self.last_frame_bytes = 0
+        self.total_bytes = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.frame_rate = 0.0
 
     def rotate(self, rotate):
         pass
 
-    def centre_text(self, text, clear_first=True, auto_show=True):
+    def start_background_flush(self, use_thread=True):
         pass
 
-    def show(self):
+    def stop_background_flush(self):
         pass
 
+    def process_background_flush(self):
+        return False
+
+    def mark_dirty(self, x, y, width, height):
+        pass
+
+    def mark_all_dirty(self):
+        pass
+
+    def centre_text(self, text, clear_first=True, auto_show=True):
+        pass
+
+    def show(self, full_refresh=False):
+        run_main_loop_hook()
+
     def fill(self, color):
         pass
 
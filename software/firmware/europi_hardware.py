@@ -29,9 +29,10 @@ from machine import PWM
 from machine import Pin
 from machine import freq
 from machine import mem32
+from array import array
 import time
 
-from europi_config import load_europi_config, CPU_FREQS
+from europi_config import load_europi_config, CPU_FREQS, MODEL_PICO_2, MODEL_PICO_2W
 from experimental.experimental_config import load_experimental_config
 
 # Load the configuration objects so we can initialize
@@ -45,6 +46,9 @@ MAX_INPUT_VOLTAGE = europi_config.MAX_INPUT_VOLTAGE
 GATE_VOLTAGE = europi_config.GATE_VOLTAGE
 DEFAULT_SAMPLES = 32
 
+# The number of edges a DigitalReader can queue in capture mode
+DEFAULT_EDGE_CAPACITY = 64
+
 # Output voltage range
 MIN_OUTPUT_VOLTAGE = 0
 MAX_OUTPUT_VOLTAGE = europi_config.MAX_OUTPUT_VOLTAGE
@@ -107,6 +111,31 @@ if type(OUTPUT_CALIBRATION_VALUES[0]) is int:
         OUTPUT_CALIBRATION_VALUES.append(cv1_values)
 
 
+# Called from the main thread whenever a script reads an analogue input or updates the OLED
+_main_loop_hook = None
+
+
+def set_main_loop_hook(func):
+    """
+    Set a function to call whenever a script reads a knob or ``ain``, or calls ``oled.show()``
+
+    Nearly every script does one of these in its main loop, so the bootloader uses this to stop a
+    running script from the main thread: an exception raised by the hook unwinds the script. A
+    script that reads an input from an IRQ handler will also call the hook there, so the hook must
+    keep raising until the main thread has handled it.
+
+    :param func:  A function that takes no arguments, or None to remove the hook
+    """
+    global _main_loop_hook
+    _main_loop_hook = func
+
+
+def run_main_loop_hook():
+    """Call the function set with ``set_main_loop_hook()``, if there is one"""
+    if _main_loop_hook is not None:
+        _main_loop_hook()
+
+
 def clamp(value: int | float, low: int | float, high: int | float):
     """
     Returns a value that is no lower than 'low' and no higher than 'high'.
@@ -138,6 +167,8 @@ class AnalogueReader:
 
     def _sample_adc(self, samples=None):
         # Over-samples the ADC and returns the average.
+        if _main_loop_hook is not None:
+            _main_loop_hook()
         value = 0
         for _ in range(samples or self._samples):
             value += self.pin.read_u16()
@@ -308,6 +339,124 @@ class Knob(AnalogueReader):
         return self.range(steps, samples, deadzone)
 
 
+class EdgeQueue:
+    """A preallocated ring buffer of input edges, written by an IRQ and read by the main loop.
+
+    Only the IRQ writes ``head`` and only the main loop writes ``tail``, so no locking is needed and
+    adding an edge never allocates. One slot is always left empty to tell a full queue from an empty
+    one. If the main loop falls behind and the queue fills, new edges are dropped and counted in
+    ``overflows``.
+
+    Draining the queue also tracks the time of the most recent rising edge and the period between
+    the last two rising edges, in microseconds.
+
+    :param capacity:  The maximum number of edges that can be waiting, plus one
+    """
+
+    def __init__(self, capacity=DEFAULT_EDGE_CAPACITY):
+        self.capacity = capacity
+        self.times = array("L", [0] * capacity)
+        self.levels = bytearray(capacity)
+
+        # the index the next edge is written to; only changed by push()
+        self.head = 0
+
+        # the index the next edge is read from; only changed by the main loop
+        self.tail = 0
+
+        # the number of edges dropped because the queue was full
+        self.overflows = 0
+
+        # the number of rising edges drained, ticks_us of the most recent one, and the period
+        # between the last two (0 until two rising edges have been drained)
+        self.rising_count = 0
+        self.last_rising_us = 0
+        self.period_us = 0
+
+    def push(self, ticks_us, level):
+        """Add an edge to the queue. This is safe to call from an IRQ.
+
+        :param ticks_us:  The time of the edge, from ``time.ticks_us()``
+        :param level:  The level of the input after the edge, HIGH or LOW
+        """
+        head = self.head
+        next_head = head + 1
+        if next_head == self.capacity:
+            next_head = 0
+        if next_head == self.tail:
+            self.overflows += 1
+            return
+        self.times[head] = ticks_us
+        self.levels[head] = level
+        self.head = next_head
+
+    def __len__(self):
+        n = self.head - self.tail
+        if n < 0:
+            n += self.capacity
+        return n
+
+    def _consume(self, ticks_us, level):
+        """Update the rising edge timing as an edge is removed from the queue"""
+        if level == HIGH:
+            if self.rising_count:
+                self.period_us = time.ticks_diff(ticks_us, self.last_rising_us)
+            self.last_rising_us = ticks_us
+            self.rising_count += 1
+
+    def pop(self):
+        """Remove the oldest edge from the queue
+
+        :return: A tuple of (ticks_us, level), or None if the queue is empty
+        """
+        tail = self.tail
+        if tail == self.head:
+            return None
+        ticks_us = self.times[tail]
+        level = self.levels[tail]
+        tail += 1
+        self.tail = 0 if tail == self.capacity else tail
+        self._consume(ticks_us, level)
+        return (ticks_us, level)
+
+    def drain(self, times=None, levels=None):
+        """Remove all waiting edges from the queue in one batch
+
+        Edges can optionally be copied into preallocated buffers. If the buffers are shorter than
+        the number of waiting edges the rest are left in the queue.
+
+        :param times:  An array to copy the edges' timestamps into, or None
+        :param levels:  An array or bytearray to copy the edges' levels into, or None
+        :return: The number of edges removed
+        """
+        head = self.head
+        tail = self.tail
+        limit = len(times) if times is not None else self.capacity
+        n = 0
+        while tail != head and n < limit:
+            ticks_us = self.times[tail]
+            level = self.levels[tail]
+            if times is not None:
+                times[n] = ticks_us
+            if levels is not None:
+                levels[n] = level
+            self._consume(ticks_us, level)
+            n += 1
+            tail += 1
+            if tail == self.capacity:
+                tail = 0
+        self.tail = tail
+        return n
+
+    def clear(self):
+        """Discard any waiting edges, the overflow count and the rising edge timing"""
+        self.tail = self.head
+        self.overflows = 0
+        self.rising_count = 0
+        self.last_rising_us = 0
+        self.period_us = 0
+
+
 class DigitalReader:
     """A base class for common digital inputs methods.
 
@@ -334,6 +483,10 @@ class DigitalReader:
         self.last_rising_ms = 0
         self.last_falling_ms = 0
 
+        # The queue of edges and the pin's IRQ object when in capture mode
+        self.edges = None
+        self._irq = None
+
     def _bounce_wrapper(self, pin):
         """IRQ handler wrapper for falling and rising edge callback functions."""
         if self.value() == HIGH:
@@ -355,6 +508,57 @@ class DigitalReader:
                 return self._both_handler()
             return self._falling_handler()
 
+    def _capture_irq(self, pin):
+        """Hard IRQ handler for capture mode; queues the time & level of the edge.
+
+        This runs as soon as the edge fires, so it must not allocate. The level comes from the
+        edge that fired rather than the pin, which may have changed again already. The inputs are
+        inverted, so a falling edge on the pin is a rising edge of the signal.
+        """
+        now = time.ticks_us()
+        flags = self._irq.flags()
+        if flags == Pin.IRQ_FALLING:
+            self.edges.push(now, HIGH)
+        elif flags == Pin.IRQ_RISING:
+            self.edges.push(now, LOW)
+        else:
+            # both edges fired before the handler ran; queue them in the order the pin's current
+            # level implies so a short pulse is still counted
+            if pin.value():
+                self.edges.push(now, HIGH)
+                self.edges.push(now, LOW)
+            else:
+                self.edges.push(now, LOW)
+                self.edges.push(now, HIGH)
+
+    def capture(self, capacity=DEFAULT_EDGE_CAPACITY):
+        """Record every edge in a queue instead of calling handlers from the IRQ.
+
+        The IRQ only stores the ``ticks_us()`` timestamp and level of each edge; no debouncing is
+        done and the rising/falling handlers are not called. The main loop should drain the queue
+        regularly::
+
+            edges = din.capture()
+            while True:
+                if edges.drain():
+                    bpm = 60_000_000 / edges.period_us if edges.period_us else 0
+                ...
+
+        This is suited to fast clocks, where calling Python handlers in the IRQ would cause edges
+        to be missed. The edges are recorded by a hard IRQ, so the timestamps are taken when the
+        edge fires rather than whenever the scheduler gets round to it. If the main loop falls
+        behind and the queue fills, the newest edges are dropped and counted in
+        ``edges.overflows``. Call ``reset_handler()`` to leave capture mode.
+
+        :param capacity:  The size of the queue
+        :return: The ``EdgeQueue`` edges are written to
+        """
+        self.edges = EdgeQueue(capacity)
+        # fetch the IRQ object before arming it; an edge can fire before pin.irq() returns
+        self._irq = self.pin.irq(handler=None)
+        self.pin.irq(handler=self._capture_irq, trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING, hard=True)
+        return self.edges
+
     def value(self):
         """The current binary value, HIGH (1) or LOW (0)."""
         # Both the digital input and buttons are normally high, and 'pulled'
@@ -378,6 +582,12 @@ class DigitalReader:
 
     def reset_handler(self):
         self.pin.irq(handler=None)
+        self._rising_handler = lambda: None
+        self._falling_handler = lambda: None
+        self._both_handler = lambda: None
+        self._other = None
+        self.edges = None
+        self._irq = None
 
     def _handler_both(self, other, func):
         """When this and other are high, execute the both func."""
@@ -496,6 +706,7 @@ class Output:
         gate_voltage=GATE_VOLTAGE,
         calibration_values=OUTPUT_CALIBRATION_VALUES[0],
     ):
+        self.pin_id = pin
         self.pin = PWM(Pin(pin))
         self.pin.freq(PWM_FREQ)
         self.MIN_VOLTAGE = min_voltage
@@ -509,11 +720,97 @@ class Output:
             self._gradients.append(self._calibration_values[index + 1] - value)
         self._gradients.append(self._gradients[-1])
 
+        # Integer copies of the voltage range, used by voltage_mv
+        self._min_mv = int(self.MIN_VOLTAGE * 1000)
+        self._max_mv = int(self.MAX_VOLTAGE * 1000)
+
+        # Optional lookup table built by build_duty_table
+        self._duty_table = None
+        self._steps_per_volt = 0
+
     def _set_duty(self, cycle):
         cycle = int(cycle)
         self.pin.duty_u16(clamp(cycle, 0, MAX_UINT16))
         self._duty = cycle
 
+    def duty_for_voltage(self, voltage):
+        """
+        Calculate the calibrated duty cycle for a voltage without changing the output.
+
+        :param voltage:  The desired output voltage. This is clamped to MIN_VOLTAGE-MAX_VOLTAGE
+        :return: The 16-bit duty cycle that ``voltage(voltage)`` would write to the PWM
+        """
+        voltage = clamp(voltage, self.MIN_VOLTAGE, self.MAX_VOLTAGE)
+        index = int(voltage // 1)
+        duty = int(self._calibration_values[index] + (self._gradients[index] * (voltage % 1)))
+        return clamp(duty, 0, MAX_UINT16)
+
+    def set_duty_raw(self, duty):
+        """
+        Write a raw PWM duty cycle to the output with no calibration or range checking.
+
+        This is the fastest way to change the output, intended for hot loops that have already
+        computed the duty cycle, e.g. from ``build_duty_table()``.
+
+        :param duty:  The 16-bit duty cycle, 0-65535. The caller is responsible for keeping this
+            in range
+        """
+        self.pin.duty_u16(duty)
+        self._duty = duty
+
+    def voltage_mv(self, millivolts):
+        """
+        Set the output voltage in integer millivolts.
+
+        Equivalent to ``voltage(millivolts / 1000)``, but uses only integer arithmetic.
+
+        :param millivolts:  The desired output in millivolts, e.g. 2500 for 2.5V
+        """
+        if millivolts < self._min_mv:
+            millivolts = self._min_mv
+        elif millivolts > self._max_mv:
+            millivolts = self._max_mv
+        index = millivolts // 1000
+        self.set_duty_raw(
+            self._calibration_values[index] + self._gradients[index] * (millivolts % 1000) // 1000
+        )
+
+    def build_duty_table(self, steps_per_volt=100):
+        """
+        Precompute the calibrated duty cycle for every step between 0V and MAX_VOLTAGE.
+
+        Once built, ``voltage_step(n)`` sets the output to ``n / steps_per_volt`` volts with a
+        single table lookup. For example, ``steps_per_volt=12`` gives one entry per semitone and
+        ``steps_per_volt=1000`` gives millivolt resolution.
+
+        The table uses 2 bytes per entry, so high resolutions can use a lot of RAM; 100 steps per
+        volt over a 10V range uses about 2kB per output.
+
+        :param steps_per_volt:  The number of table entries per volt
+        """
+        n_steps = int(self.MAX_VOLTAGE * steps_per_volt) + 1
+        table = array("H", [0] * n_steps)
+        for step in range(n_steps):
+            table[step] = self.duty_for_voltage(step / steps_per_volt)
+        self._duty_table = table
+        self._steps_per_volt = steps_per_volt
+
+    def voltage_step(self, step):
+        """
+        Set the output voltage to ``step / steps_per_volt`` using the table from ``build_duty_table()``.
+
+        ``build_duty_table()`` must be called before using this method. Steps beyond the end of
+        the table are clamped to MAX_VOLTAGE.
+
+        :param step:  The integer index into the duty table
+        """
+        table = self._duty_table
+        if step < 0:
+            step = 0
+        elif step >= len(table):
+            step = len(table) - 1
+        self.set_duty_raw(table[step])
+
     def voltage(self, voltage=None):
         """
         Set the output voltage to the provided value within the range of MIN_VOLTAGE to MAX_VOLTAGE
@@ -559,6 +856,118 @@ class Output:
             self.off()
 
 
+class OutputBank:
+    """
+    Sets several outputs together in a single pass.
+
+    Setting the outputs one after another with ``cv.voltage(...)`` means each output changes
+    slightly later than the one before it. ``OutputBank`` calculates every duty cycle first and
+    then writes them all in one tight loop, keeping the skew between channels as small as
+    possible::
+
+        cv_bank.set_voltages([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+
+    Optionally the bank can write the RP2040/RP2350 PWM compare registers directly. Each PWM
+    slice drives two outputs, so both channels of a slice change on the same PWM period. This
+    bypasses MicroPython's ``PWM`` object, so it should only be used on real hardware.
+
+    :param outputs:  The list of ``Output`` objects in the bank
+    :param use_registers:  If True, commit the duty cycles by writing the PWM registers directly
+    """
+
+    # PWM peripheral base addresses; see the RP2040 and RP2350 datasheets
+    RP2040_PWM_BASE = 0x40050000
+    RP2350_PWM_BASE = 0x400A8000
+
+    # Each slice has CSR, DIV, CTR, CC and TOP registers
+    PWM_SLICE_STRIDE = 0x14
+    PWM_CC_OFFSET = 0x0C
+    PWM_TOP_OFFSET = 0x10
+
+    def __init__(self, outputs, use_registers=False):
+        self.outputs = outputs
+        self.use_registers = use_registers
+        self._duties = array("H", [0] * len(outputs))
+
+        if europi_config.PICO_MODEL == MODEL_PICO_2 or europi_config.PICO_MODEL == MODEL_PICO_2W:
+            base = OutputBank.RP2350_PWM_BASE
+        else:
+            base = OutputBank.RP2040_PWM_BASE
+
+        # Group the outputs by PWM slice: [cc_address, top_address, output index for A, for B]
+        # An index of -1 means that channel of the slice is not part of this bank
+        self._slices = []
+        slice_indices = {}
+        for index, output in enumerate(outputs):
+            slice_base = base + OutputBank.pwm_slice(output.pin_id) * OutputBank.PWM_SLICE_STRIDE
+            if slice_base not in slice_indices:
+                slice_indices[slice_base] = len(self._slices)
+                self._slices.append(
+                    [
+                        slice_base + OutputBank.PWM_CC_OFFSET,
+                        slice_base + OutputBank.PWM_TOP_OFFSET,
+                        -1,
+                        -1,
+                    ]
+                )
+            self._slices[slice_indices[slice_base]][2 + (output.pin_id & 1)] = index
+
+    @staticmethod
+    def pwm_slice(pin_id):
+        """
+        Get the number of the PWM slice that drives a GPIO pin.
+
+        Both chips map GPIO0-31 to slices 0-7 the same way; only the RP2350B's extra GPIO32-47
+        use slices 8-11.
+
+        :param pin_id:  The GPIO number
+        :return: The slice number
+        """
+        if pin_id < 32:
+            return (pin_id >> 1) & 7
+        return 8 + ((pin_id >> 1) & 3)
+
+    def set_voltages(self, voltages):
+        """
+        Set the voltage of every output in the bank.
+
+        :param voltages:  A list of voltages, one per output, in the same order as the outputs
+        """
+        duties = self._duties
+        outputs = self.outputs
+        for i in range(len(outputs)):
+            duties[i] = outputs[i].duty_for_voltage(voltages[i])
+        self.set_duties(duties)
+
+    def set_duties(self, duties):
+        """
+        Write precomputed duty cycles to every output in the bank.
+
+        :param duties:  A list or array of 16-bit duty cycles, one per output
+        """
+        if self.use_registers:
+            self._write_registers(duties)
+        else:
+            outputs = self.outputs
+            for i in range(len(outputs)):
+                outputs[i].set_duty_raw(duties[i])
+
+    def _write_registers(self, duties):
+        for cc_address, top_address, index_a, index_b in self._slices:
+            # Scale the duty cycles the same way MicroPython's PWM.duty_u16 does
+            top = mem32[top_address] + 1
+            cc = mem32[cc_address]
+            if index_a >= 0:
+                cc = (cc & 0xFFFF0000) | min(duties[index_a] * top // MAX_UINT16, 0xFFFF)
+            if index_b >= 0:
+                cc = (cc & 0x0000FFFF) | (min(duties[index_b] * top // MAX_UINT16, 0xFFFF) << 16)
+            mem32[cc_address] = cc
+
+        outputs = self.outputs
+        for i in range(len(outputs)):
+            outputs[i]._duty = duties[i]
+
+
 class Thermometer:
     """
     Wrapper for the temperature sensor connected to Pin 4
@@ -639,6 +1048,9 @@ cv5 = Output(PIN_CV5, calibration_values=OUTPUT_CALIBRATION_VALUES[4])
 cv6 = Output(PIN_CV6, calibration_values=OUTPUT_CALIBRATION_VALUES[5])
 cvs = [cv1, cv2, cv3, cv4, cv5, cv6]
 
+# Helper object for setting all of the CV outputs at once
+cv_bank = OutputBank(cvs)
+
 # Helper object for reading the onboard temperature sensor
 thermometer = Thermometer()
 
@@ -25,9 +25,108 @@ unique to each module to make tracing the source of warnings easier
 
 Log messages are written to the console and saved to /europi_log.txt. Importing
 the ``europi`` module will reset the log file.
+
+Writing to flash is slow, so messages are collected in RAM and appended to the
+file in batches: when the buffer is full, when the oldest buffered message is
+more than ``flush_interval_ms`` old, or when an error is logged. The age is
+checked when a message is logged and by ``flush_log_if_due()``, which the
+bootloader calls whenever the running script reads a knob or ``ain`` or calls
+``oled.show()``. Call ``flush_log()`` to write any buffered messages
+immediately; the bootloader does this when a script crashes or exits. Once the file grows past ``max_size``
+bytes it is renamed to /europi_log.1.txt and a new file is started.
+
+Messages below the level set with ``configure_log()`` are discarded before
+anything is formatted. To avoid building an expensive message that would be
+discarded anyway, check ``log_enabled()`` first::
+
+    if log_enabled(LOG_DEBUG):
+        log_debug(f"state: {self.dump_state()}", "my_script")
 """
 
 import os
+from utime import ticks_diff, ticks_ms
+
+## Log levels, in increasing order of severity
+LOG_DEBUG = 0
+LOG_INFO = 1
+LOG_WARNING = 2
+LOG_ERROR = 3
+
+## Use as the level to disable logging completely
+LOG_NONE = 4
+
+LOG_FILE = "/europi_log.txt"
+OLD_LOG_FILE = "/europi_log.1.txt"
+
+## How many messages are kept in RAM before they are written to the file
+DEFAULT_BUFFER_LINES = 32
+
+## The longest a message is kept in RAM before it is written to the file
+DEFAULT_FLUSH_INTERVAL_MS = 5000
+
+## The size the log file can reach before it's rotated
+DEFAULT_MAX_SIZE = 16 * 1024
+
+
+class LogBuffer:
+    """Messages waiting to be written to the log file, and the settings that control writing them"""
+
+    def __init__(self):
+        self.level = LOG_DEBUG
+        self.console = True
+        self.buffer_lines = DEFAULT_BUFFER_LINES
+        self.flush_interval_ms = DEFAULT_FLUSH_INTERVAL_MS
+        self.max_size = DEFAULT_MAX_SIZE
+
+        # preallocated so adding a message doesn't grow the list
+        self.lines = [None] * self.buffer_lines
+        self.count = 0
+
+        # ticks_ms when the oldest message in the buffer was logged
+        self.oldest_ms = 0
+
+        # the size of the log file, or None if we haven't checked it yet
+        self.file_size = None
+
+
+_log = LogBuffer()
+
+
+def configure_log(
+    level=None, console=None, buffer_lines=None, flush_interval_ms=None, max_size=None
+):
+    """
+    Change how messages are logged.
+
+    Any argument that is None leaves that setting unchanged.
+
+    :param level: The lowest level of message to log, e.g. ``LOG_WARNING``
+    :param console: If True, messages are also printed to the console
+    :param buffer_lines: The number of messages to collect before writing them to the file
+    :param flush_interval_ms: The longest a message is kept before it's written to the file
+    :param max_size: The size in bytes the log file can reach before it's rotated
+    """
+    if level is not None:
+        _log.level = level
+    if console is not None:
+        _log.console = console
+    if buffer_lines is not None:
+        flush_log()
+        _log.buffer_lines = max(1, buffer_lines)
+        _log.lines = [None] * _log.buffer_lines
+    if flush_interval_ms is not None:
+        _log.flush_interval_ms = flush_interval_ms
+    if max_size is not None:
+        _log.max_size = max_size
+
+
+def log_enabled(level):
+    """
+    Will messages of the given level be logged?
+
+    :param level: The level to check, e.g. ``LOG_DEBUG``
+    """
+    return level >= _log.level
 
 
 def log_info(message, tag=None):
@@ -37,6 +136,8 @@ def log_info(message, tag=None):
     :param message: The message to log
     :param tag: An optional tag to use as a prefix (e.g. the module name)
     """
+    if LOG_INFO < _log.level:
+        return
     if tag:
         write_log_entry(f"[INFO] [{tag}] {message}")
     else:
@@ -52,6 +153,8 @@ def log_warning(message, tag=None):
     :param message: The message to log
     :param tag: An optional tag to use as a prefix (e.g. the module name)
     """
+    if LOG_WARNING < _log.level:
+        return
     if tag:
         write_log_entry(f"[WARN] [{tag}] {message}")
     else:
@@ -63,15 +166,18 @@ def log_error(message, tag=None):
     Log an error message.
 
     Errors are critical and may indicate a crash, missing hardware, or other
-    unrecoverable errors.
+    unrecoverable errors. Error messages are written to the file immediately.
 
     :param message: The message to log
     :param tag: An optional tag to use as a prefix (e.g. the module name)
     """
+    if LOG_ERROR < _log.level:
+        return
     if tag:
         write_log_entry(f"[ERR ] [{tag}] {message}")
     else:
         write_log_entry(f"[ERR ] {message}")
+    flush_log()
 
 
 def log_debug(message, tag=None):
@@ -84,6 +190,8 @@ def log_debug(message, tag=None):
     :param message: The message to log
     :param tag: An optional tag to use as a prefix (e.g. the module name)
     """
+    if LOG_DEBUG < _log.level:
+        return
     if tag:
         write_log_entry(f"[DBUG] [{tag}] {message}")
     else:
@@ -94,17 +202,84 @@ def write_log_entry(log_entry: str):
     """
     Write line to the log.
 
-    When logged, the message is written to the console and saved to /europi_log.txt
+    When logged, the message is written to the console and added to the buffer of lines waiting
+    to be saved to /europi_log.txt
 
     :param log_entry:  The line of text to write to the log
     """
-    print(log_entry)
+    if _log.console:
+        print(log_entry)
+
+    if _log.count == 0:
+        _log.oldest_ms = ticks_ms()
+    _log.lines[_log.count] = log_entry
+    _log.count += 1
+
+    if (
+        _log.count >= _log.buffer_lines
+        or ticks_diff(ticks_ms(), _log.oldest_ms) >= _log.flush_interval_ms
+    ):
+        flush_log()
+
+
+def _rotate_log():
+    """Replace the old log file with the current one, so a new one is started"""
     try:
-        with open("/europi_log.txt", "a") as log_out:
-            log_out.write(log_entry)
-            log_out.write("\n")
+        os.remove(OLD_LOG_FILE)
     except Exception:
         pass
+    try:
+        os.rename(LOG_FILE, OLD_LOG_FILE)
+    except Exception:
+        pass
+    _log.file_size = 0
+
+
+def flush_log():
+    """
+    Write any buffered messages to /europi_log.txt.
+
+    This is safe to call from an exception handler; errors writing the file are ignored.
+    """
+    count = _log.count
+    if count == 0:
+        return
+    lines = _log.lines
+    _log.count = 0
+
+    try:
+        if _log.file_size is None:
+            try:
+                _log.file_size = os.stat(LOG_FILE)[6]
+            except OSError:
+                _log.file_size = 0
+        if _log.file_size >= _log.max_size:
+            _rotate_log()
+
+        with open(LOG_FILE, "a") as log_out:
+            for i in range(count):
+                line = lines[i]
+                log_out.write(line)
+                log_out.write("\n")
+                _log.file_size += len(line) + 1
+    except Exception:
+        pass
+
+    # release the strings so they can be garbage collected
+    for i in range(count):
+        lines[i] = None
+
+
+def flush_log_if_due():
+    """
+    Write the buffered messages to /europi_log.txt if the oldest has waited ``flush_interval_ms``.
+
+    Without this a script that logs a few messages & then stops logging would keep them in RAM
+    until the next message, error or exit. This is cheap when nothing is buffered, so it can be
+    called from a main loop.
+    """
+    if _log.count and ticks_diff(ticks_ms(), _log.oldest_ms) >= _log.flush_interval_ms:
+        flush_log()
 
 
 def init_log():
@@ -113,7 +288,9 @@ def init_log():
 
     This is done automatically by europi.py when it is imported
     """
+    _log.count = 0
+    _log.file_size = 0
     try:
-        os.remove("/europi_log.txt")
+        os.remove(LOG_FILE)
     except Exception:
         pass
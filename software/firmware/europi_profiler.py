@@ -0,0 +1,274 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Opt-in timing of scripts' main loops and of the firmware's hot paths
+
+Profiling is turned on by setting ``PROFILING`` to ``true`` in the EuroPi configuration (see
+CONFIGURATION.md), or by calling ``profiler.enable()`` before any handlers are registered. When
+enabled, the time taken by every digital input/button handler, every ADC read and every
+``oled.show()`` is recorded, along with any sections the running script times itself::
+
+    class MyScript(EuroPiScript):
+        def __init__(self):
+            super().__init__()
+            self.draw_profile = self.profile_section("draw")
+
+        def main(self):
+            while True:
+                ...
+                start = self.draw_profile.start()
+                self.draw()
+                self.draw_profile.stop(start)
+
+Each section stores its most recent durations in a preallocated ring buffer, so recording a
+sample never allocates. ``profiler.dump()`` prints the min/mean/max/99th percentile of each
+section to the USB serial console, or writes them to a file. The bootloader writes them to
+``PROFILE_FILE`` whenever a script exits back to the menu.
+
+When profiling is disabled the hot paths are not modified at all, and ``section()`` returns a
+shared section whose ``start()`` and ``stop()`` do nothing.
+"""
+
+from array import array
+from utime import ticks_diff, ticks_us
+
+## How many of the most recent samples each section keeps
+DEFAULT_CAPACITY = 128
+
+## The file the bootloader saves the profile to when a script exits
+PROFILE_FILE = "profile.txt"
+
+## Names of the sections used for the firmware's own hot paths
+SECTION_INPUT_HANDLER = "isr:input"
+SECTION_ADC = "adc"
+SECTION_OLED_SHOW = "oled.show"
+
+
+class ProfileSection:
+    """A named section of code whose durations are being recorded
+
+    :param name:  The name shown in the profile report
+    :param capacity:  The number of samples kept; older samples are overwritten
+    """
+
+    def __init__(self, name, capacity=DEFAULT_CAPACITY):
+        self.name = name
+        self.samples = array("L", [0] * capacity)
+        self.capacity = capacity
+
+        # the index the next sample is written to
+        self.next_index = 0
+
+        # the total number of samples recorded, including any that have been overwritten
+        self.count = 0
+
+    def start(self):
+        """Mark the start of the section
+
+        :return: The start time, to be passed to ``stop()``
+        """
+        return ticks_us()
+
+    def stop(self, start):
+        """Mark the end of the section and record its duration
+
+        :param start:  The value returned by ``start()``
+        """
+        self.record(ticks_diff(ticks_us(), start))
+
+    def record(self, duration_us):
+        """Record a duration that was measured elsewhere
+
+        :param duration_us:  The duration in microseconds
+        """
+        self.samples[self.next_index] = duration_us
+        self.next_index += 1
+        if self.next_index == self.capacity:
+            self.next_index = 0
+        self.count += 1
+
+    def reset(self):
+        """Discard all recorded samples"""
+        self.next_index = 0
+        self.count = 0
+
+    def stats(self):
+        """Summarise the recorded samples
+
+        :return: A tuple of (count, min, mean, max, p99) in microseconds, calculated over the samples
+            still in the buffer, or None if nothing has been recorded. ``count`` is the total number
+            of samples ever recorded
+        """
+        n = min(self.count, self.capacity)
+        if n == 0:
+            return None
+        values = sorted(self.samples[0:n])
+        p99 = values[(99 * n + 99) // 100 - 1]
+        return (self.count, values[0], sum(values) / n, values[-1], p99)
+
+
+class NullSection:
+    """Stands in for a ``ProfileSection`` when profiling is disabled"""
+
+    name = ""
+    count = 0
+
+    def start(self):
+        return 0
+
+    def stop(self, start):
+        pass
+
+    def record(self, duration_us):
+        pass
+
+    def reset(self):
+        pass
+
+    def stats(self):
+        return None
+
+
+NULL_SECTION = NullSection()
+
+
+def timed(func, section):
+    """Wrap a function so every call is recorded in a section
+
+    :param func:  The function to wrap
+    :param section:  The ``ProfileSection`` to record the calls in
+    :return: The wrapped function
+    """
+
+    def wrapper(*args, **kwargs):
+        start = ticks_us()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            section.record(ticks_diff(ticks_us(), start))
+
+    return wrapper
+
+
+def timed_irq(func, section):
+    """Wrap a hard IRQ handler method so every call is recorded in a section
+
+    Unlike ``timed()`` the wrapper takes fixed arguments, so calling it doesn't allocate.
+
+    :param func:  The method to wrap; it must take ``self`` and the pin
+    :param section:  The ``ProfileSection`` to record the calls in
+    :return: The wrapped method
+    """
+
+    def wrapper(self, pin):
+        start = ticks_us()
+        func(self, pin)
+        section.record(ticks_diff(ticks_us(), start))
+
+    return wrapper
+
+
+class Profiler:
+    """A collection of profiled sections
+
+    Use the shared ``profiler`` instance rather than creating new ones.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.capacity = DEFAULT_CAPACITY
+        self.sections = {}
+
+    def enable(self, capacity=DEFAULT_CAPACITY):
+        """Start profiling, and instrument the firmware's hot paths
+
+        Handlers registered before this is called are not timed, so this should be called before
+        the script is created.
+
+        :param capacity:  The number of samples each section keeps
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        self.capacity = capacity
+
+        # imported here so that simply importing the profiler doesn't pull in the hardware
+        from europi_hardware import AnalogueReader, DigitalReader
+
+        AnalogueReader._sample_adc = timed(AnalogueReader._sample_adc, self.section(SECTION_ADC))
+        DigitalReader._bounce_wrapper = timed(
+            DigitalReader._bounce_wrapper, self.section(SECTION_INPUT_HANDLER)
+        )
+        DigitalReader._capture_irq = timed_irq(
+            DigitalReader._capture_irq, self.section(SECTION_INPUT_HANDLER)
+        )
+
+    def instrument_display(self, oled):
+        """Time every call to ``show()`` on the given display
+
+        :param oled:  The display object, i.e. ``europi.oled``
+        """
+        if self.enabled:
+            oled.show = timed(oled.show, self.section(SECTION_OLED_SHOW))
+
+    def section(self, name):
+        """Get the section with the given name, creating it if needed
+
+        :param name:  The name of the section
+        :return: The ``ProfileSection``, or a section that records nothing if profiling is
+            disabled
+        """
+        if not self.enabled:
+            return NULL_SECTION
+        section = self.sections.get(name)
+        if section is None:
+            section = ProfileSection(name, self.capacity)
+            self.sections[name] = section
+        return section
+
+    def reset(self):
+        """Discard the samples recorded in every section"""
+        for section in self.sections.values():
+            section.reset()
+
+    def report(self):
+        """Summarise every section that has recorded samples
+
+        :return: A list of lines of text, one per section, plus a header
+        """
+        lines = [f"{'section': <16}{'count': >8}{'min': >8}{'mean': >10}{'max': >8}{'p99': >8}"]
+        for name in sorted(self.sections.keys()):
+            stats = self.sections[name].stats()
+            if stats is not None:
+                (count, lo, mean, hi, p99) = stats
+                lines.append(f"{name: <16}{count: >8}{lo: >8}{mean: >10.1f}{hi: >8}{p99: >8}")
+        return lines
+
+    def dump(self, filename=None):
+        """Print the profile report to the console, or write it to a file
+
+        :param filename:  The file to write to. If None the report is printed
+        """
+        lines = self.report()
+        if filename is None:
+            for line in lines:
+                print(line)
+        else:
+            with open(filename, "w") as f:
+                for line in lines:
+                    f.write(line)
+                    f.write("\n")
+
+
+profiler = Profiler()
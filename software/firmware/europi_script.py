@@ -18,7 +18,9 @@ import json
 from utime import ticks_diff, ticks_ms
 from configuration import ConfigSpec, ConfigFile
 from europi_config import EuroPiConfig
+from europi_profiler import profiler
 from file_utils import load_file, delete_file, load_json_file
+from state_log import StateLog
 
 
 class EuroPiScript:
@@ -79,7 +81,8 @@ class EuroPiScript:
         #. **Save state upon state change.** When a state variable changes, call the save state function.
 
         #. **Implement save_state() method.** Provide an implementation to serialize the state variables into a string, JSON, or
-           bytes an call the appropriate save state method.
+           bytes an call the appropriate save state method. Scripts with large or frequently-changing state can use
+           ``save_state_struct()`` instead, which only writes the fields that changed.
 
         #. **Throttle the frequency of saves.** Saving state too often could negatively impact the performance of your script, so it is
            advised to add some checks in your code to ensure it doesn't save too frequently.
@@ -157,6 +160,25 @@ class EuroPiScript:
     Users can create and edit configuration files in order to change a script's configuration. The
     files should be uploaded to the pico in the `/config` directory. To assist in generating initial
     versions of these files, see `/scripts/generate_default_configs.py`.
+
+    **Profiling**
+
+    If ``PROFILING`` is enabled in the EuroPi configuration, the time spent in input handlers, ADC reads and
+    ``oled.show()`` is recorded automatically. Scripts can time parts of their main loop too, using sections from
+    ``profile_section()``::
+
+        def __init__(self):
+            super().__init__()
+            self.update_profile = self.profile_section("update")
+
+        def main(self):
+            while True:
+                start = self.update_profile.start()
+                self.update()
+                self.update_profile.stop(start)
+
+    When profiling is disabled the section's ``start()`` and ``stop()`` do nothing. The results are saved to
+    ``profile.txt`` when the script exits to the menu; see ``europi_profiler`` for details.
     """
 
     def __init__(self):
@@ -168,6 +190,24 @@ class EuroPiScript:
         """Override this method with your script's main loop method."""
         raise NotImplementedError
 
+    def teardown(self):
+        """Override this method to release anything your script started that the bootloader can't reset itself.
+
+        When the user exits to the menu the bootloader normally switches scripts without rebooting. Outputs, button
+        and digital input handlers are reset automatically, but hardware timers and threads on the second core keep
+        running unless the script stops them here.
+        """
+        pass
+
+    @staticmethod
+    def profile_section(name):
+        """Get a section for timing part of this script
+
+        :param name:  The name of the section, shown in the profile report
+        :return: A ``ProfileSection``, or a section that records nothing if profiling is disabled
+        """
+        return profiler.section(name)
+
     @classmethod
     def display_name(cls) -> str:
         """Returns the string used to identify this script in the Menu. Defaults to the class name. Override it if you
@@ -187,6 +227,13 @@ class EuroPiScript:
     def _state_filename(self):
         return f"saved_state_{self.__class__.__qualname__}.txt"
 
+    @property
+    def _state_log(self):
+        # created on first use, since not every subclass calls super().__init__()
+        if getattr(self, "_state_log_file", None) is None:
+            self._state_log_file = StateLog(f"saved_state_{self.__class__.__qualname__}.bin")
+        return self._state_log_file
+
     def save_state(self):
         """Encode state and call the appropriate persistence save method.
 
@@ -239,9 +286,44 @@ class EuroPiScript:
         """
         return load_json_file(self._state_filename)
 
+    def save_state_struct(self, state: dict):
+        """Save the given fields to this script's binary state log.
+
+        Unlike ``save_state_json()``, only the fields in ``state`` are written; fields saved previously
+        keep their values. ``int``, ``float``, ``bool``, ``str``, ``bytes`` and ``array.array`` values are
+        stored in a compact binary format, and arrays are written to flash directly from their own buffers.
+        Other values (e.g. lists and dicts) are stored as JSON.
+
+        Each save is committed atomically: if the module loses power part-way through, the previously
+        saved values are loaded next time.
+
+        .. note::
+            Be mindful of how often `save_state_struct()` is called because
+            writing to disk too often can slow down the performance of your
+            script.
+        """
+        self._state_log.write(state)
+        self._last_saved = ticks_ms()
+
+    def load_state_struct(self) -> dict:
+        """Load the fields saved with ``save_state_struct()`` as a dict.
+
+        If this script has no binary state log yet but does have a JSON state file from
+        ``save_state_json()``, the JSON state is converted to a binary log, the JSON file is removed, and
+        its contents are returned. If no state is found, an empty dictionary will be returned.
+        """
+        if not self._state_log.exists():
+            state = load_json_file(self._state_filename)
+            if state:
+                self._state_log.write(state)
+                delete_file(self._state_filename)
+            return state
+        return self._state_log.load()
+
     def remove_state(self):
         """Remove the state file for this script."""
         delete_file(self._state_filename)
+        self._state_log.remove()
 
     def last_saved(self):
         """Return the ticks in milliseconds since last save."""
@@ -0,0 +1,222 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Background ADC sampling for analogue inputs and knobs
+
+Normally every call to e.g. ``ain.percent()`` or ``k1.choice(...)`` over-samples the ADC
+``DEFAULT_SAMPLES`` times before returning. Scripts that read the same input several times per
+loop spend most of their time waiting on the ADC.
+
+The ``AdcSampler`` instead reads the ADC channels round-robin from a hardware timer and keeps a
+ring buffer of the most recent readings for each channel, along with a running total. Reading a
+``SampledAnalogueInput`` or ``SampledKnob`` then just returns the running average of the buffer,
+which does not depend on the buffer size.
+
+Example usage::
+
+    from europi import ain, k1, k2
+    from experimental.adc_sampler import AdcSampler, SampledAnalogueInput, SampledKnob
+
+    sampler = AdcSampler(rate=3000, buffer_size=16)
+    s_ain = SampledAnalogueInput(ain, sampler)
+    s_k1 = SampledKnob(k1, sampler)
+    s_k2 = SampledKnob(k2, sampler)
+    sampler.start()
+
+    while True:
+        volts = s_ain.read_voltage()
+        ...
+
+The sampled readers have the same API as ``AnalogueInput`` and ``Knob``. While the sampler is
+running the ``samples`` parameter of their methods is ignored; the smoothing is determined by
+the sampler's ``buffer_size`` instead. If the sampler has not been started, or has not yet read
+the channel, the readers fall back to sampling the ADC directly.
+"""
+
+from array import array
+from machine import Timer
+
+from europi_hardware import AnalogueInput, Knob
+
+# Default total sampling rate in Hz, shared between all channels
+DEFAULT_SAMPLE_RATE = 3000
+
+# Default number of readings kept per channel
+DEFAULT_BUFFER_SIZE = 16
+
+
+class AdcSampler:
+    """
+    Continuously samples one or more ADC channels in the background.
+
+    Each timer tick reads a single channel; the channels are visited round-robin, so the
+    per-channel sampling rate is ``rate / number_of_channels``.
+
+    :param rate:  The total number of ADC reads per second across all channels
+    :param buffer_size:  The number of readings to keep per channel. Readings are averaged over
+        this window
+    """
+
+    def __init__(self, rate=DEFAULT_SAMPLE_RATE, buffer_size=DEFAULT_BUFFER_SIZE):
+        if buffer_size < 1:
+            raise ValueError(f"buffer_size must be at least 1, got: {buffer_size}")
+
+        self.rate = rate
+        self.buffer_size = buffer_size
+
+        self._adcs = []
+        self._buffers = []
+        self._sums = []
+        self._indices = []
+        self._counts = []
+        self._next_channel = 0
+
+        self._timer = None
+
+    def add_channel(self, adc):
+        """
+        Register an ADC to be sampled.
+
+        :param adc:  The ``machine.ADC`` object to read
+        :return: The channel index used to read the filtered value back with ``.value()``
+        """
+        for ch in range(len(self._adcs)):
+            if self._adcs[ch] is adc:
+                return ch
+
+        self._adcs.append(adc)
+        self._buffers.append(array("H", [0] * self.buffer_size))
+        self._sums.append(0)
+        self._indices.append(0)
+        self._counts.append(0)
+        return len(self._adcs) - 1
+
+    def start(self):
+        """Start sampling in the background using a periodic hardware timer"""
+        if self._timer is None:
+            self._timer = Timer(mode=Timer.PERIODIC, freq=self.rate, callback=self._on_timer)
+
+    def stop(self):
+        """Stop background sampling.
+
+        The buffered readings are discarded, so readers fall back to reading the ADC directly
+        until the sampler is restarted.
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.clear()
+
+    def is_running(self):
+        """Is the background timer currently running?"""
+        return self._timer is not None
+
+    def clear(self):
+        """Discard all buffered readings"""
+        for ch in range(len(self._adcs)):
+            self._sums[ch] = 0
+            self._indices[ch] = 0
+            self._counts[ch] = 0
+        self._next_channel = 0
+
+    def _on_timer(self, timer):
+        self.tick()
+
+    def tick(self):
+        """
+        Read the next channel in the round-robin and add it to that channel's buffer.
+
+        This is called automatically by the timer once ``start()`` has been called, but can also
+        be called manually from a script's main loop if a timer is not available.
+        """
+        ch = self._next_channel
+        if ch >= len(self._adcs):
+            return
+
+        reading = self._adcs[ch].read_u16()
+        buffer = self._buffers[ch]
+        index = self._indices[ch]
+
+        # keep a running total so reading the average is O(1)
+        self._sums[ch] += reading - buffer[index]
+        buffer[index] = reading
+
+        index += 1
+        if index == self.buffer_size:
+            index = 0
+        self._indices[ch] = index
+
+        if self._counts[ch] < self.buffer_size:
+            self._counts[ch] += 1
+
+        ch += 1
+        if ch == len(self._adcs):
+            ch = 0
+        self._next_channel = ch
+
+    def value(self, channel):
+        """
+        Get the average of the buffered readings for the given channel.
+
+        :param channel:  The channel index returned by ``add_channel()``
+        :return: The averaged 16-bit ADC reading, or None if no readings have been taken yet
+        """
+        count = self._counts[channel]
+        if count == 0:
+            return None
+        return (self._sums[channel] + count // 2) // count
+
+
+class SampledAnalogueInput(AnalogueInput):
+    """
+    An ``AnalogueInput`` whose readings come from an ``AdcSampler``.
+
+    :param ain:  The analogue input to wrap. The ADC is shared with this input
+    :param sampler:  The ``AdcSampler`` that reads this input in the background
+    """
+
+    def __init__(self, ain: AnalogueInput, sampler: AdcSampler):
+        super().__init__(ain.pin_id, min_voltage=ain.MIN_VOLTAGE, max_voltage=ain.MAX_VOLTAGE)
+        self.pin = ain.pin  # Share the ADC
+        self.set_samples(ain._samples)
+        self.sampler = sampler
+        self.channel = sampler.add_channel(self.pin)
+
+    def _sample_adc(self, samples=None):
+        value = self.sampler.value(self.channel)
+        if value is None:
+            return super()._sample_adc(samples)
+        return value
+
+
+class SampledKnob(Knob):
+    """
+    A ``Knob`` whose readings come from an ``AdcSampler``.
+
+    :param knob:  The knob to wrap. The ADC is shared with this knob
+    :param sampler:  The ``AdcSampler`` that reads this knob in the background
+    """
+
+    def __init__(self, knob: Knob, sampler: AdcSampler):
+        super().__init__(knob.pin_id, deadzone=knob._deadzone)
+        self.pin = knob.pin  # Share the ADC
+        self.set_samples(knob._samples)
+        self.sampler = sampler
+        self.channel = sampler.add_channel(self.pin)
+
+    def _sample_adc(self, samples=None):
+        value = self.sampler.value(self.channel)
+        if value is None:
+            return super()._sample_adc(samples)
+        return value
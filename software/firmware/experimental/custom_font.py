@@ -13,6 +13,7 @@
 # limitations under the License.
 import framebuf
 
+from collections import OrderedDict
 from machine import I2C
 from machine import Pin
 from ssd1306 import SSD1306_I2C
@@ -27,13 +28,39 @@ from europi_display import Display as BasicDisplay
 
 # TODO: add a method to select the font to use by default
 
+# The default maximum number of glyphs each writer keeps, per colour
+DEFAULT_GLYPH_CACHE_SIZE = 96
+
+
+class Glyph(framebuf.FrameBuffer):
+    """A FrameBuffer holding a single rendered character.
+
+    Unlike a plain FrameBuffer the glyph knows its own size, which lets the display work out
+    exactly which region a ``blit`` changes.
+
+    :param buffer:  The glyph's pixel data
+    :param width:  The width of the glyph in pixels
+    :param height:  The height of the glyph in pixels
+    :param format:  The framebuf format of the pixel data
+    """
+
+    def __init__(self, buffer, width, height, format):
+        super().__init__(buffer, width, height, format)
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+
 
 class CustomFontWriter:
-    def __init__(self, device, font):
+    def __init__(self, device, font, cache_size=DEFAULT_GLYPH_CACHE_SIZE):
         """Initialize the Writer.
 
+        Rendered glyphs are cached so drawing the same characters again doesn't allocate any new
+        buffers. The least-recently-used glyphs are discarded once the cache is full.
+
         device: the OLED display instance
         font: a font module
+        cache_size: the maximum number of glyphs to keep for each colour
         """
         self.device = device
         self.font = font
@@ -44,21 +71,41 @@ class CustomFontWriter:
         self.screenwidth = device.width  # In pixels
         self.screenheight = device.height
 
+        self.cache_size = cache_size
+        self._glyphs = OrderedDict()  # normal glyphs, keyed by character
+        self._inverted_glyphs = OrderedDict()  # c=0 glyphs, keyed by character
+        self._widths = {}  # character widths, for string_len
+
+    def _glyph(self, char, inverted):
+        """Get the rendered glyph for a character, creating it if it isn't already cached."""
+        cache = self._inverted_glyphs if inverted else self._glyphs
+        glyph = cache.pop(char, None)
+        if glyph is None:
+            data, char_height, char_width = self.font.get_ch(char)
+            buf = bytearray(data)
+            if inverted:
+                for i, v in enumerate(buf):
+                    buf[i] = 0xFF & ~v
+            glyph = Glyph(buf, char_width, char_height, self.map)
+
+            if len(cache) >= self.cache_size:
+                del cache[next(iter(cache))]
+
+        # (re-)insert at the end so the least-recently-used glyph is always first
+        cache[char] = glyph
+        return glyph
+
     def print(self, string, x, y, c=1):
         """Print the string using the x, y coordinates as the upper-left corner of the text.
         With c=0, the text is display as black text on white background.
         """
+        inverted = c != 1
         for char in string:
             if char == "\n":  # line breaks are ignored
                 return
-            glyph, char_height, char_width = self.font.get_ch(char)
-            buf = bytearray(glyph)
-            if c != 1:
-                for i, v in enumerate(buf):
-                    buf[i] = 0xFF & ~v
-            fbc = framebuf.FrameBuffer(buf, char_width, char_height, self.map)
-            self.device.blit(fbc, x, y)
-            x += char_width
+            glyph = self._glyph(char, inverted)
+            self.device.blit(glyph, x, y)
+            x += glyph.width
 
     def string_len(self, string):
         """Returns the length of string in pixels."""
@@ -69,11 +116,14 @@ class CustomFontWriter:
 
     def _char_len(self, char):
         """Returns the length of char in pixels."""
-        if char == "\n":
-            char_width = 0
-        else:
-            _, _, char_width = self.font.get_ch(char)
-        return char_width
+        width = self._widths.get(char)
+        if width is None:
+            if char == "\n":
+                width = 0
+            else:
+                _, _, width = self.font.get_ch(char)
+            self._widths[char] = width
+        return width
 
 
 class CustomFontDisplay(BasicDisplay):
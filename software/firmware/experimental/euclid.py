@@ -21,19 +21,26 @@ Euclidean pattern generating library
 Copied from https://github.com/brianhouse/bjorklund with all due gratitude
 
 Originally written by Brian House (c) 2011. Released under the MIT license
+
+The original recursive pattern builder has been replaced with an equivalent iterative one, and
+recently-generated patterns are cached.
 """
 
 
-def generate_euclidean_pattern(steps, pulses, rot=0):
-    """Generates an array indicating the on/off steps of Euclid(k, n)
+from collections import OrderedDict
 
-    :param steps:  The number of steps in the pattern
-    :param pulses: The number of ON steps in the pattern (must be <= steps)
-    :param rot:    Optional rotation to offset the pattern. Must be in the range [0, steps]
+## The number of patterns kept in the cache
+PATTERN_CACHE_SIZE = 32
 
-    :return: An int array of length steps consisting of 1 and 0 values only
+_pattern_cache = OrderedDict()
 
-    :raises ValueError: if pulses or rot is out of range
+
+def _check_args(steps, pulses, rot):
+    """Validate the arguments to the pattern generators
+
+    :return: The arguments converted to integers
+
+    :raises ValueError: if any of the arguments are out of range
     """
     steps = int(steps)
     pulses = int(pulses)
@@ -46,11 +53,18 @@ def generate_euclidean_pattern(steps, pulses, rot=0):
         raise ValueError("Rotation cannot be greater than steps")
     if steps < 0:
         raise ValueError("Steps must be positive")
+    return (steps, pulses, rot)
+
+
+def _bjorklund(steps, pulses):
+    """Generate an unrotated pattern
+
+    :return: A bytes object of length steps consisting of 1 and 0 values only
+    """
     if steps == 0:
-        return []
+        return b""
     if pulses == 0:
-        return [0] * steps
-    pattern = []
+        return bytes(steps)
     counts = []
     remainders = []
     divisor = steps - pulses
@@ -65,26 +79,109 @@ def generate_euclidean_pattern(steps, pulses, rot=0):
             break
     counts.append(divisor)
 
-    def build(level):
+    # Build the pattern depth-first using a stack instead of recursion
+    # Level -1 is a 0 and level -2 is a 1
+    pattern = bytearray()
+    stack = [level]
+    while stack:
+        level = stack.pop()
         if level == -1:
             pattern.append(0)
         elif level == -2:
             pattern.append(1)
         else:
-            for i in range(0, counts[level]):
-                build(level - 1)
+            # push in reverse order so they're popped in the right order
             if remainders[level] != 0:
-                build(level - 2)
+                stack.append(level - 2)
+            for i in range(counts[level]):
+                stack.append(level - 1)
 
-    build(level)
     i = pattern.index(1)
-    pattern = pattern[i:] + pattern[0:i]
+    return bytes(pattern[i:] + pattern[0:i])
 
-    # rotate the pattern if needed by removing the last item and
-    # adding it to the start
-    if rot != 0:
-        for i in range(rot):
-            x = pattern.pop(-1)
-            pattern.insert(0, x)
 
+def _cached_pattern(steps, pulses, rot):
+    """Get a pattern from the cache, generating it if needed
+
+    :return: A bytes object of length steps consisting of 1 and 0 values only
+    """
+    key = (steps, pulses, rot)
+    pattern = _pattern_cache.pop(key, None)
+    if pattern is None:
+        pattern = _bjorklund(steps, pulses)
+
+        # rotate the pattern if needed by moving the last rot items to the start
+        if 0 < rot < steps:
+            pattern = pattern[-rot:] + pattern[:-rot]
+
+        if len(_pattern_cache) >= PATTERN_CACHE_SIZE:
+            _pattern_cache.pop(next(iter(_pattern_cache)))
+
+    # (re-)insert the pattern as the most-recently used
+    _pattern_cache[key] = pattern
     return pattern
+
+
+def generate_euclidean_pattern(steps, pulses, rot=0):
+    """Generates an array indicating the on/off steps of Euclid(k, n)
+
+    Recently-used patterns are cached, so regenerating a pattern, e.g. when a knob moves back and
+    forth, is cheap.
+
+    :param steps:  The number of steps in the pattern
+    :param pulses: The number of ON steps in the pattern (must be <= steps)
+    :param rot:    Optional rotation to offset the pattern. Must be in the range [0, steps]
+
+    :return: An int array of length steps consisting of 1 and 0 values only
+
+    :raises ValueError: if pulses or rot is out of range
+    """
+    return list(_cached_pattern(*_check_args(steps, pulses, rot)))
+
+
+def generate_euclidean_int(steps, pulses, rot=0):
+    """Generates a packed integer indicating the on/off steps of Euclid(k, n)
+
+    Bit ``i`` of the result is set if step ``i`` is on, so a step can be tested with
+    ``(pattern >> i) & 1``.
+
+    Note that on the Pico integers wider than 30 bits are stored on the heap, so patterns of more
+    than 30 steps are slower to test than shorter ones. Use ``generate_euclidean_bits`` for long
+    patterns.
+
+    :param steps:  The number of steps in the pattern
+    :param pulses: The number of ON steps in the pattern (must be <= steps)
+    :param rot:    Optional rotation to offset the pattern. Must be in the range [0, steps]
+
+    :return: An integer with one bit per step
+
+    :raises ValueError: if pulses or rot is out of range
+    """
+    pattern = _cached_pattern(*_check_args(steps, pulses, rot))
+    packed = 0
+    for i in range(len(pattern)):
+        if pattern[i]:
+            packed |= 1 << i
+    return packed
+
+
+def generate_euclidean_bits(steps, pulses, rot=0):
+    """Generates a bit array indicating the on/off steps of Euclid(k, n)
+
+    The result is compatible with ``experimental.bitarray``; step ``i`` can be tested with
+    ``get_bit(pattern, i)`` or ``pattern[i >> 3] & (0x80 >> (i & 7))``.
+
+    :param steps:  The number of steps in the pattern
+    :param pulses: The number of ON steps in the pattern (must be <= steps)
+    :param rot:    Optional rotation to offset the pattern. Must be in the range [0, steps]
+
+    :return: A bytearray with one bit per step, most significant bit first
+
+    :raises ValueError: if pulses or rot is out of range
+    """
+    pattern = _cached_pattern(*_check_args(steps, pulses, rot))
+    packed = bytearray((len(pattern) + 7) >> 3)
+    for i in range(len(pattern)):
+        if pattern[i]:
+            packed[i >> 3] |= 0x80 >> (i & 7)
+    return packed
@@ -13,17 +13,69 @@
 # limitations under the License.
 """
 A simple HTTP server for the Raspberry Pi Pico
+
+The server never blocks the script's main loop: every socket is non-blocking, ``select.poll`` is
+used to find the clients with data waiting, and each call to ``HttpServer.check_requests()``
+stops taking on new work once its time budget is spent. Several clients can stay connected at
+once, and HTTP/1.1 keep-alive lets a browser send many requests over the same connection.
+
+Requests are parsed incrementally as data arrives, so a request split across several packets, a
+large POST body, or several requests sent back to back are all handled.
+
+Clients can also upgrade a connection to a WebSocket (RFC 6455), over which small text or binary
+messages can be sent in either direction with only a few bytes of framing each.
 """
 
+import errno
 import json
+import os
+import struct
 
 try:
+    import binascii
+    import hashlib
+    import select
     import socket
 except ImportError as err:
     raise Exception(f"Failed to load HTTP server dependencies: {err}")
 
+import utime
+
 from europi_log import *
 
+## The most clients that can be connected at once
+DEFAULT_MAX_CLIENTS = 4
+
+## How long an idle keep-alive connection is held open, in milliseconds
+DEFAULT_KEEP_ALIVE_MS = 10000
+
+## How long check_requests() may spend starting new work, in milliseconds
+DEFAULT_TIME_BUDGET_MS = 10
+
+## The largest request line & headers we accept, in bytes
+DEFAULT_MAX_HEADER_SIZE = 2048
+
+## The largest request body we accept, in bytes
+DEFAULT_MAX_BODY_SIZE = 8192
+
+## The most bytes read from a client at once
+RECV_SIZE = 1024
+
+## The most bytes that can be waiting to be sent to a WebSocket before broadcast() skips it
+DEFAULT_MAX_BACKLOG = 1024
+
+## Responses smaller than this are copied into one chunk with their header
+SMALL_RESPONSE_SIZE = 1024
+
+## The size of the buffer a file is read into as it's sent
+FILE_BUFFER_SIZE = 512
+
+## How long, in seconds, browsers may cache a file sent by send_file() before checking for changes
+DEFAULT_MAX_AGE = 3600
+
+## Appended to a client's Sec-WebSocket-Key to calculate our Sec-WebSocket-Accept, per RFC 6455
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
 
 class HttpStatus:
     """
@@ -32,33 +84,51 @@ class HttpStatus:
     This collection is not exhaustive, just what we need to handle this minimal server implementation
     """
 
+    # 100 series - informational
+    CONTINUE = 100
+    SWITCHING_PROTOCOLS = 101
+
     # 200 series - everything's fine
     OK = 200
 
+    # 300 series - look elsewhere
+    NOT_MODIFIED = 304
+
     # 400 series - error is on the client end
     BAD_REQUEST = 400
     UNAUTHORIZED = 401
     FORBIDDEN = 403
     NOT_FOUND = 404
+    METHOD_NOT_ALLOWED = 405
     REQUEST_TIMEOUT = 408
+    PAYLOAD_TOO_LARGE = 413
     TEAPOT = 418
+    REQUEST_HEADER_FIELDS_TOO_LARGE = 431
 
     # 500 series - error is on the server end
     INTERNAL_SERVER_ERROR = 500
     NOT_IMPLEMENTED = 501
+    SERVICE_UNAVAILABLE = 503
 
     # Human-readable names/descriptions of the error codes above
     # If you add another error code, make sure to add it here too!
     StatusText = {
+        CONTINUE: "Continue",
+        SWITCHING_PROTOCOLS: "Switching Protocols",
         OK: "OK",
+        NOT_MODIFIED: "Not Modified",
         BAD_REQUEST: "Bad Request",
         UNAUTHORIZED: "Unauthorized",
         FORBIDDEN: "Forbidden",
         NOT_FOUND: "Not Found",
+        METHOD_NOT_ALLOWED: "Method Not Allowed",
         REQUEST_TIMEOUT: "Request Timeout",
+        PAYLOAD_TOO_LARGE: "Payload Too Large",
         TEAPOT: "I'm a teapot",
+        REQUEST_HEADER_FIELDS_TOO_LARGE: "Request Header Fields Too Large",
         INTERNAL_SERVER_ERROR: "Internal Server Error",
         NOT_IMPLEMENTED: "Not Implemented",
+        SERVICE_UNAVAILABLE: "Service Unavailable",
     }
 
 
@@ -67,21 +137,609 @@ class MimeTypes:
     Common MIME types we can support with this HTTP server implementation
     """
 
+    BINARY = "application/octet-stream"
+    CSS = "text/css"
     CSV = "text/csv"
     HTML = "text/html"
+    ICON = "image/x-icon"
+    JAVASCRIPT = "text/javascript"
     JSON = "text/json"
+    PNG = "image/png"
+    SVG = "image/svg+xml"
     TEXT = "text/plain"
     XML = "text/xml"
     YAML = "text/yaml"
 
+    # The types of files served by send_file, by extension
+    # Files with any other extension are sent as BINARY
+    ByExtension = {
+        "css": CSS,
+        "csv": CSV,
+        "htm": HTML,
+        "html": HTML,
+        "ico": ICON,
+        "js": JAVASCRIPT,
+        "json": JSON,
+        "png": PNG,
+        "svg": SVG,
+        "txt": TEXT,
+        "xml": XML,
+        "yaml": YAML,
+        "yml": YAML,
+    }
+
+
+def guess_mime_type(filename):
+    """
+    Guess a file's MIME type from its extension
+
+    :param filename:  The name of the file
+    :return: One of the types in ``MimeTypes``
+    """
+    dot = filename.rfind(".")
+    if dot < 0 or "/" in filename[dot:]:
+        return MimeTypes.BINARY
+    return MimeTypes.ByExtension.get(filename[dot + 1 :].lower(), MimeTypes.BINARY)
+
+
+def file_info(filename):
+    """
+    Get the size & modification time of a file
+
+    :param filename:  The path of the file
+    :return: A tuple of the size in bytes and the modification time, or None if the file doesn't
+        exist
+    """
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    if st[0] & 0x4000:
+        # a directory
+        return None
+    return (st[6], int(st[8]))
+
+
+def unquote(s):
+    """
+    Decode a URL-encoded query string component
+
+    ``+`` is decoded as a space, and ``%xx`` as the byte with that hex value.
+
+    :param s:  The encoded string
+    :return: The decoded string
+    """
+    s = s.replace("+", " ")
+    if "%" not in s:
+        return s
+    parts = s.split("%")
+    result = bytearray(parts[0].encode())
+    for part in parts[1:]:
+        try:
+            result.append(int(part[0:2], 16))
+            result.extend(part[2:].encode())
+        except ValueError:
+            result.extend(b"%")
+            result.extend(part.encode())
+    return result.decode()
+
+
+def parse_request_head(data):
+    """
+    Parse the request line & headers of an HTTP request
+
+    :param data:  The bytes of the request, up to but not including the blank line that ends the
+        headers
+    :return: A new ``HttpRequest`` with no body
+
+    :raises ValueError: If the request is malformed
+    """
+    lines = data.decode().split("\r\n")
+
+    # RFC 9112 asks servers to ignore empty lines before the request line
+    i = 0
+    while i < len(lines) and lines[i] == "":
+        i += 1
+    if i == len(lines):
+        raise ValueError("Empty request")
+
+    request_line = lines[i].split(" ")
+    if len(request_line) != 3 or not request_line[2].startswith("HTTP/"):
+        raise ValueError(f"Malformed request line {lines[i]}")
+    (method, target, version) = request_line
+
+    headers = {}
+    for line in lines[i + 1 :]:
+        colon = line.find(":")
+        if colon <= 0:
+            raise ValueError(f"Malformed header {line}")
+        headers[line[0:colon].strip().lower()] = line[colon + 1 :].strip()
+
+    return HttpRequest(method, target, version, headers)
+
+
+class HttpRequest:
+    """
+    A request received from a client
+
+    :param method:  The request method, e.g. ``GET``
+    :param target:  The requested path, including any query string
+    :param version:  The HTTP version, e.g. ``HTTP/1.1``
+    :param headers:  A dict of the request's headers. The names must be lower-case
+    :param body:  The body of the request
+    """
+
+    def __init__(self, method, target, version, headers, body=b""):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+        query_start = target.find("?")
+        if query_start < 0:
+            self.path = target
+            self.query = ""
+        else:
+            self.path = target[0:query_start]
+            self.query = target[query_start + 1 :]
+
+    def __str__(self):
+        return f"{self.method} {self.target} {self.version}"
+
+    def header(self, name, default=None):
+        """
+        Get the value of a header
+
+        :param name:  The name of the header; case is ignored
+        :param default:  The value returned if the header wasn't sent
+        """
+        return self.headers.get(name.lower(), default)
+
+    def content_length(self):
+        """
+        Get the length of the request body from its Content-Length header
+
+        :return: The length in bytes, or 0 if the header wasn't sent
+
+        :raises ValueError: If the header isn't a non-negative integer
+        """
+        length = int(self.headers.get("content-length", "0"))
+        if length < 0:
+            raise ValueError(f"Invalid Content-Length {length}")
+        return length
+
+    def keep_alive(self):
+        """
+        Should the connection be kept open after responding to this request?
+
+        HTTP/1.1 connections are kept open unless the client asks us to close them; HTTP/1.0
+        connections are closed unless the client asks us to keep them.
+        """
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def params(self):
+        """
+        Get the parameters from the query string
+
+        :return: A dict of the decoded parameters. Parameters without a value are set to ``""``
+        """
+        params = {}
+        if self.query:
+            for pair in self.query.split("&"):
+                if "=" in pair:
+                    (k, v) = pair.split("=", 1)
+                    params[unquote(k)] = unquote(v)
+                elif pair:
+                    params[unquote(pair)] = ""
+        return params
+
+    def text(self):
+        """Get the body of the request as a string"""
+        return self.body.decode()
+
+    def json(self):
+        """
+        Get the body of the request as a JSON object
+
+        :raises ValueError: If the body isn't valid JSON
+        """
+        return json.loads(self.text())
+
+
+class FileStream:
+    """
+    A file queued to be sent to a client
+
+    The file is read into a small buffer as the client is ready for more of it, so only
+    ``buffer_size`` bytes of it are in RAM at once.
+
+    :param file:  The open file
+    :param length:  The number of bytes to send
+    :param buffer_size:  The size of the buffer to read the file into
+    """
+
+    def __init__(self, file, length, buffer_size=FILE_BUFFER_SIZE):
+        self.file = file
+        self.remaining = length
+        self.buffer = bytearray(max(1, min(buffer_size, length)))
+        self.view = memoryview(self.buffer)
+
+        # the part of the buffer that has been read but not sent yet
+        self.start = 0
+        self.end = 0
+
+    def __len__(self):
+        return self.remaining + self.end - self.start
+
+    def data(self):
+        """
+        Get the next bytes to send, reading more of the file if the buffer has all been sent
+
+        :return: A memoryview of the bytes, which is empty once the whole file has been sent
+
+        :raises OSError: If the file is shorter than expected
+        """
+        if self.start == self.end and self.remaining > 0:
+            n = self.file.readinto(self.buffer)
+            if not n:
+                raise OSError(errno.EIO, "File truncated")
+            if n > self.remaining:
+                n = self.remaining
+            self.start = 0
+            self.end = n
+            self.remaining -= n
+        return self.view[self.start : self.end]
+
+    def consume(self, n):
+        """
+        Mark bytes returned by ``data()`` as sent
+
+        :param n:  The number of bytes sent
+        """
+        self.start += n
+
+    def close(self):
+        """Close the file"""
+        self.file.close()
+
+
+class HttpConnection:
+    """
+    A client connected to the server
+
+    Responses are queued by ``send()`` and written to the socket as quickly as the client reads
+    them, so sending a large page never blocks.
+
+    :param sock:  The client's socket
+    :param address:  The client's address
+    :param now_ms:  The time the client connected, from ``ticks_ms()``
+    """
+
+    def __init__(self, sock, address, now_ms):
+        self.socket = sock
+        self.address = address
+
+        # the time we last heard from the client
+        self.last_active_ms = now_ms
+
+        # received data that hasn't been parsed yet, and the request whose body we're waiting for
+        self.in_buffer = b""
+        self.request = None
+        self.body_length = 0
+
+        # data waiting to be sent, and how much of the first chunk has been sent already
+        self.out_chunks = []
+        self.out_offset = 0
+
+        # should the connection stay open after the current response?
+        self.keep_alive = False
+
+        # the number of requests handled, and of responses started
+        self.requests = 0
+        self.responses = 0
+
+        # set when the connection should be closed once the queued data has been sent
+        self.closing = False
+
+        # the WebSocket using this connection, once the client has upgraded it
+        self.websocket = None
+
+    def send(self, data):
+        """
+        Queue data to be sent to the client
+
+        :param data:  The bytes to send
+        """
+        if len(data) > 0:
+            self.out_chunks.append(data)
+
+    def pending(self):
+        """Is there queued data that hasn't been sent yet?"""
+        return len(self.out_chunks) > 0
+
+    def idle(self):
+        """Is the connection waiting for a new request or message, with nothing left to send?"""
+        return self.request is None and len(self.in_buffer) == 0 and not self.out_chunks
+
+    def flush(self):
+        """
+        Send as much of the queued data as the socket will accept without blocking
+
+        :raises OSError: If the connection has failed
+        """
+        chunks = self.out_chunks
+        while chunks:
+            chunk = chunks[0]
+            stream = type(chunk) is FileStream
+            if stream:
+                data = chunk.data()
+            else:
+                data = memoryview(chunk)[self.out_offset :]
+
+            if len(data) > 0:
+                try:
+                    n = self.socket.send(data)
+                except OSError as err:
+                    if err.errno == errno.EAGAIN:
+                        return
+                    raise
+                if not n:
+                    return
+                if stream:
+                    chunk.consume(n)
+                else:
+                    self.out_offset += n
+                if n < len(data):
+                    return
+
+            # everything returned by data() has been sent; a stream may have more to read
+            if stream:
+                if len(chunk) == 0:
+                    chunk.close()
+                    chunks.pop(0)
+            else:
+                chunks.pop(0)
+                self.out_offset = 0
+
+    def close(self):
+        """Close the connection, discarding anything that hasn't been sent"""
+        for chunk in self.out_chunks:
+            if type(chunk) is FileStream:
+                chunk.close()
+        self.out_chunks = []
+        self.closing = True
+        try:
+            self.socket.close()
+        except OSError:
+            pass
+
+
+class WebSocketOpcode:
+    """
+    The types of WebSocket frames
+    """
+
+    CONTINUATION = 0x0
+    TEXT = 0x1
+    BINARY = 0x2
+    CLOSE = 0x8
+    PING = 0x9
+    PONG = 0xA
+
+
+class WebSocketClose:
+    """
+    Status codes sent in a WebSocket close frame
+
+    This collection is not exhaustive, just the codes this server sends
+    """
+
+    NORMAL = 1000
+    GOING_AWAY = 1001
+    PROTOCOL_ERROR = 1002
+    MESSAGE_TOO_BIG = 1009
+    INTERNAL_ERROR = 1011
+
+
+def websocket_accept_key(key):
+    """
+    Calculate the Sec-WebSocket-Accept header for a client's Sec-WebSocket-Key
+
+    :param key:  The client's key, as a string
+    :return: The value of the Sec-WebSocket-Accept header
+    """
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()
+    return binascii.b2a_base64(digest).decode().strip()
+
+
+def encode_frame_header(opcode, length):
+    """
+    Encode the header of an unmasked, unfragmented WebSocket frame
+
+    :param opcode:  The frame type; see ``WebSocketOpcode``
+    :param length:  The length of the payload in bytes
+    :return: The header as bytes
+    """
+    if length < 126:
+        return bytes((0x80 | opcode, length))
+    if length < 0x10000:
+        return struct.pack(">BBH", 0x80 | opcode, 126, length)
+    return struct.pack(">BBQ", 0x80 | opcode, 127, length)
+
+
+def apply_mask(data, mask):
+    """
+    XOR a frame's payload with its masking key, in place
+
+    :param data:  The payload, as a bytearray
+    :param mask:  The 4-byte masking key
+    """
+    for i in range(len(data)):
+        data[i] ^= mask[i & 3]
+
+
+class WebSocket:
+    """
+    An open WebSocket connection
+
+    Created by the server when a client upgrades a request to a path registered with
+    ``HttpServer.add_websocket()``. Messages are sent with ``send()``, which queues the frame so
+    it never blocks.
+
+    :param server:  The server the client is connected to
+    :param connection:  The client's ``HttpConnection``
+    :param request:  The request that opened the WebSocket
+    :param on_message:  The function called with each message received
+    :param on_close:  The function called when the WebSocket is closed, or None
+    """
+
+    def __init__(self, server, connection, request, on_message, on_close=None):
+        self.server = server
+        self.connection = connection
+        self.request = request
+        self.on_message = on_message
+        self.on_close = on_close
+
+        # the type & payload of a fragmented message that's still arriving
+        self.fragment_opcode = None
+        self.fragments = None
+
+        self.open = True
+
+    def backlog(self):
+        """Get the number of bytes queued to send that haven't been sent yet"""
+        connection = self.connection
+        total = -connection.out_offset
+        for chunk in connection.out_chunks:
+            total += len(chunk)
+        return total
+
+    def send(self, data):
+        """
+        Send a message to the client
+
+        :param data:  The message; a string is sent as a text frame, bytes as a binary frame
+        """
+        if not self.open:
+            return
+        if type(data) is str:
+            data = data.encode()
+            opcode = WebSocketOpcode.TEXT
+        else:
+            opcode = WebSocketOpcode.BINARY
+        self._send_frame(opcode, data)
+
+    def ping(self, data=b""):
+        """
+        Send a ping; the client answers with a pong
+
+        :param data:  Up to 125 bytes to send with the ping
+        """
+        if self.open:
+            self._send_frame(WebSocketOpcode.PING, data)
+
+    def close(self, code=WebSocketClose.NORMAL, reason=""):
+        """
+        Start closing the WebSocket
+
+        The connection is closed once the close frame has been sent.
+
+        :param code:  The close status; see ``WebSocketClose``
+        :param reason:  A short explanation for the client
+        """
+        if not self.open:
+            return
+        self._send_frame(WebSocketOpcode.CLOSE, struct.pack(">H", code) + reason.encode())
+        self.server._close_websocket(self)
+        self.connection.closing = True
+
+    def _send_frame(self, opcode, payload):
+        header = encode_frame_header(opcode, len(payload))
+        if len(payload) < 126:
+            # one small chunk is cheaper to queue & send than two
+            self.connection.send(header + payload)
+        else:
+            self.connection.send(header)
+            self.connection.send(payload)
+
+    def _receive(self, opcode, fin, payload):
+        """Handle one frame from the client"""
+        if opcode == WebSocketOpcode.PING:
+            self._send_frame(WebSocketOpcode.PONG, payload)
+            return
+        if opcode == WebSocketOpcode.PONG:
+            return
+        if opcode == WebSocketOpcode.CLOSE:
+            # echo the client's status code back, as the protocol asks
+            self._send_frame(WebSocketOpcode.CLOSE, payload[0:2])
+            self.server._close_websocket(self)
+            self.connection.closing = True
+            return
+
+        if opcode == WebSocketOpcode.CONTINUATION:
+            if self.fragments is None:
+                self.close(WebSocketClose.PROTOCOL_ERROR, "Unexpected continuation")
+                return
+            self.fragments += payload
+            if len(self.fragments) > self.server.max_body_size:
+                self.close(WebSocketClose.MESSAGE_TOO_BIG)
+                return
+            if not fin:
+                return
+            opcode = self.fragment_opcode
+            payload = self.fragments
+            self.fragments = None
+        elif opcode == WebSocketOpcode.TEXT or opcode == WebSocketOpcode.BINARY:
+            if self.fragments is not None:
+                self.close(WebSocketClose.PROTOCOL_ERROR, "Expected continuation")
+                return
+            if not fin:
+                self.fragment_opcode = opcode
+                self.fragments = payload
+                return
+        else:
+            self.close(WebSocketClose.PROTOCOL_ERROR, f"Unknown opcode {opcode}")
+            return
+
+        if opcode == WebSocketOpcode.TEXT:
+            try:
+                payload = payload.decode()
+            except UnicodeError:
+                self.close(WebSocketClose.PROTOCOL_ERROR, "Invalid UTF-8")
+                return
+
+        try:
+            self.on_message(connection=self, data=payload)
+        except Exception as err:
+            log_warning(f"{err}", "http_server")
+
+
+def _poll_key(obj):
+    """
+    Get the key used to identify a socket in the server's tables
+
+    MicroPython's ``poll()`` reports the socket objects that were registered, while CPython's
+    reports their file descriptors, so both are converted to the descriptor when there is one.
+    """
+    if type(obj) is int:
+        return obj
+    try:
+        return obj.fileno()
+    except AttributeError:
+        return obj
+
 
 class HttpServer:
     """
     A basic HTTP server for EuroPi.
 
     This class will open a socket on the specified port, allowing for clients to connect to us.
-    Only HTTP is supported, not HTTPS. Basic GET/POST requests should work, but websockets
-    and anything fancy likely won't.
+    Only HTTP is supported, not HTTPS. GET/POST requests, HTTP/1.1 keep-alive connections and
+    WebSockets work, but anything fancier likely won't.
 
     Port 80 is officially reserved for HTTP traffic, and can be used by default. Port 8080
     is also commonly used for HTTP traffic.
@@ -92,25 +750,58 @@ class HttpServer:
 
     Operating in WiFi AP mode should allow the use of any port you want.
 
-    You should define a callback to handle incoming GET and/or POST requests, e.g.:
+    You should define callbacks to handle incoming requests. Handlers can be registered for a
+    method and path, e.g.:
 
     .. code-block:: python
 
         server = HttpServer(port=8080)
 
+        @server.route("/")
+        def index(connection=None, request=None):
+            server.send_html(connection, "<h1>EuroPi</h1>")
+
+        @server.route("/cv", method="POST")
+        def set_cv(connection=None, request=None):
+            cv1.voltage(request.json()["cv1"])
+            server.send_json(connection, {"cv1": cv1.voltage()})
+
+    Or a single callback can handle every GET and/or POST request that doesn't match a route:
+
+    .. code-block:: python
+
         @server.get_handler
-        def handle_http_get(request:str=None, connection:Socket=None):
+        def handle_http_get(request:HttpRequest=None, connection:HttpConnection=None):
             # process the request
             server.send_response(...)
 
         @server.post_handler
-        def handle_http_post(request:str=None, connection:Socket=None):
+        def handle_http_post(request:HttpRequest=None, connection:HttpConnection=None):
             # process the request
             server.send_response(...)
 
+    The request is an ``HttpRequest`` holding the parsed method, path, query string, headers
+    and body. If no handler matches the request the client is sent a 404 error page, or a 405
+    if the path has handlers for other methods.
+
+    Browsers can open a WebSocket on a path registered with ``add_websocket()`` or the
+    ``websocket()`` decorator. Messages can then be sent both ways over the open connection
+    without the overhead of a new request each time:
+
+    .. code-block:: python
+
+        @server.websocket("/ws")
+        def on_message(connection=None, data=None):
+            cv1.voltage(data[0] / 25.5)
+            connection.send(bytes([int(ain.percent() * 255)]))
+
+        while True:
+            server.check_requests()
+            server.broadcast(bytes([din.value()]))
+
     Responses can be an HTTP page, plain text, or JSON/CSV/YAML/XML formatted data. See
-    MimeTypes for supported types. The response should always be a string; if sending
-    a dict as JSON data you'll need to stringify it before passing it to send_response.
+    MimeTypes for supported types. The response should be a string or bytes; if sending
+    a dict as JSON data use send_json, or stringify it before passing it to send_response.
 
     You may send your own error codes as desired:
 
@@ -123,7 +814,7 @@ class HttpServer:
                 HttpStatus.TEAPOT,  # send error 418 "I'm a teapot"
             )
 
-    Inside the program's main loop you should call srv.check_connections() to process any
+    Inside the program's main loop you should call srv.check_requests() to process any
     incoming requests:
 
     .. code-block:: python
@@ -135,7 +826,19 @@ class HttpServer:
                 srv.check_requests()
                 # ...
 
+    ``check_requests()`` never waits for a client. It handles whatever has arrived, and once
+    ``time_budget_ms`` has passed it leaves any remaining work for the next call. The time taken
+    by the request handlers themselves is up to them.
+
     :param port:  The port to listen on
+    :param max_clients:  The most clients that can be connected at once. When a new client
+        connects while we're full, the client that has been idle the longest is disconnected
+    :param keep_alive_ms:  How long an idle connection is kept open
+    :param time_budget_ms:  How long check_requests() may spend starting new work
+    :param max_header_size:  The largest request line and headers we accept, in bytes
+    :param max_body_size:  The largest request body we accept, in bytes
+    :param clock:  The module used to read the time; must provide ``ticks_ms()`` and
+        ``ticks_diff()``. Defaults to ``utime``
     """
 
     # A basic error page template
@@ -190,10 +893,34 @@ class HttpServer:
 </html>
 """
 
-    def __init__(self, port=80):
+    def __init__(
+        self,
+        port=80,
+        max_clients=DEFAULT_MAX_CLIENTS,
+        keep_alive_ms=DEFAULT_KEEP_ALIVE_MS,
+        time_budget_ms=DEFAULT_TIME_BUDGET_MS,
+        max_header_size=DEFAULT_MAX_HEADER_SIZE,
+        max_body_size=DEFAULT_MAX_BODY_SIZE,
+        clock=utime,
+    ):
         self.port = port
+        self.max_clients = max_clients
+        self.keep_alive_ms = keep_alive_ms
+        self.time_budget_ms = time_budget_ms
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.clock = clock
+
         self.get_callback = self.default_request_handler
         self.post_callback = self.default_request_handler
+        self._default_callback = self.get_callback
+
+        # (method, path) -> handler
+        self.routes = {}
+
+        # path -> (on_message, on_open, on_close), and the WebSockets currently open
+        self.websocket_routes = {}
+        self.websockets = []
 
         self.socket = socket.socket()
         addr = socket.getaddrinfo("0.0.0.0", port)
@@ -203,6 +930,13 @@ class HttpServer:
         self.socket.bind(addr)
         self.socket.listen(5)
 
+        self.poller = select.poll()
+        self.poller.register(self.socket, select.POLLIN)
+        self._listen_key = _poll_key(self.socket)
+
+        # poll key -> HttpConnection
+        self.clients = {}
+
     def default_request_handler(self, connection=None, request=None):
         """
         The default request handler for GET and POST requests the server.
@@ -211,81 +945,469 @@ class HttpServer:
         to replace this function. So all we do is raise a NotImplementedError that's handled
         by self.check_requests() and will serve our HTTP 501 error page accordingly.
 
-        :param connection:  The socket the client connected on
+        :param connection:  The client's connection
         :param request:  The client's request
 
         :raises NotImplementedError: This results in an HTTP 501 error response
         """
         raise NotImplementedError("No request handler set")
 
+    def close(self):
+        """Disconnect every client and stop listening for new ones"""
+        for client in list(self.clients.values()):
+            self._disconnect(client)
+        self.poller.unregister(self.socket)
+        self.socket.close()
+
     def check_requests(self):
         """
-        Poll the socket and process any incoming requests.
+        Poll the sockets and process any incoming requests.
 
-        This will invoke the request handler function if it has been defined
+        This will invoke the matching request handler for each complete request that has arrived.
+        Any data left to send from earlier responses is sent, and connections that have been idle
+        for longer than ``keep_alive_ms`` are closed.
 
         This function should be called inside the main loop of the program
-
-        The client socket is closed after we send our response
         """
-        conn = None
-        while True:
-            try:
-                conn, addr = self.socket.accept()
-
-                # the request should look something like this
-                #
-                # GET / HTTP/1.1
-                # Host: localhost:8080
-                # User-Agent: Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:135.0) Gecko/20100101 Firefox/135.0
-                # Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8
-                # Accept-Language: en-US,en;q=0.5
-                # Accept-Encoding: gzip, deflate, br, zstd
-                # Connection: keep-alive
-                # Upgrade-Insecure-Requests: 1
-                # Sec-Fetch-Dest: document
-                # Sec-Fetch-Mode: navigate
-                # Sec-Fetch-Site: none
-                # Sec-Fetch-User: ?1
-                # Priority: u=0, i
-
-                request = conn.recv(1024)
-                request = request.decode("UTF-8")
-
-                if request.startswith("GET"):
-                    self.get_callback(request=request, connection=conn)
-                elif request.startswith("POST"):
-                    self.post_callback(request=request, connection=conn)
-                else:
-                    method = request.strip().split()[0]
-                    self.send_error_page(
-                        Exception(f"Unsupported HTTP method {method}"),
-                        conn,
-                        status=HttpStatus.BAD_REQUEST,
-                        headers=None,
+        clock = self.clock
+        start = clock.ticks_ms()
+
+        for event in self.poller.poll(0):
+            key = _poll_key(event[0])
+            if key == self._listen_key:
+                self._accept(start)
+            else:
+                client = self.clients.get(key)
+                if client is not None:
+                    self._receive(client, event[1], start)
+
+            if clock.ticks_diff(clock.ticks_ms(), start) >= self.time_budget_ms:
+                break
+
+        for client in list(self.clients.values()):
+            # requests received in an earlier call that we didn't have time for
+            if not client.closing and len(client.in_buffer) > 0:
+                self._process(client, start)
+
+            if client.pending():
+                try:
+                    client.flush()
+                except OSError:
+                    self._disconnect(client)
+                    continue
+
+            if not client.pending():
+                if client.closing:
+                    self._disconnect(client)
+                elif (
+                    client.websocket is None
+                    and clock.ticks_diff(start, client.last_active_ms) >= self.keep_alive_ms
+                ):
+                    self._disconnect(client)
+
+    def _accept(self, now):
+        """Accept a new client, making room for it if necessary"""
+        try:
+            (sock, address) = self.socket.accept()
+        except OSError:
+            return
+        sock.settimeout(0)
+        try:
+            # don't hold back small writes, e.g. WebSocket messages, waiting for an ACK
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (AttributeError, OSError):
+            pass
+
+        if len(self.clients) >= self.max_clients:
+            # drop the longest-idle HTTP connection, or if there are none the longest-idle
+            # WebSocket
+            oldest = None
+            for client in self.clients.values():
+                if not client.idle():
+                    continue
+                if (
+                    oldest is None
+                    or (oldest.websocket is not None and client.websocket is None)
+                    or (
+                        (oldest.websocket is None) == (client.websocket is None)
+                        and self.clock.ticks_diff(client.last_active_ms, oldest.last_active_ms) < 0
                     )
-            except NotImplementedError as err:
-                log_warning(f"{err}", "http_server")
-                # send a 501 error page
-                self.send_error_page(err, conn, HttpStatus.NOT_IMPLEMENTED)
+                ):
+                    oldest = client
+            if oldest is None:
+                log_warning(f"Too many clients; refusing {address}", "http_server")
+                sock.close()
+                return
+            self._disconnect(oldest)
+
+        self.clients[_poll_key(sock)] = HttpConnection(sock, address, now)
+        self.poller.register(sock, select.POLLIN)
+
+    def _disconnect(self, client):
+        """Close a client's connection and forget about it"""
+        if client.websocket is not None:
+            self._close_websocket(client.websocket)
+        self.clients.pop(_poll_key(client.socket), None)
+        try:
+            self.poller.unregister(client.socket)
+        except (OSError, KeyError, ValueError):
+            pass
+        client.close()
+
+    def _receive(self, client, events, start):
+        """Read whatever a client has sent and handle any complete requests"""
+        data = None
+        if events & select.POLLIN:
+            try:
+                data = client.socket.recv(RECV_SIZE)
             except OSError as err:
+                if err.errno == errno.EAGAIN:
+                    return
+                data = b""
+
+        if not data:
+            # the client has hung up
+            self._disconnect(client)
+            return
+
+        client.last_active_ms = start
+        if not client.closing:
+            client.in_buffer += data
+            self._process(client, start)
+
+    def _process(self, client, start):
+        """Parse and dispatch the complete requests in a client's buffer"""
+        while not client.closing:
+            if client.websocket is not None:
+                self._process_frames(client, start)
+                return
+
+            request = client.request
+            if request is None:
+                end = client.in_buffer.find(b"\r\n\r\n")
+                if end < 0:
+                    if len(client.in_buffer) > self.max_header_size:
+                        self._reject(client, HttpStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+                    return
+                if end > self.max_header_size:
+                    self._reject(client, HttpStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+                    return
+
+                try:
+                    request = parse_request_head(client.in_buffer[0:end])
+                    length = request.content_length()
+                except ValueError as err:
+                    self._reject(client, HttpStatus.BAD_REQUEST, err)
+                    return
+                client.in_buffer = client.in_buffer[end + 4 :]
+
+                if "chunked" in request.header("transfer-encoding", ""):
+                    self._reject(
+                        client,
+                        HttpStatus.NOT_IMPLEMENTED,
+                        "Chunked request bodies are not supported",
+                    )
+                    return
+                if length > self.max_body_size:
+                    self._reject(client, HttpStatus.PAYLOAD_TOO_LARGE)
+                    return
+
+                client.request = request
+                client.body_length = length
+                if (
+                    request.header("expect", "").lower() == "100-continue"
+                    and len(client.in_buffer) < length
+                ):
+                    client.send(b"HTTP/1.1 100 Continue\r\n\r\n")
+
+            length = client.body_length
+            if len(client.in_buffer) < length:
+                return
+            request.body = client.in_buffer[0:length]
+            client.in_buffer = client.in_buffer[length:]
+            client.request = None
+
+            self._dispatch(client, request)
+
+            if self.clock.ticks_diff(self.clock.ticks_ms(), start) >= self.time_budget_ms:
+                return
+
+    def _process_frames(self, client, start):
+        """Parse and handle the complete WebSocket frames in a client's buffer"""
+        websocket = client.websocket
+        while not client.closing:
+            buffer = client.in_buffer
+            if len(buffer) < 2:
+                return
+
+            length = buffer[1] & 0x7F
+            offset = 2
+            if length == 126:
+                if len(buffer) < 4:
+                    return
+                length = (buffer[2] << 8) | buffer[3]
+                offset = 4
+            elif length == 127:
+                if len(buffer) < 10:
+                    return
+                length = struct.unpack_from(">Q", buffer, 2)[0]
+                offset = 10
+
+            if buffer[0] & 0x70 or not buffer[1] & 0x80:
+                # we don't support any extensions, and clients must mask their frames
+                websocket.close(WebSocketClose.PROTOCOL_ERROR, "Invalid frame")
+                return
+            if length > self.max_body_size:
+                websocket.close(WebSocketClose.MESSAGE_TOO_BIG)
+                return
+
+            end = offset + 4 + length
+            if len(buffer) < end:
+                return
+            payload = bytearray(buffer[offset + 4 : end])
+            apply_mask(payload, buffer[offset : offset + 4])
+            client.in_buffer = buffer[end:]
+
+            websocket._receive(buffer[0] & 0x0F, buffer[0] & 0x80, payload)
+
+            if self.clock.ticks_diff(self.clock.ticks_ms(), start) >= self.time_budget_ms:
                 return
+
+    def _upgrade(self, client, request, route):
+        """Switch a client's connection to the WebSocket protocol"""
+        key = request.header("sec-websocket-key")
+        if key is None or request.header("sec-websocket-version") != "13":
+            self._reject(client, HttpStatus.BAD_REQUEST, "Unsupported WebSocket handshake")
+            return
+
+        (on_message, on_open, on_close) = route
+        websocket = WebSocket(self, client, request, on_message, on_close)
+        client.websocket = websocket
+        client.keep_alive = True
+        client.responses += 1
+        client.send(
+            (
+                f"HTTP/1.1 {HttpStatus.SWITCHING_PROTOCOLS} Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {websocket_accept_key(key)}\r\n\r\n"
+            ).encode()
+        )
+        self.websockets.append(websocket)
+
+        if on_open is not None:
+            try:
+                on_open(connection=websocket, request=request)
+            except Exception as err:
+                log_warning(f"{err}", "http_server")
+
+    def _close_websocket(self, websocket):
+        """Forget about a WebSocket that has closed, and call its on_close handler"""
+        if not websocket.open:
+            return
+        websocket.open = False
+        if websocket in self.websockets:
+            self.websockets.remove(websocket)
+        if websocket.on_close is not None:
+            try:
+                websocket.on_close(connection=websocket)
             except Exception as err:
                 log_warning(f"{err}", "http_server")
+
+    def _reject(self, client, status, message=None):
+        """Send an error page for a request we can't handle, then close the connection"""
+        if message is None:
+            message = HttpStatus.StatusText[status]
+        log_warning(f"Rejecting request from {client.address}: {message}", "http_server")
+        client.keep_alive = False
+        client.closing = True
+        self.send_error_page(Exception(message), client, status)
+
+    def _find_handler(self, request):
+        """
+        Get the handler for a request
+
+        :return: The handler, or None if the request should be rejected with a 404 or 405 error
+        """
+        handler = self.routes.get((request.method, request.path))
+        if handler is not None:
+            return handler
+
+        if request.method == "GET":
+            handler = self.get_callback
+        elif request.method == "POST":
+            handler = self.post_callback
+
+        # the default handler only applies if no routes have been set
+        if handler is self._default_callback and len(self.routes) > 0:
+            return None
+        return handler
+
+    def _dispatch(self, client, request):
+        """Call the handler for a complete request"""
+        client.requests += 1
+
+        if request.header("upgrade", "").lower() == "websocket":
+            route = self.websocket_routes.get(request.path)
+            if route is not None and request.method == "GET":
+                self._upgrade(client, request, route)
+                return
+
+        responses = client.responses
+        client.keep_alive = request.keep_alive()
+        if not client.keep_alive:
+            client.closing = True
+
+        try:
+            handler = self._find_handler(request)
+            if handler is not None:
+                handler(request=request, connection=client)
+            elif len(self.routes) == 0:
+                self.send_error_page(
+                    Exception(f"Unsupported HTTP method {request.method}"),
+                    client,
+                    status=HttpStatus.BAD_REQUEST,
+                    headers=None,
+                )
+            else:
+                status = HttpStatus.NOT_FOUND
+                for method, path in self.routes.keys():
+                    if path == request.path:
+                        status = HttpStatus.METHOD_NOT_ALLOWED
+                        break
+                self.send_error_page(Exception(f"{request}"), client, status)
+        except NotImplementedError as err:
+            log_warning(f"{err}", "http_server")
+            # send a 501 error page
+            self.send_error_page(err, client, HttpStatus.NOT_IMPLEMENTED)
+        except Exception as err:
+            log_warning(f"{err}", "http_server")
+            if client.responses > responses:
+                # part of the response has been sent already; the client can't tell it's broken
+                # unless we hang up
+                client.closing = True
+            else:
                 # send a 500 error page
-                self.send_error_page(err, conn, HttpStatus.INTERNAL_SERVER_ERROR)
-            finally:
-                if conn is not None:
-                    conn.close()
-                    conn = None
+                self.send_error_page(err, client, HttpStatus.INTERNAL_SERVER_ERROR)
+
+        if client.responses == responses:
+            log_warning(f"No response sent for {request}", "http_server")
+            self.send_error_page(Exception("No response"), client, HttpStatus.INTERNAL_SERVER_ERROR)
+
+    def add_route(self, path, handler, method="GET"):
+        """
+        Register a handler for requests with a given method and path
+
+        :param path:  The path to handle, e.g. ``/status``. The query string is not part of the path
+        :param handler:  A function accepting ``connection`` and ``request`` keyword arguments
+        :param method:  The HTTP method to handle, e.g. ``GET`` or ``POST``
+        """
+        self.routes[(method.upper(), path)] = handler
+
+    def remove_route(self, path, method="GET"):
+        """
+        Remove the handler for a method and path
+
+        :param path:  The path passed to ``add_route``
+        :param method:  The method passed to ``add_route``
+        """
+        self.routes.pop((method.upper(), path), None)
+
+    def route(self, path, method="GET"):
+        """
+        Decorator for a function to handle requests with a given method and path
+
+        :param path:  The path to handle, e.g. ``/status``
+        :param method:  The HTTP method to handle, e.g. ``GET`` or ``POST``
+        """
+
+        def decorator(func):
+            self.add_route(path, func, method)
+            return func
+
+        return decorator
+
+    def add_websocket(self, path, on_message, on_open=None, on_close=None):
+        """
+        Accept WebSocket connections on a path
+
+        Each handler is called with a ``connection`` keyword argument holding the ``WebSocket``.
+        ``on_message`` is also given ``data``: a string for a text message or a bytearray for a
+        binary one. ``on_open`` is also given the ``request`` that opened the WebSocket.
+
+        :param path:  The path clients connect to, e.g. ``/ws``
+        :param on_message:  The function called with each message received
+        :param on_open:  The function called when a client connects, or None
+        :param on_close:  The function called when a WebSocket closes, or None
+        """
+        self.websocket_routes[path] = (on_message, on_open, on_close)
+
+    def remove_websocket(self, path):
+        """
+        Stop accepting WebSocket connections on a path
+
+        WebSockets that are already open stay open.
+
+        :param path:  The path passed to ``add_websocket``
+        """
+        self.websocket_routes.pop(path, None)
+
+    def websocket(self, path):
+        """
+        Decorator for a function to handle the messages sent to a WebSocket path
+
+        :param path:  The path clients connect to, e.g. ``/ws``
+        """
+
+        def decorator(func):
+            self.add_websocket(path, func)
+            return func
+
+        return decorator
+
+    def broadcast(self, data, max_backlog=DEFAULT_MAX_BACKLOG):
+        """
+        Send a message to every open WebSocket
+
+        The frame is encoded once and sent straight away. Clients that haven't read the
+        messages sent to them earlier are skipped, so a slow client misses messages instead of
+        using up our RAM.
+
+        :param data:  The message; a string is sent as a text frame, bytes as a binary frame
+        :param max_backlog:  Skip clients with more than this many bytes still waiting to be sent
+        :return: The number of clients the message was sent to
+        """
+        if len(self.websockets) == 0:
+            return 0
+
+        if type(data) is str:
+            data = data.encode()
+            opcode = WebSocketOpcode.TEXT
+        else:
+            opcode = WebSocketOpcode.BINARY
+        frame = encode_frame_header(opcode, len(data)) + data
+
+        sent = 0
+        for websocket in self.websockets:
+            connection = websocket.connection
+            if connection.pending() and websocket.backlog() > max_backlog:
+                continue
+            connection.send(frame)
+            try:
+                connection.flush()
+            except OSError:
+                # check_requests() will notice the connection has failed and clean up
+                pass
+            sent += 1
+        return sent
 
     def get_handler(self, func):
         """
-        Decorator for the function to handle HTTP GET requests
+        Decorator for the function to handle HTTP GET requests that don't match a route
 
         The provided function must accept the following keyword arguments:
-        - request: str  The request the client sent
-        - conn: socket  A socket connection to the client
+        - request: HttpRequest  The request the client sent
+        - connection: HttpConnection  The connection to the client
 
         :param func:  The function to handle the request.
         """
@@ -298,11 +1420,11 @@ class HttpServer:
 
     def post_handler(self, func):
         """
-        Decorator for the function to handle HTTP POST requests
+        Decorator for the function to handle HTTP POST requests that don't match a route
 
         The provided function must accept the following keyword arguments:
-        - request: str  The request the client sent
-        - conn: socket  A socket connection to the client
+        - request: HttpRequest  The request the client sent
+        - connection: HttpConnection  The connection to the client
 
         :param func:  The function to handle the request.
         """
@@ -324,7 +1446,7 @@ class HttpServer:
         Serve our customized HTTP error page
 
         :param error:  The exception that caused the error
-        :param connection:  The socket to send the response over
+        :param connection:  The connection to send the response over
         :param status:  The error status to respond with
         :param headers:  Optional additional headers
         """
@@ -343,7 +1465,7 @@ class HttpServer:
         """
         Send a JSON object to the client
 
-        :param connection:  The socket connection to the client
+        :param connection:  The connection to the client
         :param data:  A dict to be converted to a JSON object
         :param headers:  Optional additional HTTP headers to include
         """
@@ -359,7 +1481,7 @@ class HttpServer:
         """
         Send an HTML document to the client
 
-        :param connection:  The socket to send the data over
+        :param connection:  The connection to send the data over
         :param html_page:  A string containing the HTML document.
         :param status:  The HTTP status to send the page with
         :param headers:  Optional additional HTTP headers
@@ -368,6 +1490,192 @@ class HttpServer:
             connection, html_page, content_type=MimeTypes.HTML, status=status, headers=headers
         )
 
+    def _response_header(self, connection, status, content_type, length, headers):
+        """
+        Encode the status line & headers of a response
+
+        :param connection:  The connection to the client
+        :param status:  The HTTP status to respond with
+        :param content_type:  The MIME type of the response, or None if it has no body
+        :param length:  The Content-Length, or None to leave it out
+        :param headers:  Optional dict of additional HTTP headers
+        :return: The header as bytes, including the blank line that ends it
+        """
+        header = f"HTTP/1.1 {status} {HttpStatus.StatusText[status]}\r\n"
+        if content_type is not None:
+            if content_type.startswith("text/"):
+                header = f"{header}Content-Type: {content_type}; charset=utf-8\r\n"
+            else:
+                header = f"{header}Content-Type: {content_type}\r\n"
+        if length is not None:
+            header = f"{header}Content-Length: {length}\r\n"
+        if getattr(connection, "keep_alive", False):
+            header = f"{header}Connection: keep-alive"
+        else:
+            header = f"{header}Connection: close"
+
+        if headers is not None:
+            for k in headers.keys():
+                header = f"{header}\r\n{k}: {headers[k]}"
+
+        if isinstance(connection, HttpConnection):
+            connection.responses += 1
+        return f"{header}\r\n\r\n".encode("UTF-8")
+
+    def send_file(
+        self,
+        connection,
+        request,
+        filename,
+        content_type=None,
+        headers=None,
+        max_age=DEFAULT_MAX_AGE,
+    ):
+        """
+        Send a file from flash to the client
+
+        The file is streamed a small chunk at a time as the client reads it, rather than being
+        loaded into RAM. If the client accepts gzip and a precompressed copy of the file called
+        ``filename.gz`` exists, the copy is sent instead; ``scripts/build_web_assets.py``
+        creates these.
+
+        The response includes an ETag made from the file's size & modification time and a
+        Cache-Control header, so browsers can cache the file. A request with a matching
+        If-None-Match header is answered with 304 Not Modified and no body.
+
+        If the file doesn't exist the client is sent a 404 error page.
+
+        :param connection:  The connection to the client
+        :param request:  The request being answered
+        :param filename:  The path of the file
+        :param content_type:  The MIME type to send; if None it's guessed from the file's extension
+        :param headers:  Optional dict of key/value pairs for additional HTTP headers
+        :param max_age:  How long, in seconds, browsers may use their copy of the file without
+            checking whether it has changed
+        """
+        if content_type is None:
+            content_type = guess_mime_type(filename)
+
+        info = None
+        gzipped = False
+        if "gzip" in request.header("accept-encoding", ""):
+            info = file_info(filename + ".gz")
+            if info is not None:
+                filename = filename + ".gz"
+                gzipped = True
+        if info is None:
+            info = file_info(filename)
+        if info is None:
+            self.send_error_page(
+                Exception(f"{request.path} not found"), connection, HttpStatus.NOT_FOUND
+            )
+            return
+
+        (size, mtime) = info
+        header = self._cached_response_header(
+            connection,
+            request,
+            f'"{size:x}-{mtime:x}"',
+            content_type,
+            size,
+            gzipped,
+            headers,
+            max_age,
+        )
+        if header is None:
+            return
+
+        file = open(filename, "rb")
+        if size < SMALL_RESPONSE_SIZE:
+            # read small files whole, and send them in one segment with the header
+            try:
+                connection.send(header + file.read(size))
+            finally:
+                file.close()
+        else:
+            connection.send(header)
+            connection.send(FileStream(file, size))
+
+    def send_bytes(
+        self,
+        connection,
+        request,
+        data,
+        etag,
+        content_type=MimeTypes.HTML,
+        gzipped=None,
+        headers=None,
+        max_age=DEFAULT_MAX_AGE,
+    ):
+        """
+        Send a static file held in a bytes object, with the same caching as ``send_file()``
+
+        This is for assets frozen into the firmware, where a bytes constant stays in flash
+        instead of being copied into RAM; ``scripts/build_web_assets.py --freeze`` generates
+        modules holding them.
+
+        :param connection:  The connection to the client
+        :param request:  The request being answered
+        :param data:  The file's contents
+        :param etag:  The file's ETag, including the quotes; it must change if the file does
+        :param content_type:  The MIME type to send
+        :param gzipped:  The gzipped contents, sent instead of ``data`` if the client accepts
+            gzip, or None
+        :param headers:  Optional dict of key/value pairs for additional HTTP headers
+        :param max_age:  How long, in seconds, browsers may use their copy of the file without
+            checking whether it has changed
+        """
+        if gzipped is not None and "gzip" in request.header("accept-encoding", ""):
+            data = gzipped
+            etag = etag[:-1] + '-gz"'
+        else:
+            gzipped = None
+
+        header = self._cached_response_header(
+            connection,
+            request,
+            etag,
+            content_type,
+            len(data),
+            gzipped is not None,
+            headers,
+            max_age,
+        )
+        if header is None:
+            return
+        if len(data) < SMALL_RESPONSE_SIZE:
+            connection.send(header + data)
+        else:
+            connection.send(header)
+            connection.send(data)
+
+    def _cached_response_header(
+        self, connection, request, etag, content_type, length, gzipped, headers, max_age
+    ):
+        """
+        Build the header for a cacheable static file, or answer a conditional request
+
+        :return: The encoded header, or None if the client's copy is current and a 304 response
+            has been queued instead
+        """
+        file_headers = {
+            "ETag": etag,
+            "Cache-Control": f"max-age={max_age}",
+            "Vary": "Accept-Encoding",
+        }
+        if gzipped:
+            file_headers["Content-Encoding"] = "gzip"
+        if headers is not None:
+            file_headers.update(headers)
+
+        if etag in request.header("if-none-match", ""):
+            connection.send(
+                self._response_header(connection, HttpStatus.NOT_MODIFIED, None, None, file_headers)
+            )
+            return None
+
+        return self._response_header(connection, HttpStatus.OK, content_type, length, file_headers)
+
     def send_response(
         self,
         connection,
@@ -379,17 +1687,23 @@ class HttpServer:
         """
         Send a response to the client
 
-        :param connection:  The socket connection to the client
-        :param response:  The response payload
+        The response is sent with a Content-Length header, so the connection can be kept open for
+        the client's next request.
+
+        :param connection:  The connection to the client
+        :param response:  The response payload, as a string or bytes
         :param status:  The HTTP status to respond with
         :param content_type:  The MIME type to include in the HTTP header
         :param headers:  Optional dict of key/value pairs for addtional HTTP headers. Charset is ALWAYS utf-8
         """
-        header = f"HTTP/1.0 {status} {HttpStatus.StatusText[status]}\r\nContent-type: {content_type}\r\ncharset=utf-8"
-
-        if headers is not None:
-            for k in headers.keys():
-                header = f"{header}\r\n{k}={headers[k]}"
-
-        connection.send(f"{header}\r\n\r\n".encode("UTF-8"))
-        connection.send(response.encode("UTF-8"))
+        if type(response) is str:
+            response = response.encode("UTF-8")
+
+        header = self._response_header(connection, status, content_type, len(response), headers)
+        if len(response) < SMALL_RESPONSE_SIZE:
+            # send small responses in one segment; split in two, the body waits for the client to
+            # ACK the header, which it may delay by up to 40ms
+            connection.send(header + response)
+        else:
+            connection.send(header)
+            connection.send(response)
@@ -14,6 +14,20 @@
 """
 Open Sound Control over UDP implementation.
 
+Packets are decoded in place with ``memoryview`` and ``struct.unpack_from`` into a reusable
+``OpenSoundPacket``, and encoded with ``struct.pack_into`` into a preallocated buffer owned by an
+``OpenSoundWriter``, so sending and receiving don't build intermediate lists or strings.
+
+Both single messages and ``#bundle`` packets are supported; every message inside a received bundle
+is passed to the data handler in turn. Bundles are processed as soon as they arrive; their
+timetags are not used for scheduling.
+
+Messages can be dispatched to handlers by address with an ``OpenSoundRouter``. Addresses can
+contain the OSC pattern-matching characters ``?``, ``*``, ``[]`` and ``{}``.
+
+An ``OpenSoundPublisher`` samples a set of values at a fixed rate and sends the ones that have
+changed to a server's client, batched into one bundle per tick.
+
 See
 - https://opensoundcontrol.stanford.edu/
 - https://hexler.net/touchosc/manual/introduction
@@ -22,6 +36,28 @@ See
 from europi_log import *
 import socket
 import struct
+import utime
+
+## The size of the buffers used to send and receive packets
+DEFAULT_BUFFER_SIZE = 1024
+
+## The timetag that means a bundle should be processed immediately
+IMMEDIATELY = 1
+
+## The first 8 bytes of a bundle
+BUNDLE_TAG = b"#bundle\0"
+
+## How deeply bundles can be nested inside each other
+MAX_BUNDLE_DEPTH = 4
+
+## How often an OpenSoundPublisher samples its values, in Hz
+DEFAULT_PUBLISH_RATE = 20
+
+## How often an OpenSoundPublisher re-sends every value, changed or not, in milliseconds
+DEFAULT_REFRESH_MS = 1000
+
+# The characters that make an address into a pattern
+PATTERN_CHARS = "?*[{"
 
 
 def align_next_word(n):
@@ -36,17 +72,27 @@ def align_next_word(n):
     return n + (4 - (n % 4)) % 4
 
 
+def _need(d, n, end):
+    """Raise a ValueError if there aren't n bytes left between d and end"""
+    if d + n > end:
+        raise ValueError("Truncated OSC packet")
+
+
 class OpenSoundPacket:
     """
     A container object for the Open Sound Control packet(s) we receive.
 
     Contains the address of the message and the data
 
+    The server reuses the same packet object for every message it receives, so a handler that
+    needs to keep the values after it returns must copy them.
+
     :property address:  The address string of the packet
     :property values:  The values included in the packet
 
-    :param data:  The raw byte data read from the UDP socket. The byte data consists
-        of the following data:
+    :param data:  The raw byte data read from the UDP socket. If None, the packet is left
+        empty until ``decode()`` is called. The byte data consists of the following data:
+
         #. leading '/' character
 
         #. slash-separated address (e.g. foo/bar)
@@ -75,91 +121,130 @@ class OpenSoundPacket:
         filler nulls to pad strings out to a multiple of 32 bits
     """
 
-    def __init__(self, data: bytes):
-        address_end = data.index(b"\0", 1)
-        self._address = data[0:address_end].decode("utf-8")
-        if self._address.endswith("/"):
-            self._address = self._address.rstrip("/")
-
-        types = []
+    def __init__(self, data: bytes = None):
+        self._address = ""
+        self._raw_address = b""
         self._values = []
-        type_start = data.index(b",", address_end)
-        data_start = data.index(b"\0", type_start)
-        data_start = align_next_word(data_start)
-        i = type_start + 1
-        d = data_start
-        while data[i] != 0x00:
-            t = chr(data[i])
-            if t == "i":
-                types.append(int)
-                n = (data[d] << 24) | (data[d + 1] << 16) | (data[d + 2] << 8) | data[d + 1]
-                self.values.append(n)
+
+        # the timetag of the bundle this message arrived in
+        self.timetag = IMMEDIATELY
+
+        if data is not None:
+            self.decode(data)
+
+    def decode(self, data, start=0, end=None):
+        """
+        Decode a single message, replacing this packet's address and values
+
+        :param data:  The bytes containing the message, as returned by ``recvfrom``
+        :param start:  The index of the first byte of the message
+        :param end:  The index after the last byte of the message. If None, the end of ``data``
+
+        :raises ValueError:  If the message is malformed
+        """
+        if end is None:
+            end = len(data)
+        values = self._values
+
+        # only needed for strings & blobs, so created when one is found
+        view = None
+        del values[:]
+
+        if start >= end or data[start] != 0x2F:  # '/'
+            raise ValueError("OSC address must start with '/'")
+        address_end = data.find(b"\0", start, end)
+        if address_end < 0:
+            raise ValueError("Unterminated OSC address")
+
+        # clients usually send the same few addresses over and over; only create a new string if
+        # the address has changed since the last message
+        raw_address = self._raw_address
+        if address_end - start != len(raw_address) or not data.startswith(raw_address, start):
+            self._raw_address = bytes(data[start:address_end])
+            address = str(self._raw_address, "utf-8")
+            if address.endswith("/"):
+                address = address.rstrip("/")
+            self._address = address
+
+        # messages from very old implementations may not have any type tags
+        i = start + align_next_word(address_end + 1 - start)
+        if i >= end or data[i] != 0x2C:  # ','
+            return
+        types_end = data.find(b"\0", i, end)
+        if types_end < 0:
+            raise ValueError("Unterminated OSC type tags")
+        d = start + align_next_word(types_end + 1 - start)
+
+        i += 1
+        while i < types_end:
+            t = data[i]
+            if t == 0x66:  # 'f'
+                if d + 4 > end:
+                    raise ValueError("Truncated OSC packet")
+                values.append(struct.unpack_from(">f", data, d)[0])
                 d += 4
-            elif t == "f":
-                types.append(float)
-                n = struct.unpack(">f", data[d : d + 4])[0]
-                self.values.append(n)
+            elif t == 0x69:  # 'i'
+                if d + 4 > end:
+                    raise ValueError("Truncated OSC packet")
+                values.append(struct.unpack_from(">i", data, d)[0])
                 d += 4
-            elif t == "s" or t == "S":  # include the alternate "S" here
-                types.append(str)
-                s = ""
-                string_end = data.index(b"\0", d)
-                for c in range(d, string_end):
-                    s += chr(data[c])
-                self.values.append(s)
-                d = string_end
-                d = align_next_word(d)
-            elif t == "b":
+            elif t == 0x73 or t == 0x53:  # 's', or the alternate 'S'
+                string_end = data.find(b"\0", d, end)
+                if string_end < 0:
+                    raise ValueError("Unterminated OSC string")
+                if view is None:
+                    view = memoryview(data)
+                values.append(str(view[d:string_end], "utf-8"))
+                d = start + align_next_word(string_end + 1 - start)
+            elif t == 0x62:  # 'b'
                 # blob; int32 -> n, followed by n bytes
-                types.append(bytearray)
-                n = (data[d] << 24) | (data[d + 1] << 16) | (data[d + 2] << 8) | data[d + 1]
+                _need(d, 4, end)
+                n = struct.unpack_from(">i", data, d)[0]
                 d += 4
-                b = []
-                for i in range(n):
-                    b.append(data[d + i])
-                d += n
-                d = align_next_word(d)
-                self.values.append(bytearray(b))
-            elif t == "T" or t == "F":
-                # zero-byte boolean; skip
-                pass
-            elif t == "t":
-                # 8-byte timestamp; skip
+                if n < 0:
+                    raise ValueError("Negative OSC blob size")
+                _need(d, n, end)
+                if view is None:
+                    view = memoryview(data)
+                values.append(bytearray(view[d : d + n]))
+                d = start + align_next_word(d + n - start)
+            elif t == 0x68:  # 'h'
+                # 64-bit signed integer; treat as a normal int
+                _need(d, 8, end)
+                values.append(struct.unpack_from(">q", data, d)[0])
+                d += 8
+            elif t == 0x64:  # 'd'
+                # 64-bit float; treat as a normal float
+                _need(d, 8, end)
+                values.append(struct.unpack_from(">d", data, d)[0])
                 d += 8
-            elif t == "h":
-                # 64-bit signed integer
-                # treat as a normal int
-                types.append(int)
-                n = (
-                    (data[d] << 56)
-                    | (data[d + 1] << 48)
-                    | (data[d + 2] << 40)
-                    | (data[d + 3] << 32)
-                    | (data[d + 4] << 24)
-                    | (data[d + 5] << 16)
-                    | (data[d + 6] << 8)
-                    | data[d + 7]
-                )
-                self.values.append(n)
+            elif t == 0x74:  # 't'
+                # 8-byte timetag
+                _need(d, 8, end)
+                values.append(struct.unpack_from(">Q", data, d)[0])
                 d += 8
-            elif t == "c":
+            elif t == 0x63:  # 'c'
                 # a single character; treat as a string
-                types.append(str)
-                self.values.append(
-                    data[d + 3].decode()  # data is in the 4th byte; padded with leading zeros
-                )
+                _need(d, 4, end)
+                values.append(chr(struct.unpack_from(">I", data, d)[0]))
                 d += 4
-            elif t == "m":
-                # 4-byte midi; skip
+            elif t == 0x6D:  # 'm'
+                # 4-byte midi message: port, status, data1, data2
+                _need(d, 4, end)
+                values.append(bytes(data[d : d + 4]))
                 d += 4
-            elif t == "N":
-                # nil; skip
-                pass
-            elif t == "I":
-                # infinity; skip
-                pass
+            elif t == 0x54:  # 'T'
+                values.append(True)
+            elif t == 0x46:  # 'F'
+                values.append(False)
+            elif t == 0x4E:  # 'N'
+                values.append(None)
+            elif t == 0x49:  # 'I'
+                values.append(float("inf"))
             else:
-                log_warning(f"Unsupported type {t}", "osc")
+                # we don't know how long this argument is, so nothing after it can be read
+                log_warning(f"Unsupported type {chr(t)}", "osc")
+                break
 
             i += 1
 
@@ -178,6 +263,417 @@ class OpenSoundPacket:
         return self._address
 
 
+def is_bundle(data, start=0):
+    """
+    Does the packet starting at the given index contain a bundle?
+
+    :param data:  The raw packet data
+    :param start:  The index of the start of the packet
+    """
+    return data.startswith(BUNDLE_TAG, start)
+
+
+def for_each_message(data, packet, callback, start=0, end=None, timetag=IMMEDIATELY, depth=0):
+    """
+    Decode every message in a packet, which may be a single message or a bundle
+
+    Each message is decoded into ``packet``, which is then passed to ``callback``.
+
+    :param data:  The raw packet data
+    :param packet:  The ``OpenSoundPacket`` to decode each message into
+    :param callback:  A function accepting the ``OpenSoundPacket``
+    :param start:  The index of the first byte of the packet
+    :param end:  The index after the last byte of the packet. If None, the end of ``data``
+    :param timetag:  The timetag of the enclosing bundle
+    :param depth:  How many bundles deep we are
+
+    :raises ValueError:  If the packet is malformed
+    """
+    if end is None:
+        end = len(data)
+    if not is_bundle(data, start):
+        packet.decode(data, start, end)
+        packet.timetag = timetag
+        callback(packet)
+        return
+
+    if depth >= MAX_BUNDLE_DEPTH:
+        raise ValueError("OSC bundles nested too deeply")
+    _need(start, 16, end)
+    timetag = struct.unpack_from(">Q", data, start + 8)[0]
+    d = start + 16
+    while d < end:
+        _need(d, 4, end)
+        size = struct.unpack_from(">i", data, d)[0]
+        d += 4
+        if size <= 0 or size % 4 != 0:
+            raise ValueError("Invalid OSC bundle element size")
+        _need(d, size, end)
+        for_each_message(data, packet, callback, d, d + size, timetag, depth + 1)
+        d += size
+
+
+class OpenSoundWriter:
+    """
+    Encodes OSC messages and bundles into a preallocated buffer
+
+    .. code-block:: python
+
+        writer = OpenSoundWriter()
+
+        # a single message
+        writer.add_message("/europi/k1", 0.5)
+        sock.sendto(writer.getvalue(), addr)
+
+        # a bundle setting every CV at once
+        writer.reset()
+        writer.begin_bundle()
+        for i in range(6):
+            writer.add_message(f"/europi/cv{i + 1}", voltages[i])
+        writer.end_bundle()
+        sock.sendto(writer.getvalue(), addr)
+
+    Supported types are int, float, bool, str, bytes/bytearray and None. Bools are sent as 0/1
+    integers. Addresses and strings can be given as ``bytes`` to avoid encoding them each time.
+
+    :param size:  The size of the buffer, i.e. the largest packet that can be written
+    """
+
+    def __init__(self, size=DEFAULT_BUFFER_SIZE):
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.length = 0
+
+        # the index of each open bundle's size field, or -1 for the outermost one
+        self.bundles = []
+
+    def reset(self):
+        """Discard the contents of the buffer"""
+        self.length = 0
+        del self.bundles[:]
+
+    def getvalue(self):
+        """
+        Get the encoded packet
+
+        :return: A memoryview of the buffer, which is overwritten by the next packet
+        """
+        if self.bundles:
+            raise ValueError("Unclosed OSC bundle")
+        return self.view[0 : self.length]
+
+    def _reserve(self, n):
+        """Make sure there's room for n more bytes
+
+        :return: The index the bytes should be written at
+        """
+        pos = self.length
+        if pos + n > len(self.buffer):
+            raise ValueError("OSC packet is larger than the buffer")
+        return pos
+
+    def _write_string(self, s):
+        """Write a null-terminated string, padded to a whole number of words"""
+        if type(s) is str:
+            s = s.encode()
+        n = len(s)
+        total = (n + 4) & ~3
+        pos = self._reserve(total)
+        buffer = self.buffer
+        # zero the last word for the terminator & padding, then write the string over it
+        struct.pack_into(">I", buffer, pos + total - 4, 0)
+        buffer[pos : pos + n] = s
+        self.length = pos + total
+
+    def _begin_element(self):
+        """Reserve space for an element's size if we're inside a bundle"""
+        if not self.bundles:
+            return -1
+        size_pos = self._reserve(4)
+        self.length = size_pos + 4
+        return size_pos
+
+    def _end_element(self, size_pos):
+        """Fill in the size of an element started with ``_begin_element``"""
+        if size_pos >= 0:
+            struct.pack_into(">i", self.buffer, size_pos, self.length - size_pos - 4)
+
+    def begin_bundle(self, timetag=IMMEDIATELY):
+        """
+        Start a bundle; every message added until ``end_bundle()`` is included in it
+
+        Bundles may be nested.
+
+        :param timetag:  The NTP timetag of the bundle
+        """
+        size_pos = self._begin_element()
+        pos = self._reserve(16)
+        self.buffer[pos : pos + 8] = BUNDLE_TAG
+        struct.pack_into(">Q", self.buffer, pos + 8, timetag)
+        self.length = pos + 16
+        self.bundles.append(size_pos)
+
+    def end_bundle(self):
+        """Finish the most recently started bundle"""
+        self._end_element(self.bundles.pop())
+
+    def add_message(self, address, *args):
+        """
+        Add a message to the buffer
+
+        :param address:  The OSC address to send to
+        :param args:  The values to encode in the message
+
+        :raises ValueError:  If a value has an unsupported type, or the buffer is full
+        """
+        size_pos = self._begin_element()
+        self._write_string(address)
+
+        # type tags; ',' + one per argument + null, padded
+        n = len(args)
+        total = (n + 5) & ~3
+        tags = self._reserve(total)
+        buffer = self.buffer
+        struct.pack_into(">I", buffer, tags + total - 4, 0)
+        buffer[tags] = 0x2C  # ','
+        for i in range(n):
+            arg = args[i]
+            t = type(arg)
+            if t is float:
+                tag = 0x66  # 'f'
+            elif t is int:
+                tag = 0x69 if -0x80000000 <= arg <= 0x7FFFFFFF else 0x68  # 'i' or 'h'
+            elif t is bool:
+                tag = 0x69  # 'i'
+            elif t is str:
+                tag = 0x73  # 's'
+            elif t is bytearray or t is bytes:
+                tag = 0x62  # 'b'
+            elif arg is None:
+                tag = 0x4E  # 'N'
+            else:
+                raise ValueError(f"Unsupported OSC type {t}")
+            buffer[tags + 1 + i] = tag
+        self.length = tags + total
+
+        # values
+        for i in range(n):
+            t = buffer[tags + 1 + i]
+            if t == 0x66:
+                pos = self._reserve(4)
+                struct.pack_into(">f", buffer, pos, args[i])
+                self.length = pos + 4
+            elif t == 0x69:
+                pos = self._reserve(4)
+                struct.pack_into(">i", buffer, pos, args[i])
+                self.length = pos + 4
+            elif t == 0x73:
+                self._write_string(args[i])
+            elif t == 0x62:
+                blob = args[i]
+                blob_length = len(blob)
+                total = 4 + ((blob_length + 3) & ~3)
+                pos = self._reserve(total)
+                struct.pack_into(">I", buffer, pos + total - 4, 0)
+                struct.pack_into(">i", buffer, pos, blob_length)
+                buffer[pos + 4 : pos + 4 + blob_length] = blob
+                self.length = pos + total
+            elif t == 0x68:
+                pos = self._reserve(8)
+                struct.pack_into(">q", buffer, pos, args[i])
+                self.length = pos + 8
+
+        self._end_element(size_pos)
+
+
+def is_pattern(address):
+    """
+    Does an address contain any OSC pattern-matching characters?
+
+    :param address:  The address to check
+    """
+    for c in PATTERN_CHARS:
+        if c in address:
+            return True
+    return False
+
+
+def match_address(pattern, address, pi=0, ai=0):
+    """
+    Does an OSC address pattern match an address?
+
+    Supports ``?`` (any single character), ``*`` (any sequence of characters), ``[abc]``,
+    ``[a-z]``, ``[!abc]`` (character sets) and ``{foo,bar}`` (alternatives). None of these match
+    the ``/`` separating the parts of the address.
+
+    :param pattern:  The address pattern, e.g. ``/europi/cv[1-3]``
+    :param address:  The address to compare it to, e.g. ``/europi/cv2``
+    :param pi:  The index in ``pattern`` to start matching from
+    :param ai:  The index in ``address`` to start matching from
+    """
+    pattern_length = len(pattern)
+    address_length = len(address)
+    while pi < pattern_length:
+        c = pattern[pi]
+        if c == "*":
+            pi += 1
+            while True:
+                if match_address(pattern, address, pi, ai):
+                    return True
+                if ai >= address_length or address[ai] == "/":
+                    return False
+                ai += 1
+
+        if ai >= address_length:
+            return False
+        a = address[ai]
+
+        if c == "?":
+            if a == "/":
+                return False
+        elif c == "[":
+            close = pattern.find("]", pi + 1)
+            if close < 0 or a == "/":
+                return False
+            j = pi + 1
+            negate = j < close and pattern[j] == "!"
+            if negate:
+                j += 1
+            matched = False
+            while j < close:
+                if j + 2 < close and pattern[j + 1] == "-":
+                    if pattern[j] <= a <= pattern[j + 2]:
+                        matched = True
+                    j += 3
+                else:
+                    if pattern[j] == a:
+                        matched = True
+                    j += 1
+            if matched == negate:
+                return False
+            pi = close
+        elif c == "{":
+            close = pattern.find("}", pi + 1)
+            if close < 0:
+                return False
+            option_start = pi + 1
+            while option_start <= close:
+                option_end = pattern.find(",", option_start, close)
+                if option_end < 0:
+                    option_end = close
+                n = option_end - option_start
+                if address[ai : ai + n] == pattern[option_start:option_end] and match_address(
+                    pattern, address, close + 1, ai + n
+                ):
+                    return True
+                option_start = option_end + 1
+            return False
+        elif c != a:
+            return False
+
+        pi += 1
+        ai += 1
+    return ai == address_length
+
+
+class OpenSoundRouter:
+    """
+    Dispatches received messages to handlers by address
+
+    Handlers for plain addresses are found with a dictionary lookup. Handlers can also be
+    registered with an address pattern, e.g. ``/europi/cv[1-6]``, in which case they receive every
+    matching message. If a received message's address is itself a pattern, it is delivered to
+    every plain address it matches, as described in the OSC specification.
+
+    .. code-block:: python
+
+        router = OpenSoundRouter()
+
+        @router.route("/europi/cv1")
+        def on_cv1(connection=None, data=None):
+            cv1.voltage(data.values[0])
+
+        srv = OpenSoundServer(9000)
+        srv.data_handler(router.dispatch)
+
+    Handlers accept the same ``connection`` and ``data`` keyword arguments as the server's data
+    handler.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.patterns = []
+
+        # called with messages that no other handler accepts
+        self.fallback = None
+
+    def add(self, address, handler):
+        """
+        Register a handler for an address or address pattern
+
+        :param address:  The address, e.g. ``/europi/cv1``. A trailing ``/`` is ignored
+        :param handler:  The function to call with messages sent to that address
+        """
+        address = address.rstrip("/")
+        if is_pattern(address):
+            self.patterns.append((address, handler))
+        else:
+            self.routes[address] = handler
+
+    def remove(self, address):
+        """
+        Remove the handler(s) for an address or address pattern
+
+        :param address:  The address passed to ``add``
+        """
+        address = address.rstrip("/")
+        self.routes.pop(address, None)
+        self.patterns = [p for p in self.patterns if p[0] != address]
+
+    def route(self, address):
+        """
+        Decorator to register a handler for an address
+
+        :param address:  The address or address pattern
+        """
+
+        def decorator(func):
+            self.add(address, func)
+            return func
+
+        return decorator
+
+    def dispatch(self, connection=None, data: OpenSoundPacket = None):
+        """
+        Pass a received message to the handler(s) for its address
+
+        :param connection:  The address of the client that sent the message
+        :param data:  The received ``OpenSoundPacket``
+        :return: True if any handler received the message
+        """
+        address = data.address
+        handled = False
+
+        handler = self.routes.get(address)
+        if handler is not None:
+            handler(connection=connection, data=data)
+            handled = True
+        elif is_pattern(address):
+            for route, handler in self.routes.items():
+                if match_address(address, route):
+                    handler(connection=connection, data=data)
+                    handled = True
+
+        for pattern, handler in self.patterns:
+            if match_address(pattern, address):
+                handler(connection=connection, data=data)
+                handled = True
+
+        if not handled and self.fallback is not None:
+            self.fallback(connection=connection, data=data)
+        return handled
+
+
 class OpenSoundServer:
     """
     The OSC server.
@@ -203,13 +699,23 @@ class OpenSoundServer:
             while True:
                 srv.receive_data()
 
+    The callback is called once for each message, including each message inside a bundle. Use an
+    ``OpenSoundRouter`` to call different handlers for different addresses.
+
     :param recv_port:  The UDP port we accept messages on. TouchOSC uses port 9000 by default,
         so we use that here for convenience
     :param send_port:  The UDP port we send outgoing messages on.
     :param send_addr:  The IP address of the host we send outgoing messages to
+    :param buffer_size:  The largest packet that can be sent or received
     """
 
-    def __init__(self, recv_port=9000, send_port=9001, send_addr="192.168.4.100"):
+    def __init__(
+        self,
+        recv_port=9000,
+        send_port=9001,
+        send_addr="192.168.4.100",
+        buffer_size=DEFAULT_BUFFER_SIZE,
+    ):
         log_info(f"Listening for OSC packets on port {recv_port}", "osc")
         addr = socket.getaddrinfo("0.0.0.0", recv_port)[0][-1]
         self.recv_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -223,6 +729,13 @@ class OpenSoundServer:
         self.send_port = send_port
         self.send_addr = send_addr
 
+        self.buffer_size = buffer_size
+        self.packet = OpenSoundPacket()
+        self.writer = OpenSoundWriter(buffer_size)
+
+        # the client that sent the packet currently being processed
+        self.connection = None
+
         self.recv_callback = self.default_callback
 
     def default_callback(self, connection=None, data: OpenSoundPacket = None):
@@ -239,7 +752,7 @@ class OpenSoundServer:
 
         The provided function must accept the following keyword arguments:
         - connection: socket  A socket connection to the client
-        - data: str  The request the client sent
+        - data: OpenSoundPacket  The message the client sent
 
         :param func:  The function to handle the request.
         """
@@ -250,13 +763,15 @@ class OpenSoundServer:
         self.recv_callback = wrapper
         return wrapper
 
+    def _on_message(self, packet):
+        self.recv_callback(connection=self.connection, data=packet)
+
     def receive_data(self):
         """Check if we have any new data to process, invoke data_handler as needed"""
         while True:
             try:
-                (data, connection) = self.recv_socket.recvfrom(1024)
-                packet = OpenSoundPacket(data)
-                self.recv_callback(connection=connection, data=packet)
+                (data, self.connection) = self.recv_socket.recvfrom(self.buffer_size)
+                for_each_message(data, self.packet, self._on_message)
             except ValueError as err:
                 log_warning(f"Failed to process packet: {err}", "osc")
                 break
@@ -270,84 +785,207 @@ class OpenSoundServer:
                 # log_debug(f"Raw packet: {s}")
                 break
 
+    def close(self):
+        """Close the sockets, freeing the ports for another server"""
+        self.recv_socket.close()
+        self.send_socket.close()
+
+    def _send(self):
+        """Send the packet in the writer's buffer"""
+        try:
+            self.send_socket.sendto(self.writer.getvalue(), (self.send_addr, self.send_port))
+        except OSError:
+            pass
+
     def send_data(self, address, *args):
         """
         Transmit a packet
 
         :param address:  The OSC address to send to
-        :param args:  The values to encode in the packet. Allowed types are int, float, bool, str, and bytearray. Bools are converted to 0/1 integers
-        """
-
-        def pad_length(arr):
-            # pad with nulls until we get to the next multiple of 4
-            for i in range((4 - (len(arr) % 4)) % 4):
-                arr.append(0)
-
-        data = []
-        for ch in address:
-            data.append(ord(ch))
-        data.append(0)
-        pad_length(data)
-
-        # comma denoting start of types
-        data.append(ord(","))
-
-        # types
-        for arg in args:
-            if type(arg) is int or type(arg) is bool:
-                data.append(ord("i"))
-            elif type(arg) is float:
-                data.append(ord("f"))
-            elif type(arg) is str:
-                data.append(ord("s"))
-            elif type(arg) is bytearray:
-                data.append(ord("b"))
-        data.append(0)
-        pad_length(data)
+        :param args:  The values to encode in the packet. Allowed types are int, float, bool, str, bytearray and None. Bools are converted to 0/1 integers
+        """
+        try:
+            self.writer.reset()
+            self.writer.add_message(address, *args)
+            self._send()
+        except Exception as err:
+            log_warning(f"Failed to send OSC data: {err}", "osc")
 
-        # values
-        for arg in args:
-            if type(arg) is int:
-                # big-endian, 32-bit int
-                data.append((arg >> 24) & 0xFF)
-                data.append((arg >> 16) & 0xFF)
-                data.append((arg >> 8) & 0xFF)
-                data.append(arg & 0xFF)
-            elif type(arg) is bool:
-                # treat boolean as a 0/1 integer for convenience
-                if arg:
-                    data.append(0)
-                    data.append(0)
-                    data.append(0)
-                    data.append(1)
-                else:
-                    data.append(0)
-                    data.append(0)
-                    data.append(0)
-                    data.append(0)
-            elif type(arg) is float:
-                bytes = struct.pack(">f", arg)
-                for b in bytes:
-                    data.append(b)
-            elif type(arg) is str:
-                for ch in arg:
-                    data.append(ord(ch))
-                data.append(0)
-                pad_length(data)
-            elif type(arg) is bytearray:
-                n = len(arg)
-                data.append((n >> 24) & 0xFF)
-                data.append((n >> 16) & 0xFF)
-                data.append((n >> 8) & 0xFF)
-                data.append(n & 0xFF)
-                for b in arg:
-                    data.append(b)
-                pad_length(data)
+    def send_bundle(self, messages, timetag=IMMEDIATELY):
+        """
+        Transmit several messages in a single bundle
 
+        :param messages:  A list of tuples, each containing the address followed by the values
+            for one message, e.g. ``[("/europi/k1", 0.5), ("/europi/k2", 0.25)]``
+        :param timetag:  The NTP timetag of the bundle
+        """
         try:
-            data = bytearray(data)
-            self.send_socket.sendto(data, (self.send_addr, self.send_port))
-        except OSError:
-            pass
+            writer = self.writer
+            writer.reset()
+            writer.begin_bundle(timetag)
+            for message in messages:
+                writer.add_message(*message)
+            writer.end_bundle()
+            self._send()
         except Exception as err:
             log_warning(f"Failed to send OSC data: {err}", "osc")
+
+
+class OpenSoundPublisher:
+    """
+    Periodically samples values and sends the ones that have changed
+
+    Each source is read once per tick. A float is sent when it has moved more than its threshold
+    away from the last value sent; any other value is sent whenever it differs from the last one.
+    Everything that changed during a tick is sent in a single bundle, so the client receives at
+    most one datagram per tick and none at all while nothing is moving.
+
+    Every value is re-sent every ``refresh_ms`` milliseconds regardless, so a client that starts
+    listening late, or misses a datagram, catches up.
+
+    ``poll()`` must be called regularly, e.g. from the script's main loop; it returns straight
+    away unless a tick is due. Publishing from the main loop rather than a ``Timer`` callback keeps
+    socket calls out of interrupt context and lets the publisher share the server's writer.
+
+    .. code-block:: python
+
+        server = OpenSoundServer()
+        publisher = OpenSoundPublisher(server, rate=20, threshold=0.005)
+        publisher.add("/europi/k1", k1.percent)
+        publisher.add("/europi/b1", lambda: b1.value() != 0)
+
+        while True:
+            server.receive_data()
+            publisher.poll()
+
+    :param server:  The ``OpenSoundServer`` to send the bundles with
+    :param rate:  How many times per second to sample the values
+    :param threshold:  The default amount a float must change by before it is sent again
+    :param refresh_ms:  How often every value is sent, in milliseconds, or 0 to only send changes
+    :param clock:  The module used to read the time; must provide ``ticks_ms()``, ``ticks_add()``
+        and ``ticks_diff()``. Defaults to ``utime``
+    """
+
+    def __init__(
+        self,
+        server,
+        rate=DEFAULT_PUBLISH_RATE,
+        threshold=0.0,
+        refresh_ms=DEFAULT_REFRESH_MS,
+        clock=utime,
+    ):
+        self.server = server
+        self.threshold = threshold
+        self.refresh_ms = refresh_ms
+        self.clock = clock
+
+        # parallel lists, one entry per source
+        self.addresses = []
+        self.readers = []
+        self.thresholds = []
+        self.values = []
+
+        # counters for the number of bundles & messages sent
+        self.packets = 0
+        self.messages = 0
+
+        self.set_rate(rate)
+        now = clock.ticks_ms()
+        self.next_tick_ms = now
+        self.last_refresh_ms = now
+
+    def set_rate(self, rate):
+        """
+        Change how often the values are sampled
+
+        :param rate:  The number of ticks per second
+        """
+        if rate <= 0:
+            raise ValueError(f"Invalid publish rate {rate}")
+        self.period_ms = max(1, round(1000 / rate))
+
+    def add(self, address, read, threshold=None):
+        """
+        Add a value to publish
+
+        :param address:  The OSC address to send the value to
+        :param read:  A function taking no arguments that returns the current value
+        :param threshold:  How much a float must change by before it is sent again. Defaults to
+            the publisher's threshold
+        """
+        if type(address) is str:
+            address = address.encode()
+        self.addresses.append(address)
+        self.readers.append(read)
+        self.thresholds.append(self.threshold if threshold is None else threshold)
+        # None forces the first sample to be sent
+        self.values.append(None)
+
+    def poll(self):
+        """
+        Publish the changed values if a tick is due
+
+        If the caller fell more than a tick behind, the missed ticks are skipped instead of being
+        sent in a burst.
+
+        :return: True if a tick was processed, otherwise False
+        """
+        clock = self.clock
+        now = clock.ticks_ms()
+        if clock.ticks_diff(now, self.next_tick_ms) < 0:
+            return False
+
+        self.next_tick_ms = clock.ticks_add(self.next_tick_ms, self.period_ms)
+        if clock.ticks_diff(now, self.next_tick_ms) >= 0:
+            self.next_tick_ms = clock.ticks_add(now, self.period_ms)
+
+        refresh = False
+        if self.refresh_ms > 0 and clock.ticks_diff(now, self.last_refresh_ms) >= self.refresh_ms:
+            self.last_refresh_ms = now
+            refresh = True
+
+        self.publish(refresh)
+        return True
+
+    def publish(self, refresh=False):
+        """
+        Sample every value now and send the ones that have changed
+
+        :param refresh:  If True, send every value whether it has changed or not
+        :return: The number of messages sent
+        """
+        writer = self.server.writer
+        addresses = self.addresses
+        readers = self.readers
+        thresholds = self.thresholds
+        values = self.values
+        count = 0
+        try:
+            writer.reset()
+            writer.begin_bundle()
+            for i in range(len(addresses)):
+                value = readers[i]()
+                last = values[i]
+                if not refresh and last is not None:
+                    if type(value) is float:
+                        if abs(value - last) <= thresholds[i]:
+                            continue
+                    elif value == last:
+                        continue
+                writer.add_message(addresses[i], value)
+                values[i] = value
+                count += 1
+            writer.end_bundle()
+        except Exception as err:
+            log_warning(f"Failed to publish OSC data: {err}", "osc")
+            writer.reset()
+            # nothing was sent, so send everything on the next tick
+            for i in range(len(values)):
+                values[i] = None
+            return 0
+
+        if count > 0:
+            self.server._send()
+            self.packets += 1
+            self.messages += count
+        return count
@@ -18,7 +18,11 @@ Shared classes for quantization support
 @year   2023
 """
 
-from europi import experimental_config, MAX_OUTPUT_VOLTAGE
+import math
+from array import array
+
+from europi import experimental_config, MAX_INPUT_VOLTAGE, MAX_OUTPUT_VOLTAGE
+from experimental.bisect import bisect_left
 
 ## 1.0V/O is the Eurorack/Moog standard, but Buchla uses 1.2V/O
 VOLTS_PER_OCTAVE = experimental_config.VOLTS_PER_OCTAVE
@@ -32,6 +36,9 @@ VOLTS_PER_SEMITONE = float(VOLTS_PER_OCTAVE) / float(SEMITONES_PER_OCTAVE)
 ## Labels for the 12 semitones (using sharps, not flats)
 SEMITONE_LABELS = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
 
+## Cents per octave
+CENTS_PER_OCTAVE = 1200.0
+
 
 class Quantizer:
     """Represents a set of semitones we can quantize input voltages to
@@ -52,31 +59,104 @@ class Quantizer:
 
     def __init__(self, notes=None, name=""):
         if notes is None:
-            self.notes = [True] * SEMITONES_PER_OCTAVE
-        else:
-            if len(notes) != SEMITONES_PER_OCTAVE:
-                raise ValueError(
-                    f"Wrong size for notes array: {len(notes)} but expected {SEMITONES_PER_OCTAVE}"
-                )
-
-            self.notes = [n for n in notes]
+            notes = [True] * SEMITONES_PER_OCTAVE
 
+        self.notes = notes
         self.name = name
 
+    @property
+    def notes(self):
+        """The boolean array of enabled notes
+
+        Assigning a new array rebuilds the lookup tables. Change individual notes with
+        ``scale[n] = True/False`` rather than modifying this array in-place.
+        """
+        return self._notes
+
+    @notes.setter
+    def notes(self, notes):
+        if len(notes) != SEMITONES_PER_OCTAVE:
+            raise ValueError(
+                f"Wrong size for notes array: {len(notes)} but expected {SEMITONES_PER_OCTAVE}"
+            )
+        self._notes = [n for n in notes]
+        self._build_tables()
+
+    def _build_tables(self):
+        """Precompute the nearest on-scale note for every semitone
+
+        ``_nearest[s]`` is the enabled note closest to semitone ``s`` within the same octave (ties go
+        to the lower note), and ``_step_down[n]`` is the number of semitones from note ``n`` down to
+        the previous enabled note, wrapping into the octave below if needed.
+        """
+        self._nearest = bytearray(SEMITONES_PER_OCTAVE)
+        self._step_down = bytearray(SEMITONES_PER_OCTAVE)
+        self._any_enabled = True in self._notes
+        if not self._any_enabled:
+            return
+        self._lowest = self._notes.index(True)
+
+        for semitone in range(SEMITONES_PER_OCTAVE):
+            best_delta = 255
+            for note in range(SEMITONES_PER_OCTAVE):
+                if self._notes[note] and abs(semitone - note) < best_delta:
+                    self._nearest[semitone] = note
+                    best_delta = abs(semitone - note)
+
+            step = 1
+            while not self._notes[(semitone - step) % SEMITONES_PER_OCTAVE]:
+                step += 1
+            self._step_down[semitone] = step
+
     def __getitem__(self, n):
-        return self.notes[n % len(self.notes)]
+        return self._notes[n % len(self._notes)]
 
     def __setitem__(self, n, value):
-        self.notes[n % len(self.notes)] = value
+        self._notes[n % len(self._notes)] = value
+        self._build_tables()
 
     def __len__(self):
-        return len(self.notes)
+        return len(self._notes)
 
     def __str__(self):
         if self.name:
             return self.name
         else:
-            return "".join(["1" if self.notes[i] else "0" for i in range(len(self.notes))])
+            return "".join(["1" if self._notes[i] else "0" for i in range(len(self._notes))])
+
+    def _quantize_semitones(self, analog_in, root):
+        """Get the absolute on-scale semitone index & scale note for the given input
+
+        The index is relative to 0V, with the root already applied
+
+        :return: A tuple of the form (index, note)
+        """
+        # find the nearest chromatic semitone to the input, transposed down by the root
+        chromatic = round((analog_in - VOLTS_PER_SEMITONE * root) / VOLTS_PER_SEMITONE)
+        if chromatic >= 0:
+            octave = chromatic // SEMITONES_PER_OCTAVE
+            note = self._nearest[chromatic - octave * SEMITONES_PER_OCTAVE]
+        else:
+            # below the root the octave is rounded towards zero, so the lowest note in the scale is
+            # always the nearest
+            octave = -(-chromatic // SEMITONES_PER_OCTAVE)
+            note = self._lowest
+
+        # re-apply the root to transpose back up
+        index = octave * SEMITONES_PER_OCTAVE + note + root
+
+        # If the calculated voltage is above what we can actually output, move down the scale until it
+        # isn't
+        # Author's Note:
+        #  The likeliest way for this to trigger is if MAX_OUTPUT_VOLTAGE is set significantly lower than
+        #  MAX_INPUT_VOLTAGE (e.g. 10V in, 5V out) and/or @root is set very high and @analog_in is close
+        #  to MAX_OUTPUT_VOLTAGE
+        while index * VOLTS_PER_SEMITONE > MAX_OUTPUT_VOLTAGE:
+            step = self._step_down[note]
+            index -= step
+            note = (note - step) % SEMITONES_PER_OCTAVE
+
+        return index, note
 
     def quantize(self, analog_in, root=0):
         """Take an analog input voltage and round it to the nearest note on our scale
@@ -88,50 +168,256 @@ class Quantizer:
         :return: A tuple of the form (voltage, note) where voltage is the raw voltage to output,
             and note is a value from 0-11 indicating the semitone
         """
-        # Make sure we've got at least 1 note in the scale enabled, otherwise we might have infinite loop problems
         # If we have nothing to quantize to, just output zero for both outputs
-        if not (True in self.notes):
+        if not self._any_enabled:
             return (0, 0)
 
-        # offset the input voltage by the root to transpose down
-        analog_in = analog_in - VOLTS_PER_SEMITONE * root
+        (index, note) = self._quantize_semitones(analog_in, root)
+        return (index * VOLTS_PER_SEMITONE, note)
 
-        # first get the closest chromatic voltage to the input
-        nearest_chromatic_volt = round(analog_in / VOLTS_PER_SEMITONE) * VOLTS_PER_SEMITONE
+    def quantize_many(self, voltages, root=0, out=None):
+        """Quantize several input voltages in one call
 
-        # then convert that to a 0-12 value indicating the nearest semitone
-        base_volts = int(nearest_chromatic_volt)
-        nearest_semitone = (nearest_chromatic_volt - base_volts) / VOLTS_PER_SEMITONE
+        :param voltages:  A list or array of input voltages
+        :param root:      An integer in the range [0, 12) indicating the number of semitones up
+            to transpose the quantized scale
+        :param out:       An optional list or ``array("f")`` of the same length to write the
+            quantized voltages into. If None a new list is created
 
-        # go through our scale and determine the nearest on-scale note
-        nearest_on_scale = 0
-        best_delta = 255
-        for note in range(len(self.notes)):
-            if self.notes[note]:
-                delta = abs(nearest_semitone - note)
-                if delta < best_delta:
-                    nearest_on_scale = note
-                    best_delta = delta
+        :return: The list or array of quantized voltages
+        """
+        n = len(voltages)
+        if out is None:
+            out = [0.0] * n
+
+        if not self._any_enabled:
+            for i in range(n):
+                out[i] = 0
+            return out
+
+        for i in range(n):
+            out[i] = self._quantize_semitones(voltages[i], root)[0] * VOLTS_PER_SEMITONE
+        return out
+
+
+class TuningQuantizer:
+    """Quantizes input voltages to an arbitrary tuning
+
+    Where ``Quantizer`` is limited to the 12 semitones of equal temperament, a ``TuningQuantizer`` can
+    use any number of notes per period, at any pitches, e.g. 19-TET, just intonation or a Scala
+    tuning. The pitches of every enabled note across the input range are precomputed into a sorted
+    array, and each call to ``quantize()`` does a binary search of that array, so quantizing is
+    O(log n) in the number of notes.
+
+    ``quantize()`` has the same signature as ``Quantizer.quantize()``, and notes can be enabled or
+    disabled with ``q[n] = True/False``, so this can be used as a drop-in replacement in most scripts.
+
+    :param cents:  The pitch of each note in the period, in cents above the root, in ascending order.
+        The first note is normally 0
+    :param period_cents:  The size of the period (normally an octave) in cents
+    :param notes:  An optional boolean array the same length as ``cents`` indicating what notes are
+        enabled. If None, all notes are enabled
+    :param name:  The human-readable name for this tuning
+    :param hysteresis:  How far past the midpoint between two notes, in volts, the input has to move
+        before the output changes. This stops the output from chattering when the input sits near a
+        boundary. If non-zero, use a separate instance for each input being quantized.
+
+    :raises ValueError: if ``cents`` is empty or not in ascending order, or if ``notes`` is the
+        wrong length
+    """
 
-        # re-apply the root to transpose back up
-        volts = base_volts + nearest_on_scale * VOLTS_PER_SEMITONE + root * VOLTS_PER_SEMITONE
+    def __init__(self, cents, period_cents=CENTS_PER_OCTAVE, notes=None, name="", hysteresis=0.0):
+        if len(cents) == 0:
+            raise ValueError("A tuning needs at least one note")
+        for i in range(1, len(cents)):
+            if cents[i] <= cents[i - 1]:
+                raise ValueError(f"Tuning is not in ascending order: {cents}")
+        if cents[-1] - cents[0] >= period_cents:
+            raise ValueError(f"Tuning is wider than the period of {period_cents} cents: {cents}")
 
-        # If the calculated voltage is above what we can actually output, move down in semitones until we get
-        # to something on the scale
-        # Author's Note:
-        #  The likeliest way for this to trigger is if MAX_OUTPUT_VOLTAGE is set significantly lower than
-        #  MAX_INPUT_VOLTAGE (e.g. 10V in, 5V out) and/or @root is set very high and @analog_in is close
-        #  to MAX_OUTPUT_VOLTAGE
-        highest_volts = volts
-        highest_note = nearest_on_scale
-        while volts > MAX_OUTPUT_VOLTAGE:
-            highest_volts -= VOLTS_PER_SEMITONE
-            highest_note = (highest_note - 1) % len(self.notes)
-            if self.notes[highest_note]:
-                volts = highest_volts
-                nearest_on_scale = highest_note
-
-        return (volts, nearest_on_scale)
+        if notes is None:
+            notes = [True] * len(cents)
+        elif len(notes) != len(cents):
+            raise ValueError(f"Wrong size for notes array: {len(notes)} but expected {len(cents)}")
+
+        self.name = name
+        self.hysteresis = hysteresis
+        self.period_volts = period_cents / CENTS_PER_OCTAVE * VOLTS_PER_OCTAVE
+        self.note_volts = [c / CENTS_PER_OCTAVE * VOLTS_PER_OCTAVE for c in cents]
+        self._notes = [n for n in notes]
+        self._last_index = -1
+        self._build_tables()
+
+    @classmethod
+    def from_voltages(cls, volts, period_volts=VOLTS_PER_OCTAVE, **kwargs):
+        """Create a tuning from the voltage of each note above the root
+
+        :param volts:  The voltage of each note in the period, in ascending order
+        :param period_volts:  The size of the period in volts
+        """
+        scale = CENTS_PER_OCTAVE / VOLTS_PER_OCTAVE
+        return cls([v * scale for v in volts], period_volts * scale, **kwargs)
+
+    @classmethod
+    def equal_temperament(cls, divisions, **kwargs):
+        """Create an equal-tempered tuning, e.g. 19-TET
+
+        :param divisions:  The number of equally-spaced notes per octave
+        """
+        step = CENTS_PER_OCTAVE / divisions
+        return cls([i * step for i in range(divisions)], **kwargs)
+
+    @classmethod
+    def from_scala(cls, lines, **kwargs):
+        """Create a tuning from the contents of a Scala (``.scl``) file
+
+        Lines starting with ``!`` are comments. The first line is the description, the second is
+        the number of notes, and each following line is a pitch, either in cents if it contains a
+        ``.``, or as a ratio (e.g. ``3/2`` or ``2``). The root (0 cents) is implied and the last pitch
+        is the period.
+
+        :param lines:  The lines of the file; an open file can be passed directly
+        """
+        lines = [line.strip() for line in lines if not line.strip().startswith("!")]
+        if len(lines) < 2:
+            raise ValueError("Incomplete Scala file")
+        description = lines[0]
+        count = int(lines[1])
+        pitches = []
+        for line in lines[2 : 2 + count]:
+            pitch = line.split()[0]
+            if "." in pitch:
+                pitches.append(float(pitch))
+            else:
+                if "/" in pitch:
+                    (num, den) = pitch.split("/")
+                    ratio = int(num) / int(den)
+                else:
+                    ratio = int(pitch)
+                pitches.append(CENTS_PER_OCTAVE * math.log(ratio) / math.log(2))
+        if len(pitches) != count:
+            raise ValueError(f"Expected {count} pitches, found {len(pitches)}")
+
+        if "name" not in kwargs:
+            kwargs["name"] = description
+        return cls([0.0] + pitches[:-1], pitches[-1], **kwargs)
+
+    @classmethod
+    def load_scala(cls, filename, **kwargs):
+        """Load a tuning from a Scala (``.scl``) file on the Pico
+
+        :param filename:  The file to load
+        """
+        with open(filename, "r") as f:
+            return cls.from_scala(f, **kwargs)
+
+    def _build_tables(self):
+        """Precompute the voltage and note number of every enabled note across the input range
+
+        The table starts at the root and extends one period past the highest input voltage so that
+        transposed inputs are covered.
+        """
+        self._volts = array("f")
+        self._indices = array("H")
+        self._last_index = -1
+        periods = int(MAX_INPUT_VOLTAGE / self.period_volts) + 2
+        for period in range(periods):
+            for note in range(len(self.note_volts)):
+                if self._notes[note]:
+                    self._volts.append(period * self.period_volts + self.note_volts[note])
+                    self._indices.append(note)
+
+    def __getitem__(self, n):
+        return self._notes[n % len(self._notes)]
+
+    def __setitem__(self, n, value):
+        self._notes[n % len(self._notes)] = value
+        self._build_tables()
+
+    def __len__(self):
+        return len(self._notes)
+
+    def __str__(self):
+        if self.name:
+            return self.name
+        else:
+            return "".join(["1" if n else "0" for n in self._notes])
+
+    def root_volts(self, root):
+        """Get the voltage offset of transposing up by the given number of notes
+
+        :param root:  The number of notes in the tuning to transpose by
+        """
+        (periods, note) = divmod(root, len(self.note_volts))
+        return periods * self.period_volts + self.note_volts[note] - self.note_volts[0]
+
+    def _nearest(self, x):
+        """Get the index in the table of the note nearest to x"""
+        volts = self._volts
+        i = bisect_left(volts, x)
+        if i == len(volts):
+            return i - 1
+        elif i > 0 and x - volts[i - 1] <= volts[i] - x:
+            return i - 1
+        return i
+
+    def _limit(self, i, offset):
+        """Move down the table until the transposed note is within the output range"""
+        while i > 0 and self._volts[i] + offset > MAX_OUTPUT_VOLTAGE:
+            i -= 1
+        return i
+
+    def quantize(self, analog_in, root=0):
+        """Take an analog input voltage and round it to the nearest note in the tuning
+
+        :param analog_in:  The input voltage to quantize, as a float
+        :param root:       An integer indicating the number of notes in the tuning to transpose up by
+
+        :return: A tuple of the form (voltage, note) where voltage is the raw voltage to output,
+            and note is the index of the note in the tuning
+        """
+        if len(self._volts) == 0:
+            return (0, 0)
+
+        offset = self.root_volts(root) if root else 0.0
+        x = analog_in - offset
+        i = self._nearest(x)
+
+        # stay on the previous note unless the input has moved far enough past the midpoint
+        last = self._last_index
+        if self.hysteresis and last >= 0 and last != i:
+            if abs(x - self._volts[last]) - abs(x - self._volts[i]) < 2 * self.hysteresis:
+                i = last
+        self._last_index = i
+
+        i = self._limit(i, offset)
+        return (self._volts[i] + offset, self._indices[i])
+
+    def quantize_many(self, voltages, root=0, out=None):
+        """Quantize several input voltages in one call
+
+        Hysteresis is not applied.
+
+        :param voltages:  A list or array of input voltages
+        :param root:      An integer indicating the number of notes in the tuning to transpose up by
+        :param out:       An optional list or ``array("f")`` of the same length to write the
+            quantized voltages into. If None a new list is created
+
+        :return: The list or array of quantized voltages
+        """
+        n = len(voltages)
+        if out is None:
+            out = [0.0] * n
+
+        if len(self._volts) == 0:
+            for i in range(n):
+                out[i] = 0
+            return out
+
+        offset = self.root_volts(root) if root else 0.0
+        for i in range(n):
+            out[i] = self._volts[self._limit(self._nearest(voltages[i] - offset), offset)] + offset
+        return out
 
 
 class CommonScales:
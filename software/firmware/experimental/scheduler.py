@@ -0,0 +1,274 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Timer-driven scheduling of CV output updates
+
+Scripts that generate CV in their main loop are at the mercy of everything else the loop does;
+a slow ``oled.show()`` delays the next output update and makes LFOs and envelopes step
+unevenly. The ``CvScheduler`` moves output updates onto a periodic hardware timer so they
+happen at a fixed rate regardless of what the main loop is doing.
+
+Each output can be given either a callback function that returns the next voltage, or a
+precomputed buffer of duty cycles that is played back one sample per update::
+
+    from europi import cvs
+    from experimental.scheduler import CvScheduler, waveform_from_voltages
+
+    scheduler = CvScheduler(rate=1000)
+
+    # CV1: a callback, called 1000 times per second
+    scheduler.add_callback(0, lambda: lfo.next_voltage())
+
+    # CV2: a looping ramp, advancing every 10th update (i.e. at 100Hz)
+    ramp = waveform_from_voltages(cvs[1], [i / 10 for i in range(100)])
+    scheduler.add_waveform(1, ramp, divisor=10)
+
+    scheduler.start()
+
+The scheduler records how far each timer interrupt was from its expected time, and how long
+the updates took, so scripts can check the timing is being met. See ``JitterStats``.
+
+Callbacks are run from the timer interrupt, so they must be short and should not allocate
+memory; see `the MicroPython ISR rules <https://docs.micropython.org/en/latest/reference/isr_rules.html>`_.
+"""
+
+from array import array
+from machine import Timer
+
+import utime
+
+from europi_hardware import cvs
+
+
+class JitterStats:
+    """
+    Running timing statistics for a periodic event.
+
+    All times are in microseconds. ``error`` is the difference between the measured and expected
+    interval between updates; positive values mean the update was late.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear all of the recorded statistics"""
+        self.count = 0
+        self.min_error = 0
+        self.max_error = 0
+        self.total_abs_error = 0
+        self.max_duration = 0
+        self.overruns = 0
+
+    def record(self, error, duration, period):
+        """
+        Add one measurement to the statistics
+
+        :param error:  The interval error in microseconds
+        :param duration:  How long the update took, in microseconds
+        :param period:  The expected interval in microseconds; updates that take longer than this
+            are counted as overruns
+        """
+        if self.count == 0 or error < self.min_error:
+            self.min_error = error
+        if self.count == 0 or error > self.max_error:
+            self.max_error = error
+        self.total_abs_error += error if error >= 0 else -error
+        if duration > self.max_duration:
+            self.max_duration = duration
+        if duration > period:
+            self.overruns += 1
+        self.count += 1
+
+    def mean_abs_error(self):
+        """The mean absolute interval error in microseconds"""
+        if self.count == 0:
+            return 0
+        return self.total_abs_error / self.count
+
+    def __str__(self):
+        return (
+            f"n={self.count} err=[{self.min_error}, {self.max_error}]us "
+            f"mean|err|={self.mean_abs_error():.1f}us max_dur={self.max_duration}us "
+            f"overruns={self.overruns}"
+        )
+
+
+def waveform_from_voltages(output, voltages):
+    """
+    Convert a list of voltages into a buffer of calibrated duty cycles for the given output
+
+    :param output:  The ``Output`` the waveform will be played on
+    :param voltages:  The voltages, one per sample
+    :return: An ``array('H')`` suitable for ``CvScheduler.add_waveform``
+    """
+    return array("H", [output.duty_for_voltage(v) for v in voltages])
+
+
+class CvScheduler:
+    """
+    Updates CV outputs from a periodic hardware timer.
+
+    :param rate:  The number of updates per second
+    :param outputs:  The outputs that can be scheduled. Defaults to ``europi.cvs``
+    :param clock:  The module used to read the time; must provide ``ticks_us()`` and
+        ``ticks_diff()``. Defaults to ``utime``, but can be replaced with a simulated clock
+        for testing
+    """
+
+    def __init__(self, rate=1000, outputs=None, clock=utime):
+        if outputs is None:
+            outputs = cvs
+
+        self.rate = rate
+        self.period_us = 1_000_000 // rate
+        self.outputs = outputs
+        self.clock = clock
+        self.stats = JitterStats()
+
+        n = len(outputs)
+        self._callbacks = [None] * n
+        self._buffers = [None] * n
+        self._positions = [0] * n
+        self._loops = [True] * n
+        self._divisors = [1] * n
+        self._countdowns = [0] * n
+
+        self.ticks = 0
+        self._last_tick_us = None
+        self._timer = None
+
+    def _check_index(self, index, divisor):
+        if index < 0 or index >= len(self.outputs):
+            raise ValueError(f"Invalid output index: {index}")
+        if divisor < 1:
+            raise ValueError(f"divisor must be at least 1, got: {divisor}")
+
+    def add_callback(self, index, callback, divisor=1):
+        """
+        Update an output with the value returned by a callback.
+
+        The callback takes no arguments and returns the voltage to set, or None to leave the
+        output unchanged. Any previous callback or waveform on the output is replaced.
+
+        :param index:  The index of the output to update, e.g. 0 for CV1
+        :param callback:  The function to call
+        :param divisor:  The callback is called every ``divisor`` updates
+        """
+        if not callable(callback):
+            raise ValueError("Provided callback func is not callable")
+        self._check_index(index, divisor)
+        self._buffers[index] = None
+        self._divisors[index] = divisor
+        self._countdowns[index] = 0
+        self._callbacks[index] = callback
+
+    def add_waveform(self, index, duties, divisor=1, loop=True):
+        """
+        Play a buffer of precomputed duty cycles on an output.
+
+        Any previous callback or waveform on the output is replaced.
+
+        :param index:  The index of the output to update, e.g. 0 for CV1
+        :param duties:  An array of 16-bit duty cycles; see ``waveform_from_voltages``
+        :param divisor:  The output advances to the next sample every ``divisor`` updates
+        :param loop:  If True the waveform repeats forever, otherwise the output holds the last
+            sample and is removed from the schedule
+        """
+        if len(duties) == 0:
+            raise ValueError("Waveform buffer is empty")
+        self._check_index(index, divisor)
+        self._callbacks[index] = None
+        self._positions[index] = 0
+        self._loops[index] = loop
+        self._divisors[index] = divisor
+        self._countdowns[index] = 0
+        self._buffers[index] = duties
+
+    def remove(self, index):
+        """
+        Stop updating an output. The output keeps its current voltage.
+
+        :param index:  The index of the output to remove from the schedule
+        """
+        self._callbacks[index] = None
+        self._buffers[index] = None
+
+    def is_scheduled(self, index):
+        """Is the output at the given index currently being updated?"""
+        return self._callbacks[index] is not None or self._buffers[index] is not None
+
+    def start(self):
+        """Start updating the outputs from the hardware timer"""
+        if self._timer is None:
+            self._last_tick_us = None
+            self._timer = Timer()
+            self._timer.init(freq=self.rate, mode=Timer.PERIODIC, callback=self._on_timer)
+
+    def stop(self):
+        """Stop the hardware timer. Outputs keep their current voltages."""
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def is_running(self):
+        """Is the hardware timer currently running?"""
+        return self._timer is not None
+
+    def _on_timer(self, timer):
+        self.tick()
+
+    def tick(self):
+        """
+        Perform one update of all scheduled outputs.
+
+        This is called automatically by the timer once ``start()`` has been called. It may be
+        called manually, e.g. to drive the scheduler from a simulated clock in a test.
+        """
+        clock = self.clock
+        start_us = clock.ticks_us()
+
+        for i in range(len(self.outputs)):
+            callback = self._callbacks[i]
+            buffer = self._buffers[i]
+            if callback is None and buffer is None:
+                continue
+
+            if self._countdowns[i] > 0:
+                self._countdowns[i] -= 1
+                continue
+            self._countdowns[i] = self._divisors[i] - 1
+
+            if callback is not None:
+                voltage = callback()
+                if voltage is not None:
+                    self.outputs[i].voltage(voltage)
+            else:
+                position = self._positions[i]
+                self.outputs[i].set_duty_raw(buffer[position])
+                position += 1
+                if position == len(buffer):
+                    position = 0
+                    if not self._loops[i]:
+                        self._buffers[i] = None
+                self._positions[i] = position
+
+        self.ticks += 1
+        if self._last_tick_us is not None:
+            self.stats.record(
+                clock.ticks_diff(start_us, self._last_tick_us) - self.period_us,
+                clock.ticks_diff(clock.ticks_us(), start_us),
+                self.period_us,
+            )
+        self._last_tick_us = start_us
@@ -0,0 +1,302 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Tracking the tempo of an external clock
+
+The ``TempoTracker`` is given the times of a clock's rising edges and keeps a smoothed estimate
+of the clock's period, ignoring the odd late, early or missing pulse::
+
+    from europi import din
+    from experimental.tempo import TempoTracker
+
+    tempo = TempoTracker(ppqn=4)
+    tempo.add_subdivision(3, lambda step: cv1.voltage(5 if step == 0 else 2))
+
+    edges = din.capture()
+    while True:
+        tempo.update(edges)
+        tempo.poll()
+        oled.centre_text(f"{tempo.bpm():.1f} BPM")
+
+Edges can be passed in from ``din.capture()``'s ``EdgeQueue`` with ``update()``, or one at a
+time with ``edge()``, which does not allocate and so is safe to call from a handler.
+
+Each interval between edges is compared with the current period. Intervals within
+``tolerance`` percent of it are blended in with an exponential moving average; anything else is
+treated as an outlier and ignored. If several outliers in a row agree with each other the clock
+has changed tempo, and the period jumps to the median of the most recent intervals.
+
+Subdivisions run a callback several times per clock pulse, spaced using the estimated period and
+restarted on every pulse, so they stay phase-locked to the external clock. They are fired by
+``poll()``, which should be called regularly from the main loop.
+"""
+
+from array import array
+
+import utime
+
+## The number of recent intervals the median is taken from when the tempo changes
+HISTORY_LENGTH = 3
+
+## How far, in percent, an interval can be from the current period and still be used to update it
+DEFAULT_TOLERANCE = 20
+
+## The weight given to each new interval is 1 / 2^smoothing
+DEFAULT_SMOOTHING = 2
+
+
+def median3(a, b, c):
+    """
+    Get the median of three values without sorting
+
+    :param a:  The first value
+    :param b:  The second value
+    :param c:  The third value
+    :return: The middle value
+    """
+    if a > b:
+        (a, b) = (b, a)
+    if b > c:
+        b = c
+    return a if a > b else b
+
+
+class Subdivision:
+    """
+    A callback run ``count`` times per clock pulse
+
+    :param count:  The number of steps per pulse
+    :param callback:  A function called with the step number, 0 to count-1
+    """
+
+    def __init__(self, count, callback):
+        self.count = count
+        self.callback = callback
+
+        # the tracker's edge_count when this subdivision last started a pulse, and the last step fired
+        self.pulse = 0
+        self.step = 0
+
+
+class TempoTracker:
+    """
+    Estimates the period of an external clock from the times of its rising edges
+
+    :param ppqn:  The number of clock pulses per quarter note, used to calculate the BPM
+    :param tolerance:  How far, in percent, an interval can differ from the current period
+        before it's treated as an outlier
+    :param smoothing:  How slowly the period follows the clock; each new interval moves the period
+        1 / 2^smoothing of the way towards it
+    :param relock_count:  The number of outliers in a row, all within ``tolerance`` of each other,
+        that are taken as a change of tempo
+    :param clock:  The module used to read the time; must provide ``ticks_us()``, ``ticks_add()``
+        and ``ticks_diff()``. Defaults to ``utime``
+    """
+
+    def __init__(
+        self,
+        ppqn=1,
+        tolerance=DEFAULT_TOLERANCE,
+        smoothing=DEFAULT_SMOOTHING,
+        relock_count=HISTORY_LENGTH,
+        clock=utime,
+    ):
+        self.ppqn = ppqn
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.relock_count = max(relock_count, HISTORY_LENGTH)
+        self.clock = clock
+
+        self.subdivisions = []
+
+        # buffers for draining an EdgeQueue
+        self._times = array("L", [0] * 8)
+        self._levels = bytearray(8)
+
+        self.reset()
+
+    def reset(self):
+        """Forget the current tempo, e.g. when the clock has stopped"""
+        # the estimated period in microseconds, or 0 if it isn't known yet
+        self.period_us = 0
+
+        # the number of edges received, and the time of the most recent one
+        self.edge_count = 0
+        self.last_edge_us = 0
+
+        # the most recent intervals, for finding the median on a tempo change
+        self.history = array("l", [0] * HISTORY_LENGTH)
+        self.history_index = 0
+
+        # the number of consecutive outliers, and the total number ignored
+        self.consecutive_outliers = 0
+        self.outliers = 0
+
+        for subdivision in self.subdivisions:
+            subdivision.pulse = 0
+            subdivision.step = 0
+
+    def _differs(self, a, b):
+        """Is a more than ``tolerance`` percent away from b?"""
+        diff = a - b
+        if diff < 0:
+            diff = -diff
+        return diff * 100 > b * self.tolerance
+
+    def edge(self, ticks_us):
+        """
+        Add a rising edge of the clock
+
+        This doesn't allocate memory, so it can be called from a ``din`` handler.
+
+        :param ticks_us:  The time of the edge, from ``ticks_us()``
+        """
+        if self.edge_count > 0:
+            interval = self.clock.ticks_diff(ticks_us, self.last_edge_us)
+            history = self.history
+            history[self.history_index] = interval
+            self.history_index = (self.history_index + 1) % HISTORY_LENGTH
+
+            if self.period_us == 0:
+                self.period_us = interval
+            elif self._differs(interval, self.period_us):
+                self.outliers += 1
+                self.consecutive_outliers += 1
+                if self.consecutive_outliers >= self.relock_count:
+                    median = median3(history[0], history[1], history[2])
+                    if not (
+                        self._differs(history[0], median)
+                        or self._differs(history[1], median)
+                        or self._differs(history[2], median)
+                    ):
+                        self.period_us = median
+                        self.consecutive_outliers = 0
+            else:
+                self.consecutive_outliers = 0
+                self.period_us += (interval - self.period_us) >> self.smoothing
+
+        self.last_edge_us = ticks_us
+        self.edge_count += 1
+
+    def update(self, edges):
+        """
+        Add all of the rising edges waiting in an ``EdgeQueue``
+
+        :param edges:  The queue returned by ``DigitalReader.capture()``
+        """
+        times = self._times
+        levels = self._levels
+        while True:
+            n = edges.drain(times, levels)
+            for i in range(n):
+                if levels[i]:
+                    self.edge(times[i])
+            if n < len(times):
+                break
+
+    def locked(self):
+        """Is the period known?"""
+        return self.period_us > 0
+
+    def running(self, now_us=None):
+        """
+        Is the clock still running?
+
+        The clock is considered stopped if no edge has arrived for twice the estimated period.
+
+        :param now_us:  The current time; if None ``ticks_us()`` is used
+        """
+        if self.period_us == 0:
+            return False
+        if now_us is None:
+            now_us = self.clock.ticks_us()
+        return self.clock.ticks_diff(now_us, self.last_edge_us) < 2 * self.period_us
+
+    def bpm(self):
+        """The estimated tempo in beats per minute, or 0 if the period isn't known"""
+        if self.period_us == 0:
+            return 0
+        return 60_000_000 / (self.period_us * self.ppqn)
+
+    def next_edge_us(self):
+        """The predicted time of the next rising edge, in ``ticks_us()`` units"""
+        return self.clock.ticks_add(self.last_edge_us, self.period_us)
+
+    def phase(self, now_us=None):
+        """
+        How far through the current clock pulse we are
+
+        :param now_us:  The current time; if None ``ticks_us()`` is used
+        :return: The fraction of the period since the last edge, limited to 0-1
+        """
+        if self.period_us == 0:
+            return 0
+        if now_us is None:
+            now_us = self.clock.ticks_us()
+        elapsed = self.clock.ticks_diff(now_us, self.last_edge_us)
+        if elapsed >= self.period_us:
+            return 1
+        return elapsed / self.period_us
+
+    def add_subdivision(self, count, callback):
+        """
+        Run a callback ``count`` times per clock pulse, phase-locked to the clock
+
+        Step 0 runs at each edge; the others are spaced evenly across the estimated period. If the
+        next edge arrives before all the steps have run, the rest are skipped.
+
+        :param count:  The number of steps per pulse
+        :param callback:  A function called with the step number, 0 to count-1
+        :return: The new ``Subdivision``
+        """
+        subdivision = Subdivision(count, callback)
+        subdivision.pulse = self.edge_count
+        subdivision.step = count
+        self.subdivisions.append(subdivision)
+        return subdivision
+
+    def remove_subdivision(self, subdivision):
+        """
+        Stop running a subdivision
+
+        :param subdivision:  The ``Subdivision`` returned by ``add_subdivision``
+        """
+        self.subdivisions.remove(subdivision)
+
+    def poll(self, now_us=None):
+        """
+        Run any subdivision steps that are due
+
+        :param now_us:  The current time; if None ``ticks_us()`` is used
+        """
+        if self.period_us == 0:
+            return
+        if now_us is None:
+            now_us = self.clock.ticks_us()
+        elapsed = self.clock.ticks_diff(now_us, self.last_edge_us)
+        edge_count = self.edge_count
+
+        for subdivision in self.subdivisions:
+            count = subdivision.count
+            if subdivision.pulse != edge_count:
+                subdivision.pulse = edge_count
+                subdivision.step = 0
+                subdivision.callback(0)
+
+            due = elapsed * count // self.period_us
+            if due >= count:
+                due = count - 1
+            while subdivision.step < due:
+                subdivision.step += 1
+                subdivision.callback(subdivision.step)
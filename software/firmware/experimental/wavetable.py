@@ -0,0 +1,228 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Wavetable oscillators for LFOs and other periodic control voltages
+
+Rather than calling ``sin()`` etc... every time an output is updated, the wave shapes are computed
+once into tables of 16-bit integers, and each ``WavetableLfo`` steps through a table with an
+integer phase accumulator. Updating an LFO is then a few integer operations and one or two table
+lookups, with no floating point math at all.
+
+Example usage::
+
+    from europi import cvs
+    from experimental.wavetable import WavetableLfo, SINE, TRIANGLE
+
+    UPDATE_RATE = 200  # Hz
+
+    lfos = [WavetableLfo(SINE, rate=UPDATE_RATE, frequency=0.5 * (i + 1)) for i in range(6)]
+
+    while True:
+        for i in range(6):
+            cvs[i].voltage_mv(lfos[i].tick_mv(10000))
+        time.sleep(1 / UPDATE_RATE)
+
+Tables hold values from 0 to ``MAX_LEVEL`` and have ``TABLE_SIZE + 1`` entries; the extra entry is
+a copy of the value at the end of the cycle so interpolation never needs to wrap around. Standard
+shapes are created on first use and shared between all oscillators; custom shapes can be created
+with ``make_table()``.
+"""
+
+import math
+from array import array
+
+## Number of bits used to index into a wavetable
+TABLE_BITS = 8
+
+## Number of points in a single cycle of a wavetable
+TABLE_SIZE = 1 << TABLE_BITS
+
+## Maximum value stored in a wavetable
+MAX_LEVEL = 0xFFFF
+
+## Number of bits in the phase accumulator. This keeps the phase within MicroPython's small integer
+## range, so advancing it never allocates
+PHASE_BITS = 24
+
+## One full cycle of the phase accumulator
+PHASE_CYCLE = 1 << PHASE_BITS
+
+PHASE_MASK = PHASE_CYCLE - 1
+
+## Number of fractional phase bits used for interpolating between table entries
+FRAC_BITS = 8
+
+_INDEX_SHIFT = PHASE_BITS - TABLE_BITS
+_FRAC_SHIFT = _INDEX_SHIFT - FRAC_BITS
+_FRAC_MASK = (1 << FRAC_BITS) - 1
+
+## Names of the built-in wave shapes
+SINE = "sine"
+TRIANGLE = "triangle"
+SAW = "saw"
+RAMP = "ramp"
+SQUARE = "square"
+EXP_RISE = "exp_rise"
+EXP_DECAY = "exp_decay"
+
+## How steep the exponential curves are
+EXP_CURVATURE = 4.0
+
+_tables = {}
+
+
+def make_table(func):
+    """Build a wavetable from a function
+
+    :param func:  A function taking the position in the cycle, in the range [0, 1], and returning
+        the level of the wave at that point, in the range [0, 1]
+    :return: An ``array("H")`` of ``TABLE_SIZE + 1`` levels
+    """
+    table = array("H", [0] * (TABLE_SIZE + 1))
+    for i in range(TABLE_SIZE + 1):
+        level = func(i / TABLE_SIZE)
+        table[i] = int(min(max(level, 0.0), 1.0) * MAX_LEVEL + 0.5)
+    return table
+
+
+def _exp_rise(x):
+    return (math.exp(EXP_CURVATURE * x) - 1) / (math.exp(EXP_CURVATURE) - 1)
+
+
+_SHAPES = {
+    # sine shifted to [0, 1] since we can't output negative voltages
+    SINE: lambda x: (math.sin(2 * math.pi * x) + 1) / 2,
+    TRIANGLE: lambda x: 2 * x if x < 0.5 else 2 - 2 * x,
+    SAW: lambda x: x,
+    RAMP: lambda x: 1 - x,
+    SQUARE: lambda x: 1.0 if x < 0.5 else 0.0,
+    EXP_RISE: _exp_rise,
+    EXP_DECAY: lambda x: _exp_rise(1 - x),
+}
+
+
+def get_table(shape):
+    """Get the shared wavetable for one of the built-in shapes
+
+    The table is created the first time it's requested.
+
+    :param shape:  One of SINE, TRIANGLE, SAW, RAMP, SQUARE, EXP_RISE or EXP_DECAY
+    :return: The ``array("H")`` wavetable
+    """
+    table = _tables.get(shape)
+    if table is None:
+        if shape not in _SHAPES:
+            raise ValueError(f"Unknown wave shape: {shape}")
+        table = make_table(_SHAPES[shape])
+        _tables[shape] = table
+    return table
+
+
+class WavetableLfo:
+    """A low-frequency oscillator that reads its wave shape from a wavetable
+
+    :param shape:  The name of a built-in shape (e.g. ``SINE``) or a table made with ``make_table()``
+    :param rate:  How many times per second ``tick()`` will be called
+    :param frequency:  The frequency of the LFO in Hz
+    :param phase:  The starting phase, as a fraction of a cycle in the range [0, 1)
+    :param interpolate:  If True, linearly interpolate between table entries. This gives a
+        smoother output at the cost of a second table lookup
+    """
+
+    def __init__(self, shape=SINE, rate=100, frequency=1.0, phase=0.0, interpolate=True):
+        self.set_shape(shape)
+        self.rate = rate
+        self.interpolate = interpolate
+        self.increment = 0
+        self.phase = 0
+        self.set_frequency(frequency)
+        self.set_phase(phase)
+
+    def set_shape(self, shape):
+        """Change the wave shape
+
+        :param shape:  The name of a built-in shape or a table made with ``make_table()``
+        """
+        if type(shape) is str:
+            shape = get_table(shape)
+        elif len(shape) != TABLE_SIZE + 1:
+            raise ValueError(f"Wavetables must have {TABLE_SIZE + 1} entries, got {len(shape)}")
+        self.table = shape
+
+    def set_frequency(self, frequency):
+        """Set the frequency of the LFO
+
+        :param frequency:  The frequency in Hz. This is rounded to the nearest phase increment
+        """
+        self.increment = int(frequency * PHASE_CYCLE / self.rate + 0.5) & PHASE_MASK
+
+    def set_period_ticks(self, ticks):
+        """Set the length of one cycle of the LFO as a number of calls to ``tick()``
+
+        This is useful for syncing the LFO to a clock, e.g. one cycle per 96 clock pulses.
+
+        :param ticks:  The number of ticks per cycle
+        """
+        self.increment = PHASE_CYCLE // ticks
+
+    def set_phase(self, phase):
+        """Jump to a position in the cycle
+
+        :param phase:  The position as a fraction of a cycle in the range [0, 1)
+        """
+        self.phase = int(phase * PHASE_CYCLE) & PHASE_MASK
+
+    def reset(self):
+        """Return to the start of the cycle"""
+        self.phase = 0
+
+    def value(self):
+        """Get the current level of the LFO without advancing it
+
+        :return: The level in the range [0, MAX_LEVEL]
+        """
+        phase = self.phase
+        table = self.table
+        index = phase >> _INDEX_SHIFT
+        if not self.interpolate:
+            return table[index]
+        frac = (phase >> _FRAC_SHIFT) & _FRAC_MASK
+        a = table[index]
+        return a + (((table[index + 1] - a) * frac) >> FRAC_BITS)
+
+    def tick(self):
+        """Get the current level of the LFO and advance it by one step
+
+        :return: The level in the range [0, MAX_LEVEL]
+        """
+        # this is value(), inlined since it's called for every output on every update
+        phase = self.phase
+        table = self.table
+        index = phase >> _INDEX_SHIFT
+        level = table[index]
+        if self.interpolate:
+            frac = (phase >> _FRAC_SHIFT) & _FRAC_MASK
+            level += ((table[index + 1] - level) * frac) >> FRAC_BITS
+        self.phase = (phase + self.increment) & PHASE_MASK
+        return level
+
+    def tick_mv(self, max_mv):
+        """Advance the LFO and get its level scaled to millivolts
+
+        The result can be passed directly to ``Output.voltage_mv()``.
+
+        :param max_mv:  The output level in millivolts at the peak of the wave
+        :return: The level in millivolts, in the range [0, max_mv]
+        """
+        return (self.tick() * max_mv) // MAX_LEVEL
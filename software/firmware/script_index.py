@@ -0,0 +1,138 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A prebuilt, file-backed index of the scripts shown in the bootloader menu
+
+Normally the menu is built from ``EUROPI_SCRIPTS`` in ``contrib/menu.py``, which means the whole
+table is compiled and held in RAM on every boot. The index file contains the same information as
+plain text, one script per line::
+
+    <display name>\t<module.ClassName>\t<flags>
+
+where ``flags`` is a comma-separated (possibly empty) list of metadata tags, e.g. ``wifi`` for
+scripts that need a Pico W.
+
+Only the display names are kept in memory; the class name for a script is looked up in the file
+when the script is launched. The index is generated offline from ``contrib/menu.py`` by
+``scripts/generate_script_index.py``.
+
+The index only applies when the scripts are copied to the filesystem. The UF2 firmware freezes
+``contrib/menu.py``, so there is nothing to compile at boot and its ``main.py`` imports the menu
+directly.
+"""
+
+import errno
+
+from europi_log import *
+
+# The default location of the index on the Pico
+DEFAULT_INDEX_FILE = "/lib/contrib/menu_index.txt"
+
+# Metadata flag for scripts that require a wifi-enabled Pico
+FLAG_WIFI = "wifi"
+
+
+def write_script_index(file, scripts, flags=None):
+    """
+    Write an index of scripts to an open text file
+
+    :param file:  The file to write to
+    :param scripts:  A dict of display names to fully-qualified class names
+    :param flags:  An optional dict of display names to lists of metadata flags
+    """
+    if flags is None:
+        flags = {}
+    for name, class_name in scripts.items():
+        if "\t" in name or "\n" in name:
+            raise ValueError(f"Invalid script name: {name!r}")
+        script_flags = ",".join(flags.get(name, []))
+        file.write(f"{name}\t{class_name}\t{script_flags}\n")
+
+
+class ScriptIndex:
+    """
+    A read-only, dict-like view of an index file that can be given to ``BootloaderMenu``
+
+    :param filename:  The index file to read
+    :param exclude_flags:  Scripts with any of these flags are left out of the index
+    """
+
+    def __init__(self, filename=DEFAULT_INDEX_FILE, exclude_flags=()):
+        self.filename = filename
+        self.exclude_flags = exclude_flags
+        self._names = []
+        for name, _, _ in self._entries():
+            self._names.append(name)
+
+    def _entries(self):
+        """Iterate over the (name, class name, flags) entries in the file"""
+        with open(self.filename, "r") as file:
+            for line in file:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) != 3:
+                    continue
+                name, class_name, flags = fields
+                flags = flags.split(",") if flags else []
+                excluded = False
+                for flag in flags:
+                    if flag in self.exclude_flags:
+                        excluded = True
+                if not excluded:
+                    yield name, class_name, flags
+
+    def keys(self):
+        """Get the display names of every script in the index"""
+        return self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __getitem__(self, name):
+        """Look up the fully-qualified class name for a script"""
+        for entry_name, class_name, _ in self._entries():
+            if entry_name == name:
+                return class_name
+        raise KeyError(name)
+
+    def flags(self, name):
+        """Get the metadata flags for a script"""
+        for entry_name, _, flags in self._entries():
+            if entry_name == name:
+                return flags
+        raise KeyError(name)
+
+
+def load_menu_index(filename=DEFAULT_INDEX_FILE):
+    """
+    Load the menu index, leaving out any scripts the hardware cannot run
+
+    :param filename:  The index file to read
+    :return: A ``ScriptIndex``, or None if the file doesn't exist or cannot be read
+    """
+    from europi_config import load_europi_config, MODEL_PICO_W, MODEL_PICO_2W
+
+    cfg = load_europi_config()
+    exclude_flags = ()
+    if cfg.PICO_MODEL != MODEL_PICO_W and cfg.PICO_MODEL != MODEL_PICO_2W:
+        exclude_flags = (FLAG_WIFI,)
+
+    try:
+        return ScriptIndex(filename, exclude_flags)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            log_warning(f"Unable to read {filename}: {e}", "script_index")
+        return None
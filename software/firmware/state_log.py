@@ -0,0 +1,321 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A compact, append-only binary log for persisting script state
+
+Saving state as JSON means serialising the whole state into a string and rewriting the whole file
+every time anything changes. A ``StateLog`` instead appends only the fields that changed, each as
+a small binary record::
+
+    <key length: u8> <type: 1 char> <payload length: u32> <key> <payload>
+
+Numbers are packed with ``struct``, and ``array.array`` values are written straight from the
+array's own buffer, so saving a large array doesn't need a second copy of it in RAM.
+
+Every call to ``write()`` ends with a commit record. When loading, records after the last commit
+are ignored, so a save interrupted by a power loss leaves the previously committed state intact.
+Later records for the same key replace earlier ones. Once the log grows past ``compact_size``
+bytes it is rewritten with only the latest value of each key, using a temporary file and a rename
+so the old log is only replaced once the new one is complete.
+"""
+
+import json
+import os
+import struct
+from array import array
+
+from europi_log import *
+
+# Record header: key length, type code, payload length
+HEADER_FORMAT = "<B1sI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Written at the start of every log file
+MAGIC = b"EPSL\x01"
+
+# Type codes for non-array values. Arrays use their own typecode (e.g. b"H", b"f"), so none of
+# these may be one of ARRAY_TYPECODES
+TYPE_COMMIT = b"!"
+TYPE_NONE = b"n"
+TYPE_BOOL = b"?"
+TYPE_INT = b"z"
+TYPE_FLOAT = b"r"
+TYPE_STR = b"s"
+TYPE_BYTES = b"y"
+TYPE_JSON = b"j"
+
+# The typecodes array.array supports
+ARRAY_TYPECODES = b"bBhHiIlLqQfd"
+
+# Default size in bytes the log can grow to before it is compacted
+DEFAULT_COMPACT_SIZE = 4096
+
+# Chunk size used when copying records during compaction
+COPY_BUFFER_SIZE = 64
+
+
+def _encode(value):
+    """Get the type code and payload for a value
+
+    :param value:  The value to encode
+    :return: A tuple of the type code, an object supporting the buffer protocol, and the
+        payload's length in bytes
+    """
+    if value is None:
+        payload = b""
+        typecode = TYPE_NONE
+    elif type(value) is bool:
+        payload = b"\x01" if value else b"\x00"
+        typecode = TYPE_BOOL
+    elif type(value) is int:
+        payload = struct.pack("<q", value)
+        typecode = TYPE_INT
+    elif type(value) is float:
+        payload = struct.pack("<d", value)
+        typecode = TYPE_FLOAT
+    elif type(value) is str:
+        payload = value.encode()
+        typecode = TYPE_STR
+    elif type(value) is bytes or type(value) is bytearray:
+        payload = value
+        typecode = TYPE_BYTES
+    elif type(value) is array:
+        typecode = _array_typecode(value)
+        return typecode, value, len(value) * struct.calcsize(typecode.decode())
+    else:
+        # lists, dicts, etc...
+        payload = json.dumps(value).encode()
+        typecode = TYPE_JSON
+    return typecode, payload, len(payload)
+
+
+def _array_typecode(arr):
+    """Get the typecode of an array as bytes
+
+    MicroPython's arrays don't expose ``.typecode``, so fall back to parsing the repr
+    """
+    try:
+        return arr.typecode.encode()
+    except AttributeError:
+        return repr(arr)[7:8].encode()  # "array('H', [...])"
+
+
+def _decode(typecode, payload):
+    """Turn a record's payload back into a value
+
+    :param typecode:  The record's type code
+    :param payload:  The record's payload as bytes
+    """
+    if typecode == TYPE_NONE:
+        return None
+    elif typecode == TYPE_BOOL:
+        return payload != b"\x00"
+    elif typecode == TYPE_INT:
+        return struct.unpack("<q", payload)[0]
+    elif typecode == TYPE_FLOAT:
+        return struct.unpack("<d", payload)[0]
+    elif typecode == TYPE_STR:
+        return payload.decode()
+    elif typecode == TYPE_BYTES:
+        return bytes(payload)
+    elif typecode == TYPE_JSON:
+        return json.loads(payload)
+    elif typecode in ARRAY_TYPECODES:
+        return array(typecode.decode(), payload)
+    raise ValueError(f"Unknown type code {typecode}")
+
+
+class StateLog:
+    """
+    An append-only log of typed key/value records
+
+    :param filename:  The file to store the log in
+    :param compact_size:  Once the file is larger than this many bytes it is rewritten with only
+        the latest value of each key
+    """
+
+    def __init__(self, filename, compact_size=DEFAULT_COMPACT_SIZE):
+        self.filename = filename
+        self.compact_size = compact_size
+
+        # The size of the file after our last commit. If the file's size is different it may end
+        # with an incomplete record and must be cleaned up before appending to it
+        self._committed_size = None
+
+    def exists(self):
+        """Does the log file exist?"""
+        try:
+            os.stat(self.filename)
+            return True
+        except OSError:
+            return False
+
+    def size(self):
+        """Get the size of the log file in bytes, or zero if it doesn't exist"""
+        try:
+            return os.stat(self.filename)[6]
+        except OSError:
+            return 0
+
+    def _index(self, file):
+        """Find the latest committed record for every key in an open log file
+
+        Only the record headers are read; payloads are skipped over.
+
+        :param file:  The log file, opened in binary mode
+        :return: A tuple of a dict of keys to (typecode, payload offset, payload length) tuples
+            and the file offset just past the last commit record
+        """
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{self.filename} is not a state log")
+
+        committed = {}
+        pending = {}
+        offset = len(MAGIC)
+        commit_end = offset
+        while True:
+            header = file.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                break
+            (key_len, typecode, length) = struct.unpack(HEADER_FORMAT, header)
+            offset += HEADER_SIZE
+
+            if typecode == TYPE_COMMIT:
+                committed.update(pending)
+                pending = {}
+                commit_end = offset
+                continue
+
+            key = file.read(key_len)
+            if len(key) < key_len:
+                break
+            offset += key_len
+            pending[key.decode()] = (typecode, offset, length)
+            offset += length
+            file.seek(offset)
+
+        # anything in pending was never committed
+        return committed, commit_end
+
+    def load(self):
+        """Read the latest committed value of every key
+
+        :return: A dict of the stored values. If the file doesn't exist or cannot be read an empty
+            dict is returned
+        """
+        state = {}
+        try:
+            with open(self.filename, "rb") as file:
+                (index, _) = self._index(file)
+                for key, (typecode, offset, length) in index.items():
+                    file.seek(offset)
+                    payload = file.read(length)
+                    if len(payload) < length:
+                        break
+                    state[key] = _decode(typecode, payload)
+        except OSError as e:
+            if self.exists():
+                log_warning(f"Unable to read {self.filename}: {e}", "state_log")
+        except ValueError as e:
+            log_warning(f"Unable to parse {self.filename}: {e}", "state_log")
+        return state
+
+    @staticmethod
+    def _write_record(file, key, typecode, payload, length):
+        """Write a single record to the open file"""
+        key = key.encode()
+        if len(key) > 255:
+            raise ValueError(f"Key is too long: {key}")
+        file.write(struct.pack(HEADER_FORMAT, len(key), typecode, length))
+        file.write(key)
+        file.write(payload)
+
+    def _check_tail(self):
+        """Make sure the file ends with a commit record before appending to it
+
+        :return: True if the file can be appended to, False if it needs to be started over
+        """
+        size = self.size()
+        if size == self._committed_size:
+            return True
+
+        try:
+            with open(self.filename, "rb") as file:
+                (_, commit_end) = self._index(file)
+        except ValueError as e:
+            log_warning(f"Discarding {self.filename}: {e}", "state_log")
+            return False
+
+        if commit_end != size:
+            # a previous save was interrupted; drop the incomplete records
+            self.compact()
+        return True
+
+    def write(self, values):
+        """Append the given values to the log and commit them
+
+        Only the keys in ``values`` are changed; any other keys keep their previous values.
+
+        :param values:  A dict of keys to values to save. Values may be ``None``, ``bool``,
+            ``int``, ``float``, ``str``, ``bytes`` or ``array.array``; anything else is stored as
+            JSON
+        """
+        new_file = not self.exists() or not self._check_tail()
+        with open(self.filename, "wb" if new_file else "ab") as file:
+            if new_file:
+                file.write(MAGIC)
+            for key, value in values.items():
+                (typecode, payload, length) = _encode(value)
+                self._write_record(file, key, typecode, payload, length)
+            file.write(struct.pack(HEADER_FORMAT, 0, TYPE_COMMIT, 0))
+
+        self._committed_size = self.size()
+        if self._committed_size > self.compact_size:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log so it only contains the latest committed value of each key
+
+        The records are copied in small chunks, so the values are never all loaded into RAM.
+        """
+        tmp_filename = f"{self.filename}.tmp"
+        buf = bytearray(COPY_BUFFER_SIZE)
+        with open(self.filename, "rb") as src:
+            (index, _) = self._index(src)
+            with open(tmp_filename, "wb") as dst:
+                dst.write(MAGIC)
+                for key, (typecode, offset, length) in index.items():
+                    key = key.encode()
+                    dst.write(struct.pack(HEADER_FORMAT, len(key), typecode, length))
+                    dst.write(key)
+                    src.seek(offset)
+                    remaining = length
+                    while remaining > 0:
+                        n = src.readinto(buf)
+                        if n == 0:
+                            break
+                        n = min(n, remaining)
+                        dst.write(memoryview(buf)[:n])
+                        remaining -= n
+                dst.write(struct.pack(HEADER_FORMAT, 0, TYPE_COMMIT, 0))
+        os.rename(tmp_filename, self.filename)
+        self._committed_size = self.size()
+
+    def remove(self):
+        """Delete the log file"""
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+        self._committed_size = None
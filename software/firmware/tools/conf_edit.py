@@ -86,6 +86,10 @@ class ConfigurationEditor(EuroPiScript):
                 title = "boot to menu"
                 prefix = "Sys"
                 items = system_items
+            elif cfg.name == "WARM_SCRIPT_SWITCH":
+                title = "warm switch"
+                prefix = "Sys"
+                items = system_items
             elif "EXTERNAL_I2C" in cfg.name:
                 title = cfg.name.replace("EXTERNAL_I2C", "").replace("_", ' ').lower().strip()
                 prefix = "I2C"
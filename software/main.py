@@ -12,7 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import gc
-from contrib.menu import *
+from script_index import load_menu_index
+
+# Prefer the prebuilt menu index; it lists the scripts without compiling contrib/menu.py
+scripts = load_menu_index()
+if scripts is None:
+    from contrib.menu import *
+
+    scripts = EUROPI_SCRIPTS
+else:
+    from europi import bootsplash
+
+    bootsplash()
+
+    from bootloader import BootloaderMenu
 
 gc.collect()
-BootloaderMenu(EUROPI_SCRIPTS).main()
+BootloaderMenu(scripts).main()
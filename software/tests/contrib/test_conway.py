@@ -0,0 +1,114 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+
+import pytest
+
+from contrib.conway import Conway, LifeField, NUM_PIXELS, bitwise_entropy, count_entropy
+from europi import OLED_HEIGHT, OLED_WIDTH
+from experimental.bitarray import get_bit, set_bit
+
+
+def reference_step(field, width, height):
+    """Calculate the next generation one cell at a time, with dead cells beyond the edges"""
+    next_field = bytearray(len(field))
+    born = 0
+    died = 0
+    for y in range(height):
+        for x in range(width):
+            neighbours = 0
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    if (dx or dy) and 0 <= x + dx < width and 0 <= y + dy < height:
+                        neighbours += get_bit(field, (y + dy) * width + x + dx)
+            alive = get_bit(field, y * width + x)
+            if neighbours == 3 or (alive and neighbours == 2):
+                set_bit(next_field, y * width + x, True)
+                if not alive:
+                    born += 1
+            elif alive:
+                died += 1
+    return next_field, born, died
+
+
+def random_field(width, height, density, seed):
+    rng = random.Random(seed)
+    field = bytearray(width * height // 8)
+    for i in range(width * height):
+        if rng.random() < density:
+            set_bit(field, i, True)
+    return field
+
+
+@pytest.mark.parametrize("density", [0.1, 0.35, 0.6, 1.0])
+def test_step_matches_reference(density):
+    field = random_field(OLED_WIDTH, OLED_HEIGHT, density, seed=int(density * 100))
+    life = LifeField(OLED_WIDTH, OLED_HEIGHT)
+    life.load(field)
+    out = bytearray(len(field))
+
+    for _ in range(5):
+        (expected, expected_born, expected_died) = reference_step(field, OLED_WIDTH, OLED_HEIGHT)
+        assert life.step() == (expected_born, expected_died)
+        life.store(out)
+        assert out == expected
+        field = expected
+
+
+def test_edges_do_not_wrap():
+    # a blinker on the left edge only has 2 live neighbours on the right edge if the field wraps
+    width = 16
+    height = 8
+    field = bytearray(width * height // 8)
+    for y in (3, 4, 5):
+        set_bit(field, y * width, True)
+
+    life = LifeField(width, height)
+    life.load(field)
+    assert life.step() == (1, 2)
+    life.store(field)
+    assert [i for i in range(width * height) if get_bit(field, i)] == [4 * width, 4 * width + 1]
+
+
+def test_population():
+    life = LifeField(OLED_WIDTH, OLED_HEIGHT)
+    field = random_field(OLED_WIDTH, OLED_HEIGHT, 0.5, seed=1)
+    life.load(field)
+    assert life.population() == sum(get_bit(field, i) for i in range(NUM_PIXELS))
+
+    life.load(bytearray(b"\xff" * len(field)))
+    assert life.population() == NUM_PIXELS
+
+
+def test_entropy():
+    field = random_field(OLED_WIDTH, OLED_HEIGHT, 0.3, seed=2)
+    count = sum(get_bit(field, i) for i in range(NUM_PIXELS))
+    assert bitwise_entropy(field) == count_entropy(count, NUM_PIXELS)
+    assert count_entropy(0, 8) == 0.0
+    assert count_entropy(8, 8) == 1.0
+    assert count_entropy(4, 8) == pytest.approx(1.0)
+
+
+def test_tick_updates_counters():
+    random.seed(3)
+    conway = Conway()
+    conway.reset()
+    assert conway.num_alive == sum(get_bit(conway.field, i) for i in range(NUM_PIXELS))
+
+    for _ in range(10):
+        before = conway.num_alive
+        conway.tick()
+        assert conway.num_alive == before + conway.num_born - conway.num_died
+        assert conway.num_changes == conway.num_born + conway.num_died
+        assert conway.num_alive == sum(get_bit(conway.field, i) for i in range(NUM_PIXELS))
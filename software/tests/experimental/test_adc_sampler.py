@@ -0,0 +1,97 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+from europi import ain, k1, k2, MAX_UINT16, INPUT_CALIBRATION_VALUES
+from experimental.adc_sampler import AdcSampler, SampledAnalogueInput, SampledKnob
+
+from mock_hardware import MockHardware
+
+
+@pytest.fixture
+def sampler():
+    return AdcSampler(buffer_size=4)
+
+
+def test_fallback_before_sampling(mockHardware: MockHardware, sampler):
+    s_k1 = SampledKnob(k1, sampler)
+    mockHardware.set_ADC_u16_value(k1, MAX_UINT16 // 4)
+
+    assert round(s_k1.percent(), 2) == round(k1.percent(), 2)
+
+
+def test_channels_are_shared(sampler):
+    a = SampledKnob(k1, sampler)
+    b = SampledKnob(k1, sampler)
+    c = SampledKnob(k2, sampler)
+
+    assert a.channel == b.channel
+    assert a.channel != c.channel
+
+
+def test_round_robin(mockHardware: MockHardware, sampler):
+    s_ain = SampledAnalogueInput(ain, sampler)
+    s_k1 = SampledKnob(k1, sampler)
+    mockHardware.set_ADC_u16_value(ain, 1000)
+    mockHardware.set_ADC_u16_value(k1, 2000)
+
+    sampler.tick()
+    assert sampler.value(s_ain.channel) == 1000
+    assert sampler.value(s_k1.channel) is None
+
+    sampler.tick()
+    assert sampler.value(s_k1.channel) == 2000
+
+
+def test_running_average(mockHardware: MockHardware, sampler):
+    s_k1 = SampledKnob(k1, sampler)
+
+    for reading in [100, 200, 300, 400]:
+        mockHardware.set_ADC_u16_value(k1, reading)
+        sampler.tick()
+    assert sampler.value(s_k1.channel) == 250
+
+    # oldest readings are dropped once the buffer is full
+    for reading in [1000, 1000]:
+        mockHardware.set_ADC_u16_value(k1, reading)
+        sampler.tick()
+    assert sampler.value(s_k1.channel) == (300 + 400 + 1000 + 1000) // 4
+
+
+@pytest.mark.parametrize("percent", [0.0, 0.1, 0.5, 0.9, 1.0])
+def test_same_results_as_direct_read(mockHardware: MockHardware, sampler, percent):
+    s_ain = SampledAnalogueInput(ain, sampler)
+    s_k2 = SampledKnob(k2, sampler)
+    # the real ADC only returns integers
+    mockHardware.set_ADC_u16_value(ain, round(percent * INPUT_CALIBRATION_VALUES[-1]))
+    mockHardware.set_ADC_u16_value(k2, round((1 - percent) * MAX_UINT16))
+
+    for _ in range(sampler.buffer_size * 2):
+        sampler.tick()
+
+    assert s_ain.read_voltage() == pytest.approx(ain.read_voltage(), abs=0.01)
+    assert s_k2.percent() == pytest.approx(k2.percent(), abs=0.001)
+    assert s_k2.choice([1, 2, 3, 4]) == k2.choice([1, 2, 3, 4])
+
+
+def test_stop_clears_buffers(mockHardware: MockHardware, sampler):
+    s_k1 = SampledKnob(k1, sampler)
+    mockHardware.set_ADC_u16_value(k1, MAX_UINT16)
+    sampler.tick()
+
+    sampler.start()
+    assert sampler.is_running()
+    sampler.stop()
+    assert not sampler.is_running()
+    assert sampler.value(s_k1.channel) is None
@@ -0,0 +1,91 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+from experimental.custom_font import CustomFontWriter, oled
+from experimental.fonts import freesans14
+
+
+class BlitRecorder:
+    """Stands in for the display, recording what is blitted where"""
+
+    width = 128
+    height = 32
+
+    def __init__(self):
+        self.blits = []
+
+    def blit(self, fbuf, x, y):
+        self.blits.append((fbuf, x, y))
+
+
+@pytest.fixture
+def device():
+    return BlitRecorder()
+
+
+def test_glyphs_are_reused(device):
+    writer = CustomFontWriter(device, freesans14)
+    writer.print("hello", 0, 0)
+    writer.print("hello", 0, 0)
+
+    first, second = device.blits[:5], device.blits[5:]
+    assert [b[0] for b in first] == [b[0] for b in second]
+    assert first[2][0] is first[3][0]  # both l's
+    assert len(writer._glyphs) == 4
+
+
+def test_glyph_positions(device):
+    writer = CustomFontWriter(device, freesans14)
+    writer.print("ab", 10, 5)
+
+    _, _, width_a = freesans14.get_ch("a")
+    assert [(x, y) for _, x, y in device.blits] == [(10, 5), (10 + width_a, 5)]
+    assert device.blits[0][0].width == width_a
+    assert device.blits[0][0].height == freesans14.height()
+
+
+def test_inverted_glyphs(device):
+    writer = CustomFontWriter(device, freesans14)
+    writer.print("a", 0, 0, c=1)
+    writer.print("a", 0, 0, c=0)
+
+    normal = device.blits[0][0]
+    inverted = device.blits[1][0]
+    assert normal is not inverted
+    assert inverted.buffer == bytearray(0xFF & ~b for b in normal.buffer)
+
+
+def test_lru_eviction(device):
+    writer = CustomFontWriter(device, freesans14, cache_size=2)
+    writer.print("ab", 0, 0)
+    writer.print("a", 0, 0)  # a is now the most recently used
+    writer.print("c", 0, 0)
+
+    assert list(writer._glyphs.keys()) == ["a", "c"]
+
+
+@pytest.mark.parametrize("string", ["", "hello", "EuroPi 1.2.3", "line\nbreak"])
+def test_string_len(device, string):
+    writer = CustomFontWriter(device, freesans14)
+    expected = sum(0 if c == "\n" else freesans14.get_ch(c)[2] for c in string)
+
+    assert writer.string_len(string) == expected
+    assert writer.string_len(string) == expected  # cached
+
+
+def test_display_text_width():
+    assert oled.text_width("hello", font=freesans14) == sum(
+        freesans14.get_ch(c)[2] for c in "hello"
+    )
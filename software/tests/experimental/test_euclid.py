@@ -0,0 +1,118 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+from experimental import euclid
+from experimental.bitarray import get_bit
+from experimental.euclid import (
+    generate_euclidean_bits,
+    generate_euclidean_int,
+    generate_euclidean_pattern,
+)
+
+
+def reference_pattern(steps, pulses):
+    """The original recursive Bjorklund implementation, without rotation"""
+    if steps == 0:
+        return []
+    if pulses == 0:
+        return [0] * steps
+    pattern = []
+    counts = []
+    remainders = []
+    divisor = steps - pulses
+    remainders.append(pulses)
+    level = 0
+    while True:
+        counts.append(divisor // remainders[level])
+        remainders.append(divisor % remainders[level])
+        divisor = remainders[level]
+        level = level + 1
+        if remainders[level] <= 1:
+            break
+    counts.append(divisor)
+
+    def build(level):
+        if level == -1:
+            pattern.append(0)
+        elif level == -2:
+            pattern.append(1)
+        else:
+            for i in range(0, counts[level]):
+                build(level - 1)
+            if remainders[level] != 0:
+                build(level - 2)
+
+    build(level)
+    i = pattern.index(1)
+    return pattern[i:] + pattern[0:i]
+
+
+def reference_rotate(pattern, rot):
+    pattern = list(pattern)
+    for i in range(rot):
+        x = pattern.pop(-1)
+        pattern.insert(0, x)
+    return pattern
+
+
+@pytest.mark.parametrize("steps", range(65))
+def test_matches_reference(steps):
+    for pulses in range(steps + 1):
+        expected = reference_pattern(steps, pulses)
+        for rot in range(steps + 1):
+            rotated = reference_rotate(expected, rot)
+            assert generate_euclidean_pattern(steps, pulses, rot) == rotated
+
+            packed = generate_euclidean_int(steps, pulses, rot)
+            bits = generate_euclidean_bits(steps, pulses, rot)
+            for i in range(steps):
+                assert (packed >> i) & 1 == rotated[i]
+                assert get_bit(bits, i) == rotated[i]
+
+
+def test_known_patterns():
+    assert generate_euclidean_pattern(8, 3) == [1, 0, 0, 1, 0, 0, 1, 0]
+    assert generate_euclidean_pattern(8, 3, 1) == [0, 1, 0, 0, 1, 0, 0, 1]
+    assert generate_euclidean_int(8, 3) == 0b01001001
+    assert generate_euclidean_bits(8, 3) == bytearray([0b10010010])
+
+
+def test_cache():
+    euclid._pattern_cache.clear()
+    pattern = generate_euclidean_pattern(16, 5, 2)
+    assert (16, 5, 2) in euclid._pattern_cache
+
+    # callers get their own copy of the pattern
+    pattern[0] = 99
+    assert generate_euclidean_pattern(16, 5, 2)[0] != 99
+
+    for steps in range(euclid.PATTERN_CACHE_SIZE + 10):
+        generate_euclidean_pattern(steps, 0)
+    assert len(euclid._pattern_cache) == euclid.PATTERN_CACHE_SIZE
+    assert (16, 5, 2) not in euclid._pattern_cache
+
+
+@pytest.mark.parametrize(
+    "steps, pulses, rot",
+    [
+        (8, 9, 0),
+        (8, -1, 0),
+        (8, 3, 9),
+        (-1, 0, 0),
+    ],
+)
+def test_invalid(steps, pulses, rot):
+    with pytest.raises(ValueError):
+        generate_euclidean_pattern(steps, pulses, rot)
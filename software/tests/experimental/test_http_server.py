@@ -0,0 +1,813 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import base64
+import gzip
+import importlib.util
+import json
+import os
+import socket
+import struct
+import time
+
+import pytest
+
+from experimental.http_server import (
+    HttpRequest,
+    HttpServer,
+    HttpStatus,
+    MimeTypes,
+    WebSocketClose,
+    WebSocketOpcode,
+    encode_frame_header,
+    guess_mime_type,
+    parse_request_head,
+    unquote,
+    websocket_accept_key,
+)
+
+
+class SimulatedClock:
+    """Replaces utime so idle timeouts can be tested without waiting"""
+
+    def __init__(self):
+        self.now = 0
+
+    def ticks_ms(self):
+        return self.now
+
+    def ticks_diff(self, a, b):
+        return a - b
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def clock():
+    return SimulatedClock()
+
+
+@pytest.fixture
+def server(clock):
+    srv = HttpServer(free_port(), max_body_size=32768, clock=clock)
+    yield srv
+    srv.close()
+
+
+class Client:
+    """A plain socket client, driving the server between its own reads & writes"""
+
+    def __init__(self, server):
+        self.server = server
+        self.sock = socket.create_connection(("127.0.0.1", server.port))
+        self.sock.settimeout(0.01)
+        self.buffer = b""
+
+    def send(self, data):
+        self.sock.sendall(data)
+
+    def request(self, method, path, body=b"", headers=None):
+        lines = [f"{method} {path} HTTP/1.1", "Host: europi"]
+        if body:
+            lines.append(f"Content-Length: {len(body)}")
+        for k, v in (headers or {}).items():
+            lines.append(f"{k}: {v}")
+        self.send(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+
+    def _read(self):
+        self.server.check_requests()
+        try:
+            data = self.sock.recv(65536)
+        except socket.timeout:
+            return True
+        except ConnectionResetError:
+            # the server hung up without reading everything we sent
+            return False
+        if not data:
+            return False
+        self.buffer += data
+        return True
+
+    def response(self, attempts=200):
+        """
+        Read one response
+
+        :return: A tuple of the status, a dict of the headers and the body
+        """
+        for _ in range(attempts):
+            end = self.buffer.find(b"\r\n\r\n")
+            if end >= 0:
+                lines = self.buffer[0:end].decode().split("\r\n")
+                headers = dict(line.split(": ", 1) for line in lines[1:])
+                length = int(headers.get("Content-Length", 0))
+                if len(self.buffer) >= end + 4 + length:
+                    body = self.buffer[end + 4 : end + 4 + length]
+                    self.buffer = self.buffer[end + 4 + length :]
+                    return (int(lines[0].split(" ")[1]), headers, body)
+            if not self._read():
+                break
+        raise AssertionError(f"No complete response; received {self.buffer}")
+
+    def closed(self, attempts=50):
+        """Has the server closed the connection?"""
+        for _ in range(attempts):
+            if not self._read():
+                return True
+        return False
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture
+def connect(server):
+    clients = []
+
+    def factory():
+        client = Client(server)
+        clients.append(client)
+        return client
+
+    yield factory
+    for client in clients:
+        client.close()
+
+
+def test_parse_request_head():
+    request = parse_request_head(
+        b"\r\nPOST /cv?x=1&name=Euro+Pi%21&flag HTTP/1.1\r\n"
+        b"Host: europi\r\nContent-Type: text/json\r\nContent-Length: 12"
+    )
+    assert (request.method, request.path, request.version) == ("POST", "/cv", "HTTP/1.1")
+    assert request.query == "x=1&name=Euro+Pi%21&flag"
+    assert request.params() == {"x": "1", "name": "Euro Pi!", "flag": ""}
+    assert request.header("content-type") == "text/json"
+    assert request.header("CONTENT-LENGTH") == "12"
+    assert request.content_length() == 12
+    assert request.keep_alive()
+
+    for data in [b"", b"GET /", b"GET / HTTP/1.1\r\nbad header", b"GET / FTP/1.0"]:
+        with pytest.raises(ValueError):
+            parse_request_head(data)
+
+
+@pytest.mark.parametrize(
+    "version, connection, expected",
+    [
+        ("HTTP/1.1", None, True),
+        ("HTTP/1.1", "close", False),
+        ("HTTP/1.1", "Close", False),
+        ("HTTP/1.0", None, False),
+        ("HTTP/1.0", "keep-alive", True),
+    ],
+)
+def test_keep_alive(version, connection, expected):
+    headers = {} if connection is None else {"connection": connection}
+    assert HttpRequest("GET", "/", version, headers).keep_alive() == expected
+
+
+def test_unquote():
+    assert unquote("a%20b%2Fc+d") == "a b/c d"
+    assert unquote("%E2%82%AC") == "€"
+    assert unquote("100%") == "100%"
+
+
+def test_legacy_handlers(server, connect):
+    @server.get_handler
+    def handle_get(connection=None, request=None):
+        server.send_html(connection, f"<p>{request.path}</p>")
+
+    @server.post_handler
+    def handle_post(connection=None, request=None):
+        server.send_json(connection, request.json())
+
+    client = connect()
+    client.request("GET", "/index.html")
+    (status, headers, body) = client.response()
+    assert status == HttpStatus.OK
+    assert headers["Content-Type"] == "text/html; charset=utf-8"
+    assert headers["Connection"] == "keep-alive"
+    assert body == b"<p>/index.html</p>"
+
+    client.request("POST", "/", body=b'{"cv1": 2.5}')
+    (status, headers, body) = client.response()
+    assert headers["Content-Type"].startswith(MimeTypes.JSON)
+    assert json.loads(body) == {"cv1": 2.5}
+
+    client.request("PUT", "/")
+    assert client.response()[0] == HttpStatus.BAD_REQUEST
+
+
+def test_default_handler_is_not_implemented(server, connect):
+    client = connect()
+    client.request("GET", "/")
+    assert client.response()[0] == HttpStatus.NOT_IMPLEMENTED
+
+
+def test_routes(server, connect):
+    @server.route("/status")
+    def status(connection=None, request=None):
+        server.send_response(connection, "ok", content_type=MimeTypes.TEXT)
+
+    server.add_route(
+        "/cv",
+        lambda connection=None, request=None: server.send_json(
+            connection, {"method": request.method, "body": request.text()}
+        ),
+        method="post",
+    )
+
+    client = connect()
+    client.request("GET", "/status?verbose=1")
+    assert client.response()[2] == b"ok"
+
+    client.request("POST", "/cv", body=b"5")
+    assert json.loads(client.response()[2]) == {"method": "POST", "body": "5"}
+
+    client.request("GET", "/cv")
+    assert client.response()[0] == HttpStatus.METHOD_NOT_ALLOWED
+
+    client.request("GET", "/missing")
+    assert client.response()[0] == HttpStatus.NOT_FOUND
+
+    server.remove_route("/status")
+    client.request("GET", "/status")
+    assert client.response()[0] == HttpStatus.NOT_FOUND
+
+
+def test_keep_alive_reuses_connection(server, connect):
+    count = []
+
+    @server.route("/")
+    def index(connection=None, request=None):
+        count.append(connection)
+        server.send_response(connection, str(len(count)))
+
+    client = connect()
+    for i in range(10):
+        client.request("GET", "/")
+        assert client.response()[2] == str(i + 1).encode()
+
+    # every request arrived over the same connection
+    assert len(server.clients) == 1
+    assert all(c is count[0] for c in count)
+    assert count[0].requests == 10
+
+
+def test_connection_close(server, connect):
+    server.add_route(
+        "/", lambda connection=None, request=None: server.send_response(connection, "")
+    )
+
+    client = connect()
+    client.request("GET", "/", headers={"Connection": "close"})
+    assert client.response()[1]["Connection"] == "close"
+    assert client.closed()
+    assert len(server.clients) == 0
+
+    # HTTP/1.0 closes by default
+    client = connect()
+    client.send(b"GET / HTTP/1.0\r\n\r\n")
+    assert client.response()[1]["Connection"] == "close"
+    assert client.closed()
+
+
+def test_large_body_in_pieces(server, connect):
+    received = []
+
+    @server.route("/upload", method="POST")
+    def upload(connection=None, request=None):
+        received.append(request.body)
+        server.send_response(connection, str(len(request.body)))
+
+    body = bytes(i % 251 for i in range(20000))
+    client = connect()
+    head = f"POST /upload HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+    data = head + body
+
+    # trickle the request in; the server returns straight away whenever it's incomplete
+    for i in range(0, len(data), 777):
+        client.send(data[i : i + 777])
+        server.check_requests()
+        assert received == [] or i + 777 >= len(data)
+
+    assert client.response()[2] == b"20000"
+    assert received == [body]
+
+
+def test_pipelined_requests(server, connect):
+    server.add_route(
+        "/echo",
+        lambda connection=None, request=None: server.send_response(connection, request.query),
+    )
+    client = connect()
+    client.send(b"".join(f"GET /echo?{i} HTTP/1.1\r\n\r\n".encode() for i in range(5)))
+    assert [client.response()[2] for i in range(5)] == [str(i).encode() for i in range(5)]
+
+
+def test_multiple_clients(server, connect):
+    server.add_route(
+        "/who",
+        lambda connection=None, request=None: server.send_response(
+            connection, request.header("x-client")
+        ),
+    )
+
+    clients = [connect() for i in range(3)]
+
+    # interleave partial requests from each client
+    for i, client in enumerate(clients):
+        client.send(b"GET /who HTTP/1.1\r\n")
+    server.check_requests()
+    for i, client in enumerate(clients):
+        client.send(f"X-Client: {i}\r\n\r\n".encode())
+
+    for i, client in enumerate(clients):
+        assert client.response()[2] == str(i).encode()
+    assert len(server.clients) == 3
+
+
+def test_idle_clients_are_evicted(server, connect, clock):
+    server.add_route(
+        "/", lambda connection=None, request=None: server.send_response(connection, "")
+    )
+    server.max_clients = 2
+
+    a = connect()
+    a.request("GET", "/")
+    a.response()
+    clock.now = 100
+    b = connect()
+    b.request("GET", "/")
+    b.response()
+
+    # a third client replaces the one idle for longest
+    clock.now = 200
+    c = connect()
+    c.request("GET", "/")
+    assert c.response()[0] == HttpStatus.OK
+    assert a.closed()
+    assert len(server.clients) == 2
+
+    # and clients idle for longer than keep_alive_ms are dropped
+    clock.now += server.keep_alive_ms
+    assert b.closed()
+    assert c.closed()
+    assert len(server.clients) == 0
+
+
+@pytest.mark.parametrize(
+    "data, status",
+    [
+        (b"NONSENSE\r\n\r\n", HttpStatus.BAD_REQUEST),
+        (b"POST / HTTP/1.1\r\nContent-Length: x\r\n\r\n", HttpStatus.BAD_REQUEST),
+        (b"POST / HTTP/1.1\r\nContent-Length: 100000\r\n\r\n", HttpStatus.PAYLOAD_TOO_LARGE),
+        (b"GET / HTTP/1.1\r\nX-Big: " + b"x" * 4096, HttpStatus.REQUEST_HEADER_FIELDS_TOO_LARGE),
+        (
+            b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n",
+            HttpStatus.NOT_IMPLEMENTED,
+        ),
+    ],
+    ids=["malformed", "bad-length", "too-large", "huge-header", "chunked"],
+)
+def test_bad_requests(server, connect, data, status):
+    client = connect()
+    client.send(data)
+    (response_status, headers, body) = client.response()
+    assert response_status == status
+    assert headers["Connection"] == "close"
+    assert client.closed()
+
+
+def test_handler_errors(server, connect):
+    @server.route("/fail")
+    def fail(connection=None, request=None):
+        raise KeyError("oops")
+
+    @server.route("/silent")
+    def silent(connection=None, request=None):
+        pass
+
+    client = connect()
+    client.request("GET", "/fail")
+    assert client.response()[0] == HttpStatus.INTERNAL_SERVER_ERROR
+    client.request("GET", "/silent")
+    assert client.response()[0] == HttpStatus.INTERNAL_SERVER_ERROR
+
+    # the connection survives
+    client.request("GET", "/nothing")
+    assert client.response()[0] == HttpStatus.NOT_FOUND
+
+
+def test_expect_continue(server, connect):
+    server.add_route(
+        "/",
+        lambda connection=None, request=None: server.send_response(connection, request.body),
+        method="POST",
+    )
+    client = connect()
+    client.send(b"POST / HTTP/1.1\r\nContent-Length: 4\r\nExpect: 100-continue\r\n\r\n")
+    assert client.response()[0] == HttpStatus.CONTINUE
+    client.send(b"data")
+    assert client.response()[2] == b"data"
+
+
+def test_check_requests_does_not_block(server, connect):
+    server.add_route(
+        "/", lambda connection=None, request=None: server.send_response(connection, "")
+    )
+    client = connect()
+    client.send(b"GET / HTTP/1.1\r\nHost: euro")
+
+    start = time.perf_counter()
+    for i in range(100):
+        server.check_requests()
+    assert time.perf_counter() - start < 0.5
+
+
+def mask_frame(opcode, payload, fin=True):
+    """Encode a frame the way a browser would, with a random masking key"""
+    if len(payload) < 126:
+        header = bytes((opcode | (0x80 if fin else 0), 0x80 | len(payload)))
+    else:
+        header = struct.pack(">BBH", opcode | (0x80 if fin else 0), 0x80 | 126, len(payload))
+    mask = os.urandom(4)
+    return header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+class WebSocketClient(Client):
+    """A minimal WebSocket client"""
+
+    def __init__(self, server, path="/ws"):
+        super().__init__(server)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.request(
+            "GET",
+            path,
+            headers={
+                "Upgrade": "websocket",
+                "Connection": "Upgrade",
+                "Sec-WebSocket-Key": key,
+                "Sec-WebSocket-Version": "13",
+            },
+        )
+        (self.status, self.headers, _) = self.response()
+        self.key = key
+
+    def send_frame(self, opcode, payload, fin=True):
+        self.send(mask_frame(opcode, payload, fin))
+
+    def frame(self, attempts=200):
+        """
+        Read one frame
+
+        :return: A tuple of the opcode and payload
+        """
+        for _ in range(attempts):
+            if len(self.buffer) >= 2:
+                assert self.buffer[1] & 0x80 == 0, "server frames must not be masked"
+                length = self.buffer[1]
+                offset = 2
+                if length == 126:
+                    length = struct.unpack_from(">H", self.buffer, 2)[0]
+                    offset = 4
+                if len(self.buffer) >= offset + length:
+                    opcode = self.buffer[0] & 0x0F
+                    payload = self.buffer[offset : offset + length]
+                    self.buffer = self.buffer[offset + length :]
+                    return (opcode, payload)
+            if not self._read():
+                break
+        raise AssertionError(f"No complete frame; received {self.buffer}")
+
+
+@pytest.fixture
+def ws_connect(server):
+    clients = []
+
+    def factory(path="/ws"):
+        client = WebSocketClient(server, path)
+        clients.append(client)
+        return client
+
+    yield factory
+    for client in clients:
+        client.close()
+
+
+@pytest.fixture
+def echo(server):
+    events = []
+
+    def on_message(connection=None, data=None):
+        events.append(("message", data))
+        connection.send(data)
+
+    server.add_websocket(
+        "/ws",
+        on_message,
+        on_open=lambda connection=None, request=None: events.append(("open", request.path)),
+        on_close=lambda connection=None: events.append(("close", None)),
+    )
+    return events
+
+
+def test_websocket_accept_key():
+    # the example from RFC 6455
+    assert websocket_accept_key("dGhlIHNhbXBsZSBub25jZQ==") == "s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
+
+
+@pytest.mark.parametrize("length", [0, 5, 125, 126, 1000, 65535, 65536])
+def test_encode_frame_header(length):
+    header = encode_frame_header(WebSocketOpcode.BINARY, length)
+    assert header[0] == 0x82
+    if length < 126:
+        assert header[1:] == bytes([length])
+    elif length < 65536:
+        assert header[1:] == b"\x7e" + struct.pack(">H", length)
+    else:
+        assert header[1:] == b"\x7f" + struct.pack(">Q", length)
+
+
+def test_websocket_handshake(server, ws_connect, echo):
+    client = ws_connect()
+    assert client.status == HttpStatus.SWITCHING_PROTOCOLS
+    assert client.headers["Upgrade"] == "websocket"
+    assert client.headers["Sec-WebSocket-Accept"] == websocket_accept_key(client.key)
+    assert echo == [("open", "/ws")]
+    assert len(server.websockets) == 1
+
+
+def test_websocket_echo(server, ws_connect, echo):
+    client = ws_connect()
+    client.send_frame(WebSocketOpcode.BINARY, b"\x01\x02\x03")
+    assert client.frame() == (WebSocketOpcode.BINARY, b"\x01\x02\x03")
+
+    client.send_frame(WebSocketOpcode.TEXT, "häßlich".encode())
+    assert client.frame() == (WebSocketOpcode.TEXT, "häßlich".encode())
+
+    big = os.urandom(3000)
+    client.send_frame(WebSocketOpcode.BINARY, big)
+    assert client.frame() == (WebSocketOpcode.BINARY, big)
+
+    assert echo[1:] == [("message", b"\x01\x02\x03"), ("message", "häßlich"), ("message", big)]
+
+
+def test_websocket_fragments_and_pings(server, ws_connect, echo):
+    client = ws_connect()
+    client.send_frame(WebSocketOpcode.TEXT, b"hello ", fin=False)
+    # control frames may arrive between the fragments of a message
+    client.send_frame(WebSocketOpcode.PING, b"are you there?")
+    client.send_frame(WebSocketOpcode.CONTINUATION, b"there")
+    assert client.frame() == (WebSocketOpcode.PONG, b"are you there?")
+    assert client.frame() == (WebSocketOpcode.TEXT, b"hello there")
+
+
+def test_websocket_close(server, ws_connect, echo):
+    client = ws_connect()
+    client.send_frame(WebSocketOpcode.CLOSE, struct.pack(">H", WebSocketClose.GOING_AWAY))
+    assert client.frame() == (WebSocketOpcode.CLOSE, struct.pack(">H", WebSocketClose.GOING_AWAY))
+    assert client.closed()
+    assert echo[-1] == ("close", None)
+    assert server.websockets == []
+
+
+def test_websocket_disconnect(server, ws_connect, echo):
+    client = ws_connect()
+    client.close()
+    for i in range(10):
+        server.check_requests()
+    assert echo[-1] == ("close", None)
+    assert server.websockets == []
+
+
+def test_websocket_protocol_errors(server, ws_connect, echo):
+    # frames from the client must be masked
+    client = ws_connect()
+    client.send(b"\x82\x01x")
+    (opcode, payload) = client.frame()
+    assert opcode == WebSocketOpcode.CLOSE
+    assert struct.unpack(">H", payload[0:2])[0] == WebSocketClose.PROTOCOL_ERROR
+    assert client.closed()
+
+    client = ws_connect()
+    client.send_frame(WebSocketOpcode.CONTINUATION, b"x")
+    assert client.frame()[0] == WebSocketOpcode.CLOSE
+
+
+def test_websocket_bad_handshake(server, connect, echo):
+    client = connect()
+    client.request("GET", "/ws", headers={"Upgrade": "websocket", "Connection": "Upgrade"})
+    assert client.response()[0] == HttpStatus.BAD_REQUEST
+
+
+def test_websockets_do_not_time_out(server, ws_connect, echo, clock):
+    client = ws_connect()
+    clock.now += 10 * server.keep_alive_ms
+    server.check_requests()
+    client.send_frame(WebSocketOpcode.BINARY, b"still here")
+    assert client.frame()[1] == b"still here"
+
+
+def test_broadcast(server, ws_connect, echo):
+    assert server.broadcast(b"nobody") == 0
+
+    clients = [ws_connect() for i in range(3)]
+    assert server.broadcast(b"\x00\x01") == 3
+    assert server.broadcast("text") == 3
+    for client in clients:
+        assert client.frame() == (WebSocketOpcode.BINARY, b"\x00\x01")
+        assert client.frame() == (WebSocketOpcode.TEXT, b"text")
+
+    # a client that has fallen behind is skipped
+    backed_up = server.websockets[0].connection
+    backed_up.out_chunks.append(b"x" * 2000)
+    assert server.broadcast(b"skip") == 2
+
+
+@pytest.mark.parametrize(
+    "filename, expected",
+    [
+        ("index.html", MimeTypes.HTML),
+        ("/lib/www/STYLE.CSS", MimeTypes.CSS),
+        ("app.js", MimeTypes.JAVASCRIPT),
+        ("logo.svg", MimeTypes.SVG),
+        ("data.bin", MimeTypes.BINARY),
+        ("/lib/www.d/README", MimeTypes.BINARY),
+    ],
+)
+def test_guess_mime_type(filename, expected):
+    assert guess_mime_type(filename) == expected
+
+
+@pytest.fixture
+def www(tmp_path, server):
+    page = ("<html>" + "".join(f"<p>line {i}</p>" for i in range(2000)) + "</html>").encode()
+    (tmp_path / "index.html").write_bytes(page)
+    (tmp_path / "index.html.gz").write_bytes(gzip.compress(page, mtime=0))
+    (tmp_path / "style.css").write_bytes(b"body { color: red; }")
+    (tmp_path / "logo.png").write_bytes(bytes(range(256)) * 8)
+
+    @server.get_handler
+    def handle_get(connection=None, request=None):
+        server.send_file(connection, request, str(tmp_path) + request.path)
+
+    return page
+
+
+def test_send_file(server, connect, www):
+    client = connect()
+    client.request("GET", "/index.html")
+    (status, headers, body) = client.response()
+    assert status == HttpStatus.OK
+    assert body == www
+    assert headers["Content-Type"] == "text/html; charset=utf-8"
+    assert "Content-Encoding" not in headers
+    assert headers["Cache-Control"] == "max-age=3600"
+
+    client.request("GET", "/logo.png")
+    (status, headers, body) = client.response()
+    assert headers["Content-Type"] == MimeTypes.PNG
+    assert body == bytes(range(256)) * 8
+
+    client.request("GET", "/style.css")
+    assert client.response()[2] == b"body { color: red; }"
+
+    client.request("GET", "/missing.html")
+    assert client.response()[0] == HttpStatus.NOT_FOUND
+
+    # the connection is still usable after streaming
+    assert len(server.clients) == 1
+
+
+def test_send_file_gzip(server, connect, www):
+    client = connect()
+    client.request("GET", "/index.html", headers={"Accept-Encoding": "gzip, deflate"})
+    (status, headers, body) = client.response()
+    assert headers["Content-Encoding"] == "gzip"
+    assert headers["Vary"] == "Accept-Encoding"
+    assert len(body) < len(www) / 4
+    assert gzip.decompress(body) == www
+
+    # files without a compressed copy are sent as they are
+    client.request("GET", "/style.css", headers={"Accept-Encoding": "gzip"})
+    (status, headers, body) = client.response()
+    assert "Content-Encoding" not in headers
+    assert body == b"body { color: red; }"
+
+
+def test_send_file_not_modified(server, connect, www):
+    client = connect()
+    client.request("GET", "/index.html", headers={"Accept-Encoding": "gzip"})
+    etag = client.response()[1]["ETag"]
+
+    client.request("GET", "/index.html", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    (status, headers, body) = client.response()
+    assert status == HttpStatus.NOT_MODIFIED
+    assert headers["ETag"] == etag
+    assert body == b""
+    assert "Content-Length" not in headers
+
+    # the uncompressed file has a different ETag
+    client.request("GET", "/index.html", headers={"If-None-Match": etag})
+    assert client.response()[0] == HttpStatus.OK
+
+
+def slow_client(server, connect):
+    """Connect a client with small socket buffers, so a large file can't be sent all at once"""
+    client = connect()
+    client.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    server.check_requests()
+    connection = list(server.clients.values())[0]
+    connection.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    return (client, connection)
+
+
+def test_send_file_streams(server, connect, www):
+    (client, connection) = slow_client(server, connect)
+    client.request("GET", "/index.html")
+    server.check_requests()
+
+    stream = connection.out_chunks[-1]
+    assert len(stream.buffer) <= 512
+    assert client.response()[2] == www
+    assert connection.out_chunks == []
+    assert stream.file.closed
+
+
+def test_file_closed_on_disconnect(server, connect, www):
+    (client, connection) = slow_client(server, connect)
+    client.request("GET", "/index.html")
+    server.check_requests()
+    stream = connection.out_chunks[-1]
+
+    # the client hangs up part way through
+    client.close()
+    for i in range(10):
+        server.check_requests()
+    assert len(server.clients) == 0
+    assert stream.file.closed
+
+
+def load_frozen_assets(tmp_path):
+    """Freeze the real web assets the way the UF2 build does, and import the result"""
+    root = os.path.join(os.path.dirname(__file__), "..", "..", "..")
+    spec = importlib.util.spec_from_file_location(
+        "build_web_assets", os.path.join(root, "scripts", "build_web_assets.py")
+    )
+    build_web_assets = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(build_web_assets)
+    [(module, _)] = [
+        m
+        for m in build_web_assets.freeze(os.path.join(root, "software", "contrib", "www"), tmp_path)
+        if m[0].endswith("www_http_control.py")
+    ]
+
+    spec = importlib.util.spec_from_file_location("www_http_control", module)
+    frozen = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(frozen)
+    return frozen.FILES
+
+
+def test_send_bytes(server, connect, tmp_path):
+    files = load_frozen_assets(tmp_path)
+    (etag, page, gzipped) = files["index.html"]
+    assert gzip.decompress(gzipped) == page
+
+    @server.get_handler
+    def handle_get(connection=None, request=None):
+        server.send_bytes(connection, request, page, etag, gzipped=gzipped)
+
+    client = connect()
+    client.request("GET", "/")
+    (status, headers, body) = client.response()
+    assert status == HttpStatus.OK
+    assert body == page
+    assert headers["ETag"] == etag
+    assert "Content-Encoding" not in headers
+
+    client.request("GET", "/", headers={"Accept-Encoding": "gzip"})
+    (status, headers, body) = client.response()
+    assert headers["Content-Encoding"] == "gzip"
+    assert body == gzipped
+    gzip_etag = headers["ETag"]
+    assert gzip_etag != etag
+
+    client.request("GET", "/", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+    (status, headers, body) = client.response()
+    assert status == HttpStatus.NOT_MODIFIED
+    assert body == b""
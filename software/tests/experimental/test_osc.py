@@ -0,0 +1,442 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+import socket
+import struct
+
+import pytest
+
+from experimental.osc import (
+    OpenSoundPacket,
+    OpenSoundPublisher,
+    OpenSoundRouter,
+    OpenSoundServer,
+    OpenSoundWriter,
+    for_each_message,
+    is_pattern,
+    match_address,
+)
+
+
+def encode(address, *args):
+    writer = OpenSoundWriter()
+    writer.add_message(address, *args)
+    return bytes(writer.getvalue())
+
+
+def decode_all(data):
+    """Decode every message in a packet, copying the results"""
+    messages = []
+    for_each_message(
+        data,
+        OpenSoundPacket(),
+        lambda p: messages.append((p.address, list(p.values), p.timetag)),
+    )
+    return messages
+
+
+def test_encode_known_packet():
+    # example from the OSC 1.0 specification
+    assert encode("/oscillator/4/frequency", 440.0) == (
+        b"/oscillator/4/frequency\0,f\0\0" + struct.pack(">f", 440.0)
+    )
+    assert encode("/foo", 1000, -1, "hello", 1.234, 5.678) == (
+        b"/foo\0\0\0\0,iisff\0\0"
+        + struct.pack(">ii", 1000, -1)
+        + b"hello\0\0\0"
+        + struct.pack(">ff", 1.234, 5.678)
+    )
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        (),
+        (0,),
+        (1, -1, 0x7FFFFFFF, -0x80000000),
+        (0x123456789,),
+        (0.5, -1.25),
+        ("", "a", "abc", "abcd", "häßlich"),
+        (bytearray(), bytearray(b"\x00\x01\x02"), bytearray(range(8))),
+        (None, 7, "x"),
+    ],
+)
+def test_round_trip(args):
+    packet = OpenSoundPacket(encode("/europi/test", *args))
+    assert packet.address == "/europi/test"
+    assert packet.values == list(args)
+
+
+def test_bools_are_sent_as_ints():
+    assert OpenSoundPacket(encode("/b", True, False)).values == [1, 0]
+
+
+def test_decode_other_types():
+    data = (
+        b"/x\0\0,TFNIhdtcm\0\0"
+        + struct.pack(">qdQI", -(2**40), 0.1, 12345, ord("z"))
+        + b"\x00\x90\x3c\x7f"
+    )
+    packet = OpenSoundPacket(data)
+    assert packet.values == [
+        True,
+        False,
+        None,
+        float("inf"),
+        -(2**40),
+        0.1,
+        12345,
+        "z",
+        b"\x00\x90\x3c\x7f",
+    ]
+
+
+def test_decode_without_type_tags():
+    packet = OpenSoundPacket(b"/old/style/\0")
+    assert packet.address == "/old/style"
+    assert packet.values == []
+
+
+def test_packet_is_reused():
+    packet = OpenSoundPacket(encode("/a", 1, 2, 3))
+    values = packet.values
+    packet.decode(encode("/b", "x"))
+    assert packet.values is values
+    assert (packet.address, packet.values) == ("/b", ["x"])
+
+
+def test_bundle():
+    writer = OpenSoundWriter()
+    writer.begin_bundle(timetag=42)
+    for i in range(6):
+        writer.add_message(f"/europi/cv{i + 1}", i / 10)
+    writer.begin_bundle()
+    writer.add_message("/europi/nested", "yes")
+    writer.end_bundle()
+    writer.end_bundle()
+    data = bytes(writer.getvalue())
+
+    assert data.startswith(b"#bundle\0")
+    messages = decode_all(data)
+    assert [m[0] for m in messages] == [f"/europi/cv{i + 1}" for i in range(6)] + ["/europi/nested"]
+    assert messages[3][1] == [pytest.approx(0.3)]
+    assert messages[0][2] == 42
+    assert messages[-1] == ("/europi/nested", ["yes"], 1)
+
+
+def test_writer_errors():
+    writer = OpenSoundWriter(size=16)
+    with pytest.raises(ValueError):
+        writer.add_message("/a/very/long/address", 1)
+
+    writer.reset()
+    with pytest.raises(ValueError):
+        writer.add_message("/a", object())
+
+    writer.reset()
+    writer.begin_bundle()
+    with pytest.raises(ValueError):
+        writer.getvalue()
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"no/slash\0\0\0\0",
+        b"/unterminated",
+        b"/a\0\0,i\0\0\0\0",
+        b"/a\0\0,s\0\0abc",
+        b"/a\0\0,b\0\0\xff\xff\xff\xff",
+        b"/a\0\0,b\0\0\0\0\0\x10abcd",
+        b"#bundle\0\0\0\0\0\0\0\0\x01\0\0\0\x07/a\0\0,\0\0\0",
+        b"#bundle\0\0\0\0\0\0\0\0\x01\0\0\0\x40/a\0\0,\0\0\0",
+    ],
+)
+def test_malformed_packets(data):
+    with pytest.raises(ValueError):
+        decode_all(data)
+
+
+def test_fuzz():
+    """Random and corrupted packets either decode or raise ValueError"""
+    rng = random.Random(1234)
+    values = [0, -5, 2**40, 0.25, "s", "longer string", bytearray(b"blob!"), None, True]
+    for _ in range(2000):
+        writer = OpenSoundWriter()
+        writer.begin_bundle()
+        for _ in range(rng.randint(1, 4)):
+            args = [rng.choice(values) for _ in range(rng.randint(0, 5))]
+            writer.add_message("/fuzz/" + "x" * rng.randint(0, 6), *args)
+        writer.end_bundle()
+        data = bytearray(writer.getvalue())
+
+        # a valid packet always round-trips
+        assert len(decode_all(bytes(data))) > 0
+
+        mutation = rng.randint(0, 2)
+        if mutation == 0:
+            data = data[0 : rng.randint(0, len(data))]
+        elif mutation == 1:
+            for _ in range(rng.randint(1, 4)):
+                data[rng.randrange(len(data))] = rng.randrange(256)
+        else:
+            data = bytearray(rng.randrange(256) for _ in range(rng.randint(0, 64)))
+
+        try:
+            decode_all(bytes(data))
+        except ValueError:
+            pass
+
+
+@pytest.mark.parametrize(
+    "pattern, address, expected",
+    [
+        ("/europi/cv1", "/europi/cv1", True),
+        ("/europi/cv1", "/europi/cv2", False),
+        ("/europi/cv?", "/europi/cv6", True),
+        ("/europi/cv?", "/europi/cv", False),
+        ("/europi/*", "/europi/cv1", True),
+        ("/europi/*", "/europi/cv1/x", False),
+        ("/*/cv1", "/europi/cv1", True),
+        ("/europi/*1", "/europi/cv1", True),
+        ("/europi/*1", "/europi/cv2", False),
+        ("/europi/cv[1-3]", "/europi/cv2", True),
+        ("/europi/cv[1-3]", "/europi/cv4", False),
+        ("/europi/cv[!1-3]", "/europi/cv4", True),
+        ("/europi/cv[!1-3]", "/europi/cv1", False),
+        ("/europi/cv[135]", "/europi/cv5", True),
+        ("/europi/{k1,k2,ain}", "/europi/ain", True),
+        ("/europi/{k1,k2,ain}", "/europi/k3", False),
+        ("/europi/{cv,k}[12]", "/europi/k2", True),
+        ("/europi/[", "/europi/x", False),
+    ],
+)
+def test_match_address(pattern, address, expected):
+    assert match_address(pattern, address) == expected
+
+
+def test_is_pattern():
+    assert not is_pattern("/europi/cv1")
+    assert is_pattern("/europi/cv*")
+    assert is_pattern("/europi/{a,b}")
+
+
+def test_router():
+    router = OpenSoundRouter()
+    calls = []
+
+    @router.route("/europi/cv1/")
+    def on_cv1(connection=None, data=None):
+        calls.append(("cv1", data.values[0]))
+
+    router.add("/europi/cv2", lambda connection=None, data=None: calls.append(("cv2", connection)))
+    router.add(
+        "/europi/k[12]", lambda connection=None, data=None: calls.append(("k", data.address))
+    )
+    router.fallback = lambda connection=None, data=None: calls.append(("?", data.address))
+
+    packet = OpenSoundPacket()
+    for address in ["/europi/cv1", "/europi/cv2", "/europi/k2", "/europi/b1"]:
+        packet.decode(encode(address, 5))
+        router.dispatch(connection="client", data=packet)
+    assert calls == [("cv1", 5), ("cv2", "client"), ("k", "/europi/k2"), ("?", "/europi/b1")]
+
+    # an incoming pattern is delivered to every plain address it matches
+    calls.clear()
+    packet.decode(encode("/europi/cv*", 1))
+    assert router.dispatch(data=packet)
+    assert sorted(c[0] for c in calls) == ["cv1", "cv2"]
+
+    router.remove("/europi/k[12]")
+    router.remove("/europi/cv1")
+    calls.clear()
+    packet.decode(encode("/europi/k1", 1))
+    assert not router.dispatch(data=packet)
+    assert calls == [("?", "/europi/k1")]
+
+
+class SimulatedClock:
+    """Replaces utime so the publisher's ticks can be driven without waiting"""
+
+    def __init__(self):
+        self.now = 0
+
+    def ticks_ms(self):
+        return self.now
+
+    def ticks_add(self, a, b):
+        return a + b
+
+    def ticks_diff(self, a, b):
+        return a - b
+
+
+@pytest.fixture
+def listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(0.01)
+    yield sock
+    sock.close()
+
+
+@pytest.fixture
+def server(listener):
+    srv = OpenSoundServer(recv_port=0, send_port=listener.getsockname()[1], send_addr="127.0.0.1")
+    yield srv
+    srv.close()
+
+
+def receive(listener):
+    """Read every datagram waiting on the listener, decoding each into a list of messages"""
+    datagrams = []
+    try:
+        while True:
+            datagrams.append(decode_all(listener.recv(2048)))
+    except socket.timeout:
+        pass
+    return datagrams
+
+
+def test_publisher(server, listener):
+    clock = SimulatedClock()
+    state = {"k1": 0.5, "b1": False, "count": 3}
+    publisher = OpenSoundPublisher(server, rate=20, threshold=0.01, refresh_ms=0, clock=clock)
+    publisher.add("/europi/k1", lambda: state["k1"])
+    publisher.add("/europi/b1", lambda: state["b1"])
+    publisher.add("/europi/count", lambda: state["count"], threshold=100)
+
+    # everything is sent in one bundle on the first tick
+    assert publisher.poll()
+    [messages] = receive(listener)
+    assert [(m[0], m[1]) for m in messages] == [
+        ("/europi/k1", [0.5]),
+        ("/europi/b1", [0]),
+        ("/europi/count", [3]),
+    ]
+
+    # nothing is sent before the next tick, or while nothing changes
+    state["b1"] = True
+    clock.now = 49
+    assert not publisher.poll()
+    clock.now = 50
+    state["b1"] = False
+    assert publisher.poll()
+    assert receive(listener) == []
+
+    # floats are only sent once they've moved past the threshold; other types on any change
+    clock.now = 100
+    state["k1"] = 0.505
+    state["count"] = 4
+    publisher.poll()
+    assert [m[:2] for m in receive(listener)[0]] == [("/europi/count", [4])]
+
+    clock.now = 150
+    state["k1"] = 0.52
+    publisher.poll()
+    [messages] = receive(listener)
+    assert messages[0][0] == "/europi/k1"
+    assert messages[0][1][0] == pytest.approx(0.52)
+
+    assert publisher.packets == 3
+    assert publisher.messages == 5
+
+
+def test_publisher_threshold_is_from_last_sent_value(server, listener):
+    clock = SimulatedClock()
+    level = [0.0]
+    publisher = OpenSoundPublisher(server, threshold=0.1, refresh_ms=0, clock=clock)
+    publisher.add("/europi/ain", lambda: level[0])
+
+    # a slow drift is sent once it adds up to more than the threshold
+    sent = []
+    for i in range(20):
+        level[0] = i * 0.03
+        clock.now = i * 50
+        publisher.poll()
+        sent.extend(round(m[1][0], 2) for d in receive(listener) for m in d)
+    assert sent == [0.0, 0.12, 0.24, 0.36, 0.48]
+
+
+def test_publisher_refresh(server, listener):
+    clock = SimulatedClock()
+    publisher = OpenSoundPublisher(server, rate=10, refresh_ms=1000, clock=clock)
+    publisher.add("/europi/k1", lambda: 0.25)
+    publisher.add("/europi/din", lambda: True)
+
+    counts = []
+    for t in range(0, 2100, 100):
+        clock.now = t
+        publisher.poll()
+        counts.append(sum(len(d) for d in receive(listener)))
+    assert counts[0] == 2
+    assert counts[10] == 2
+    assert counts[20] == 2
+    assert sum(counts) == 6
+
+
+def test_publisher_skips_missed_ticks(server, listener):
+    clock = SimulatedClock()
+    value = [0]
+    publisher = OpenSoundPublisher(server, rate=10, refresh_ms=0, clock=clock)
+    publisher.add("/europi/count", lambda: value[0])
+    publisher.poll()
+
+    # after a long stall only one tick is processed, then the schedule resumes from now
+    clock.now = 1050
+    value[0] = 1
+    assert publisher.poll()
+    assert not publisher.poll()
+    clock.now = 1149
+    assert not publisher.poll()
+    clock.now = 1150
+    assert publisher.poll()
+    assert publisher.packets == 2
+
+    with pytest.raises(ValueError):
+        publisher.set_rate(0)
+
+
+def test_publisher_errors(server, listener):
+    clock = SimulatedClock()
+    state = {"ok": True}
+
+    def read():
+        if not state["ok"]:
+            raise RuntimeError("sensor failed")
+        return 1
+
+    publisher = OpenSoundPublisher(server, refresh_ms=0, clock=clock)
+    publisher.add("/europi/b2", lambda: 0)
+    publisher.add("/europi/flaky", read)
+    publisher.poll()
+    assert len(receive(listener)) == 1
+
+    # a failed tick sends nothing, and everything is sent again once it recovers
+    state["ok"] = False
+    clock.now = 50
+    assert publisher.publish() == 0
+    assert receive(listener) == []
+
+    state["ok"] = True
+    assert publisher.publish() == 2
+    assert [m[0] for m in receive(listener)[0]] == ["/europi/b2", "/europi/flaky"]
+
+
+def test_server_close(listener):
+    srv = OpenSoundServer(recv_port=0, send_port=listener.getsockname()[1], send_addr="127.0.0.1")
+    srv.close()
+    assert srv.recv_socket.fileno() == -1
+    assert srv.send_socket.fileno() == -1
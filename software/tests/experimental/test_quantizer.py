@@ -0,0 +1,196 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+from array import array
+
+from europi import MAX_OUTPUT_VOLTAGE
+from experimental import quantizer
+from experimental.quantizer import CommonScales, Quantizer, TuningQuantizer, VOLTS_PER_SEMITONE
+
+
+def reference_quantize(notes, analog_in, root=0, max_output_voltage=MAX_OUTPUT_VOLTAGE):
+    """The original, table-free implementation of Quantizer.quantize"""
+    if not (True in notes):
+        return (0, 0)
+
+    analog_in = analog_in - VOLTS_PER_SEMITONE * root
+    nearest_chromatic_volt = round(analog_in / VOLTS_PER_SEMITONE) * VOLTS_PER_SEMITONE
+    base_volts = int(nearest_chromatic_volt)
+    nearest_semitone = (nearest_chromatic_volt - base_volts) / VOLTS_PER_SEMITONE
+
+    nearest_on_scale = 0
+    best_delta = 255
+    for note in range(len(notes)):
+        if notes[note]:
+            delta = abs(nearest_semitone - note)
+            if delta < best_delta:
+                nearest_on_scale = note
+                best_delta = delta
+
+    volts = base_volts + nearest_on_scale * VOLTS_PER_SEMITONE + root * VOLTS_PER_SEMITONE
+
+    highest_volts = volts
+    highest_note = nearest_on_scale
+    while volts > max_output_voltage:
+        highest_volts -= VOLTS_PER_SEMITONE
+        highest_note = (highest_note - 1) % len(notes)
+        if notes[highest_note]:
+            volts = highest_volts
+            nearest_on_scale = highest_note
+
+    return (volts, nearest_on_scale)
+
+
+ALL_SCALES = [
+    getattr(CommonScales, name)
+    for name in dir(CommonScales)
+    if isinstance(getattr(CommonScales, name), Quantizer)
+]
+
+# 0-12V in 5mV steps, plus exact semitone voltages
+INPUTS = [i * 0.005 for i in range(2401)] + [i * VOLTS_PER_SEMITONE for i in range(145)]
+
+
+@pytest.mark.parametrize("scale", ALL_SCALES, ids=str)
+@pytest.mark.parametrize("root", [0, 5, 11])
+def test_matches_reference(scale, root):
+    for v in INPUTS:
+        (volts, note) = scale.quantize(v, root)
+        (expected_volts, expected_note) = reference_quantize(scale.notes, v, root)
+        assert volts == pytest.approx(expected_volts, abs=1e-6), f"input {v}"
+        assert note == expected_note, f"input {v}"
+
+
+def test_lower_max_output(monkeypatch):
+    monkeypatch.setattr(quantizer, "MAX_OUTPUT_VOLTAGE", 5.0)
+    scale = CommonScales.Major135
+    for v in INPUTS:
+        (volts, note) = scale.quantize(v, 7)
+        (expected_volts, expected_note) = reference_quantize(scale.notes, v, 7, 5.0)
+        assert volts == pytest.approx(expected_volts, abs=1e-6)
+        assert note == expected_note
+
+
+def test_setitem_rebuilds_tables():
+    q = Quantizer([False] * 12)
+    assert q.quantize(3.3) == (0, 0)
+
+    q[4] = True
+    assert q.quantize(3.3) == (pytest.approx(3 + 4 * VOLTS_PER_SEMITONE), 4)
+
+    q[7] = True
+    assert q.quantize(3.55) == (pytest.approx(3 + 7 * VOLTS_PER_SEMITONE), 7)
+
+    q.notes = [True] + [False] * 11
+    assert q.quantize(3.3) == (pytest.approx(3), 0)
+
+
+def test_quantize_many():
+    scale = CommonScales.NatMinor
+    voltages = [0.0, 0.3, 1.7, 4.44, 9.99]
+    expected = [scale.quantize(v, 2)[0] for v in voltages]
+
+    assert scale.quantize_many(voltages, 2) == pytest.approx(expected)
+
+    out = array("f", [0.0] * len(voltages))
+    assert scale.quantize_many(voltages, 2, out) is out
+    assert list(out) == pytest.approx(expected)
+
+
+# TuningQuantizer
+
+
+@pytest.mark.parametrize("root", [0, 3, 11])
+def test_tuning_12tet_matches_chromatic(root):
+    tuning = TuningQuantizer.equal_temperament(12)
+    for v in INPUTS:
+        if abs(v / VOLTS_PER_SEMITONE % 1 - 0.5) < 1e-4:
+            # Quantizer rounds exact midpoints to the even semitone; TuningQuantizer rounds down
+            continue
+        (volts, note) = tuning.quantize(v, root)
+        (expected_volts, expected_note) = CommonScales.Chromatic.quantize(v, root)
+        assert volts == pytest.approx(expected_volts, abs=1e-5), f"input {v}"
+        assert note == expected_note, f"input {v}"
+
+
+def test_tuning_19tet():
+    tuning = TuningQuantizer.equal_temperament(19)
+    step = 1.0 / 19
+    assert tuning.quantize(2 + 5 * step + 0.4 * step) == (pytest.approx(2 + 5 * step), 5)
+    assert tuning.quantize(2 + 5 * step + 0.6 * step) == (pytest.approx(2 + 6 * step), 6)
+    assert tuning.quantize(0.99 - step / 4) == (pytest.approx(1.0), 0)
+
+
+def test_tuning_from_scala():
+    scl = """! just.scl
+!
+Just major pentatonic
+ 5
+!
+ 9/8
+ 5/4
+ 3/2
+ 884.359
+ 2
+"""
+    tuning = TuningQuantizer.from_scala(scl.splitlines())
+    assert str(tuning) == "Just major pentatonic"
+    assert len(tuning) == 5
+    assert tuning.note_volts == pytest.approx(
+        [0.0, 0.169925, 0.321928, 0.584963, 0.736966], abs=1e-5
+    )
+    assert tuning.quantize(1.59) == (pytest.approx(1.584963, abs=1e-5), 3)
+
+
+def test_tuning_from_voltages():
+    tuning = TuningQuantizer.from_voltages([0.0, 0.25, 0.5, 0.75])
+    assert tuning.quantize(3.3) == (pytest.approx(3.25), 1)
+
+
+def test_tuning_notes_mask():
+    tuning = TuningQuantizer.equal_temperament(12, notes=CommonScales.Major135.notes)
+    assert tuning.quantize(1.5) == (pytest.approx(1 + 7 * VOLTS_PER_SEMITONE), 7)
+
+    tuning[7] = False
+    assert tuning.quantize(1.5) == (pytest.approx(1 + 4 * VOLTS_PER_SEMITONE), 4)
+
+
+def test_tuning_hysteresis():
+    tuning = TuningQuantizer.equal_temperament(12, hysteresis=0.01)
+    half = VOLTS_PER_SEMITONE / 2
+
+    assert tuning.quantize(1.0)[1] == 0
+    # just past the midpoint isn't enough to change notes...
+    assert tuning.quantize(1.0 + half + 0.005)[1] == 0
+    # ...but far enough past is
+    assert tuning.quantize(1.0 + half + 0.015)[1] == 1
+    assert tuning.quantize(1.0 + half - 0.005)[1] == 1
+    assert tuning.quantize(1.0 + half - 0.015)[1] == 0
+
+
+def test_tuning_max_output(monkeypatch):
+    monkeypatch.setattr(quantizer, "MAX_OUTPUT_VOLTAGE", 5.0)
+    tuning = TuningQuantizer.equal_temperament(12, notes=CommonScales.Major135.notes)
+    (volts, note) = tuning.quantize(5.6, 7)
+    assert volts <= 5.0
+    assert (volts, note) == (pytest.approx(4 + 11 * VOLTS_PER_SEMITONE, abs=1e-5), 4)
+
+
+def test_tuning_quantize_many():
+    tuning = TuningQuantizer.equal_temperament(19)
+    voltages = [0.0, 0.3, 1.7, 4.44, 9.99]
+    assert tuning.quantize_many(voltages, 2) == pytest.approx(
+        [tuning.quantize(v, 2)[0] for v in voltages]
+    )
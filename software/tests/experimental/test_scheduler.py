@@ -0,0 +1,141 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+from europi import cvs
+from experimental.scheduler import CvScheduler, waveform_from_voltages
+
+
+class SimulatedClock:
+    """Replaces utime so the scheduler can be driven at precise, repeatable times"""
+
+    def __init__(self):
+        self.now = 0
+
+    def ticks_us(self):
+        return self.now
+
+    def ticks_diff(self, a, b):
+        return a - b
+
+    def advance(self, us):
+        self.now += us
+
+
+@pytest.fixture
+def clock():
+    return SimulatedClock()
+
+
+@pytest.fixture
+def scheduler(clock):
+    for cv in cvs:
+        cv.off()
+    return CvScheduler(rate=1000, clock=clock)
+
+
+def run(scheduler, clock, n, jitter=None):
+    for i in range(n):
+        clock.advance(scheduler.period_us + (jitter[i % len(jitter)] if jitter else 0))
+        scheduler.tick()
+
+
+def test_callback(scheduler, clock):
+    values = iter([1.0, 2.0, None, 3.0])
+    scheduler.add_callback(0, lambda: next(values))
+
+    expected = [1.0, 2.0, 2.0, 3.0]
+    for v in expected:
+        run(scheduler, clock, 1)
+        assert cvs[0].voltage() == pytest.approx(v, abs=0.1)
+
+
+def test_callback_divisor(scheduler, clock):
+    calls = []
+    scheduler.add_callback(2, lambda: calls.append(scheduler.ticks), divisor=4)
+
+    run(scheduler, clock, 12)
+    assert calls == [0, 4, 8]
+
+
+def test_waveform_loop(scheduler, clock):
+    waveform = waveform_from_voltages(cvs[1], [0, 1, 2])
+    scheduler.add_waveform(1, waveform, divisor=2)
+
+    duties = []
+    for _ in range(12):
+        run(scheduler, clock, 1)
+        duties.append(cvs[1]._duty)
+    assert duties == [waveform[i // 2 % 3] for i in range(12)]
+
+
+def test_waveform_one_shot(scheduler, clock):
+    waveform = waveform_from_voltages(cvs[5], [1, 2, 3])
+    scheduler.add_waveform(5, waveform, loop=False)
+
+    run(scheduler, clock, 3)
+    assert not scheduler.is_scheduled(5)
+
+    run(scheduler, clock, 3)
+    assert cvs[5]._duty == waveform[-1]
+
+
+def test_replace_and_remove(scheduler, clock):
+    scheduler.add_waveform(0, waveform_from_voltages(cvs[0], [5]))
+    scheduler.add_callback(0, lambda: 1.0)
+    run(scheduler, clock, 1)
+    assert cvs[0].voltage() == pytest.approx(1.0, abs=0.1)
+
+    scheduler.remove(0)
+    assert not scheduler.is_scheduled(0)
+
+
+@pytest.mark.parametrize(
+    "index, divisor",
+    [
+        (-1, 1),
+        (6, 1),
+        (0, 0),
+    ],
+)
+def test_invalid_arguments(scheduler, index, divisor):
+    with pytest.raises(ValueError):
+        scheduler.add_callback(index, lambda: None, divisor=divisor)
+
+
+def test_jitter_stats(scheduler, clock):
+    run(scheduler, clock, 1)  # the first tick has no previous interval to compare with
+    run(scheduler, clock, 8, jitter=[0, 10, -10, 50])
+
+    assert scheduler.stats.count == 8
+    assert scheduler.stats.min_error == -10
+    assert scheduler.stats.max_error == 50
+    assert scheduler.stats.mean_abs_error() == pytest.approx(70 / 4)
+    assert scheduler.stats.overruns == 0
+
+
+def test_overrun(scheduler, clock):
+    # a callback that takes longer than the timer period
+    scheduler.add_callback(0, lambda: clock.advance(1500))
+
+    run(scheduler, clock, 3)
+    assert scheduler.stats.overruns == 2
+    assert scheduler.stats.max_duration == 1500
+
+
+def test_start_stop(scheduler):
+    scheduler.start()
+    assert scheduler.is_running()
+    scheduler.stop()
+    assert not scheduler.is_running()
@@ -0,0 +1,227 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+import time
+
+import pytest
+
+from europi_hardware import EdgeQueue, HIGH, LOW
+from experimental.tempo import TempoTracker, median3
+
+# 120 BPM
+PERIOD_US = 500_000
+
+
+class SimulatedClock:
+    """Replaces utime so the tracker can be driven at precise, repeatable times"""
+
+    def __init__(self):
+        self.now = 0
+
+    def ticks_us(self):
+        return self.now
+
+    def ticks_add(self, a, b):
+        return a + b
+
+    def ticks_diff(self, a, b):
+        return a - b
+
+
+@pytest.fixture
+def clock():
+    return SimulatedClock()
+
+
+@pytest.fixture
+def tracker(clock):
+    return TempoTracker(clock=clock)
+
+
+def jittered_edges(period_us, count, jitter_us, seed=1, start_us=0):
+    """The times of a clock's edges, each displaced by up to +/- jitter_us"""
+    rng = random.Random(seed)
+    return [start_us + i * period_us + rng.randint(-jitter_us, jitter_us) for i in range(count)]
+
+
+def feed(tracker, times):
+    for t in times:
+        tracker.edge(t)
+
+
+@pytest.mark.parametrize(
+    "a, b, c", [(1, 2, 3), (1, 3, 2), (2, 1, 3), (2, 3, 1), (3, 1, 2), (3, 2, 1)]
+)
+def test_median3(a, b, c):
+    assert median3(a, b, c) == 2
+
+
+def test_steady_clock(tracker):
+    assert not tracker.locked()
+    assert tracker.bpm() == 0
+
+    feed(tracker, [i * PERIOD_US for i in range(4)])
+    assert tracker.locked()
+    assert tracker.period_us == PERIOD_US
+    assert tracker.bpm() == pytest.approx(120)
+    assert tracker.next_edge_us() == 4 * PERIOD_US
+
+    tracker.ppqn = 4
+    assert tracker.bpm() == pytest.approx(30)
+
+
+@pytest.mark.parametrize("jitter_us", [500, 2_000, 10_000])
+def test_tracking_error_with_jitter(tracker, jitter_us):
+    times = jittered_edges(PERIOD_US, 200, jitter_us)
+
+    errors = []
+    prediction_errors = []
+    for i, t in enumerate(times):
+        if i > 10:
+            prediction_errors.append(abs(t - tracker.next_edge_us()))
+        tracker.edge(t)
+        if i > 10:
+            errors.append(abs(tracker.period_us - PERIOD_US))
+
+    # the smoothed period is much steadier than the individual intervals, which vary by up to
+    # 2 * jitter_us
+    assert max(errors) < jitter_us
+    assert sum(errors) / len(errors) < jitter_us / 2
+
+    # the next edge is predicted to within the jitter of the edges themselves
+    assert sum(prediction_errors) / len(prediction_errors) < 1.5 * jitter_us
+    assert tracker.outliers == 0
+
+
+def test_outliers_are_ignored(tracker):
+    times = jittered_edges(PERIOD_US, 40, 1_000)
+
+    # a missed pulse, then a late one
+    del times[20]
+    times[30] += PERIOD_US // 2
+    feed(tracker, times)
+
+    assert tracker.outliers == 3
+    assert tracker.period_us == pytest.approx(PERIOD_US, abs=2_000)
+
+
+def test_tempo_change(tracker):
+    feed(tracker, jittered_edges(PERIOD_US, 20, 1_000))
+    assert tracker.bpm() == pytest.approx(120, rel=0.01)
+
+    # jump to 180 BPM, outside the tolerance; the tracker relocks on the 3rd interval at the new tempo
+    new_period = 60_000_000 // 180
+    start = 19 * PERIOD_US + new_period
+    times = jittered_edges(new_period, 10, 1_000, seed=2, start_us=start)
+    feed(tracker, times[0:2])
+    assert tracker.bpm() == pytest.approx(120, rel=0.01)
+    feed(tracker, times[2:3])
+    assert tracker.bpm() == pytest.approx(180, rel=0.01)
+    feed(tracker, times[3:])
+    assert tracker.bpm() == pytest.approx(180, rel=0.01)
+
+
+def test_gradual_tempo_change(tracker):
+    # accelerate from 120 to 150 BPM, 0.5% per beat; each change is inside the tolerance
+    t = 0
+    period = PERIOD_US
+    for i in range(50):
+        tracker.edge(t)
+        t += int(period)
+        period = max(400_000, period * 0.995)
+    for i in range(10):
+        tracker.edge(t)
+        t += 400_000
+
+    assert tracker.outliers == 0
+    assert tracker.bpm() == pytest.approx(150, rel=0.01)
+
+
+def test_running(tracker, clock):
+    assert not tracker.running()
+    feed(tracker, [0, PERIOD_US])
+
+    clock.now = PERIOD_US + PERIOD_US // 2
+    assert tracker.running()
+    assert tracker.phase() == pytest.approx(0.5)
+
+    clock.now = PERIOD_US * 3
+    assert not tracker.running()
+    assert tracker.phase() == 1
+
+    tracker.reset()
+    assert not tracker.locked()
+
+
+def test_update_from_edge_queue(tracker, monkeypatch):
+    # the host's time module has no ticks_diff; the queue uses it to track its own period
+    monkeypatch.setattr(time, "ticks_diff", lambda a, b: a - b, raising=False)
+    edges = EdgeQueue(capacity=32)
+    for i in range(12):
+        edges.push(i * PERIOD_US, HIGH)
+        edges.push(i * PERIOD_US + 10_000, LOW)
+
+    # more edges than the tracker's drain buffer holds
+    tracker.update(edges)
+    assert len(edges) == 0
+    assert tracker.edge_count == 12
+    assert tracker.period_us == PERIOD_US
+
+
+def test_subdivisions(tracker):
+    steps = []
+    tracker.add_subdivision(4, lambda step: steps.append(step))
+
+    # nothing runs until the period is known and a new pulse starts
+    tracker.poll(0)
+    feed(tracker, [0, PERIOD_US])
+    assert steps == []
+
+    for t in range(PERIOD_US, 2 * PERIOD_US, 1_000):
+        tracker.poll(t)
+    assert steps == [0, 1, 2, 3]
+
+    # steps stay on the last one if the next edge is late
+    tracker.poll(2 * PERIOD_US + 100_000)
+    assert steps == [0, 1, 2, 3]
+
+    # an early edge restarts the subdivision, skipping the remaining steps
+    steps.clear()
+    tracker.edge(3 * PERIOD_US)
+    tracker.poll(3 * PERIOD_US + PERIOD_US // 4)
+    tracker.edge(3 * PERIOD_US + PERIOD_US // 2)
+    tracker.poll(3 * PERIOD_US + PERIOD_US // 2)
+    assert steps == [0, 1, 0]
+
+
+def test_subdivisions_stay_phase_locked(tracker):
+    times = jittered_edges(PERIOD_US, 50, 2_000)
+    step_times = []
+    tracker.add_subdivision(6, lambda step: step_times.append(now))
+
+    edge_index = 0
+    for now in range(0, times[-1], 500):
+        while edge_index < len(times) and times[edge_index] <= now:
+            tracker.edge(times[edge_index])
+            edge_index += 1
+        tracker.poll(now)
+
+    # one step per sixth of a beat, each within a few ms of where it should be
+    step_us = PERIOD_US / 6
+    errors = [abs(t - round(t / step_us) * step_us) for t in step_times]
+    assert len(step_times) == 6 * (len(times) - 2)
+    assert max(errors) < 5_000
+
+    tracker.remove_subdivision(tracker.subdivisions[0])
+    assert tracker.subdivisions == []
@@ -0,0 +1,96 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import math
+import pytest
+
+from experimental.wavetable import (
+    EXP_DECAY,
+    EXP_RISE,
+    MAX_LEVEL,
+    RAMP,
+    SAW,
+    SINE,
+    SQUARE,
+    TABLE_SIZE,
+    TRIANGLE,
+    WavetableLfo,
+    get_table,
+    make_table,
+)
+
+
+@pytest.mark.parametrize("shape", [SINE, TRIANGLE, SAW, RAMP, SQUARE, EXP_RISE, EXP_DECAY])
+def test_tables(shape):
+    table = get_table(shape)
+    assert len(table) == TABLE_SIZE + 1
+    assert min(table) >= 0
+    assert max(table) <= MAX_LEVEL
+    assert get_table(shape) is table
+
+
+def test_unknown_shape():
+    with pytest.raises(ValueError):
+        get_table("wibble")
+
+
+@pytest.mark.parametrize(
+    "interpolate, tolerance",
+    [
+        (True, 0.0002),
+        (False, 0.02),
+    ],
+)
+def test_sine_accuracy(interpolate, tolerance):
+    rate = 1000
+    lfo = WavetableLfo(SINE, rate=rate, frequency=0.37, interpolate=interpolate)
+    for n in range(rate * 5):
+        expected = (math.sin(2 * math.pi * (lfo.phase / (1 << 24))) + 1) / 2
+        assert lfo.tick() / MAX_LEVEL == pytest.approx(expected, abs=tolerance)
+
+
+def test_frequency():
+    lfo = WavetableLfo(SAW, rate=128, frequency=2.0)
+    levels = [lfo.tick() for _ in range(128)]
+    # two full cycles in one second
+    assert levels[0] == 0
+    assert levels[64] == 0
+    assert levels[32] == pytest.approx(MAX_LEVEL / 2, abs=2)
+
+
+def test_period_ticks_and_phase():
+    lfo = WavetableLfo(TRIANGLE)
+    lfo.set_period_ticks(96)
+    lfo.set_phase(0.5)
+    assert lfo.tick() == MAX_LEVEL
+    for _ in range(47):
+        lfo.tick()
+    assert lfo.tick() < 1000  # back at the bottom halfway through the cycle
+
+    lfo.reset()
+    assert lfo.value() == 0
+
+
+def test_tick_mv():
+    lfo = WavetableLfo(SQUARE, rate=10, frequency=1.0)
+    levels = [lfo.tick_mv(10000) for _ in range(10)]
+    assert levels == [10000] * 5 + [0] * 5
+
+
+def test_custom_table():
+    table = make_table(lambda x: 0.25)
+    lfo = WavetableLfo(table)
+    assert lfo.tick() == round(MAX_LEVEL * 0.25)
+
+    with pytest.raises(ValueError):
+        WavetableLfo([0, 1, 2])
@@ -26,14 +26,22 @@ class I2C:
     def scan(self):
         return []
 
+    def writeto(self, addr, buf, stop=True):
+        return 1
+
+    def writevto(self, addr, vector, stop=True):
+        return 1
+
 
 class Pin:
     IN = "in"
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
 
     def __init__(self, id, *args):
         pass
 
-    def irq(self, handler=None, trigger=None):
+    def irq(self, handler=None, trigger=None, hard=False):
         pass
 
     def value(self, *args):
@@ -65,6 +73,10 @@ class Timer:
         pass
 
 
+def reset():
+    pass
+
+
 def freq(f=None):
     if f is None:
         return 150_000_000
@@ -31,8 +31,14 @@ SET_CHARGE_PUMP = 0x8D
 
 
 class SSD1306_I2C:
-    def __init__(self, *args):
-        pass
+    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
+        self.width = width
+        self.height = height
+        self.pages = height // 8
+        self.i2c = i2c
+        self.addr = addr
+        self.buffer = bytearray(self.pages * width)
+        self.write_list = [b"\x40", None]
 
     def contrast(self, *args):
         pass
@@ -61,5 +67,24 @@ class SSD1306_I2C:
     def hline(self, *args):
         pass
 
-    def write_cmd(self, *args):
+    def vline(self, *args):
+        pass
+
+    def line(self, *args):
         pass
+
+    def pixel(self, *args):
+        pass
+
+    def poly(self, *args):
+        pass
+
+    def scroll(self, *args):
+        pass
+
+    def write_cmd(self, cmd):
+        self.i2c.writeto(self.addr, bytearray([0x80, cmd]))
+
+    def write_data(self, buf):
+        self.write_list[1] = buf
+        self.i2c.writevto(self.addr, self.write_list)
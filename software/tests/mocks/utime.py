@@ -31,6 +31,10 @@ def ticks_ms():
     return 0
 
 
+def ticks_us():
+    return 0
+
+
 def localtime():
     return (1970, 1, 1, 0, 0, 0)
 
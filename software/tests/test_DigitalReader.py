@@ -11,9 +11,13 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import time
+from array import array
+
 import pytest
+from machine import Pin
 
-from europi import DigitalReader
+from europi import DigitalReader, HIGH, LOW
 
 from mock_hardware import MockHardware
 
@@ -34,3 +38,173 @@ def test_value(mockHardware: MockHardware, digitalReader, value, expected):
     mockHardware.set_digital_value(digitalReader, value)
 
     assert digitalReader.value() == expected
+
+
+class SyntheticPin:
+    """Stands in for a pin's IRQ, firing edges at given times"""
+
+    def __init__(self, monkeypatch):
+        self.now_us = 0
+        self.level = 1  # the input is inverted; idle high is no signal
+        self.handler = None
+        self.hard = False
+        self.irq_flags = 0
+        monkeypatch.setattr(
+            Pin,
+            "irq",
+            lambda pin, handler=None, trigger=None, hard=False: self.irq(pin, handler, hard),
+        )
+        monkeypatch.setattr(Pin, "value", lambda pin: self.level)
+        monkeypatch.setattr(time, "ticks_us", lambda: self.now_us, raising=False)
+        monkeypatch.setattr(time, "ticks_diff", lambda end, start: end - start, raising=False)
+
+    def irq(self, pin, handler, hard):
+        self.pin = pin
+        self.handler = handler
+        self.hard = hard
+        return self
+
+    def flags(self):
+        return self.irq_flags
+
+    def edge(self, at_us, high):
+        self.now_us = at_us
+        self.level = 0 if high else 1
+        self.irq_flags = Pin.IRQ_FALLING if high else Pin.IRQ_RISING
+        self.handler(self.pin)
+
+    def clock(self, start_us, period_us, gate_us, count):
+        """Fire a train of pulses"""
+        for i in range(count):
+            self.edge(start_us + i * period_us, True)
+            self.edge(start_us + i * period_us + gate_us, False)
+
+
+@pytest.fixture
+def pin(monkeypatch):
+    return SyntheticPin(monkeypatch)
+
+
+def test_capture_edges(pin, digitalReader):
+    rising = []
+    digitalReader.handler(lambda: rising.append(True))
+    edges = digitalReader.capture(capacity=16)
+
+    pin.clock(start_us=1000, period_us=250, gate_us=100, count=3)
+
+    # handlers aren't called in capture mode
+    assert rising == []
+    assert len(edges) == 6
+
+    times = array("L", [0] * 4)
+    levels = bytearray(4)
+    assert edges.drain(times, levels) == 4
+    assert list(times) == [1000, 1100, 1250, 1350]
+    assert list(levels) == [HIGH, LOW, HIGH, LOW]
+
+    assert edges.pop() == (1500, HIGH)
+    assert edges.pop() == (1600, LOW)
+    assert edges.pop() is None
+    assert edges.overflows == 0
+
+
+def test_capture_uses_the_edge_not_the_pin(pin, digitalReader):
+    edges = digitalReader.capture()
+    assert pin.hard
+
+    # a pulse so short the pin is already low again when the handler runs
+    pin.now_us = 100
+    pin.level = 1
+    pin.irq_flags = Pin.IRQ_FALLING
+    pin.handler(pin.pin)
+    assert edges.pop() == (100, HIGH)
+
+    # both edges fired before the handler ran; the pin is back high, so it was a HIGH pulse
+    pin.now_us = 200
+    pin.irq_flags = Pin.IRQ_FALLING | Pin.IRQ_RISING
+    pin.handler(pin.pin)
+    assert edges.pop() == (200, HIGH)
+    assert edges.pop() == (200, LOW)
+
+
+def test_capture_edge_while_arming(pin, digitalReader):
+    arm = pin.irq
+
+    def irq(p, handler, hard):
+        irq = arm(p, handler, hard)
+        if handler is not None:
+            pin.edge(100, True)
+        return irq
+
+    pin.irq = irq
+    edges = digitalReader.capture()
+    assert edges.pop() == (100, HIGH)
+
+
+def test_capture_period(pin, digitalReader):
+    edges = digitalReader.capture()
+    assert edges.drain() == 0
+    assert edges.period_us == 0
+
+    pin.edge(500, True)
+    pin.edge(510, False)
+    assert edges.drain() == 2
+    assert (edges.rising_count, edges.last_rising_us, edges.period_us) == (1, 500, 0)
+
+    # an audio-rate clock: 5kHz, with a 50us gate
+    pin.clock(start_us=10_000, period_us=200, gate_us=50, count=20)
+    assert edges.drain() == 40
+    assert edges.rising_count == 21
+    assert edges.last_rising_us == 10_000 + 19 * 200
+    assert edges.period_us == 200
+
+
+def test_capture_overflow(pin, digitalReader):
+    edges = digitalReader.capture(capacity=8)
+    pin.clock(start_us=0, period_us=100, gate_us=10, count=10)
+
+    # one slot is always kept free
+    assert len(edges) == 7
+    assert edges.overflows == 13
+    assert edges.drain() == 7
+
+    # once drained, new edges are queued again
+    pin.edge(5000, True)
+    assert edges.pop() == (5000, HIGH)
+
+    edges.clear()
+    assert edges.overflows == 0
+    assert edges.rising_count == 0
+
+
+def test_capture_wraps_around(pin, digitalReader):
+    edges = digitalReader.capture(capacity=5)
+    for i in range(10):
+        pin.clock(start_us=i * 1000, period_us=1000, gate_us=10, count=1)
+        assert edges.drain() == 2
+        assert edges.period_us == (1000 if i else 0)
+    assert edges.overflows == 0
+
+
+def test_reset_handler_leaves_capture_mode(pin, digitalReader):
+    digitalReader.capture()
+    digitalReader.reset_handler()
+    assert pin.handler is None
+    assert digitalReader.edges is None
+
+
+def test_reset_state_forgets_handlers(pin, monkeypatch):
+    from europi import b1, b2, reset_state
+
+    monkeypatch.setattr(time, "ticks_ms", lambda: pin.now_us // 1000, raising=False)
+    fired = []
+    b1.handler(lambda: fired.append("pressed"))
+    b1._handler_both(b2, lambda: fired.append("both"))
+    reset_state()
+    assert b1._other is None
+
+    # the next script only watches for releases, which re-enables the IRQ
+    b1.handler_falling(lambda: fired.append("released"))
+    pin.edge(1_000_000, True)
+    pin.edge(2_000_000, False)
+    assert fired == ["released"]
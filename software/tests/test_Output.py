@@ -0,0 +1,160 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+import europi_hardware
+from europi import Output, OutputBank, OUTPUT_CALIBRATION_VALUES, MAX_UINT16, cvs
+from europi_config import MODEL_PICO, MODEL_PICO_2
+from machine import PWM
+
+
+@pytest.fixture
+def output():
+    return Output(pin=1)  # actual pin value doesn't matter
+
+
+def duty_for_voltage(output, voltage):
+    output.voltage(voltage)
+    return output._duty
+
+
+def test_voltage_mv_matches_voltage(output):
+    for millivolts in range(0, 10001):
+        expected = duty_for_voltage(output, millivolts / 1000)
+        output.voltage_mv(millivolts)
+
+        # float rounding in voltage() can differ by a single step
+        assert abs(output._duty - expected) <= 1
+
+
+@pytest.mark.parametrize(
+    "millivolts, expected",
+    [
+        (-500, 0),
+        (0, OUTPUT_CALIBRATION_VALUES[0][0]),
+        (1000, OUTPUT_CALIBRATION_VALUES[0][1]),
+        (10000, OUTPUT_CALIBRATION_VALUES[0][10]),
+        (15000, OUTPUT_CALIBRATION_VALUES[0][10]),
+    ],
+)
+def test_voltage_mv_clamps(output, millivolts, expected):
+    output.voltage_mv(millivolts)
+    assert output._duty == expected
+
+
+@pytest.mark.parametrize("steps_per_volt", [12, 100, 1000])
+def test_duty_table_matches_voltage(output, steps_per_volt):
+    output.build_duty_table(steps_per_volt)
+
+    for step in range(0, 10 * steps_per_volt + 1):
+        expected = duty_for_voltage(output, step / steps_per_volt)
+        output.voltage_step(step)
+        assert output._duty == expected
+
+
+def test_duty_table_clamps(output):
+    output.build_duty_table(12)
+
+    output.voltage_step(-1)
+    assert output._duty == OUTPUT_CALIBRATION_VALUES[0][0]
+
+    output.voltage_step(1000)
+    assert output._duty == OUTPUT_CALIBRATION_VALUES[0][10]
+
+
+def test_set_duty_raw(output):
+    output.set_duty_raw(MAX_UINT16 // 2)
+    assert output._duty == MAX_UINT16 // 2
+    assert output.voltage() == pytest.approx(output.MAX_VOLTAGE / 2, abs=0.001)
+
+
+# OutputBank tests
+
+
+class FakeRegisters:
+    """Stands in for machine.mem32, with every PWM slice's TOP register set to 65534"""
+
+    def __init__(self, base=OutputBank.RP2040_PWM_BASE):
+        self.base = base
+        self.values = {}
+
+    def __getitem__(self, address):
+        if (address - self.base) % OutputBank.PWM_SLICE_STRIDE == 0x10:
+            return MAX_UINT16 - 1
+        return self.values.get(address, 0)
+
+    def __setitem__(self, address, value):
+        self.values[address] = value
+
+
+@pytest.fixture
+def pwm_writes(monkeypatch):
+    writes = {}
+    monkeypatch.setattr(PWM, "duty_u16", lambda pwm, duty: writes.__setitem__(pwm, duty))
+    return writes
+
+
+@pytest.mark.parametrize(
+    "voltages",
+    [
+        [0, 0, 0, 0, 0, 0],
+        [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        [0.123, 9.87, 4.5, -1, 11, 7.77],
+    ],
+)
+def test_bank_matches_individual_writes(pwm_writes, voltages):
+    for cv, v in zip(cvs, voltages):
+        cv.voltage(v)
+    expected = [(pwm_writes[cv.pin], cv._duty) for cv in cvs]
+
+    pwm_writes.clear()
+    for cv in cvs:
+        cv.off()
+    OutputBank(cvs).set_voltages(voltages)
+
+    assert [(pwm_writes[cv.pin], cv._duty) for cv in cvs] == expected
+
+
+@pytest.mark.parametrize(
+    "model, pwm_base",
+    [
+        (MODEL_PICO, OutputBank.RP2040_PWM_BASE),
+        (MODEL_PICO_2, OutputBank.RP2350_PWM_BASE),
+    ],
+)
+def test_bank_register_writes(monkeypatch, model, pwm_base):
+    registers = FakeRegisters(pwm_base)
+    monkeypatch.setattr(europi_hardware, "mem32", registers)
+    monkeypatch.setattr(europi_hardware.europi_config, "PICO_MODEL", model)
+    duties = [1000, 2000, 3000, 4000, 5000, 6000]
+
+    OutputBank(cvs, use_registers=True).set_duties(duties)
+
+    # CV3/CV4 are on slice 0, CV5/CV6 on slice 1 and CV1/CV2 on slice 2 on both chips
+    # with TOP=65534 the compare values are the same as the duty cycles
+    base = pwm_base + OutputBank.PWM_CC_OFFSET
+    stride = OutputBank.PWM_SLICE_STRIDE
+    assert registers.values == {
+        base: (4000 << 16) | 3000,
+        base + stride: (6000 << 16) | 5000,
+        base + 2 * stride: (1000 << 16) | 2000,
+    }
+    assert [cv._duty for cv in cvs] == duties
+
+
+def test_pwm_slice():
+    assert [OutputBank.pwm_slice(pin) for pin in (16, 17, 18, 19, 20, 21)] == [0, 0, 1, 1, 2, 2]
+    assert OutputBank.pwm_slice(15) == 7
+    assert OutputBank.pwm_slice(32) == 8
+    assert OutputBank.pwm_slice(47) == 11
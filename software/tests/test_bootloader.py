@@ -13,7 +13,9 @@
 # limitations under the License.
 import pytest
 
+import europi
 from bootloader import BootloaderMenu
+from europi_hardware import set_main_loop_hook
 from europi_script import EuroPiScript
 
 
@@ -39,3 +41,147 @@ class BadTestScript:
 )
 def test_is_europi_script(cls, expected):
     assert BootloaderMenu._is_europi_script(cls) == expected
+
+
+class ResetCalled(BaseException):
+    """machine.reset() never returns, so model it as something scripts can't catch"""
+
+
+def button_irq(handler):
+    """Call a handler the way MicroPython calls a Pin IRQ handler, printing & discarding any error"""
+    try:
+        handler()
+    except ResetCalled:
+        raise
+    except BaseException as err:
+        button_irq.errors.append(err)
+
+
+class ExitingScript(EuroPiScript):
+    """Asks to go back to the menu as soon as it starts, like a user holding both buttons"""
+
+    torn_down = False
+
+    def main(self):
+        # the IRQ only flags the exit; the script is stopped when its main loop next reads a knob
+        button_irq(europi.b1._both_handler)
+        for _ in range(3):
+            europi.k1.percent()
+        raise AssertionError("the knob read should have stopped the script")
+
+    def teardown(self):
+        ExitingScript.torn_down = True
+
+
+class MemoryHogScript(EuroPiScript):
+    def __init__(self):
+        raise MemoryError()
+
+
+@pytest.fixture
+def menu(monkeypatch, tmp_path):
+    import bootloader
+    import machine
+    import utime
+
+    def reset():
+        raise ResetCalled()
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(machine, "reset", reset)
+    monkeypatch.setattr(bootloader, "time", utime)
+    ExitingScript.torn_down = False
+    button_irq.errors = []
+    menu = BootloaderMenu({"Exiting": "test_bootloader.ExitingScript"})
+    yield menu
+    set_main_loop_hook(None)
+
+
+def test_warm_exit_returns_to_menu(menu):
+    menu.warm_switch = True
+    assert menu.run_script(ExitingScript, "test_bootloader.ExitingScript")
+    assert ExitingScript.torn_down
+    assert menu.running_script is None
+    assert menu.exit_timer is None
+    assert not menu.exit_requested
+    assert button_irq.errors == []
+
+    # the hook is removed, so reading the knobs from the menu doesn't raise
+    europi.k1.percent()
+    europi.oled.show()
+
+
+class DrawingScript(EuroPiScript):
+    """Only redraws the screen, never reading an input"""
+
+    def main(self):
+        button_irq(europi.b2._both_handler)
+        while True:
+            europi.oled.show()
+
+
+def test_warm_exit_from_oled_show(menu):
+    menu.warm_switch = True
+    assert menu.run_script(DrawingScript, "test_bootloader.DrawingScript")
+    assert button_irq.errors == []
+
+
+class IrqReadingScript(EuroPiScript):
+    """Reads a knob from its own IRQ handler after the user has asked to exit"""
+
+    def main(self):
+        button_irq(europi.b1._both_handler)
+        button_irq(europi.k2.percent)
+        assert len(button_irq.errors) == 1
+        europi.k2.percent()
+        raise AssertionError("the knob read should have stopped the script")
+
+
+def test_warm_exit_survives_raising_in_irq(menu):
+    menu.warm_switch = True
+    assert menu.run_script(IrqReadingScript, "test_bootloader.IrqReadingScript")
+
+
+def test_pams_teardown_stops_the_clock(menu, monkeypatch):
+    import time
+    import utime
+
+    from contrib.pams import PamsWorkout2
+
+    for name in ("ticks_ms", "ticks_diff"):
+        monkeypatch.setattr(time, name, getattr(utime, name), raising=False)
+    script = PamsWorkout2()
+    script.clock.start()
+    script.teardown()
+    assert not script.clock.is_running
+    script.remove_state()
+
+
+def test_cold_exit_resets(menu):
+    menu.warm_switch = False
+    with pytest.raises(ResetCalled):
+        menu.run_script(ExitingScript, "test_bootloader.ExitingScript")
+    assert not ExitingScript.torn_down
+
+
+def test_out_of_memory_after_warm_launch_resets(menu):
+    menu.selected_at = 0
+    with pytest.raises(ResetCalled):
+        menu.run_script(MemoryHogScript, "test_bootloader.MemoryHogScript")
+
+
+def test_main_switches_without_reset(menu, monkeypatch):
+    launches = []
+
+    def run_menu():
+        if len(launches) == 2:
+            raise ResetCalled()  # stop the loop
+        launches.append(ExitingScript)
+        return ExitingScript
+
+    menu.warm_switch = True
+    monkeypatch.setattr(menu, "run_menu", run_menu)
+    with pytest.raises(ResetCalled):
+        menu.main()
+    assert len(launches) == 2
+    assert menu.last_launch_ms is not None
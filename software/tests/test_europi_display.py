@@ -0,0 +1,274 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+from machine import I2C
+from europi_display import Display, DummyDisplay
+
+FULL_FRAME_BYTES = Display.WINDOW_BYTES + 1 + 128 * 4
+
+
+class I2CTraffic:
+    """Records the data written to the mock I2C bus"""
+
+    def __init__(self, monkeypatch):
+        self.commands = []
+        self.data = []
+        monkeypatch.setattr(I2C, "writeto", lambda i2c, addr, buf: self.writeto(buf))
+        monkeypatch.setattr(I2C, "writevto", lambda i2c, addr, vector: self.writevto(vector))
+
+    def writeto(self, buf):
+        self.commands.append(bytes(buf))
+
+    def writevto(self, vector):
+        self.data.append(b"".join(bytes(v) for v in vector))
+
+    def total_bytes(self):
+        return sum(len(c) for c in self.commands) + sum(len(d) for d in self.data)
+
+    def clear(self):
+        self.commands.clear()
+        self.data.clear()
+
+
+@pytest.fixture
+def traffic(monkeypatch):
+    return I2CTraffic(monkeypatch)
+
+
+@pytest.fixture
+def display(traffic):
+    d = Display(
+        width=128, height=32, sda=0, scl=1, channel=0, freq=400000, contrast=255, rotate=False
+    )
+    d.show()
+    traffic.clear()
+    return d
+
+
+def test_first_frame_is_full(traffic):
+    d = Display(
+        width=128, height=32, sda=0, scl=1, channel=0, freq=400000, contrast=255, rotate=False
+    )
+    traffic.clear()
+    d.show()
+
+    assert d.last_frame_bytes == FULL_FRAME_BYTES
+    assert traffic.total_bytes() == FULL_FRAME_BYTES
+
+
+def test_nothing_changed(display, traffic):
+    display.show()
+
+    assert display.last_frame_bytes == 0
+    assert traffic.total_bytes() == 0
+
+
+def test_single_line_of_text(display, traffic):
+    display.text("hello", 10, 8, 1)
+    display.show()
+
+    # one page, 5 characters wide
+    expected = Display.WINDOW_BYTES + 1 + 5 * 8
+    assert display.last_frame_bytes == expected
+    assert traffic.total_bytes() == expected
+    assert traffic.commands[-2:] == [b"\x80\x01", b"\x80\x01"]  # page window is 1-1
+
+
+def test_unaligned_text_spans_two_pages(display, traffic):
+    display.text("hi", 0, 4, 1)
+    display.show()
+
+    # both pages have the same columns, so they're sent as one window
+    expected = Display.WINDOW_BYTES + 1 + 2 * 16
+    assert display.last_frame_bytes == expected
+    assert len(traffic.data) == 1
+
+
+def test_separate_regions(display, traffic):
+    display.pixel(0, 0, 1)
+    display.fill_rect(100, 24, 10, 8, 1)
+    display.show()
+
+    expected = 2 * (Display.WINDOW_BYTES + 1) + 1 + 10
+    assert display.last_frame_bytes == expected
+    assert len(traffic.data) == 2
+
+
+@pytest.mark.parametrize("x, y", [(-10, 8), (10, -4)])
+def test_blit_of_unknown_size_marks_to_the_edges(display, x, y):
+    from framebuf import FrameBuffer
+
+    display.blit(FrameBuffer(), x, y)
+    display.show()
+
+    x0 = max(x, 0)
+    pages = (32 - max(y, 0) + 7) // 8
+    assert display.last_frame_bytes == Display.WINDOW_BYTES + 1 + pages * (128 - x0)
+
+
+def test_reading_a_pixel_is_not_dirty(display):
+    display.pixel(5, 5)
+    display.show()
+
+    assert display.last_frame_bytes == 0
+
+
+@pytest.mark.parametrize(
+    "draw",
+    [
+        lambda d: d.fill(0),
+        lambda d: d.scroll(-1, 0),
+        lambda d: d.mark_all_dirty(),
+        # every page has a slightly different width; 4 windows cost more than a full frame
+        lambda d: [d.hline(0, y, 128 - (y % 16) // 8, 1) for y in range(0, 32, 8)],
+    ],
+)
+def test_full_refresh_fallback(display, traffic, draw):
+    draw(display)
+    display.show()
+
+    assert display.last_frame_bytes == FULL_FRAME_BYTES
+    assert traffic.total_bytes() == FULL_FRAME_BYTES
+
+
+def test_partial_data_matches_framebuffer(display, traffic):
+    display.buffer[128 + 20] = 0xAA
+    display.buffer[128 + 21] = 0x55
+    display.mark_dirty(20, 8, 2, 8)
+    display.show()
+
+    assert traffic.data == [b"\x40\xaa\x55"]
+
+
+def test_offscreen_drawing_is_ignored(display):
+    display.text("x", 200, 0, 1)
+    display.hline(0, -10, 128, 1)
+    display.show()
+
+    assert display.last_frame_bytes == 0
+
+
+def test_total_bytes(display):
+    display.text("a", 0, 0, 1)
+    display.show()
+    first = display.last_frame_bytes
+    display.text("b", 0, 0, 1)
+    display.show()
+
+    assert display.total_bytes == FULL_FRAME_BYTES + 2 * first
+
+
+# background flush tests
+
+
+def test_background_show_returns_without_sending(display, traffic):
+    display.start_background_flush(use_thread=False)
+    display.text("hello", 0, 0, 1)
+    display.show()
+
+    assert traffic.total_bytes() == 0
+    assert display.process_background_flush()
+    assert display.last_frame_bytes == Display.WINDOW_BYTES + 1 + 5 * 8
+    assert display.frames_sent == 1
+    assert not display.process_background_flush()
+
+
+def test_background_sends_snapshot(display, traffic):
+    display.start_background_flush(use_thread=False)
+    display.buffer[0] = 0x0F
+    display.mark_dirty(0, 0, 1, 1)
+    display.show()
+
+    # drawing after show() doesn't affect the frame being sent
+    display.buffer[0] = 0xF0
+    display.process_background_flush()
+    assert traffic.data == [b"\x40\x0f"]
+
+
+def test_background_drops_stale_frames(display, traffic):
+    display.start_background_flush(use_thread=False)
+    display.text("a", 0, 0, 1)
+    display.show()
+    display.text("b", 8, 0, 1)
+    display.show()  # worker hasn't sent the first frame yet
+
+    assert display.frames_dropped == 1
+    display.process_background_flush()
+    traffic.clear()
+
+    # the dropped frame's changes are sent with the next frame
+    display.show()
+    display.process_background_flush()
+    assert display.last_frame_bytes == Display.WINDOW_BYTES + 1 + 8
+    assert traffic.data == [b"\x40" + bytes(display.buffer[8:16])]
+
+
+def test_background_sends_last_frame_after_busy_show(display, traffic):
+    display.start_background_flush(use_thread=False)
+    display.text("a", 0, 0, 1)
+    display.show()
+    display.text("b", 8, 0, 1)
+    display.show()  # the last show(); the worker is still busy with the first frame
+
+    assert display.process_background_flush()
+    traffic.clear()
+
+    # the worker sends the newer frame without waiting for another show()
+    assert display.process_background_flush()
+    assert display.last_frame_bytes == FULL_FRAME_BYTES
+    assert traffic.data == [b"\x40" + bytes(display.buffer)]
+    assert display.frames_sent == 2
+    assert not display.process_background_flush()
+
+
+def test_background_stop_sends_deferred_frame(display, traffic):
+    display.start_background_flush(use_thread=False)
+    display.text("a", 0, 0, 1)
+    display.show()
+    display.text("b", 8, 0, 1)
+    display.show()
+    display.stop_background_flush()
+
+    assert traffic.data[-1] == b"\x40" + bytes(display.buffer[8:16])
+
+
+def test_background_stop_sends_pending_frame(display, traffic):
+    display.start_background_flush(use_thread=False)
+    display.text("a", 0, 0, 1)
+    display.show()
+    display.stop_background_flush()
+
+    assert traffic.total_bytes() > 0
+    display.text("b", 0, 0, 1)
+    display.show()
+    assert display.last_frame_bytes == Display.WINDOW_BYTES + 1 + 8
+
+
+def test_background_thread(display, traffic):
+    display.start_background_flush()
+    display.text("a", 0, 0, 1)
+    display.show()
+    display.stop_background_flush()
+
+    assert traffic.total_bytes() == Display.WINDOW_BYTES + 1 + 8
+
+
+def test_dummy_display_background_flush():
+    d = DummyDisplay(128, 32)
+    d.start_background_flush()
+    d.show()
+    assert not d.process_background_flush()
+    d.stop_background_flush()
+    assert d.frames_dropped == 0
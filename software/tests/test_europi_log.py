@@ -0,0 +1,169 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+import europi_log
+from europi_log import (
+    LOG_DEBUG,
+    LOG_NONE,
+    LOG_WARNING,
+    configure_log,
+    flush_log,
+    flush_log_if_due,
+    log_debug,
+    log_enabled,
+    log_error,
+    log_info,
+    log_warning,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def ticks_ms(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(europi_log, "ticks_ms", fake.ticks_ms)
+    monkeypatch.setattr(europi_log, "ticks_diff", lambda end, start: end - start)
+    return fake
+
+
+@pytest.fixture
+def log_file(monkeypatch, tmp_path, clock):
+    filename = tmp_path / "europi_log.txt"
+    monkeypatch.setattr(europi_log, "LOG_FILE", str(filename))
+    monkeypatch.setattr(europi_log, "OLD_LOG_FILE", str(tmp_path / "europi_log.1.txt"))
+    monkeypatch.setattr(europi_log, "_log", europi_log.LogBuffer())
+    configure_log(buffer_lines=4, flush_interval_ms=1000)
+    return filename
+
+
+def read_lines(filename):
+    if not filename.exists():
+        return []
+    return filename.read_text().splitlines()
+
+
+def test_messages_are_buffered(log_file, capsys):
+    log_info("one", "test")
+    log_warning("two")
+    log_debug("three", "test")
+
+    # printed immediately, but not written yet
+    assert capsys.readouterr().out.splitlines() == [
+        "[INFO] [test] one",
+        "[WARN] two",
+        "[DBUG] [test] three",
+    ]
+    assert read_lines(log_file) == []
+
+    # the buffer holds 4 lines
+    log_info("four")
+    assert read_lines(log_file) == [
+        "[INFO] [test] one",
+        "[WARN] two",
+        "[DBUG] [test] three",
+        "[INFO] four",
+    ]
+
+
+def test_flush_interval(log_file, clock):
+    log_info("one")
+    clock.now = 999
+    log_info("two")
+    assert read_lines(log_file) == []
+
+    clock.now = 1000
+    log_info("three")
+    assert read_lines(log_file) == ["[INFO] one", "[INFO] two", "[INFO] three"]
+
+
+def test_flush_log_if_due(log_file, clock):
+    flush_log_if_due()
+    log_info("one")
+    clock.now = 999
+    flush_log_if_due()
+    assert read_lines(log_file) == []
+
+    # written once it's old enough, without another message being logged
+    clock.now = 1000
+    flush_log_if_due()
+    assert read_lines(log_file) == ["[INFO] one"]
+
+
+def test_errors_are_written_immediately(log_file):
+    log_info("one")
+    log_error("boom", "test")
+    assert read_lines(log_file) == ["[INFO] one", "[ERR ] [test] boom"]
+
+
+def test_flush_log(log_file):
+    flush_log()
+    assert read_lines(log_file) == []
+
+    log_debug("one")
+    flush_log()
+    flush_log()
+    assert read_lines(log_file) == ["[DBUG] one"]
+
+
+def test_level_filter(log_file, capsys):
+    configure_log(level=LOG_WARNING)
+    assert not log_enabled(LOG_DEBUG)
+    assert log_enabled(LOG_WARNING)
+
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("filtered messages must not be formatted")
+
+    log_debug(Expensive())
+    log_info(Expensive())
+    log_warning("kept")
+    flush_log()
+    assert capsys.readouterr().out.splitlines() == ["[WARN] kept"]
+    assert read_lines(log_file) == ["[WARN] kept"]
+
+    configure_log(level=LOG_NONE)
+    log_error(Expensive())
+    assert read_lines(log_file) == ["[WARN] kept"]
+
+
+def test_rotation(log_file, tmp_path):
+    configure_log(console=False, buffer_lines=1, max_size=40)
+    for i in range(7):
+        log_info(f"message {i:03}")  # 19 bytes per line
+
+    old_file = tmp_path / "europi_log.1.txt"
+    assert read_lines(old_file) == [
+        "[INFO] message 003",
+        "[INFO] message 004",
+        "[INFO] message 005",
+    ]
+    assert read_lines(log_file) == ["[INFO] message 006"]
+
+
+def test_init_log(log_file):
+    log_error("old")
+    log_info("discarded")
+    europi_log.init_log()
+    assert not log_file.exists()
+
+    log_error("new")
+    assert read_lines(log_file) == ["[ERR ] new"]
@@ -0,0 +1,148 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+import europi_profiler
+from europi_hardware import AnalogueReader, DigitalReader
+from europi_profiler import (
+    NULL_SECTION,
+    ProfileSection,
+    Profiler,
+    SECTION_ADC,
+    SECTION_INPUT_HANDLER,
+    SECTION_OLED_SHOW,
+)
+from europi_script import EuroPiScript
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def ticks_us(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(europi_profiler, "ticks_us", fake.ticks_us)
+    monkeypatch.setattr(europi_profiler, "ticks_diff", lambda end, start: end - start)
+    return fake
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    # enabling the profiler patches the hardware classes; make sure that's undone afterwards
+    monkeypatch.setattr(AnalogueReader, "_sample_adc", AnalogueReader._sample_adc)
+    monkeypatch.setattr(DigitalReader, "_bounce_wrapper", DigitalReader._bounce_wrapper)
+    monkeypatch.setattr(DigitalReader, "_capture_irq", DigitalReader._capture_irq)
+    return Profiler()
+
+
+def test_stats():
+    section = ProfileSection("test", capacity=200)
+    assert section.stats() is None
+
+    for i in range(1, 101):
+        section.record(i)
+    (count, lo, mean, hi, p99) = section.stats()
+    assert count == 100
+    assert lo == 1
+    assert mean == pytest.approx(50.5)
+    assert hi == 100
+    assert p99 == 99
+
+
+def test_ring_buffer_keeps_latest_samples():
+    section = ProfileSection("test", capacity=4)
+    for i in range(10):
+        section.record(i)
+    (count, lo, mean, hi, p99) = section.stats()
+    assert count == 10
+    assert sorted(section.samples) == [6, 7, 8, 9]
+    assert (lo, hi) == (6, 9)
+
+    section.reset()
+    assert section.stats() is None
+
+
+def test_start_stop(clock):
+    section = ProfileSection("test")
+    clock.now = 1000
+    start = section.start()
+    clock.now = 1250
+    section.stop(start)
+    assert section.stats() == (1, 250, 250, 250, 250)
+
+
+def test_disabled_profiler_does_nothing(profiler):
+    original = AnalogueReader._sample_adc
+    assert profiler.section("draw") is NULL_SECTION
+    assert profiler.sections == {}
+    assert AnalogueReader._sample_adc is original
+    assert EuroPiScript.profile_section("draw") is NULL_SECTION
+
+
+def test_enable_instruments_hot_paths(profiler, clock):
+    profiler.enable(capacity=8)
+
+    class Reader(AnalogueReader):
+        def __init__(self):
+            pass
+
+    def slow_sample(reader, samples=None):
+        clock.now += 40
+        return 0
+
+    # the instrumented method wraps whatever was there when the profiler was enabled
+    AnalogueReader._sample_adc = europi_profiler.timed(slow_sample, profiler.section(SECTION_ADC))
+    Reader()._sample_adc()
+    assert profiler.sections[SECTION_ADC].stats() == (1, 40, 40, 40, 40)
+    assert SECTION_INPUT_HANDLER in profiler.sections
+    assert profiler.sections[SECTION_ADC].capacity == 8
+
+
+def test_instrument_display(profiler, clock):
+    class Display:
+        def show(self, full_refresh=False):
+            clock.now += 900 if full_refresh else 300
+
+    oled = Display()
+    profiler.instrument_display(oled)
+    oled.show()
+    assert profiler.sections == {}
+
+    profiler.enable()
+    profiler.instrument_display(oled)
+    oled.show()
+    oled.show(full_refresh=True)
+    (count, lo, mean, hi, p99) = profiler.sections[SECTION_OLED_SHOW].stats()
+    assert (count, lo, hi) == (2, 300, 900)
+
+
+def test_dump(profiler, tmp_path, capsys):
+    profiler.enable()
+    profiler.section("update").record(10)
+    profiler.section("update").record(30)
+    profiler.section("unused")
+
+    profiler.dump()
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert lines[1].split() == ["update", "2", "10", "20.0", "30", "30"]
+
+    filename = tmp_path / "profile.txt"
+    profiler.dump(str(filename))
+    assert filename.read_text().splitlines() == lines
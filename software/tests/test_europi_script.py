@@ -96,3 +96,20 @@ def test_load_config_defaults(script_for_testing_with_config):
 
 def test_load_europi_config(script_for_testing_with_config):
     assert script_for_testing_with_config.europi_config.PICO_MODEL == "pico"
+
+
+def test_save_load_state_struct(script_for_testing):
+    from array import array
+
+    script_for_testing.save_state_struct({"bank": 2, "steps": array("H", [0, 100, 65535])})
+    script_for_testing.save_state_struct({"bank": 3})
+    state = script_for_testing.load_state_struct()
+    assert state["bank"] == 3
+    assert state["steps"] == array("H", [0, 100, 65535])
+
+
+def test_load_state_struct_migrates_json(script_for_testing):
+    script_for_testing.save_state_json({"one": 1, "two": ["a", "bb"]})
+    assert script_for_testing.load_state_struct() == {"one": 1, "two": ["a", "bb"]}
+    assert script_for_testing.load_state_json() == {}
+    assert script_for_testing.load_state_struct() == {"one": 1, "two": ["a", "bb"]}
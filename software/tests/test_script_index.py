@@ -0,0 +1,97 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import io
+import sys
+from pathlib import Path
+
+import pytest
+import utime
+
+from script_index import (
+    FLAG_WIFI,
+    ScriptIndex,
+    load_menu_index,
+    write_script_index,
+)
+
+SCRIPTS = {
+    "Hello": "contrib.hello_world.HelloWorld",
+    "HTTP Interface": "contrib.http_control.HttpControl",
+    "_About": "tools.about.About",
+}
+FLAGS = {"HTTP Interface": [FLAG_WIFI]}
+
+INDEX_FILE = Path(__file__).parent.parent / "contrib" / "menu_index.txt"
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    filename = tmp_path / "menu_index.txt"
+    with open(filename, "w") as file:
+        write_script_index(file, SCRIPTS, FLAGS)
+    return str(filename)
+
+
+def test_round_trip(index_file):
+    index = ScriptIndex(index_file)
+
+    assert index.keys() == list(SCRIPTS.keys())
+    assert len(index) == 3
+    for name, class_name in SCRIPTS.items():
+        assert name in index
+        assert index[name] == class_name
+    assert index.flags("HTTP Interface") == [FLAG_WIFI]
+    assert index.flags("Hello") == []
+
+
+def test_exclude_flags(index_file):
+    index = ScriptIndex(index_file, exclude_flags=(FLAG_WIFI,))
+
+    assert "HTTP Interface" not in index
+    with pytest.raises(KeyError):
+        index["HTTP Interface"]
+
+
+def test_invalid_name():
+    with pytest.raises(ValueError):
+        write_script_index(io.StringIO(), {"bad\tname": "contrib.spam.Eggs"})
+
+
+def test_missing_index(tmp_path):
+    assert load_menu_index(str(tmp_path / "missing.txt")) is None
+
+
+def test_load_menu_index_excludes_wifi(index_file):
+    # the default configuration is a Pico without wifi
+    index = load_menu_index(index_file)
+    assert index.keys() == ["Hello", "_About"]
+
+
+@pytest.fixture
+def mock_time_module(monkeypatch):
+    monkeypatch.setitem(sys.modules, "time", utime)
+
+
+def test_menu_index_is_up_to_date(mock_time_module):
+    """The committed index must match contrib/menu.py; run scripts/generate_script_index.py"""
+    from contrib.menu import EUROPI_SCRIPTS, WIFI_SCRIPTS
+
+    index = ScriptIndex(str(INDEX_FILE))
+    expected = dict(EUROPI_SCRIPTS)
+    expected.update(WIFI_SCRIPTS)
+
+    assert sorted(index.keys()) == sorted(expected.keys())
+    for name, class_name in expected.items():
+        assert index[name] == class_name
+        assert (FLAG_WIFI in index.flags(name)) == (name in WIFI_SCRIPTS)
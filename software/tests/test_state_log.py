@@ -0,0 +1,93 @@
+# Copyright 2025 Allen Synthesis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+from array import array
+
+from state_log import StateLog, ARRAY_TYPECODES, MAGIC
+
+
+@pytest.fixture
+def log(tmp_path):
+    return StateLog(str(tmp_path / "state.bin"))
+
+
+def test_missing_file_is_empty(log):
+    assert not log.exists()
+    assert log.load() == {}
+
+
+def test_round_trip(log):
+    state = {
+        "none": None,
+        "flag": True,
+        "count": -123456789012,
+        "ratio": 0.25,
+        "name": "Héllo",
+        "raw": b"\x00\xff",
+        "levels": array("f", [0.5, -1.0, 2.0]),
+        "steps": array("h", [-1, 0, 1]),
+        "nested": {"a": [1, 2, 3]},
+    }
+    log.write(state)
+    assert log.load() == state
+
+
+@pytest.mark.parametrize("typecode", ARRAY_TYPECODES.decode())
+def test_array_round_trip(log, typecode):
+    values = array(typecode, [0, 1, 2, 3] if typecode in "BHILQ" else [-2, -1, 0, 1])
+    log.write({"a": values, "n": 7, "x": 1.5})
+    assert StateLog(log.filename).load() == {"a": values, "n": 7, "x": 1.5}
+    assert type(StateLog(log.filename).load()["a"]) is array
+
+
+def test_updates_replace_earlier_values(log):
+    log.write({"a": 1, "b": 2})
+    log.write({"b": 3})
+    assert log.load() == {"a": 1, "b": 3}
+
+
+def test_uncommitted_records_are_ignored(log):
+    log.write({"a": 1})
+    committed = log.size()
+    log.write({"a": 2, "b": array("B", range(32))})
+
+    # simulate losing power part-way through the second save
+    with open(log.filename, "rb+") as file:
+        file.truncate(committed + 10)
+
+    assert log.load() == {"a": 1}
+
+    # the next save discards the incomplete records before appending
+    fresh = StateLog(log.filename)
+    fresh.write({"c": 3})
+    assert fresh.load() == {"a": 1, "c": 3}
+
+
+def test_compaction(log):
+    log.compact_size = 256
+    for i in range(100):
+        log.write({"i": i, "const": "x"})
+    assert log.size() <= 256
+    assert log.load() == {"i": 99, "const": "x"}
+
+
+def test_bad_file_is_replaced(log):
+    with open(log.filename, "wb") as file:
+        file.write(b"not a log")
+    assert log.load() == {}
+    log.write({"a": 1})
+    assert log.load() == {"a": 1}
+    with open(log.filename, "rb") as file:
+        assert file.read(len(MAGIC)) == MAGIC
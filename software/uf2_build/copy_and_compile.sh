@@ -10,6 +10,9 @@ cp -r europi/software/firmware/experimental/*.py /micropython/ports/rp2/modules/
 cp -r europi/software/firmware/tools/*.py /micropython/ports/rp2/modules/tools
 cp -r europi/software/contrib/*.py /micropython/ports/rp2/modules/contrib
 
+echo "Freezing web assets..."
+python3 europi/scripts/build_web_assets.py --freeze /micropython/ports/rp2/modules/contrib europi/software/contrib/www
+
 echo "Compiling micropython and firmware modules..."
 cd /micropython/ports/rp2
 